@@ -11,6 +11,12 @@ from flask_migrate import Migrate
 from datetime import datetime
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
+import pandas as pd
+
+# Copy-on-write do pandas: DataFrames cacheados são compartilhados entre
+# requisições sem cópias profundas; qualquer escrita do chamador copia
+# apenas as colunas alteradas, sem afetar o cache.
+pd.set_option('mode.copy_on_write', True)
 
 # Configuração robusta para SQLite em ambientes concorrentes
 @event.listens_for(Engine, "connect")
@@ -318,9 +324,31 @@ def create_app():
     # Inicializa configurações de fases de projetos
     initialize_phase_configurations()
 
+    # Pré-calcula em segundo plano os caches das páginas mais pesadas
+    iniciar_aquecimento(app)
+
     return app
 
 # --- Funções Auxiliares ---
+def iniciar_aquecimento(app):
+    """Registra as tarefas de aquecimento de caches e inicia o agendador em segundo plano."""
+    if app.config.get('TESTING'):
+        return
+    try:
+        from .utils.agendador import AGENDADOR
+        from .macro import macro_service
+        from .gerencial.routes import gerencial_service
+
+        AGENDADOR.registrar('macro_dashboard', macro_service.obter_kpis_dashboard,
+                            'Snapshot do dadosr.csv e KPIs do dashboard macro')
+        AGENDADOR.registrar('macro_apresentacao', macro_service.aquecer_apresentacao,
+                            'Fontes mensais recentes e cubos da apresentação')
+        AGENDADOR.registrar('gerencial_dashboard', gerencial_service.obter_dashboard,
+                            'Dashboard gerencial sem filtros')
+        AGENDADOR.iniciar(app)
+    except Exception as e:
+        app.logger.error(f"❌ Erro ao iniciar o aquecimento de caches: {e}", exc_info=True)
+
 def check_templates(app):
     """Verifica a existência de arquivos de template essenciais."""
     app.logger.info("Verificando templates essenciais...")
@@ -8,6 +8,9 @@ from pathlib import Path
 import json
 import pytz
 from ..utils.decorators import admin_required
+from ..utils.data_version import incrementar_versao_dados
+from ..utils.data_diff import diff_arquivos, registrar_diff_aplicado
+from ..utils.agendador import AGENDADOR
 
 # Define o fuso horário brasileiro
 br_timezone = pytz.timezone('America/Sao_Paulo')
@@ -366,9 +369,9 @@ def manage_record(record_id):
             return jsonify(updated_record)
         
         elif request.method == 'DELETE':
-            AdminService.delete_record(record_id)
-            current_app.logger.info(f"Registro {record_id} deletado via admin")
-            return jsonify({'success': True})
+            result = AdminService.delete_record(record_id)
+            current_app.logger.info(f"Registro {record_id} deletado via admin (cópia de trabalho)")
+            return jsonify(result)
     
     except Exception as e:
         current_app.logger.error(f"Erro ao gerenciar registro {record_id}: {str(e)}")
@@ -411,6 +414,40 @@ def apply_changes():
         current_app.logger.error(f"Erro ao aplicar alterações: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/api/data/staging')
+def staging_status():
+    """Situação da cópia de trabalho (alterações pendentes de publicação)"""
+    try:
+        return jsonify(AdminService.get_staging_status())
+    
+    except Exception as e:
+        current_app.logger.error(f"Erro ao consultar cópia de trabalho: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/api/data/publish', methods=['POST'])
+def publish_changes():
+    """Publica as alterações da cópia de trabalho no dadosr.csv"""
+    try:
+        result = AdminService.publish_data_changes()
+        status_code = 200 if result.get('success') else 409
+        return jsonify(result), status_code
+    
+    except Exception as e:
+        current_app.logger.error(f"Erro ao publicar alterações: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/api/data/discard', methods=['POST'])
+def discard_changes():
+    """Descarta as alterações pendentes da cópia de trabalho"""
+    try:
+        result = AdminService.discard_data_changes()
+        current_app.logger.info(f"Alterações descartadas via admin: {result.get('discarded', 0)}")
+        return jsonify(result)
+    
+    except Exception as e:
+        current_app.logger.error(f"Erro ao descartar alterações: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @admin_bp.route('/api/data/apply-upload', methods=['POST'])
 def apply_upload():
     """Aplica arquivo temporário como dados principais"""
@@ -421,25 +458,53 @@ def apply_upload():
         if not temp_path.exists():
             return jsonify({'error': 'Arquivo temporário não encontrado'}), 400
         
+        from ..macro.services import invalidar_caches_por_diff, versao_resultados_atual
+        
+        # Diff contra o arquivo atual (normalmente já calculado no upload)
+        try:
+            diff = diff_arquivos(main_path, temp_path)
+        except Exception as e:
+            current_app.logger.warning(f"Diff do upload indisponível, invalidando todos os caches: {str(e)}")
+            diff = None
+        versao_anterior = versao_resultados_atual()
+        
         # Cria backup do arquivo atual
         backup_result = AdminService.create_data_backup()
         
         # Move o arquivo temporário para o principal
         import shutil
         shutil.move(str(temp_path), str(main_path))
+        incrementar_versao_dados("upload de CSV")
+        
+        # Sem diff, a nova versão dos dados já invalida todos os caches
+        invalidacao = invalidar_caches_por_diff(diff, versao_anterior) if diff else None
+        if diff:
+            registrar_diff_aplicado(diff)
         
         current_app.logger.info("Arquivo CSV atualizado via upload")
         
         return jsonify({
             'success': True,
             'message': 'Dados atualizados com sucesso!',
-            'backup_created': backup_result.get('filename', '')
+            'backup_created': backup_result.get('filename', ''),
+            'diff': diff['resumo'] if diff else None,
+            'invalidacao': invalidacao
         })
     
     except Exception as e:
         current_app.logger.error(f"Erro ao aplicar upload: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/api/data/diff')
+def upload_diff():
+    """Diff por projeto (Numero) entre os dados atuais e o upload pendente ou o último aplicado"""
+    try:
+        return jsonify(AdminService.get_upload_diff())
+    
+    except Exception as e:
+        current_app.logger.error(f"Erro ao calcular diff do upload: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @admin_bp.route('/api/data/test')
 def test_data_loading():
     """Endpoint de teste para verificar carregamento de dados"""
@@ -469,6 +534,31 @@ def test_data_loading():
             'preview_test': 'ERRO'
         }), 500
 
+@admin_bp.route('/api/aquecimento/status')
+def warmup_status():
+    """Situação do aquecimento de caches em segundo plano (tarefas, execuções e durações)"""
+    try:
+        return jsonify(AGENDADOR.status())
+    
+    except Exception as e:
+        current_app.logger.error(f"Erro ao consultar aquecimento de caches: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/api/aquecimento/executar', methods=['POST'])
+def warmup_run():
+    """Agenda a execução imediata de uma tarefa de aquecimento (ou de todas)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        nome = data.get('tarefa')
+        agendadas = AGENDADOR.agendar(nome)
+        if nome and not agendadas:
+            return jsonify({'error': f"Tarefa '{nome}' não encontrada ou desativada"}), 404
+        return jsonify({'success': True, 'agendadas': agendadas})
+    
+    except Exception as e:
+        current_app.logger.error(f"Erro ao agendar aquecimento de caches: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 # --- ROTAS PARA CONFIGURAÇÕES DE ESPECIALISTAS ---
 
 @admin_bp.route('/specialist-configuration')
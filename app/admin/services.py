@@ -10,6 +10,7 @@ import json
 import pandas as pd
 import os
 import shutil
+from ..utils.data_diff import diff_arquivos, obter_ultimo_diff_aplicado, registrar_diff_aplicado
 from pathlib import Path
 import csv
 import re
@@ -17,6 +18,9 @@ import logging
 # import chardet  # Temporariamente comentado
 from io import StringIO
 import pytz
+from ..utils.data_version import incrementar_versao_dados
+from ..utils.file_info import detectar_formato, ler_csv_detectado
+from . import staging
 
 # Define o fuso horário brasileiro
 br_timezone = pytz.timezone('America/Sao_Paulo')
@@ -178,20 +182,8 @@ class AdminService:
                     'columns': []
                 }
             
-            # Tenta diferentes encodings para ler o CSV (CP1252 primeiro - arquivo atual)
-            df = None
-            encodings = ['cp1252', 'utf-8', 'latin1', 'iso-8859-1']
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_path, sep=';', encoding=encoding)
-                    print(f"Estatísticas carregadas com encoding: {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    continue
-                except Exception as e:
-                    print(f"Erro com encoding {encoding}: {str(e)}")
-                    continue
+            # Encoding/separador detectados uma vez por versão do arquivo
+            df, _ = ler_csv_detectado(csv_path)
             
             if df is None:
                 return {
@@ -226,34 +218,11 @@ class AdminService:
     
     @staticmethod
     def detect_file_info(file_path):
-        """Detecta informações do arquivo CSV: encoding, separador e encoding válido"""
-        encodings = ['cp1252', 'utf-8', 'latin1', 'iso-8859-1', 'utf-16']
-        separators = [';', ',', '\t', '|']
-        
-        # Detectar encoding usando chardet (temporariamente comentado)
-        # with open(file_path, 'rb') as f:
-        #     raw_data = f.read()
-        #     detected = chardet.detect(raw_data)
-        #     detected_encoding = detected.get('encoding', 'utf-8')
-        #     if detected_encoding not in encodings:
-        #         encodings.insert(0, detected_encoding)
-        
-        # Testar diferentes combinações de encoding e separador
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    first_line = f.readline()
-                    second_line = f.readline()
-                
-                # Testar separadores
-                for sep in separators:
-                    if first_line.count(sep) >= 5:  # Assumindo pelo menos 6 colunas
-                        columns = first_line.strip().split(sep)
-                        if len(columns) >= 6:
-                            return encoding, sep, len(columns)
-                            
-            except (UnicodeDecodeError, Exception):
-                continue
+        """Detecta informações do arquivo CSV: encoding, separador e número de colunas"""
+        # Amostra limitada, com resultado registrado por (arquivo, mtime, tamanho)
+        formato = detectar_formato(file_path, ('cp1252', 'utf-8', 'latin1', 'iso-8859-1', 'utf-16'))
+        if formato is not None and formato.separador:
+            return formato.encoding, formato.separador, formato.num_colunas
         
         # Fallback: latin1 com ';' (padrão ITSM brasileiro)
         return 'latin1', ';', 0
@@ -306,6 +275,13 @@ class AdminService:
                 date_format='%d/%m/%Y %H:%M'
             )
             
+            # Diff por Numero contra o arquivo atual (fica em cache para a API e o apply)
+            try:
+                diff_resumo = diff_arquivos(current_file, temp_file)['resumo']
+            except Exception as e:
+                logging.warning(f"Não foi possível calcular o diff do upload: {str(e)}")
+                diff_resumo = None
+            
             # Estatísticas
             stats = {
                 'records_count': len(df),
@@ -353,6 +329,7 @@ class AdminService:
                 'success': True,
                 'message': f'Arquivo processado com sucesso! {stats["records_count"]} registros carregados.',
                 'stats': stats,
+                'diff': diff_resumo,
                 'data_preview': cleaned_preview
             }
             
@@ -364,6 +341,24 @@ class AdminService:
                 'stats': None
             }
 
+    @staticmethod
+    def get_upload_diff():
+        """
+        Retorna o diff entre o dadosr.csv atual e o upload pendente (dadosr_temp.csv).
+        Sem upload pendente, retorna o diff do último upload aplicado.
+        """
+        current_file = 'data/dadosr.csv'
+        temp_file = 'data/dadosr_temp.csv'
+        
+        if os.path.exists(temp_file):
+            return dict(diff_arquivos(current_file, temp_file), pendente=True)
+        
+        ultimo = obter_ultimo_diff_aplicado()
+        if ultimo is not None:
+            return dict(ultimo, pendente=False)
+        
+        return {'pendente': False, 'disponivel': False, 'message': 'Nenhum upload pendente ou aplicado'}
+
     @staticmethod
     def apply_automatic_corrections(df):
         """Aplica correções automáticas nos dados"""
@@ -634,82 +629,34 @@ class AdminService:
                 'identified_columns': found_columns
             }
     
+    @staticmethod
+    def _formatar_registro(record_id, valores):
+        """Registro para o JSON da tela de gerenciamento (valores em texto, nulos como '')"""
+        record = dict(valores, _id=record_id)
+        for key, value in record.items():
+            if value is None or pd.isna(value):
+                record[key] = ''
+            else:
+                record[key] = str(value)
+        return record
+    
     @staticmethod
     def get_data_preview(page=1, per_page=50, search=''):
-        """Retorna preview paginado dos dados"""
+        """Retorna preview paginado da cópia de trabalho (staging) dos dados"""
         try:
-            csv_path = Path("data/dadosr.csv")
-            
-            # Tenta diferentes encodings (CP1252 primeiro - arquivo atual)
-            df = None
-            working_encoding = None
-            encodings = ['cp1252', 'utf-8', 'latin1', 'iso-8859-1']
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_path, sep=';', encoding=encoding)
-                    working_encoding = encoding
-                    break
-                except UnicodeDecodeError:
-                    continue
-                except Exception:
-                    continue
-            
-            if df is None:
-                return {
-                    'data': [],
-                    'total': 0,
-                    'page': 1,
-                    'per_page': per_page,
-                    'total_pages': 0,
-                    'error': 'Não foi possível ler o arquivo CSV'
-                }
-            
-            # Log do encoding usado para leitura
-            try:
-                from flask import current_app
-                current_app.logger.info(f"📖 Preview carregado com encoding: {working_encoding}")
-            except:
-                pass
+            start = (page - 1) * per_page
             
-            # Garantir que as datas sejam parseadas corretamente para exibição
-            date_columns = ['DataInicio', 'DataTermino', 'VencimentoEm', 'UltimaInteracao']
-            for col in date_columns:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], format='%d/%m/%Y %H:%M', errors='coerce')
-
-            # Filtro de busca e manutenção dos índices originais
             if search:
-                search_term = search.lower()
-                mask = df.astype(str).apply(lambda x: x.str.contains(search_term, case=False, na=False)).any(axis=1)
-                # Mantém os índices originais antes de filtrar
-                df_filtered = df[mask].copy()
-                df_filtered['_original_index'] = df[mask].index
+                # Índice de busca por prefixo, sem acentos; o _id é a posição original no arquivo publicado
+                total, df_page = staging.buscar(search, start, per_page)
             else:
-                df_filtered = df.copy()
-                df_filtered['_original_index'] = df.index
+                # Sem busca, a página sai direto do SQLite (LIMIT/OFFSET)
+                total, df_page = staging.consultar_pagina(start, per_page)
             
-            # Paginação
-            total = len(df_filtered)
-            start = (page - 1) * per_page
-            end = start + per_page
-            
-            data = df_filtered.iloc[start:end].to_dict('records')
-            
-            # Adiciona ID único para cada registro usando o índice original do arquivo
-            for record in data:
-                # CORREÇÃO CRÍTICA: usa o índice original do arquivo, não da página
-                record['_id'] = record['_original_index']
-                # Remove o campo auxiliar
-                record.pop('_original_index', None)
-                # Limpa valores NaN e None que podem causar problemas no JSON
-                for key, value in record.items():
-                    if pd.isna(value) or value is None:
-                        record[key] = ''
-                    elif isinstance(value, float) and pd.isna(value):
-                        record[key] = ''
-                    else:
-                        record[key] = str(value)
+            data = [
+                AdminService._formatar_registro(record_id, row)
+                for record_id, row in zip(df_page.index, df_page.to_dict('records'))
+            ]
             
             return {
                 'data': data,
@@ -731,138 +678,121 @@ class AdminService:
     
     @staticmethod
     def get_record_by_id(record_id):
-        """Retorna um registro específico por ID"""
+        """Retorna um registro específico da cópia de trabalho por ID"""
         try:
-            csv_path = Path("data/dadosr.csv")
-            
-            # Tenta diferentes encodings (CP1252 primeiro - arquivo atual)
-            df = None
-            encodings = ['cp1252', 'utf-8', 'latin1', 'iso-8859-1']
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_path, sep=';', encoding=encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-                except Exception:
-                    continue
-            
-            if df is None:
-                return {'error': 'Não foi possível ler o arquivo CSV'}
-            
-            if record_id >= len(df):
+            record = staging.obter_registro(record_id)
+            if record is None:
                 return {'error': 'Registro não encontrado'}
             
-            record = df.iloc[record_id].to_dict()
-            record['_id'] = record_id
-            
-            # Limpa valores problemáticos
-            for key, value in record.items():
-                if pd.isna(value) or value is None:
-                    record[key] = ''
-                else:
-                    record[key] = str(value)
-            
-            return record
+            return AdminService._formatar_registro(record_id, record)
             
         except Exception as e:
             return {'error': str(e)}
     
     @staticmethod
     def update_record(record_id, data):
-        """Atualiza um registro específico"""
+        """Atualiza um registro na cópia de trabalho (UPDATE de uma linha; publicado depois)"""
         try:
-            csv_path = Path("data/dadosr.csv")
-            
-            # Tenta diferentes encodings para ler e salva no mesmo encoding (CP1252 primeiro - arquivo atual)
-            df = None
-            working_encoding = None
-            encodings = ['cp1252', 'utf-8', 'latin1', 'iso-8859-1']
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_path, sep=';', encoding=encoding)
-                    working_encoding = encoding
-                    break
-                except UnicodeDecodeError:
-                    continue
-                except Exception:
-                    continue
-            
-            if df is None:
-                return {'error': 'Não foi possível ler o arquivo CSV'}
-            
-            if record_id >= len(df):
-                return {'error': 'Registro não encontrado'}
-            
             # Remove campos de controle
-            data.pop('_id', None)
-            
-            # Atualiza o registro
-            for key, value in data.items():
-                if key in df.columns:
-                    df.iloc[record_id, df.columns.get_loc(key)] = value
+            data = {key: value for key, value in data.items() if key != '_id'}
             
-            # Salva no mesmo encoding que foi lido
-            df.to_csv(csv_path, sep=';', index=False, encoding=working_encoding)
+            if not staging.atualizar_registro(record_id, data):
+                return {'error': 'Registro não encontrado'}
             
-            # Log da atualização
-            from flask import current_app
-            current_app.logger.info(f"✅ Registro {record_id} atualizado com sucesso. Encoding: {working_encoding}")
+            situacao = staging.status()
+            current_app.logger.info(f"✅ Registro {record_id} atualizado na cópia de trabalho "
+                                    f"({situacao['pendentes']} alterações pendentes de publicação)")
             
-            # Teste de verificação imediata - lê novamente para confirmar que salvou corretamente
-            try:
-                df_test = pd.read_csv(csv_path, sep=';', encoding=working_encoding)
-                if record_id < len(df_test):
-                    current_app.logger.info(f"✅ Verificação: Dados salvos e lidos corretamente")
-                else:
-                    current_app.logger.warning(f"⚠️ Verificação: Registro não encontrado após salvar")
-            except Exception as e:
-                current_app.logger.error(f"❌ Verificação: Erro ao ler arquivo após salvar: {str(e)}")
-            
-            return {'success': True, 'record_id': record_id, 'encoding_used': working_encoding}
+            return {
+                'success': True,
+                'record_id': record_id,
+                'encoding_used': situacao['encoding'],
+                'pending_changes': situacao['pendentes']
+            }
             
         except Exception as e:
             return {'error': str(e)}
     
     @staticmethod
     def delete_record(record_id):
-        """Deleta um registro específico"""
+        """Deleta um registro da cópia de trabalho (publicado depois)"""
         try:
-            csv_path = Path("data/dadosr.csv")
+            if not staging.excluir_registro(record_id):
+                return {'error': 'Registro não encontrado'}
             
-            # Tenta diferentes encodings para ler e salva no mesmo encoding (CP1252 primeiro - arquivo atual)
-            df = None
-            working_encoding = None
-            encodings = ['cp1252', 'utf-8', 'latin1', 'iso-8859-1']
+            return {'success': True, 'pending_changes': staging.status()['pendentes']}
             
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_path, sep=';', encoding=encoding)
-                    working_encoding = encoding
-                    break
-                except UnicodeDecodeError:
-                    continue
-                except Exception:
-                    continue
+        except Exception as e:
+            return {'error': str(e)}
+    
+    @staticmethod
+    def get_staging_status():
+        """Situação da cópia de trabalho: registros, alterações pendentes e conflito com o arquivo publicado"""
+        try:
+            return staging.status()
+        except Exception as e:
+            return {'error': str(e)}
+    
+    @staticmethod
+    def discard_data_changes():
+        """Descarta as alterações pendentes da cópia de trabalho"""
+        try:
+            return {'success': True, 'discarded': staging.descartar()}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    @staticmethod
+    def publish_data_changes():
+        """
+        Publica a cópia de trabalho: grava o dadosr.csv uma única vez com todas as
+        alterações pendentes, com backup, diff e invalidação dos caches afetados
+        """
+        from ..macro.services import invalidar_caches_por_diff, versao_resultados_atual
+        from ..utils.ingestion import carregar_dados_normalizados
+        
+        main_path = staging.CSV_PATH
+        temp_path = main_path.with_name('dadosr_publicacao.csv')
+        try:
+            exportado = staging.exportar_csv(temp_path)
+            if exportado['pendentes'] == 0:
+                temp_path.unlink()
+                return {'success': True, 'published': 0, 'message': 'Nenhuma alteração pendente'}
             
-            if df is None:
-                return {'error': 'Não foi possível ler o arquivo CSV'}
+            try:
+                diff = diff_arquivos(main_path, temp_path)
+            except Exception as e:
+                current_app.logger.warning(f"Diff da publicação indisponível, invalidando todos os caches: {str(e)}")
+                diff = None
+            versao_anterior = versao_resultados_atual()
             
-            if record_id >= len(df):
-                return {'error': 'Registro não encontrado'}
+            backup_result = AdminService.create_data_backup()
+            os.replace(temp_path, main_path)
+            staging.confirmar_publicacao()
+            incrementar_versao_dados(f"publicação de {exportado['pendentes']} alterações do admin")
             
-            # Remove o registro
-            df = df.drop(df.index[record_id])
+            invalidacao = invalidar_caches_por_diff(diff, versao_anterior) if diff else None
+            if diff:
+                registrar_diff_aplicado(diff)
             
-            # Salva no mesmo encoding que foi lido
-            df.to_csv(csv_path, sep=';', index=False, encoding=working_encoding)
+            # Materializa o snapshot normalizado da nova versão uma única vez
+            carregar_dados_normalizados(main_path)
             
-            return {'success': True}
+            current_app.logger.info(f"📤 {exportado['pendentes']} alterações publicadas em {main_path.name} "
+                                    f"({exportado['registros']} registros)")
+            return {
+                'success': True,
+                'published': exportado['pendentes'],
+                'total_records': exportado['registros'],
+                'backup_created': backup_result.get('filename', ''),
+                'diff': diff['resumo'] if diff else None,
+                'invalidacao': invalidacao
+            }
             
         except Exception as e:
-            return {'error': str(e)}
+            if temp_path.exists():
+                temp_path.unlink()
+            current_app.logger.error(f"Erro ao publicar alterações: {str(e)}")
+            return {'success': False, 'error': str(e)}
     
     @staticmethod
     def create_data_backup():
@@ -937,31 +867,15 @@ class AdminService:
     
     @staticmethod
     def apply_data_changes(changes_data):
-        """Aplica todas as alterações pendentes"""
+        """Aplica um lote de alterações na cópia de trabalho, numa única transação"""
         try:
-            # Cria backup antes das alterações
-            backup_result = AdminService.create_data_backup()
-            
-            affected_records = 0
-            errors = []
-            
-            # Processa cada alteração
-            for change in changes_data.get('changes', []):
-                try:
-                    if change['type'] == 'update':
-                        AdminService.update_record(change['record_id'], change['data'])
-                        affected_records += 1
-                    elif change['type'] == 'delete':
-                        AdminService.delete_record(change['record_id'])
-                        affected_records += 1
-                except Exception as e:
-                    errors.append(f"Erro no registro {change.get('record_id', 'N/A')}: {str(e)}")
+            affected_records, errors = staging.aplicar_alteracoes(changes_data.get('changes', []))
             
             return {
                 'success': len(errors) == 0,
                 'affected_records': affected_records,
                 'errors': errors,
-                'backup_created': backup_result.get('filename', '')
+                'pending_changes': staging.status()['pendentes']
             }
             
         except Exception as e:
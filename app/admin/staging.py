@@ -0,0 +1,390 @@
+"""
+Cópia de trabalho (staging) do dadosr.csv para o gerenciamento de dados do admin.
+
+As edições da tela de gerenciamento de dados são gravadas numa tabela SQLite
+indexada pelo ``_id`` (posição da linha no CSV quando a cópia foi carregada),
+com UPDATE/DELETE por linha dentro de transações. O CSV só é regravado no passo
+explícito de publicação, uma única vez para todas as edições pendentes.
+
+Os valores são mantidos como texto, exatamente como estão no arquivo, para que
+a publicação não altere as colunas que não foram editadas.
+
+A busca do preview usa um índice invertido (FTS5 do SQLite) com o texto de cada
+registro em minúsculas e sem acentos, mantido junto com as edições. Cada termo
+buscado é tratado como prefixo de palavra e todos precisam estar no registro;
+o custo é proporcional aos registros encontrados, não ao tamanho da tabela.
+Sem FTS5 no SQLite, o índice vira uma coluna de texto normalizado com LIKE.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+
+import pandas as pd
+
+from ..utils.data_version import DATA_DIR, assinatura_arquivo
+from ..utils.file_info import FormatoArquivo, detectar_formato, ler_csv_detectado, registrar_formato
+
+logger = logging.getLogger(__name__)
+
+CSV_PATH = DATA_DIR / 'dadosr.csv'
+STAGING_DB = DATA_DIR / '.staging' / 'dadosr_staging.db'
+
+# Incrementar quando as tabelas auxiliares ou o meta mudarem (2: índice de busca; 3: separador)
+STAGING_SCHEMA_VERSION = 3
+
+SEPARADOR_PADRAO = ';'
+
+_TERMO = re.compile(r'\w+')
+
+_lock = threading.Lock()
+_fts5 = {}
+
+
+def _q(nome):
+    """Identificador SQL entre aspas (os cabeçalhos do ITSM têm espaços e acentos)."""
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+def _conectar():
+    STAGING_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(STAGING_DB), timeout=10)
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+def _ler_meta(conn):
+    try:
+        return {chave: json.loads(valor) for chave, valor in conn.execute('SELECT chave, valor FROM meta')}
+    except sqlite3.OperationalError:
+        return {}
+
+
+def _dobrar(texto):
+    """Minúsculas sem acentos ('Migração' -> 'migracao')."""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def _texto_busca(valores):
+    """Termos normalizados do registro, separados e precedidos por espaço (prefixo de palavra no LIKE)."""
+    return ' ' + ' '.join(_TERMO.findall(_dobrar(' '.join(v for v in valores if v))))
+
+
+def _fts5_disponivel(conn):
+    if 'ok' not in _fts5:
+        try:
+            conn.execute('CREATE VIRTUAL TABLE temp._teste_fts5 USING fts5(texto)')
+            conn.execute('DROP TABLE temp._teste_fts5')
+            _fts5['ok'] = True
+        except sqlite3.OperationalError:
+            logger.warning("⚠️ SQLite sem FTS5: busca do admin usará LIKE sobre o texto normalizado")
+            _fts5['ok'] = False
+    return _fts5['ok']
+
+
+def _criar_indice_busca(conn, colunas):
+    """(Re)constrói o índice de busca a partir da tabela de registros."""
+    tipo = 'fts5' if _fts5_disponivel(conn) else 'like'
+    conn.execute('DROP TABLE IF EXISTS busca')
+    if tipo == 'fts5':
+        conn.execute("CREATE VIRTUAL TABLE busca USING fts5(texto, tokenize='unicode61 remove_diacritics 2')")
+    else:
+        conn.execute('CREATE TABLE busca (rowid INTEGER PRIMARY KEY, texto TEXT)')
+    linhas = conn.execute(f"SELECT _id, {', '.join(_q(c) for c in colunas)} FROM registros")
+    conn.executemany('INSERT INTO busca (rowid, texto) VALUES (?, ?)',
+                     ((linha[0], _texto_busca(linha[1:])) for linha in linhas))
+    return tipo
+
+
+def _gravar_meta(conn, valores):
+    conn.executemany('INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)',
+                     [(chave, json.dumps(valor)) for chave, valor in valores.items()])
+
+
+def _contar_pendentes(conn):
+    return conn.execute('SELECT COUNT(*) FROM alteracoes').fetchone()[0]
+
+
+def _recriar(conn):
+    """Recarrega a cópia de trabalho a partir do CSV publicado."""
+    inicio = datetime.now()
+    dados, formato = ler_csv_detectado(CSV_PATH, separador_padrao=SEPARADOR_PADRAO, dtype=str, keep_default_na=False)
+    if dados is None:
+        raise ValueError('Não foi possível ler o arquivo CSV')
+
+    colunas = list(dados.columns)
+    with conn:
+        conn.execute('DROP TABLE IF EXISTS registros')
+        conn.execute('DROP TABLE IF EXISTS alteracoes')
+        conn.execute('DROP TABLE IF EXISTS meta')
+        conn.execute(f"CREATE TABLE registros (_id INTEGER PRIMARY KEY, {', '.join(f'{_q(c)} TEXT' for c in colunas)})")
+        if colunas:
+            # Busca por número do projeto sem varrer a tabela
+            conn.execute(f'CREATE INDEX idx_registros_numero ON registros ({_q(colunas[0])})')
+        conn.execute('CREATE TABLE alteracoes (id INTEGER PRIMARY KEY AUTOINCREMENT, registro INTEGER, '
+                     'tipo TEXT, campos TEXT, em TEXT)')
+        conn.execute('CREATE TABLE meta (chave TEXT PRIMARY KEY, valor TEXT)')
+        conn.executemany(
+            f"INSERT INTO registros (_id, {', '.join(_q(c) for c in colunas)}) VALUES ({', '.join('?' * (len(colunas) + 1))})",
+            ((i, *linha) for i, linha in enumerate(dados.itertuples(index=False, name=None)))
+        )
+        meta = {
+            'colunas': colunas,
+            'encoding': formato.encoding,
+            'separador': formato.separador or SEPARADOR_PADRAO,
+            'origem': list(assinatura_arquivo(CSV_PATH) or ()),
+            'carregado_em': datetime.now().isoformat(),
+            'busca': _criar_indice_busca(conn, colunas),
+            'schema': STAGING_SCHEMA_VERSION
+        }
+        _gravar_meta(conn, meta)
+
+    logger.info(f"🗃️ Staging do admin carregado: {len(dados)} registros em "
+                f"{(datetime.now() - inicio).total_seconds() * 1000:.0f}ms")
+    return meta
+
+
+def _garantir(conn):
+    """
+    Garante que a cópia de trabalho reflete o CSV publicado. Sem edições pendentes,
+    um CSV alterado por fora (upload, arquivamento) é recarregado; com pendências,
+    a cópia é mantida e o conflito é informado no status.
+    """
+    with _lock:
+        meta = _ler_meta(conn)
+        if meta and list(assinatura_arquivo(CSV_PATH) or ()) != meta['origem'] and _contar_pendentes(conn) == 0:
+            meta = {}
+        if not meta:
+            meta = _recriar(conn)
+        elif meta.get('schema') != STAGING_SCHEMA_VERSION:
+            # Cópia de uma versão anterior (possivelmente com edições): completa o que faltar
+            atualizacao = {'schema': STAGING_SCHEMA_VERSION}
+            if 'separador' not in meta:
+                formato = detectar_formato(CSV_PATH)
+                atualizacao['separador'] = (formato and formato.separador) or SEPARADOR_PADRAO
+            with conn:
+                if 'busca' not in meta:
+                    atualizacao['busca'] = _criar_indice_busca(conn, meta['colunas'])
+                meta.update(atualizacao)
+                _gravar_meta(conn, atualizacao)
+        return meta
+
+
+def _registrar_alteracao(conn, registro, tipo, campos=None):
+    conn.execute('INSERT INTO alteracoes (registro, tipo, campos, em) VALUES (?, ?, ?, ?)',
+                 (registro, tipo, json.dumps(campos, ensure_ascii=False) if campos else None,
+                  datetime.now().isoformat()))
+
+
+def _atualizar(conn, meta, registro, dados):
+    colunas = [col for col in dados if col in meta['colunas']]
+    if not colunas:
+        return conn.execute('SELECT 1 FROM registros WHERE _id = ?', (registro,)).fetchone() is not None
+    valores = ['' if dados[col] is None else str(dados[col]) for col in colunas]
+    cursor = conn.execute(
+        f"UPDATE registros SET {', '.join(f'{_q(col)} = ?' for col in colunas)} WHERE _id = ?",
+        (*valores, registro)
+    )
+    if cursor.rowcount == 0:
+        return False
+    linha = conn.execute(f"SELECT {', '.join(_q(c) for c in meta['colunas'])} FROM registros WHERE _id = ?",
+                         (registro,)).fetchone()
+    conn.execute('UPDATE busca SET texto = ? WHERE rowid = ?', (_texto_busca(linha), registro))
+    _registrar_alteracao(conn, registro, 'update', dict(zip(colunas, valores)))
+    return True
+
+
+def _excluir(conn, registro):
+    if conn.execute('DELETE FROM registros WHERE _id = ?', (registro,)).rowcount == 0:
+        return False
+    conn.execute('DELETE FROM busca WHERE rowid = ?', (registro,))
+    _registrar_alteracao(conn, registro, 'delete')
+    return True
+
+
+def status():
+    """Resumo da cópia de trabalho: registros, edições pendentes e conflito com o CSV publicado."""
+    conn = _conectar()
+    try:
+        meta = _garantir(conn)
+        return {
+            'registros': conn.execute('SELECT COUNT(*) FROM registros').fetchone()[0],
+            'pendentes': _contar_pendentes(conn),
+            'origem_alterada': list(assinatura_arquivo(CSV_PATH) or ()) != meta['origem'],
+            'encoding': meta['encoding'],
+            'carregado_em': meta['carregado_em']
+        }
+    finally:
+        conn.close()
+
+
+def consultar_pagina(inicio, quantidade):
+    """Retorna (total, DataFrame da página) em ordem de ``_id``."""
+    conn = _conectar()
+    try:
+        _garantir(conn)
+        total = conn.execute('SELECT COUNT(*) FROM registros').fetchone()[0]
+        pagina = pd.read_sql_query('SELECT * FROM registros ORDER BY _id LIMIT ? OFFSET ?', conn,
+                                   params=(quantidade, inicio), index_col='_id')
+        return total, pagina
+    finally:
+        conn.close()
+
+
+def buscar(termo, inicio, quantidade):
+    """
+    Busca por prefixo de palavra, sem diferenciar maiúsculas nem acentos
+    ('migra share' encontra 'Migração SharePoint'). Todos os termos precisam estar
+    no registro.
+
+    Returns:
+        tuple: (total de registros encontrados, DataFrame da página em ordem de ``_id``)
+    """
+    conn = _conectar()
+    try:
+        meta = _garantir(conn)
+        termos = _TERMO.findall(_dobrar(termo))
+        if not termos:
+            return 0, pd.DataFrame(columns=meta['colunas'])
+
+        if meta['busca'] == 'fts5':
+            condicao = 'busca MATCH ?'
+            params = (' '.join('"' + t.replace('"', '""') + '"*' for t in termos),)
+        else:
+            condicao = ' AND '.join(["texto LIKE ? ESCAPE '\\'"] * len(termos))
+            params = tuple('% ' + t.replace('_', '\\_') + '%' for t in termos)
+
+        total = conn.execute(f'SELECT COUNT(*) FROM busca WHERE {condicao}', params).fetchone()[0]
+        pagina = pd.read_sql_query(
+            f'SELECT registros.* FROM registros JOIN ('
+            f'SELECT rowid AS _id FROM busca WHERE {condicao} ORDER BY rowid LIMIT ? OFFSET ?'
+            f') AS encontrados USING (_id) ORDER BY _id',
+            conn, params=(*params, quantidade, inicio), index_col='_id'
+        )
+        return total, pagina
+    finally:
+        conn.close()
+
+
+def obter_registro(registro):
+    """Registro como dicionário (valores em texto), ou None se não existir."""
+    conn = _conectar()
+    try:
+        meta = _garantir(conn)
+        linha = conn.execute(
+            f"SELECT {', '.join(_q(col) for col in meta['colunas'])} FROM registros WHERE _id = ?", (registro,)
+        ).fetchone()
+        return dict(zip(meta['colunas'], linha)) if linha is not None else None
+    finally:
+        conn.close()
+
+
+def atualizar_registro(registro, dados):
+    """Atualiza as colunas informadas de um registro; retorna False se ele não existir."""
+    conn = _conectar()
+    try:
+        meta = _garantir(conn)
+        with conn:
+            return _atualizar(conn, meta, registro, dados)
+    finally:
+        conn.close()
+
+
+def excluir_registro(registro):
+    """Exclui um registro; retorna False se ele não existir."""
+    conn = _conectar()
+    try:
+        _garantir(conn)
+        with conn:
+            return _excluir(conn, registro)
+    finally:
+        conn.close()
+
+
+def aplicar_alteracoes(alteracoes):
+    """
+    Aplica um lote de alterações (``{'type': 'update'|'delete', 'record_id', 'data'}``)
+    numa única transação: ou todas são gravadas, ou nenhuma.
+
+    Returns:
+        tuple: (registros afetados, lista de erros)
+    """
+    conn = _conectar()
+    try:
+        meta = _garantir(conn)
+        afetados = 0
+        erros = []
+        with conn:
+            for alteracao in alteracoes:
+                registro = alteracao.get('record_id')
+                if alteracao.get('type') == 'update':
+                    ok = _atualizar(conn, meta, registro, alteracao.get('data') or {})
+                elif alteracao.get('type') == 'delete':
+                    ok = _excluir(conn, registro)
+                else:
+                    erros.append(f"Tipo de alteração inválido no registro {registro}: {alteracao.get('type')}")
+                    continue
+                if ok:
+                    afetados += 1
+                else:
+                    erros.append(f"Registro {registro} não encontrado")
+            if erros:
+                conn.rollback()
+                afetados = 0
+        return afetados, erros
+    finally:
+        conn.close()
+
+
+def exportar_csv(destino):
+    """
+    Grava a cópia de trabalho em ``destino`` (mesmas colunas, separador e encoding
+    do CSV de origem).
+
+    Returns:
+        dict: total de registros e edições pendentes incluídas
+    """
+    conn = _conectar()
+    try:
+        meta = _garantir(conn)
+        if list(assinatura_arquivo(CSV_PATH) or ()) != meta['origem']:
+            raise ValueError('O arquivo de dados foi alterado desde o início da edição. '
+                             'Descarte as edições pendentes e edite novamente.')
+        dados = pd.read_sql_query(
+            f"SELECT {', '.join(_q(col) for col in meta['colunas'])} FROM registros ORDER BY _id", conn
+        )
+        dados.to_csv(destino, sep=meta['separador'], index=False, encoding=meta['encoding'])
+        return {'registros': len(dados), 'pendentes': _contar_pendentes(conn)}
+    finally:
+        conn.close()
+
+
+def confirmar_publicacao():
+    """Após o CSV publicado ser substituído, associa a cópia de trabalho à nova versão dele."""
+    conn = _conectar()
+    try:
+        with _lock, conn:
+            meta = _ler_meta(conn)
+            registrar_formato(CSV_PATH, FormatoArquivo(meta['encoding'], meta['separador'], len(meta['colunas'])))
+            conn.execute('DELETE FROM alteracoes')
+            conn.execute('UPDATE meta SET valor = ? WHERE chave = ?',
+                         (json.dumps(list(assinatura_arquivo(CSV_PATH) or ())), 'origem'))
+    finally:
+        conn.close()
+
+
+def descartar():
+    """Descarta as edições pendentes; a cópia é recarregada do CSV publicado no próximo acesso."""
+    conn = _conectar()
+    try:
+        with _lock, conn:
+            pendentes = _contar_pendentes(conn) if _ler_meta(conn) else 0
+            conn.execute('DROP TABLE IF EXISTS meta')
+        return pendentes
+    finally:
+        conn.close()
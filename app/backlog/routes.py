@@ -12,13 +12,13 @@ import pytz # <<< ADICIONADO
 from sqlalchemy import and_
 from sqlalchemy.orm import joinedload
 from io import BytesIO
-import time
 
 # Define o fuso horário de Brasília
 br_timezone = pytz.timezone('America/Sao_Paulo') # <<< ADICIONADO
 
 # Importa a versão otimizada da função de serialização
 from ..utils.serializers import serialize_task_for_sprints
+from ..utils.cache import LRUCache
 
 # Função auxiliar para serializar uma tarefa
 def serialize_tasks_batch(tasks, project_details=None):
@@ -1299,26 +1299,15 @@ def get_project_header_details(project_id):
 
 # API para obter tarefas não alocadas a sprints, agrupadas por backlog/projeto
 # ✅ CACHE OTIMIZADO: Cache global para projetos ativos (reduz logs MacroService)
-import time
-_ACTIVE_PROJECTS_CACHE = {
-    'data': None,
-    'timestamp': None,
-    'ttl_seconds': 300  # 5 minutos de cache para projetos ativos
-}
+_ACTIVE_PROJECTS_CACHE = LRUCache('projetos_ativos_backlog', max_itens=1, ttl=300)  # 5 minutos
 
 def _get_cached_active_projects():
     """Retorna projetos ativos do cache se válido."""
-    if (_ACTIVE_PROJECTS_CACHE['data'] is not None and 
-        _ACTIVE_PROJECTS_CACHE['timestamp'] is not None):
-        elapsed = time.time() - _ACTIVE_PROJECTS_CACHE['timestamp']
-        if elapsed < _ACTIVE_PROJECTS_CACHE['ttl_seconds']:
-            return _ACTIVE_PROJECTS_CACHE['data']
-    return None
+    return _ACTIVE_PROJECTS_CACHE.get('ids')
 
 def _set_cached_active_projects(project_ids):
     """Cacheia IDs de projetos ativos."""
-    _ACTIVE_PROJECTS_CACHE['data'] = project_ids
-    _ACTIVE_PROJECTS_CACHE['timestamp'] = time.time()
+    _ACTIVE_PROJECTS_CACHE.set('ids', project_ids)
 
 @backlog_bp.route('/api/backlogs/unassigned-tasks')
 def get_unassigned_tasks():
@@ -4127,27 +4116,6 @@ def export_wbs_to_excel():
         current_app.logger.error(f"[WBS Export] Erro ao exportar: {str(e)}")
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
-# ✅ CACHE OTIMIZADO: Cache global para projetos ativos (reduz logs MacroService)
-_ACTIVE_PROJECTS_CACHE = {
-    'data': None,
-    'timestamp': None,
-    'ttl_seconds': 300  # 5 minutos de cache para projetos ativos
-}
-
-def _get_cached_active_projects():
-    """Retorna projetos ativos do cache se válido."""
-    if (_ACTIVE_PROJECTS_CACHE['data'] is not None and 
-        _ACTIVE_PROJECTS_CACHE['timestamp'] is not None):
-        elapsed = time.time() - _ACTIVE_PROJECTS_CACHE['timestamp']
-        if elapsed < _ACTIVE_PROJECTS_CACHE['ttl_seconds']:
-            return _ACTIVE_PROJECTS_CACHE['data']
-    return None
-
-def _set_cached_active_projects(project_ids):
-    """Cacheia IDs de projetos ativos."""
-    _ACTIVE_PROJECTS_CACHE['data'] = project_ids
-    _ACTIVE_PROJECTS_CACHE['timestamp'] = time.time()
-
 # 🎯 ENDPOINT PARA SALVAR NOVA ORDEM DA WBS
 @backlog_bp.route('/api/wbs/update-order', methods=['POST'])
 @feature_required('backlog.wbs')
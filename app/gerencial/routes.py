@@ -6,6 +6,7 @@ from flask import render_template, request, jsonify
 from . import gerencial_bp
 from .services import GerencialService
 from ..utils.decorators import module_required
+from ..utils.http_cache import resposta_condicional, resposta_de_falha
 
 # Instancia o serviço
 gerencial_service = GerencialService()
@@ -25,10 +26,10 @@ def dashboard():
         squad = request.args.get('squad', '').strip()
         faturamento = request.args.get('faturamento', '').strip()
         
-        # Carrega dados usando o serviço
-        dados = gerencial_service.carregar_dados()
+        # Carrega, filtra e processa os dados (em cache por versão dos dados e filtros)
+        resultado = gerencial_service.obter_dashboard(squad, faturamento)
         
-        if dados.empty:
+        if resultado is None:
             logger.error(f"[{request_id}] Nenhum dado encontrado para exibição")
             return render_template('gerencial/dashboard.html', 
                                 erro="Não foi possível carregar os dados do dashboard", 
@@ -36,34 +37,6 @@ def dashboard():
                                 filtro_aplicado={'squad': '', 'faturamento': ''},
                                 metricas={'total_projetos': 0, 'projetos_ativos': 0, 'projetos_abertos': 0, 'burn_rate': 0.0})
         
-        # Aplica filtros se necessário
-        dados_filtrados = dados.copy()
-        
-        # Log ANTES de filtrar Squad
-        logger.info(f"[Filtro Rota Debug] Valor do filtro Squad recebido: '{squad}'")
-        if not dados_filtrados.empty:
-            logger.info(f"[Filtro Rota Debug] Squads Únicos ANTES do filtro: {dados_filtrados['Squad'].unique().tolist()}")
-        
-        if squad and squad != 'Todos':
-            # Comparação case-insensitive para garantir que o filtro funcione
-            dados_filtrados = dados_filtrados[dados_filtrados['Squad'].str.upper() == squad.upper()]
-            # Log DEPOIS de filtrar Squad
-            logger.info(f"[Filtro Rota Debug] Filtro de Squad '{squad}' aplicado (case-insensitive).")
-            logger.info(f"[Filtro Rota Debug] Total de registros APÓS filtro de Squad: {len(dados_filtrados)}")
-            if not dados_filtrados.empty:
-                logger.info(f"[Filtro Rota Debug] Squads Únicos APÓS filtro: {dados_filtrados['Squad'].unique().tolist()}")
-            else:
-                logger.warning("[Filtro Rota Debug] DataFrame vazio após filtro de Squad!")
-        else:
-            logger.info("[Filtro Rota Debug] Nenhum filtro de Squad aplicado (Squad vazio ou 'Todos').")
-        
-        # Filtro de Faturamento (mantido como estava)
-        if faturamento and faturamento != 'Todos':
-            dados_filtrados = dados_filtrados[dados_filtrados['Faturamento'] == faturamento]
-        
-        # Processa dados para o dashboard
-        resultado = gerencial_service.processar_gerencial(dados_filtrados, squad_filtro=squad, faturamento_filtro=faturamento)
-        
         # Log detalhado dos projetos críticos
         logger.info(f"[{request_id}] Total de projetos críticos: {len(resultado['projetos_criticos'])}")
         if resultado['projetos_criticos']:
@@ -121,6 +94,7 @@ def dashboard():
                              alertas=[])
 
 @gerencial_bp.route('/api/projetos-ativos')
+@resposta_condicional
 def api_projetos_ativos():
     """API para listar projetos ativos"""
     try:
@@ -130,7 +104,7 @@ def api_projetos_ativos():
         
         dados = gerencial_service.carregar_dados()
         if dados.empty:
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
         
         # Aplica filtros se fornecidos
         dados_filtrados = dados.copy()
@@ -148,9 +122,10 @@ def api_projetos_ativos():
         return jsonify(projetos)
     except Exception as e:
         logger.error(f"Erro ao obter projetos ativos: {str(e)}")
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
 @gerencial_bp.route('/api/projetos-criticos')
+@resposta_condicional
 def api_projetos_criticos():
     """API para listar projetos críticos"""
     try:
@@ -163,7 +138,7 @@ def api_projetos_criticos():
         
         if dados.empty:
             logger.warning("API projetos-criticos: DataFrame vazio")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
         
         # Aplica filtros se fornecidos
         dados_filtrados = dados.copy()
@@ -190,9 +165,10 @@ def api_projetos_criticos():
         return jsonify(projetos)
     except Exception as e:
         logger.error(f"Erro ao obter projetos críticos: {str(e)}", exc_info=True)
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
 @gerencial_bp.route('/api/projetos-em-atendimento')
+@resposta_condicional
 def api_projetos_em_atendimento():
     """API para listar projetos em atendimento"""
     try:
@@ -216,6 +192,7 @@ def api_projetos_em_atendimento():
         return jsonify({'erro': 'Erro ao carregar projetos em atendimento'}), 500
 
 @gerencial_bp.route('/api/projetos-para-faturar')
+@resposta_condicional
 def api_projetos_para_faturar():
     """API para listar projetos para faturar"""
     try:
@@ -1,12 +1,17 @@
 import pandas as pd
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 import numpy as np
 import glob
 import os
 from .base_service import BaseService
 from .constants import *
+from app.utils.ingestion import carregar_dados_normalizados, ler_csv_projetado, adicionar_categorias, contar_valores, horas_restantes_ajustadas, substituir_valores
+from app.utils.cache import LRUCache, SingleFlight, copia_leve
+from app.utils.data_version import assinatura_arquivo, obter_versao_dados
+from app.utils.historico import HistoricoMensal
+from app.utils.time_parser import converter_tempo_para_horas, converter_tempo_para_horas_vetorizado
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +28,16 @@ COLUNAS_OBRIGATORIAS = ['Projeto', 'Status', 'Squad', 'Faturamento', 'HorasTraba
 COLUNAS_NUMERICAS = ['Horas', 'HorasRestantes', 'Conclusao', 'HorasTrabalhadas']
 COLUNAS_TEXTO = ['Squad', 'Status', 'Faturamento', 'Especialista', 'Account Manager']
 
+# Cache LRU dos arquivos históricos (dadosr_apt_*.csv), chaveado por (arquivo, mtime, tamanho)
+_HISTORICO_CACHE = LRUCache(
+    'historico_gerencial',
+    max_bytes=int(os.environ.get('HISTORICO_CACHE_MAX_MB', '64')) * 1024 * 1024
+)
+
+# Resultado do dashboard por (versão dos dados, dia, filtros); pré-calculado pelo aquecimento de caches
+_DASHBOARD_CACHE = LRUCache('dashboard_gerencial', max_bytes=16 * 1024 * 1024, max_itens=32)
+_DASHBOARD_SINGLE_FLIGHT = SingleFlight('dashboard_gerencial')
+
 class GerencialService(BaseService):
     def __init__(self):
         super().__init__()
@@ -47,246 +62,70 @@ class GerencialService(BaseService):
                 logger.error(f"Arquivo CSV não encontrado: {self.csv_path}")
                 return pd.DataFrame() # Retorna DataFrame vazio
             
-            # Lê o CSV dadosr.csv com parâmetros corretos
-            # dtype=str ainda é útil para ler tudo inicialmente e tratar depois
-            dados = pd.read_csv(
-                self.csv_path, 
-                dtype=str, 
-                sep=';', 
-                encoding='latin1', # Codificação correta para dadosr.csv
-                # quoting=csv.QUOTE_MINIMAL (ou 1) pode ser necessário se campos contêm delimitador
-                # Vamos começar sem quoting explícito, pode ser adicionado se necessário
-            )
-            logger.info(f"Arquivo {self.csv_path} carregado com {len(dados)} linhas.")
-            
-            # --- Passo 1.2: Tratamento Inicial (Usando Nomes de dadosr.csv) ---
-            
-            # 1.2.1 Conversão de Datas
-            colunas_data_simples = ['Aberto em', 'Resolvido em', 'Data da última ação']
-            for col in colunas_data_simples:
-                if col in dados.columns:
-                    dados[col] = pd.to_datetime(dados[col], format='%d/%m/%Y', errors='coerce')
-                else:
-                    logger.warning(f"Coluna de data esperada não encontrada: {col}")
-            
-            # Tratamento especial para 'Vencimento em' (pode ter hora)
-            if 'Vencimento em' in dados.columns:
-                logger.info("=== Processando Vencimento em ===")
-                # Log dos 5 primeiros valores originais
-                logger.info(f"Valores originais (head): {dados['Vencimento em'].head().tolist()}")
-                
-                # Tenta primeiro com data e hora
-                dados['Vencimento em_Original'] = dados['Vencimento em'] # Guarda original para debug
-                dados['Vencimento em'] = pd.to_datetime(dados['Vencimento em_Original'], format='%d/%m/%Y %H:%M', errors='coerce')
-                logger.info(f"Após 1ª tentativa (data/hora) (head): {dados['Vencimento em'].head().tolist()}")
-                
-                # Onde falhou (virou NaT), tenta apenas com data
-                mask_nat = dados['Vencimento em'].isna()
-                logger.info(f"Linhas que falharam na 1ª tentativa: {mask_nat.sum()}")
-                
-                if mask_nat.any():
-                    # Log de alguns valores que falharam
-                    logger.info(f"Exemplos de valores que falharam (originais): {dados.loc[mask_nat, 'Vencimento em_Original'].head().tolist()}")
-                    
-                    dados.loc[mask_nat, 'Vencimento em'] = pd.to_datetime(dados.loc[mask_nat, 'Vencimento em_Original'], format='%d/%m/%Y', errors='coerce')
-                    logger.info(f"Após 2ª tentativa (data) para NaTs (head dos que falharam antes): {dados.loc[mask_nat, 'Vencimento em'].head().tolist()}")
-                    
-                    # Verifica se ainda há NaTs após a 2ª tentativa
-                    mask_nat_final = dados['Vencimento em'].isna()
-                    if mask_nat_final.sum() > 0:
-                        logger.warning(f"{mask_nat_final.sum()} valores em 'Vencimento em' ainda são NaT após todas as tentativas.")
-                        logger.warning(f"Exemplos finais de NaT (originais): {dados.loc[mask_nat_final, 'Vencimento em_Original'].head().tolist()}")
-                
-                # Remove a coluna original de debug
-                # del dados['Vencimento em_Original']
-            else:
-                logger.warning("Coluna de data esperada não encontrada: Vencimento em")
-
-            # 1.2.2 Conversão Numérica
-            # 'Número' para Inteiro (usando Int64 para suportar possíveis NaNs da conversão)
-            if 'Número' in dados.columns:
-                dados['Número'] = pd.to_numeric(dados['Número'], errors='coerce').astype('Int64')
-            else:
-                logger.warning("Coluna numérica esperada não encontrada: Número")
-
-            # 'Esforço estimado' para Float (trata vírgula e nulos)
-            if 'Esforço estimado' in dados.columns:
-                dados['Esforço estimado'] = dados['Esforço estimado'].str.replace(',', '.', regex=False)
-                dados['Esforço estimado'] = pd.to_numeric(dados['Esforço estimado'], errors='coerce').fillna(0.0)
-            else:
-                logger.warning("Coluna numérica esperada não encontrada: Esforço estimado")
-                dados['Esforço estimado'] = 0.0 # Cria a coluna se não existir, para segurança
-
-            # 'Andamento' para Float (trata % e nulos)
-            if 'Andamento' in dados.columns:
-                dados['Andamento'] = dados['Andamento'].str.rstrip('%').str.replace(',', '.', regex=False)
-                dados['Andamento'] = pd.to_numeric(dados['Andamento'], errors='coerce').fillna(0.0)
-                dados['Andamento'] = dados['Andamento'].clip(lower=0, upper=100) # Garante 0-100
-            else:
-                logger.warning("Coluna numérica esperada não encontrada: Andamento")
-                dados['Andamento'] = 0.0 # Cria a coluna se não existir
-            
-            # 1.2.3 Conversão de Tempo para Horas Decimais
-            if 'Tempo trabalhado' in dados.columns:
-                # Reutiliza a função de conversão existente na classe
-                dados['Tempo trabalhado'] = dados['Tempo trabalhado'].apply(self.converter_tempo_para_horas)
-            else:
-                 logger.warning("Coluna de tempo esperada não encontrada: Tempo trabalhado")
-                 dados['Tempo trabalhado'] = 0.0 # Cria a coluna se não existir
-
-            # --- Fim do Passo 1.2 ---
-
-            # --- Passo 1.3: Renomeação (Novos Nomes -> Nomes Antigos/Apelidos) ---
-            rename_map_new_to_old = {
-                'Número': 'Numero',
-                'Cliente (Completo)': 'Cliente',
-                'Assunto': 'Projeto',
-                'Serviço (2º Nível)': 'Squad',
-                'Serviço (3º Nível)': 'TipoServico',
-                'Status': 'Status', # Mantém o nome
-                'Esforço estimado': 'Horas',
-                'Tempo trabalhado': 'HorasTrabalhadas',
-                'Andamento': 'Conclusao',
-                'Data da última ação': 'UltimaInteracao',
-                'Tipo de faturamento': 'Faturamento',
-                'Responsável': 'Especialista',
-                'Account Manager ': 'Account Manager', # Remove espaço final
-                'Aberto em': 'DataInicio',
-                'Resolvido em': 'DataTermino',
-                'Vencimento em': 'VencimentoEm'
-            }
-            
-            # Verifica quais colunas do mapa realmente existem no DataFrame antes de renomear
-            colunas_para_renomear = {k: v for k, v in rename_map_new_to_old.items() if k in dados.columns}
-            dados.rename(columns=colunas_para_renomear, inplace=True)
-            
-            # --- Passo 1.3.1: Fallback para coluna Projeto (NOVO) ---
-            # Se Assunto está vazio ou não existe, usa Cliente como fallback
-            if 'Projeto' in dados.columns and 'Cliente' in dados.columns:
-                mask_projeto_vazio = dados['Projeto'].isna() | (dados['Projeto'] == '') | (dados['Projeto'] == 'nan')
-                if mask_projeto_vazio.any():
-                    dados.loc[mask_projeto_vazio, 'Projeto'] = dados.loc[mask_projeto_vazio, 'Cliente']
-                    # Log apenas se houver fallbacks aplicados
-                    num_fallbacks = mask_projeto_vazio.sum()
-                    if num_fallbacks > 0:
-                        logger.info(f"Aplicado fallback Cliente→Projeto em {num_fallbacks} registros")
-            elif 'Cliente' in dados.columns and 'Projeto' not in dados.columns:
-                # Se a coluna Assunto não existe ainda, cria Projeto copiando de Cliente
-                dados['Projeto'] = dados['Cliente']
-                logger.info("Criada coluna 'Projeto' usando dados de 'Cliente' (coluna Assunto não encontrada)")
-            
-            logger.info(f"Colunas renomeadas para nomes antigos/apelidos: {list(colunas_para_renomear.values())}")
-            # --- Fim do Passo 1.3 ---
-            
-            # --- Passo 1.4: Padronização Final (Usando Nomes Antigos/Apelidos) ---
-            
-            # 1.4.1 Padronização de Status (para Title Case)
-            if 'Status' in dados.columns:
-                # Converte para string, remove espaços extras e aplica Title Case
-                dados['Status'] = dados['Status'].astype(str).str.strip().str.title()
-                # Opcional: Preencher NaNs restantes, se houver, após conversão inicial
-                # dados['Status'] = dados['Status'].fillna('Desconhecido') 
-                logger.info(f"Coluna 'Status' padronizada para Title Case. Valores únicos: {dados['Status'].unique().tolist()}")
-            else:
-                logger.warning("Coluna 'Status' não encontrada para padronização final.")
-
-            # 1.4.2 Padronização de Faturamento (Texto Longo -> Código Curto/Apelido)
-            faturamento_map = {
-                # Mapeia os textos originais de dadosr.csv para os apelidos
-                "PRIME": "PRIME",
-                "Descontar do PLUS no inicio do projeto": "PLUS",
-                "Faturar no inicio do projeto": "INICIO",
-                "Faturar no final do projeto": "TERMINO",
-                "Faturado em outro projeto": "FEOP", # Inclui os que eram vazios
-                "Faturado em outro projeto.": "FEOP", # Adicionado com ponto final
-                "Engajamento": "ENGAJAMENTO"
-            }
-            if 'Faturamento' in dados.columns:
-                # Garante que é string e remove espaços
-                dados['Faturamento'] = dados['Faturamento'].astype(str).str.strip()
-                # Aplica o mapeamento. Valores não encontrados no mapa se tornarão NaN.
-                dados['Faturamento_Original'] = dados['Faturamento'] # Guarda o original para debug, se necessário
-                dados['Faturamento'] = dados['Faturamento'].map(faturamento_map)
-                # Trata valores que não foram mapeados (viraram NaN)
-                nao_mapeados = dados['Faturamento'].isna()
-                if nao_mapeados.any():
-                    logger.warning(f"Valores de faturamento não mapeados encontrados: {dados.loc[nao_mapeados, 'Faturamento_Original'].unique().tolist()}")
-                    # Valores "nan" ou vazios devem ser mapeados para EAN (Em Análise)
-                    # Verifica valores que são NaN ou 'nan' string no original
-                    mask_nan = dados['Faturamento_Original'].isna() | (dados['Faturamento_Original'] == 'nan')
-                    if mask_nan.any():
-                        dados.loc[mask_nan, 'Faturamento'] = 'EAN'
-                        logger.info(f"Mapeado {mask_nan.sum()} valores nan/vazios para EAN")
-                    
-                    # Outros valores não mapeados ainda são preenchidos com NAO_MAPEADO
-                    dados['Faturamento'] = dados['Faturamento'].fillna('NAO_MAPEADO')
-                    
-                logger.info(f"Coluna 'Faturamento' mapeada para códigos curtos. Valores únicos: {dados['Faturamento'].unique().tolist()}")
-                # Remove a coluna original de debug se não for mais necessária
-                # del dados['Faturamento_Original'] 
-            else:
-                 logger.warning("Coluna 'Faturamento' não encontrada para padronização final.")
-
-            # 1.4.3 Padronização de outras colunas de texto
-            colunas_texto_padrao = ['Projeto', 'Squad', 'Especialista', 'Account Manager']
-            for col in colunas_texto_padrao:
-                if col in dados.columns:
-                    dados[col] = dados[col].astype(str).str.strip()
-                    # Tratamento especial para Squad: valores vazios ou 'nan' viram 'Em Planejamento - PMO'
-                    if col == 'Squad':
-                        dados[col] = dados[col].replace({'': 'Em Planejamento - PMO', 'nan': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'})
-                        dados[col] = dados[col].fillna('Em Planejamento - PMO')
-                    else:
-                        # Para outras colunas, mantém o comportamento original
-                        dados[col] = dados[col].replace({'': 'NÃO DEFINIDO', 'nan': 'NÃO DEFINIDO'})
-                        dados[col] = dados[col].fillna('NÃO DEFINIDO')
-                else:
-                    logger.warning(f"Coluna de texto '{col}' não encontrada para padronização final.")
-            # --- Fim do Passo 1.4 ---
-            
-            # Reavaliação do cálculo de HorasRestantes
-            # A função antiga calculava Horas - HorasTrabalhadas. Isso ainda é válido?
-            # Ambas as colunas agora são numéricas decimais.
-            if 'Horas' in dados.columns and 'HorasTrabalhadas' in dados.columns:
-                 dados['HorasRestantes'] = (dados['Horas'] - dados['HorasTrabalhadas']).round(1)
-                 logger.info("Coluna 'HorasRestantes' calculada.")
-            else:
-                 logger.warning("Não foi possível calcular 'HorasRestantes': colunas 'Horas' ou 'HorasTrabalhadas' ausentes após renomeação.")
-                 dados['HorasRestantes'] = 0.0 # Define como 0 se não puder calcular
-
-            logger.info(f"Dados carregados e totalmente processados. Total de registros: {len(dados)}")
-            return dados
+            # Pipeline canônico (snapshot binário: o CSV só é reprocessado quando o arquivo muda)
+            dados = carregar_dados_normalizados(self.csv_path)
+            logger.info(f"Dados carregados. Total de registros: {len(dados)}")
+            return self._adaptar_dados_gerencial(dados)
 
         except Exception as e:
             logger.error(f"Erro ao carregar e tratar dados: {str(e)}")
             return pd.DataFrame()
 
+    def _carregar_historico_cacheado(self, caminho_historico, colunas=None):
+        """
+        Carrega um CSV histórico via cache LRU (arquivo, mtime, tamanho); no miss, usa o pipeline canônico.
+        Com ``colunas``, lê apenas essas colunas (leitura projetada, com cache próprio).
+        """
+        if colunas:
+            return self._adaptar_dados_gerencial(ler_csv_projetado(caminho_historico, colunas))
+        
+        stat = caminho_historico.stat()
+        chave = (str(caminho_historico.resolve()), stat.st_mtime_ns, stat.st_size)
+        dados = _HISTORICO_CACHE.get(chave)
+        if dados is not None:
+            logger.info(f"Cache hit para dados históricos: {caminho_historico.name}")
+            return copia_leve(dados)
+        
+        dados = self._adaptar_dados_gerencial(carregar_dados_normalizados(caminho_historico))
+        if not dados.empty:
+            # Descarta versões anteriores do mesmo arquivo antes de cachear a atual
+            _HISTORICO_CACHE.invalidar(lambda c: c[0] == chave[0])
+            _HISTORICO_CACHE.set(chave, dados)
+        return copia_leve(dados)
+
+    def _adaptar_dados_gerencial(self, dados):
+        """
+        Aplica as convenções do Gerencial sobre o DataFrame canônico da ingestão:
+        Status em Title Case, faturamento vazio como EAN (Em Análise) e textos vazios preenchidos.
+        """
+        if dados.empty:
+            return dados
+        
+        # Status para Title Case (ex: 'EM ATENDIMENTO' -> 'Em Atendimento')
+        if 'Status' in dados.columns:
+            dados['Status'] = substituir_valores(dados['Status'], {s: s.title() for s in dados['Status'].unique()})
+        
+        # Valores "nan" ou vazios de faturamento são mapeados para EAN (Em Análise)
+        if 'Faturamento' in dados.columns and 'Faturamento_Original' in dados.columns:
+            mask_nan = dados['Faturamento_Original'].isna() | (dados['Faturamento_Original'] == 'nan')
+            if mask_nan.any():
+                dados['Faturamento'] = adicionar_categorias(dados['Faturamento'], ['EAN'])
+                dados.loc[mask_nan, 'Faturamento'] = 'EAN'
+        
+        for col in ['Projeto', 'Squad', 'Especialista', 'Account Manager']:
+            if col in dados.columns:
+                # Squad vazio ou 'nan' vira 'Em Planejamento - PMO'; demais colunas 'NÃO DEFINIDO'
+                if col == 'Squad':
+                    dados[col] = substituir_valores(dados[col], {'': 'Em Planejamento - PMO', 'nan': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'}, 'Em Planejamento - PMO')
+                else:
+                    dados[col] = substituir_valores(dados[col], {'': 'NÃO DEFINIDO', 'nan': 'NÃO DEFINIDO'}, 'NÃO DEFINIDO')
+        
+        logger.info(f"Dados adaptados para o Gerencial. Status: {dados['Status'].unique().tolist() if 'Status' in dados.columns else []}")
+        return dados
+
     def converter_tempo_para_horas(self, tempo_str):
         """Converte string de tempo (HH:MM:SS ou HH:MM) para horas decimais"""
-        try:
-            if pd.isna(tempo_str) or tempo_str == '':
-                return 0.0
-            if isinstance(tempo_str, (int, float)):
-                return float(tempo_str)
-            
-            tempo_str = str(tempo_str).strip()
-            if tempo_str.replace('.', '').isdigit():
-                return float(tempo_str)
-            
-            partes = tempo_str.split(':')
-            if len(partes) == 3:
-                horas = int(partes[0])
-                minutos = int(partes[1])
-                segundos = int(partes[2])
-                return horas + (minutos/60) + (segundos/3600)
-            elif len(partes) == 2:
-                horas = int(partes[0])
-                minutos = int(partes[1])
-                return horas + (minutos/60)
-            return 0.0
-        except Exception as e:
-            logger.error(f"Erro ao converter tempo '{tempo_str}': {str(e)}")
-            return 0.0
+        return converter_tempo_para_horas(tempo_str)
 
     def calcular_horas_restantes(self, dados):
         """Calcula as horas restantes dos projetos"""
@@ -341,8 +180,11 @@ class GerencialService(BaseService):
             
             # Garantir que Squad não tenha valores nulos
             if 'Squad' in dados_formatados.columns:
-                dados_formatados['Squad'] = dados_formatados['Squad'].fillna('Em Planejamento - PMO')
-                dados_formatados['Squad'] = dados_formatados['Squad'].replace({'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'})
+                dados_formatados['Squad'] = substituir_valores(
+                    dados_formatados['Squad'],
+                    {'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'},
+                    'Em Planejamento - PMO'
+                )
             
             # Garante que Conclusao seja numérico
             dados_formatados['Conclusao'] = pd.to_numeric(dados_formatados['Conclusao'], errors='coerce').fillna(0.0)
@@ -499,8 +341,11 @@ class GerencialService(BaseService):
             
             # Garantir que Squad não tenha valores nulos
             if 'Squad' in projetos_formatados.columns:
-                projetos_formatados['Squad'] = projetos_formatados['Squad'].fillna('Em Planejamento - PMO')
-                projetos_formatados['Squad'] = projetos_formatados['Squad'].replace({'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'})
+                projetos_formatados['Squad'] = substituir_valores(
+                    projetos_formatados['Squad'],
+                    {'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'},
+                    'Em Planejamento - PMO'
+                )
             
             # Formata conclusão e horas restantes
             if 'Conclusao' in projetos_formatados.columns:
@@ -736,8 +581,11 @@ class GerencialService(BaseService):
             
             # Garantir que Squad não tenha valores nulos
             if 'Squad' in projetos_formatados.columns:
-                projetos_formatados['Squad'] = projetos_formatados['Squad'].fillna('Em Planejamento - PMO')
-                projetos_formatados['Squad'] = projetos_formatados['Squad'].replace({'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'})
+                projetos_formatados['Squad'] = substituir_valores(
+                    projetos_formatados['Squad'],
+                    {'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'},
+                    'Em Planejamento - PMO'
+                )
             
             result = projetos_formatados.replace({np.nan: None}).to_dict('records')
             logger.info(f"Retornando {len(result)} projetos para faturar")
@@ -775,6 +623,51 @@ class GerencialService(BaseService):
             self.logger.error(f"Erro ao formatar projetos: {str(e)}")
             return []
 
+    def obter_dashboard(self, squad='', faturamento=''):
+        """
+        Resultado de ``processar_gerencial`` para os filtros do dashboard, em cache
+        enquanto os dados e o dia não mudarem.
+
+        Args:
+            squad: Filtro de squad da rota ('' ou 'Todos' para nenhum)
+            faturamento: Filtro de faturamento da rota ('' ou 'Todos' para nenhum)
+
+        Returns:
+            dict | None: Resultado do processamento, ou None se não houver dados
+        """
+        chave = (obter_versao_dados(), assinatura_arquivo(self.csv_path), datetime.now().date(), squad, faturamento)
+        resultado = _DASHBOARD_CACHE.get(chave)
+        if resultado is None:
+            resultado = _DASHBOARD_SINGLE_FLIGHT.executar(chave, lambda: self._calcular_dashboard(chave, squad, faturamento))
+        return resultado or None
+
+    def _calcular_dashboard(self, chave, squad, faturamento):
+        # Outra thread pode ter concluído o cálculo enquanto esta aguardava
+        resultado = _DASHBOARD_CACHE.get(chave)
+        if resultado is not None:
+            return resultado
+
+        dados = self.carregar_dados()
+        if dados.empty:
+            logger.error("Nenhum dado encontrado para o dashboard gerencial")
+            return {}
+
+        dados_filtrados = dados
+        if squad and squad != 'Todos':
+            # Comparação case-insensitive para garantir que o filtro funcione
+            dados_filtrados = dados_filtrados[dados_filtrados['Squad'].str.upper() == squad.upper()]
+            logger.info(f"[Filtro Dashboard] Filtro de Squad '{squad}' aplicado: {len(dados_filtrados)} registros")
+            if dados_filtrados.empty:
+                logger.warning("[Filtro Dashboard] DataFrame vazio após filtro de Squad!")
+        if faturamento and faturamento != 'Todos':
+            dados_filtrados = dados_filtrados[dados_filtrados['Faturamento'] == faturamento]
+
+        resultado = self.processar_gerencial(dados_filtrados, squad_filtro=squad, faturamento_filtro=faturamento)
+        # Versões anteriores dos dados não serão mais consultadas
+        _DASHBOARD_CACHE.invalidar(lambda c: c[:3] != chave[:3])
+        _DASHBOARD_CACHE.set(chave, resultado)
+        return resultado
+
     def processar_gerencial(self, dados, squad_filtro=None, faturamento_filtro=None):
         """
         Processa dados para o dashboard gerencial
@@ -793,25 +686,12 @@ class GerencialService(BaseService):
                 return self.criar_estrutura_vazia()
 
             # Cria cópia dos dados para evitar modificações no original
-            dados_limpos = dados.copy()
+            dados_limpos = dados.copy(deep=False)
             
             # --- PRÉ-PROCESSAMENTO DO TEMPO TRABALHADO ---
             if 'Tempo trabalhado' in dados_limpos.columns:
-                # Função robusta para conversão de horas
-                def converter_horas(time_str):
-                    try:
-                        # Remove espaços e divide em componentes
-                        parts = str(time_str).strip().split(':')
-                        # Garante que temos 3 componentes (HH:MM:SS)
-                        if len(parts) == 3:
-                            h, m, s = map(int, parts)
-                            return h + m/60 + s/3600
-                        return 0.0
-                    except (ValueError, AttributeError):
-                        return 0.0
-                
-                # Aplica conversão e verifica resultados
-                dados_limpos['HorasTrabalhadas'] = dados_limpos['Tempo trabalhado'].apply(converter_horas)
+                # Conversão vetorizada (HH:MM:SS, HH:MM ou decimal)
+                dados_limpos['HorasTrabalhadas'] = converter_tempo_para_horas_vetorizado(dados_limpos['Tempo trabalhado'])
                 
                 # Debug: Verifique a conversão
                 logger.debug(f"Total horas convertidas: {dados_limpos['HorasTrabalhadas'].sum():.2f}")
@@ -852,20 +732,12 @@ class GerencialService(BaseService):
                     (dados_limpos['Squad'] == squad_filtro_rota) &
                     (~dados_limpos['Status'].isin(self.status_concluidos)) &
                     (~dados_limpos['Especialista'].str.upper().isin(['CDB DATA SOLUTIONS']))
-                ].copy()
+                ]
                 
                 if not dados_burn_atual.empty and 'HorasRestantes' in dados_burn_atual.columns:
-                    # Ajusta horas restantes negativas para 10% do esforço inicial (mesma lógica da ocupação)
-                    def ajustar_horas_restantes(row):
-                        if row['HorasRestantes'] >= 0:
-                            return row['HorasRestantes']
-                        else:
-                            return 0.10 * row['Horas']
-                    
-                    dados_burn_atual['HorasRestantesAjustadas'] = dados_burn_atual.apply(ajustar_horas_restantes, axis=1)
-                    
+                    # Horas restantes negativas contam 10% do esforço inicial (mesma lógica da ocupação)
                     # Calcula burn rate baseado nas horas restantes ajustadas vs capacidade mensal
-                    horas_restantes_squad = dados_burn_atual['HorasRestantesAjustadas'].sum()
+                    horas_restantes_squad = horas_restantes_ajustadas(dados_burn_atual).sum()
                     capacidade_squad = 540  # 540h por squad
                     
                     # Calcula o percentual de ocupação (igual ao cálculo da Ocupação por Squad)
@@ -884,20 +756,12 @@ class GerencialService(BaseService):
                     (~dados_limpos['Status'].isin(self.status_concluidos)) &
                     (dados_limpos['Squad'] != 'Em Planejamento - PMO') &
                     (~dados_limpos['Especialista'].str.upper().isin(['CDB DATA SOLUTIONS']))
-                ].copy()
+                ]
                 
                 if not dados_burn_geral.empty and 'HorasRestantes' in dados_burn_geral.columns:
-                    # Ajusta horas restantes negativas para 10% do esforço inicial (mesma lógica da ocupação)
-                    def ajustar_horas_restantes_geral(row):
-                        if row['HorasRestantes'] >= 0:
-                            return row['HorasRestantes']
-                        else:
-                            return 0.10 * row['Horas']
-                    
-                    dados_burn_geral['HorasRestantesAjustadas'] = dados_burn_geral.apply(ajustar_horas_restantes_geral, axis=1)
-                    
+                    # Horas restantes negativas contam 10% do esforço inicial (mesma lógica da ocupação)
                     # Calcula burn rate baseado nas horas restantes ajustadas vs capacidade total
-                    horas_restantes_total = dados_burn_geral['HorasRestantesAjustadas'].sum()
+                    horas_restantes_total = horas_restantes_ajustadas(dados_burn_geral).sum()
                     
                     # Calcula capacidade total baseada nos squads presentes (excluindo PMO)
                     squads_ativos = dados_burn_geral['Squad'].unique()
@@ -929,7 +793,7 @@ class GerencialService(BaseService):
             ano_atual = hoje_fatura.year
             
             # FILTRO: Exclui projetos com especialista CDB DATA SOLUTIONS para cálculo do contador
-            dados_faturamento = dados_limpos.copy()
+            dados_faturamento = dados_limpos.copy(deep=False)
             if 'Especialista' in dados_faturamento.columns:
                 dados_antes = len(dados_faturamento)
                 dados_faturamento = dados_faturamento[~dados_faturamento['Especialista'].str.upper().isin(['CDB DATA SOLUTIONS'])]
@@ -960,7 +824,7 @@ class GerencialService(BaseService):
             )
             
             # Condição especial para ENGAJAMENTO - VencimentoEm + 30 dias no mês atual
-            dados_engajamento = dados_faturamento[dados_faturamento['Faturamento'] == 'ENGAJAMENTO'].copy()
+            dados_engajamento = dados_faturamento[dados_faturamento['Faturamento'] == 'ENGAJAMENTO']
             if not dados_engajamento.empty:
                 # Verifica se a data de faturamento está no mês atual
                 cond_engajamento = (
@@ -1003,9 +867,9 @@ class GerencialService(BaseService):
                 },
                 'projetos_criticos': self.obter_projetos_criticos(dados_limpos),
                 'projetos_por_squad': dados_limpos[~dados_limpos['Status'].isin(self.status_concluidos)]
-                                    .groupby('Squad').size().to_dict(),
+                                    .groupby('Squad', observed=True).size().to_dict(),
                 'projetos_por_faturamento': dados_limpos[~dados_limpos['Status'].isin(self.status_concluidos)]
-                                        .groupby('Faturamento').size().to_dict(),
+                                        .groupby('Faturamento', observed=True).size().to_dict(),
                 'squads_disponiveis': sorted(dados_limpos['Squad'].dropna().unique().tolist()),
                 'faturamentos_disponiveis': sorted(dados_limpos['Faturamento'].dropna().unique().tolist())
             }
@@ -1074,19 +938,12 @@ class GerencialService(BaseService):
                     logger.info(f"    Horas Restantes: {projeto.get('HorasRestantes', 0.0)}")
                     logger.info(f"    Especialista: {projeto.get('Especialista', 'N/A')}")
             
-            # Ajusta horas restantes: para negativas, usa 10% do esforço inicial
-            def ajustar_horas_restantes(row):
-                if row['HorasRestantes'] >= 0:
-                    return row['HorasRestantes']
-                else:
-                    valor_ajustado = 0.10 * row['Horas']
-                    if row['Squad'] == 'DATA E POWER':
-                        logger.info(f"  Ajustando projeto {row.get('Projeto', 'N/A')}: "
-                                  f"Horas Restantes: {row['HorasRestantes']} -> "
-                                  f"Ajustado (10% de {row['Horas']}): {valor_ajustado}")
-                    return valor_ajustado
-            
-            dados_calc['HorasRestantesAjustadas'] = dados_calc.apply(ajustar_horas_restantes, axis=1)
+            # Horas restantes ajustadas: negativas contam 10% do esforço inicial (derivadas no snapshot canônico)
+            dados_calc['HorasRestantesAjustadas'] = horas_restantes_ajustadas(dados_calc)
+            ajustados_data_power = (dados_calc['Squad'] == 'DATA E POWER') & (dados_calc['HorasRestantes'] < 0)
+            if ajustados_data_power.any():
+                logger.info(f"  DATA E POWER: {int(ajustados_data_power.sum())} projetos com horas restantes negativas "
+                            f"ajustados para 10% do esforço inicial")
             
             # Separa projetos em planejamento
             planejamento_pmo = dados_calc[dados_calc['Squad'] == 'Em Planejamento - PMO'].copy()
@@ -1106,7 +963,7 @@ class GerencialService(BaseService):
             # Ocupação por Squad (apenas squads regulares)
             if 'Squad' in dados_squads.columns and not dados_squads.empty:
                 # Agrupa por Squad
-                squads = dados_squads.groupby('Squad').agg({
+                squads = dados_squads.groupby('Squad', observed=True).agg({
                     'Projeto': 'count',
                     'HorasRestantesAjustadas': 'sum'
                 }).reset_index()
@@ -1628,8 +1485,11 @@ class GerencialService(BaseService):
             
             # Garantir que Squad não tenha valores nulos
             if 'Squad' in projetos_formatados.columns:
-                projetos_formatados['Squad'] = projetos_formatados['Squad'].fillna('Em Planejamento - PMO')
-                projetos_formatados['Squad'] = projetos_formatados['Squad'].replace({'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'})
+                projetos_formatados['Squad'] = substituir_valores(
+                    projetos_formatados['Squad'],
+                    {'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'},
+                    'Em Planejamento - PMO'
+                )
             
             return projetos_formatados.replace({np.nan: None}).to_dict('records')
             
@@ -1750,7 +1610,7 @@ class GerencialService(BaseService):
             
             # Verificar tipos de faturamento disponíveis
             if 'Faturamento' in dados.columns:
-                faturamentos = dados['Faturamento'].value_counts().to_dict()
+                faturamentos = contar_valores(dados['Faturamento']).to_dict()
                 print(f"Tipos de faturamento disponíveis: {faturamentos}")
             
             # Verificar projetos por mês de início
@@ -1779,8 +1639,8 @@ class GerencialService(BaseService):
             print(traceback.format_exc())
             return []
     
-    def _carregar_dados_historicos(self, ano, mes):
-        """Carrega e processa dados de um arquivo histórico específico (dadosr_apt_mes.csv)."""
+    def _carregar_dados_historicos(self, ano, mes, colunas=None):
+        """Carrega e processa dados de um arquivo histórico específico (dadosr_apt_mes.csv), opcionalmente só com ``colunas``."""
         try:
             mes_str = f"{mes:02d}" # Formata mês com zero à esquerda (01, 02, ..., 12)
             # Mapeia número do mês para abreviação de 3 letras em minúsculo
@@ -1801,107 +1661,8 @@ class GerencialService(BaseService):
                 logger.error(f"Arquivo histórico CSV não encontrado: {caminho_historico}")
                 return pd.DataFrame()
             
-            # Lê o CSV histórico (mesmos parâmetros de carregar_dados)
-            dados = pd.read_csv(
-                caminho_historico, 
-                dtype=str, 
-                sep=';', 
-                encoding='latin1'
-            )
-            logger.info(f"Arquivo histórico {nome_arquivo} carregado com {len(dados)} linhas.")
-            
-            # Aplica EXATAMENTE O MESMO pré-processamento de carregar_dados
-            # (Conversão de Datas, Números, Tempo, Renomeação, Padronização)
-            # --- Copiado e adaptado de carregar_dados --- 
-            # 1.2.1 Conversão de Datas
-            colunas_data_simples = ['Aberto em', 'Resolvido em', 'Data da última ação']
-            # ... (resto do código de conversão de datas igual a carregar_dados) ...
-            for col in colunas_data_simples:
-                 if col in dados.columns:
-                     dados[col] = pd.to_datetime(dados[col], format='%d/%m/%Y', errors='coerce')
-                 # else: # Não loga warning para históricos, podem ter colunas diferentes
-                 #    logger.warning(f"[Histórico] Coluna de data {col} não encontrada em {nome_arquivo}")
-            
-            if 'Vencimento em' in dados.columns:
-                 dados['Vencimento em_Original'] = dados['Vencimento em']
-                 dados['Vencimento em'] = pd.to_datetime(dados['Vencimento em_Original'], format='%d/%m/%Y %H:%M', errors='coerce')
-                 mask_nat = dados['Vencimento em'].isna()
-                 if mask_nat.any():
-                     dados.loc[mask_nat, 'Vencimento em'] = pd.to_datetime(dados.loc[mask_nat, 'Vencimento em_Original'], format='%d/%m/%Y', errors='coerce')
-                 # del dados['Vencimento em_Original'] 
-            
-            # 1.2.2 Conversão Numérica
-            if 'Número' in dados.columns:
-                 dados['Número'] = pd.to_numeric(dados['Número'], errors='coerce').astype('Int64')
-            if 'Esforço estimado' in dados.columns:
-                 dados['Esforço estimado'] = dados['Esforço estimado'].str.replace(',', '.', regex=False)
-                 dados['Esforço estimado'] = pd.to_numeric(dados['Esforço estimado'], errors='coerce').fillna(0.0)
-            else: dados['Esforço estimado'] = 0.0
-            if 'Andamento' in dados.columns:
-                 dados['Andamento'] = dados['Andamento'].str.rstrip('%').str.replace(',', '.', regex=False)
-                 dados['Andamento'] = pd.to_numeric(dados['Andamento'], errors='coerce').fillna(0.0).clip(lower=0, upper=100)
-            else: dados['Andamento'] = 0.0
-            if 'Tempo trabalhado' in dados.columns:
-                 dados['Tempo trabalhado'] = dados['Tempo trabalhado'].apply(self.converter_tempo_para_horas)
-            else: dados['Tempo trabalhado'] = 0.0
-            
-            # 1.3 Renomeação
-            rename_map_new_to_old = { ... } # Usar o mesmo mapa de carregar_dados
-            rename_map_new_to_old = {
-                'Número': 'Numero',
-                'Cliente (Completo)': 'Cliente',
-                'Assunto': 'Projeto',
-                'Serviço (2º Nível)': 'Squad',
-                'Serviço (3º Nível)': 'TipoServico',
-                'Status': 'Status',
-                'Esforço estimado': 'Horas',
-                'Tempo trabalhado': 'HorasTrabalhadas',
-                'Andamento': 'Conclusao',
-                'Data da última ação': 'UltimaInteracao',
-                'Tipo de faturamento': 'Faturamento',
-                'Responsável': 'Especialista',
-                'Account Manager ': 'Account Manager',
-                'Aberto em': 'DataInicio',
-                'Resolvido em': 'DataTermino',
-                'Vencimento em': 'VencimentoEm'
-            }
-            colunas_para_renomear = {k: v for k, v in rename_map_new_to_old.items() if k in dados.columns}
-            dados.rename(columns=colunas_para_renomear, inplace=True)
-            
-            # 1.4 Padronização Final
-            if 'Status' in dados.columns: dados['Status'] = dados['Status'].astype(str).str.strip().str.title()
-            faturamento_map = { ... } # Usar o mesmo mapa de carregar_dados
-            faturamento_map = {
-                "PRIME": "PRIME",
-                "Descontar do PLUS no inicio do projeto": "PLUS",
-                "Faturar no inicio do projeto": "INICIO",
-                "Faturar no final do projeto": "TERMINO",
-                "Faturado em outro projeto": "FEOP",
-                "Faturado em outro projeto.": "FEOP",
-                "Engajamento": "ENGAJAMENTO"
-            }
-            if 'Faturamento' in dados.columns:
-                dados['Faturamento'] = dados['Faturamento'].astype(str).str.strip()
-                dados['Faturamento_Original'] = dados['Faturamento']
-                dados['Faturamento'] = dados['Faturamento'].map(faturamento_map)
-                nao_mapeados = dados['Faturamento'].isna()
-                if nao_mapeados.any():
-                    mask_nan = dados['Faturamento_Original'].isna() | (dados['Faturamento_Original'] == 'nan')
-                    if mask_nan.any(): dados.loc[mask_nan, 'Faturamento'] = 'EAN'
-                    dados['Faturamento'] = dados['Faturamento'].fillna('NAO_MAPEADO')
-                # del dados['Faturamento_Original']
-            colunas_texto_padrao = ['Projeto', 'Squad', 'Especialista', 'Account Manager']
-            for col in colunas_texto_padrao:
-                if col in dados.columns:
-                    dados[col] = dados[col].astype(str).str.strip()
-                    if col == 'Squad': dados[col] = dados[col].replace({'': 'Em Planejamento - PMO', 'nan': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'}).fillna('Em Planejamento - PMO')
-                    else: dados[col] = dados[col].replace({'': 'NÃO DEFINIDO', 'nan': 'NÃO DEFINIDO'}).fillna('NÃO DEFINIDO')
-            
-            # Recalcula HorasRestantes (importante após carregar e renomear)
-            if 'Horas' in dados.columns and 'HorasTrabalhadas' in dados.columns:
-                 dados['HorasRestantes'] = (dados['Horas'] - dados['HorasTrabalhadas']).round(1)
-            else: dados['HorasRestantes'] = 0.0
-            # --- Fim do código copiado --- 
+            # Mesmo pipeline canônico de carregar_dados, com cache LRU em memória
+            dados = self._carregar_historico_cacheado(caminho_historico, colunas)
             
             logger.info(f"Dados históricos de {mes_abrev.upper()}/{ano} processados.")
             return dados
@@ -1915,54 +1676,26 @@ class GerencialService(BaseService):
         try:
             logger.info(f"[Burn Rate Mensal] Calculando para {mes:02d}/{ano}, filtro squad: '{squad_filtro if squad_filtro else 'Nenhum'}'")
             
-            # Carrega dados do mês atual (mês para o qual calculamos o burn rate)
-            df_atual = self._carregar_dados_historicos(ano, mes)
-            if df_atual.empty:
+            # Horas do mês por projeto: diferença vetorizada sobre o histórico mensal (MesSnapshot, Numero)
+            deltas = HistoricoMensal(self.csv_path.parent).deltas_horas([f"{ano}-{mes:02d}"])
+            if deltas.empty:
                 logger.warning(f"[Burn Rate Mensal] Não foi possível carregar dados para {mes:02d}/{ano}. Retornando 0.")
                 return 0.0, 0.0 # Retorna Burn Rate e Burn Rate Projetado
-                
-            # Determina o mês/ano anterior
-            data_ref = datetime(ano, mes, 1)
-            data_anterior = data_ref - timedelta(days=1)
-            ano_prev = data_anterior.year
-            mes_prev = data_anterior.month
-            
-            # Carrega dados do mês anterior
-            df_prev = self._carregar_dados_historicos(ano_prev, mes_prev)
-            if df_prev.empty:
-                logger.warning(f"[Burn Rate Mensal] Não foi possível carregar dados do mês anterior ({mes_prev:02d}/{ano_prev}). Calculando com base apenas no mês atual.")
+            
+            if deltas['HorasAnteriores'].isna().all():
+                logger.warning(f"[Burn Rate Mensal] Mês anterior a {mes:02d}/{ano} não está no histórico. Calculando com base apenas no mês atual.")
                 # Se não há dados anteriores, não podemos calcular a diferença.
-                # Poderíamos retornar 0 ou calcular usando o total atual (mas isso seria o cálculo antigo)
                 # Vamos retornar 0 por segurança, pois a métrica seria enganosa.
                 return 0.0, 0.0
-
-            # Seleciona colunas necessárias para merge e cálculo
-            cols_atual = ['Numero', 'Projeto', 'Squad', 'Especialista', 'Status', 'HorasTrabalhadas']
-            cols_prev = ['Numero', 'HorasTrabalhadas']
-            
-            # Garante que as colunas existem
-            for col in cols_atual: 
-                if col not in df_atual.columns: df_atual[col] = 0 if col == 'HorasTrabalhadas' else ('N/A' if col != 'Numero' else pd.NA)
-            for col in cols_prev: 
-                if col not in df_prev.columns: df_prev[col] = 0 if col == 'HorasTrabalhadas' else pd.NA
-                
-            # Renomeia colunas do df_prev para evitar conflito no merge
-            df_prev_renamed = df_prev[cols_prev].rename(columns={'HorasTrabalhadas': 'HT_prev'})
-            
-            # Merge usando 'Numero' como chave (garantir que 'Numero' seja tipo consistente)
-            df_atual['Numero'] = df_atual['Numero'].astype(str)
-            df_prev_renamed['Numero'] = df_prev_renamed['Numero'].astype(str)
             
-            df_merged = pd.merge(df_atual[cols_atual], df_prev_renamed, on='Numero', how='left')
-            
-            # Calcula Horas Trabalhadas Mensais
-            df_merged['HT_prev'] = df_merged['HT_prev'].fillna(0)
-            df_merged['HT_mensal'] = df_merged['HorasTrabalhadas'] - df_merged['HT_prev']
+            df_merged = self._adaptar_dados_gerencial(
+                deltas[['Numero', 'Projeto', 'Squad', 'Especialista', 'Status', 'HorasTrabalhadas', 'HorasIncrementais']]
+            )
             
             # Lida com possíveis valores negativos (pode indicar inconsistência, mas clampamos para 0)
-            df_merged['HT_mensal'] = df_merged['HT_mensal'].clip(lower=0)
+            df_merged['HT_mensal'] = df_merged['HorasIncrementais'].clip(lower=0)
             
-            logger.info(f"[Burn Rate Mensal] {len(df_merged)} projetos após merge.")
+            logger.info(f"[Burn Rate Mensal] {len(df_merged)} projetos no mês.")
             logger.info(f"[Burn Rate Mensal] Amostra HT_mensal: {df_merged['HT_mensal'].head().tolist()}")
             
             # Aplica filtros para cálculo do Burn Rate
@@ -2072,19 +1805,12 @@ class GerencialService(BaseService):
                     logger.info(f"    Horas Restantes: {projeto.get('HorasRestantes', 0.0)}")
                     logger.info(f"    Especialista: {projeto.get('Especialista', 'N/A')}")
             
-            # Ajusta horas restantes: para negativas, usa 10% do esforço inicial
-            def ajustar_horas_restantes(row):
-                if row['HorasRestantes'] >= 0:
-                    return row['HorasRestantes']
-                else:
-                    valor_ajustado = 0.10 * row['Horas']
-                    if row['Squad'] == 'DATA E POWER':
-                        logger.info(f"  Ajustando projeto {row.get('Projeto', 'N/A')}: "
-                                  f"Horas Restantes: {row['HorasRestantes']} -> "
-                                  f"Ajustado (10% de {row['Horas']}): {valor_ajustado}")
-                    return valor_ajustado
-            
-            dados_calc['HorasRestantesAjustadas'] = dados_calc.apply(ajustar_horas_restantes, axis=1)
+            # Horas restantes ajustadas: negativas contam 10% do esforço inicial (derivadas no snapshot canônico)
+            dados_calc['HorasRestantesAjustadas'] = horas_restantes_ajustadas(dados_calc)
+            ajustados_data_power = (dados_calc['Squad'] == 'DATA E POWER') & (dados_calc['HorasRestantes'] < 0)
+            if ajustados_data_power.any():
+                logger.info(f"  DATA E POWER: {int(ajustados_data_power.sum())} projetos com horas restantes negativas "
+                            f"ajustados para 10% do esforço inicial")
             
             # Separa projetos em planejamento
             planejamento_pmo = dados_calc[dados_calc['Squad'] == 'Em Planejamento - PMO'].copy()
@@ -2104,7 +1830,7 @@ class GerencialService(BaseService):
             # Ocupação por Squad (apenas squads regulares)
             if 'Squad' in dados_squads.columns and not dados_squads.empty:
                 # Agrupa por Squad
-                squads = dados_squads.groupby('Squad').agg({
+                squads = dados_squads.groupby('Squad', observed=True).agg({
                     'Projeto': 'count',
                     'HorasRestantesAjustadas': 'sum'
                 }).reset_index()
@@ -2417,8 +2143,11 @@ class GerencialService(BaseService):
             
             # Garantir que Squad não tenha valores nulos
             if 'Squad' in projetos_formatados.columns:
-                projetos_formatados['Squad'] = projetos_formatados['Squad'].fillna('Em Planejamento - PMO')
-                projetos_formatados['Squad'] = projetos_formatados['Squad'].replace({'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'})
+                projetos_formatados['Squad'] = substituir_valores(
+                    projetos_formatados['Squad'],
+                    {'nan': 'Em Planejamento - PMO', '': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'},
+                    'Em Planejamento - PMO'
+                )
             
             return projetos_formatados.replace({np.nan: None}).to_dict('records')
             
@@ -2539,7 +2268,7 @@ class GerencialService(BaseService):
             
             # Verificar tipos de faturamento disponíveis
             if 'Faturamento' in dados.columns:
-                faturamentos = dados['Faturamento'].value_counts().to_dict()
+                faturamentos = contar_valores(dados['Faturamento']).to_dict()
                 print(f"Tipos de faturamento disponíveis: {faturamentos}")
             
             # Verificar projetos por mês de início
@@ -2568,8 +2297,8 @@ class GerencialService(BaseService):
             print(traceback.format_exc())
             return []
     
-    def _carregar_dados_historicos(self, ano, mes):
-        """Carrega e processa dados de um arquivo histórico específico (dadosr_apt_mes.csv)."""
+    def _carregar_dados_historicos(self, ano, mes, colunas=None):
+        """Carrega e processa dados de um arquivo histórico específico (dadosr_apt_mes.csv), opcionalmente só com ``colunas``."""
         try:
             mes_str = f"{mes:02d}" # Formata mês com zero à esquerda (01, 02, ..., 12)
             # Mapeia número do mês para abreviação de 3 letras em minúsculo
@@ -2590,107 +2319,8 @@ class GerencialService(BaseService):
                 logger.error(f"Arquivo histórico CSV não encontrado: {caminho_historico}")
                 return pd.DataFrame()
             
-            # Lê o CSV histórico (mesmos parâmetros de carregar_dados)
-            dados = pd.read_csv(
-                caminho_historico, 
-                dtype=str, 
-                sep=';', 
-                encoding='latin1'
-            )
-            logger.info(f"Arquivo histórico {nome_arquivo} carregado com {len(dados)} linhas.")
-            
-            # Aplica EXATAMENTE O MESMO pré-processamento de carregar_dados
-            # (Conversão de Datas, Números, Tempo, Renomeação, Padronização)
-            # --- Copiado e adaptado de carregar_dados --- 
-            # 1.2.1 Conversão de Datas
-            colunas_data_simples = ['Aberto em', 'Resolvido em', 'Data da última ação']
-            # ... (resto do código de conversão de datas igual a carregar_dados) ...
-            for col in colunas_data_simples:
-                 if col in dados.columns:
-                     dados[col] = pd.to_datetime(dados[col], format='%d/%m/%Y', errors='coerce')
-                 # else: # Não loga warning para históricos, podem ter colunas diferentes
-                 #    logger.warning(f"[Histórico] Coluna de data {col} não encontrada em {nome_arquivo}")
-            
-            if 'Vencimento em' in dados.columns:
-                 dados['Vencimento em_Original'] = dados['Vencimento em']
-                 dados['Vencimento em'] = pd.to_datetime(dados['Vencimento em_Original'], format='%d/%m/%Y %H:%M', errors='coerce')
-                 mask_nat = dados['Vencimento em'].isna()
-                 if mask_nat.any():
-                     dados.loc[mask_nat, 'Vencimento em'] = pd.to_datetime(dados.loc[mask_nat, 'Vencimento em_Original'], format='%d/%m/%Y', errors='coerce')
-                 # del dados['Vencimento em_Original'] 
-            
-            # 1.2.2 Conversão Numérica
-            if 'Número' in dados.columns:
-                 dados['Número'] = pd.to_numeric(dados['Número'], errors='coerce').astype('Int64')
-            if 'Esforço estimado' in dados.columns:
-                 dados['Esforço estimado'] = dados['Esforço estimado'].str.replace(',', '.', regex=False)
-                 dados['Esforço estimado'] = pd.to_numeric(dados['Esforço estimado'], errors='coerce').fillna(0.0)
-            else: dados['Esforço estimado'] = 0.0
-            if 'Andamento' in dados.columns:
-                 dados['Andamento'] = dados['Andamento'].str.rstrip('%').str.replace(',', '.', regex=False)
-                 dados['Andamento'] = pd.to_numeric(dados['Andamento'], errors='coerce').fillna(0.0).clip(lower=0, upper=100)
-            else: dados['Andamento'] = 0.0
-            if 'Tempo trabalhado' in dados.columns:
-                 dados['Tempo trabalhado'] = dados['Tempo trabalhado'].apply(self.converter_tempo_para_horas)
-            else: dados['Tempo trabalhado'] = 0.0
-            
-            # 1.3 Renomeação
-            rename_map_new_to_old = { ... } # Usar o mesmo mapa de carregar_dados
-            rename_map_new_to_old = {
-                'Número': 'Numero',
-                'Cliente (Completo)': 'Cliente',
-                'Assunto': 'Projeto',
-                'Serviço (2º Nível)': 'Squad',
-                'Serviço (3º Nível)': 'TipoServico',
-                'Status': 'Status',
-                'Esforço estimado': 'Horas',
-                'Tempo trabalhado': 'HorasTrabalhadas',
-                'Andamento': 'Conclusao',
-                'Data da última ação': 'UltimaInteracao',
-                'Tipo de faturamento': 'Faturamento',
-                'Responsável': 'Especialista',
-                'Account Manager ': 'Account Manager',
-                'Aberto em': 'DataInicio',
-                'Resolvido em': 'DataTermino',
-                'Vencimento em': 'VencimentoEm'
-            }
-            colunas_para_renomear = {k: v for k, v in rename_map_new_to_old.items() if k in dados.columns}
-            dados.rename(columns=colunas_para_renomear, inplace=True)
-            
-            # 1.4 Padronização Final
-            if 'Status' in dados.columns: dados['Status'] = dados['Status'].astype(str).str.strip().str.title()
-            faturamento_map = { ... } # Usar o mesmo mapa de carregar_dados
-            faturamento_map = {
-                "PRIME": "PRIME",
-                "Descontar do PLUS no inicio do projeto": "PLUS",
-                "Faturar no inicio do projeto": "INICIO",
-                "Faturar no final do projeto": "TERMINO",
-                "Faturado em outro projeto": "FEOP",
-                "Faturado em outro projeto.": "FEOP",
-                "Engajamento": "ENGAJAMENTO"
-            }
-            if 'Faturamento' in dados.columns:
-                dados['Faturamento'] = dados['Faturamento'].astype(str).str.strip()
-                dados['Faturamento_Original'] = dados['Faturamento']
-                dados['Faturamento'] = dados['Faturamento'].map(faturamento_map)
-                nao_mapeados = dados['Faturamento'].isna()
-                if nao_mapeados.any():
-                    mask_nan = dados['Faturamento_Original'].isna() | (dados['Faturamento_Original'] == 'nan')
-                    if mask_nan.any(): dados.loc[mask_nan, 'Faturamento'] = 'EAN'
-                    dados['Faturamento'] = dados['Faturamento'].fillna('NAO_MAPEADO')
-                # del dados['Faturamento_Original']
-            colunas_texto_padrao = ['Projeto', 'Squad', 'Especialista', 'Account Manager']
-            for col in colunas_texto_padrao:
-                if col in dados.columns:
-                    dados[col] = dados[col].astype(str).str.strip()
-                    if col == 'Squad': dados[col] = dados[col].replace({'': 'Em Planejamento - PMO', 'nan': 'Em Planejamento - PMO', 'NÃO DEFINIDO': 'Em Planejamento - PMO'}).fillna('Em Planejamento - PMO')
-                    else: dados[col] = dados[col].replace({'': 'NÃO DEFINIDO', 'nan': 'NÃO DEFINIDO'}).fillna('NÃO DEFINIDO')
-            
-            # Recalcula HorasRestantes (importante após carregar e renomear)
-            if 'Horas' in dados.columns and 'HorasTrabalhadas' in dados.columns:
-                 dados['HorasRestantes'] = (dados['Horas'] - dados['HorasTrabalhadas']).round(1)
-            else: dados['HorasRestantes'] = 0.0
-            # --- Fim do código copiado --- 
+            # Mesmo pipeline canônico de carregar_dados, com cache LRU em memória
+            dados = self._carregar_historico_cacheado(caminho_historico, colunas)
             
             logger.info(f"Dados históricos de {mes_abrev.upper()}/{ano} processados.")
             return dados
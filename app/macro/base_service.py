@@ -3,6 +3,7 @@ from pathlib import Path
 import logging
 from datetime import datetime
 import os
+from app.utils.time_parser import converter_tempo_para_horas
 
 logger = logging.getLogger(__name__)
 
@@ -79,25 +80,8 @@ class BaseService:
 
     @staticmethod
     def converter_tempo_para_horas(tempo_str):
-        """Converte string de tempo (HH:MM) para horas decimais."""
-        try:
-            if pd.isna(tempo_str) or tempo_str == '' or tempo_str == 'nan':
-                return 0.0
-            if isinstance(tempo_str, (int, float)):
-                return float(tempo_str)
-            
-            tempo_str = str(tempo_str).strip()
-            if tempo_str.replace('.', '', 1).isdigit():
-                return float(tempo_str)
-            
-            partes = tempo_str.split(':')
-            if len(partes) >= 2:
-                horas = int(partes[0])
-                minutos = int(partes[1])
-                return horas + (minutos/60)
-            return 0.0
-        except (ValueError, TypeError):
-            return 0.0
+        """Converte string de tempo (HH:MM:SS, HH:MM ou decimal) para horas decimais."""
+        return converter_tempo_para_horas(tempo_str)
             
     def calcular_horas_restantes(self, dados):
         """Calcula horas restantes para cada projeto."""
@@ -0,0 +1,289 @@
+"""
+Motor de KPIs do dashboard macro.
+
+Cada KPI é declarado como um nó com entradas explícitas (outros nós). O motor
+resolve o grafo sob demanda e guarda a saída de cada nó associada à versão dos
+resultados (versão dos dados + dia): intermediários compartilhados, como os
+dados preparados por ``preparar_dados_base`` e as máscaras de projetos não
+concluídos, fora da CDB, ativos e concluídos no mês, são calculados uma única
+vez por versão e reaproveitados por todos os KPIs que dependem deles. Depois
+do primeiro carregamento, renderizar o dashboard é só leitura de cache.
+
+Saídas vazias (``None``, DataFrame/Series/coleção vazios ou a estrutura
+``{'dados': <vazio>, 'metricas': {}}`` que os cálculos devolvem quando falham)
+não são cacheadas, nem as saídas calculadas a partir delas: a próxima leitura
+recalcula (dentro de uma mesma resolução, como ``obter_varios``, são calculadas
+uma vez só). Exceções propagam sem deixar nada no cache.
+
+Nós cuja saída também depende de outro estado (ex: ``backlog_exists``, lido
+do banco) declaram ``versao_extra``: a função é consultada a cada leitura e
+compõe a versão do nó, sem invalidar as entradas compartilhadas.
+
+Requisições simultâneas com o cache frio não repetem o cálculo: cada nó passa
+por um ``SingleFlight`` chaveado por (nó, versão).
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from app.utils.cache import SingleFlight, copia_leve
+from app.utils.data_version import obter_versao_backlogs
+
+logger = logging.getLogger(__name__)
+
+
+def saida_vazia(saida):
+    """True para saídas que não devem ser cacheadas: vazias ou a estrutura de falha dos cálculos."""
+    if saida is None:
+        return True
+    if isinstance(saida, (pd.DataFrame, pd.Series)):
+        return saida.empty
+    if isinstance(saida, (dict, list, tuple)) and not saida:
+        return True
+    if isinstance(saida, dict) and 'dados' in saida and 'metricas' in saida:
+        dados = saida['dados']
+        return not saida['metricas'] and (dados is None or len(dados) == 0)
+    return False
+
+
+class NoKPI:
+    """Nó do grafo: ``funcao(servico, *entradas)`` calcula a saída a partir das saídas das entradas."""
+
+    def __init__(self, nome, entradas, funcao, versao_extra=None):
+        self.nome = nome
+        self.entradas = tuple(entradas)
+        self.funcao = funcao
+        self.versao_extra = versao_extra
+
+    def versao(self, versao):
+        """Versão da saída do nó: a versão dos resultados, mais ``versao_extra()`` se declarada."""
+        return versao if self.versao_extra is None else (versao, self.versao_extra())
+
+
+class MotorKPIs:
+    """Grafo de KPIs com cache por nó e versão."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self._nos = {}
+        self._cache = {}  # nome do nó -> (versão do nó, saída)
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight(f'kpis_{nome}')
+        self.calculos = {}
+        self.hits = 0
+        self.tempo_calculo = {}
+
+    def no(self, nome, entradas=(), versao_extra=None):
+        """
+        Decorator que registra ``funcao(servico, *entradas)`` como o nó ``nome``.
+
+        ``versao_extra`` (callable sem argumentos) entra na versão só deste nó.
+        """
+        def registrar(funcao):
+            for entrada in entradas:
+                if entrada not in self._nos:
+                    raise ValueError(f"Nó '{nome}' depende de '{entrada}', que não foi declarado antes")
+            self._nos[nome] = NoKPI(nome, entradas, funcao, versao_extra)
+            return funcao
+        return registrar
+
+    def obter(self, nome, servico, versao, resolucao=None):
+        """
+        Saída do nó ``nome`` para ``versao``, calculando (uma vez) o que estiver faltando.
+
+        ``resolucao`` guarda as saídas não cacheadas já calculadas na resolução corrente
+        (ex: ``obter_varios``), para que uma entrada vazia não seja recalculada por cada dependente.
+        """
+        if resolucao is None:
+            resolucao = {}
+        if nome in resolucao:
+            return resolucao[nome]
+        versao_no = self._nos[nome].versao(versao)
+        with self._lock:
+            item = self._cache.get(nome)
+        if item is not None and item[0] == versao_no:
+            with self._lock:
+                self.hits += 1
+            return item[1]
+        return self._single_flight.executar((nome, versao_no),
+                                            lambda: self._calcular(nome, servico, versao, versao_no, resolucao))
+
+    def _calcular(self, nome, servico, versao, versao_no, resolucao):
+        # Outra thread pode ter concluído o cálculo enquanto esta aguardava
+        with self._lock:
+            item = self._cache.get(nome)
+        if item is not None and item[0] == versao_no:
+            return item[1]
+
+        no = self._nos[nome]
+        entradas = [copia_leve(self.obter(entrada, servico, versao, resolucao)) for entrada in no.entradas]
+        versoes_entradas = [self._nos[entrada].versao(versao) for entrada in no.entradas]
+        inicio = time.time()
+        saida = no.funcao(servico, *entradas)
+        duracao = time.time() - inicio
+        with self._lock:
+            # Só cacheia se a saída não é vazia e todas as entradas ficaram em cache
+            cacheavel = not saida_vazia(saida) and all(
+                self._cache.get(entrada, (None,))[0] == versao_entrada
+                for entrada, versao_entrada in zip(no.entradas, versoes_entradas)
+            )
+            if cacheavel:
+                self._cache[nome] = (versao_no, saida)
+            else:
+                self._cache.pop(nome, None)
+                resolucao[nome] = saida
+            self.calculos[nome] = self.calculos.get(nome, 0) + 1
+            self.tempo_calculo[nome] = round(duracao * 1000, 1)
+        logger.debug(f"KPI {self.nome}.{nome} calculado em {duracao * 1000:.1f}ms")
+        return saida
+
+    def obter_varios(self, nomes, servico, versao):
+        """Dicionário {nó: saída} para os nós pedidos."""
+        resolucao = {}
+        return {nome: self.obter(nome, servico, versao, resolucao) for nome in nomes}
+
+    def invalidar(self):
+        """Descarta todas as saídas cacheadas."""
+        with self._lock:
+            removidos = len(self._cache)
+            self._cache.clear()
+        return removidos
+
+    def stats(self):
+        """Cálculos por nó, hits e tempo do último cálculo de cada nó."""
+        with self._lock:
+            return {
+                'nome': self.nome,
+                'nos': list(self._nos),
+                'nos_cacheados': len(self._cache),
+                'hits': self.hits,
+                'calculos': dict(self.calculos),
+                'tempo_ultimo_calculo_ms': dict(self.tempo_calculo)
+            }
+
+
+# --- Grafo do dashboard macro ---
+
+MOTOR_DASHBOARD = MotorKPIs('dashboard_macro')
+
+
+@MOTOR_DASHBOARD.no('dados')
+def _dados(servico):
+    return servico.carregar_dados(fonte=None)
+
+
+@MOTOR_DASHBOARD.no('dados_periodo')
+def _dados_periodo(servico):
+    return servico.carregar_dados_periodo_dashboard()
+
+
+@MOTOR_DASHBOARD.no('dados_base', ['dados'])
+def _dados_base(servico, dados):
+    return servico.preparar_dados_base(dados)
+
+
+# Máscaras booleanas alinhadas ao índice de dados_base (preparar_dados_base preserva o índice).
+# Se a máscara não puder ser calculada (ex: coluna ausente), o nó devolve None (não cacheado) e
+# cada KPI recalcula a sua e trata a falha como antes.
+
+def _mascara(nome, funcao, *args):
+    try:
+        return funcao(*args)
+    except Exception as e:
+        logger.warning(f"Máscara {nome} não calculada: {e}")
+        return None
+
+
+@MOTOR_DASHBOARD.no('mascara_nao_concluidos', ['dados_base'])
+def _mascara_nao_concluidos(servico, dados_base):
+    return _mascara('nao_concluidos', servico.mascara_nao_concluidos, dados_base)
+
+
+@MOTOR_DASHBOARD.no('mascara_fora_cdb', ['dados_base'])
+def _mascara_fora_cdb(servico, dados_base):
+    return _mascara('fora_cdb', servico.mascara_fora_cdb, dados_base)
+
+
+@MOTOR_DASHBOARD.no('mascara_ativos', ['dados_base', 'mascara_nao_concluidos', 'mascara_fora_cdb'])
+def _mascara_ativos(servico, dados_base, nao_concluidos, fora_cdb):
+    return _mascara('ativos', servico.mascara_ativos, dados_base, nao_concluidos, fora_cdb)
+
+
+@MOTOR_DASHBOARD.no('mascara_concluidos_mes', ['dados_base'])
+def _mascara_concluidos_mes(servico, dados_base):
+    return _mascara('concluidos_mes', servico.mascara_concluidos_mes, dados_base)
+
+
+@MOTOR_DASHBOARD.no('projetos_ativos', ['dados_base', 'mascara_ativos'], versao_extra=obter_versao_backlogs)
+def _projetos_ativos(servico, dados_base, mascara):
+    return servico.calcular_projetos_ativos(dados_base, mascara)
+
+
+@MOTOR_DASHBOARD.no('projetos_criticos', ['dados_base', 'mascara_ativos'], versao_extra=obter_versao_backlogs)
+def _projetos_criticos(servico, dados_base, mascara):
+    return servico.calcular_projetos_criticos(dados_base, mascara)
+
+
+@MOTOR_DASHBOARD.no('media_horas', ['dados_base', 'mascara_nao_concluidos'])
+def _media_horas(servico, dados_base, mascara):
+    return servico.calcular_media_horas(dados_base, mascara)
+
+
+@MOTOR_DASHBOARD.no('projetos_concluidos', ['dados_base', 'mascara_concluidos_mes'],
+                    versao_extra=obter_versao_backlogs)
+def _projetos_concluidos(servico, dados_base, mascara):
+    return servico.calcular_projetos_concluidos(dados_base, mascara)
+
+
+@MOTOR_DASHBOARD.no('projetos_risco', ['dados_base', 'mascara_nao_concluidos'])
+def _projetos_risco(servico, dados_base, mascara):
+    return servico.calcular_projetos_risco(dados_base, mascara)
+
+
+@MOTOR_DASHBOARD.no('eficiencia_entrega', ['dados_periodo'], versao_extra=obter_versao_backlogs)
+def _eficiencia_entrega(servico, dados_periodo):
+    # Usa dados dos últimos 3 meses
+    return servico.calcular_eficiencia_entrega(dados_periodo)
+
+
+@MOTOR_DASHBOARD.no('tempo_medio_vida', ['dados_periodo'])
+def _tempo_medio_vida(servico, dados_periodo):
+    return servico.calcular_tempo_medio_vida(dados_periodo, datetime.now())
+
+
+@MOTOR_DASHBOARD.no('agregacoes', ['dados'])
+def _agregacoes(servico, dados):
+    # Normaliza Status por conta própria (mantém 'NAN' para status vazio), por isso recebe os dados brutos
+    return servico.calcular_agregacoes(dados)
+
+
+@MOTOR_DASHBOARD.no('dados_especialistas', ['dados_base', 'mascara_nao_concluidos'])
+def _dados_especialistas(servico, dados_base, mascara):
+    return servico.calcular_alocacao_especialistas(dados_base, mascara)
+
+
+@MOTOR_DASHBOARD.no('media_alocacao', ['dados_especialistas'])
+def _media_alocacao(servico, dados_especialistas):
+    taxas_uso = [dados.get('taxa_uso', 0) for dados in (dados_especialistas or {}).values()]
+    return sum(taxas_uso) / len(taxas_uso) if taxas_uso else 0.0
+
+
+@MOTOR_DASHBOARD.no('dados_abas', ['dados_base'])
+def _dados_abas(servico, dados_base):
+    return servico.preparar_dados_abas(dados_base)
+
+
+@MOTOR_DASHBOARD.no('ocupacao_squads', ['dados_base'])
+def _ocupacao_squads(servico, dados_base):
+    return servico.calcular_ocupacao_squads(dados_base)
+
+
+KPIS_DASHBOARD = [
+    'projetos_ativos', 'projetos_criticos', 'media_horas', 'projetos_concluidos', 'eficiencia_entrega',
+    'projetos_risco', 'tempo_medio_vida', 'agregacoes', 'dados_especialistas', 'media_alocacao',
+    'dados_abas', 'ocupacao_squads'
+]
@@ -4,6 +4,10 @@ from datetime import datetime, timedelta
 import logging
 import pandas as pd
 from app.macro.services import MacroService
+from app.utils.cubo import periodo_mes
+from app.utils.historico import HistoricoMensal
+from app.utils.ingestion import contar_valores, ler_csv_projetado, substituir_valores
+from app.utils.paralelo import carregar_em_paralelo
 import os
 
 logger = logging.getLogger(__name__)
@@ -20,9 +24,10 @@ class PeriodoFiscalManager:
         if dados.empty or 'DataTermino' not in dados.columns:
             return {'trimestral': [], 'semestral': []}
         
-        # Converte DataTermino para datetime se necessário
-        dados_temp = dados.copy()
-        dados_temp['DataTermino'] = pd.to_datetime(dados_temp['DataTermino'], errors='coerce')
+        # Converte DataTermino para datetime se necessário (o DataFrame canônico já vem tipado)
+        dados_temp = dados.copy(deep=False)
+        if not pd.api.types.is_datetime64_any_dtype(dados_temp['DataTermino']):
+            dados_temp['DataTermino'] = pd.to_datetime(dados_temp['DataTermino'], errors='coerce')
         
         # Remove registros sem data de término
         dados_temp = dados_temp.dropna(subset=['DataTermino'])
@@ -76,15 +81,29 @@ class StatusReportHistoricoService:
         self.macro_service = MacroService()
         self.data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
         
+        # Histórico mensal em formato longo: mês/ano de cada arquivo e horas incrementais
+        self.historico = HistoricoMensal(self.data_dir)
+        
+        # Meses já carregados por esta instância (KPIs e exportação reaproveitam a mesma carga)
+        self._dados_meses = {}
+        
         # Mapeamento de meses disponíveis (apenas dados históricos)
         self.meses_disponiveis = {
-            'jan': {'arquivo': 'dadosr_apt_jan.csv', 'nome': 'Janeiro', 'numero': 1, 'filtro_mes': '2025-01'},
-            'fev': {'arquivo': 'dadosr_apt_fev.csv', 'nome': 'Fevereiro', 'numero': 2, 'filtro_mes': '2025-02'},
-            'mar': {'arquivo': 'dadosr_apt_mar.csv', 'nome': 'Março', 'numero': 3, 'filtro_mes': '2025-03'},
-            'abr': {'arquivo': 'dadosr_apt_abr.csv', 'nome': 'Abril', 'numero': 4, 'filtro_mes': '2025-04'},
-            'mai': {'arquivo': 'dadosr_apt_mai.csv', 'nome': 'Maio', 'numero': 5, 'filtro_mes': '2025-05'},
-            'jun': {'arquivo': 'dadosr_apt_jun.csv', 'nome': 'Junho', 'numero': 6, 'filtro_mes': '2025-06'},
+            'jan': {'arquivo': 'dadosr_apt_jan.csv', 'nome': 'Janeiro', 'numero': 1},
+            'fev': {'arquivo': 'dadosr_apt_fev.csv', 'nome': 'Fevereiro', 'numero': 2},
+            'mar': {'arquivo': 'dadosr_apt_mar.csv', 'nome': 'Março', 'numero': 3},
+            'abr': {'arquivo': 'dadosr_apt_abr.csv', 'nome': 'Abril', 'numero': 4},
+            'mai': {'arquivo': 'dadosr_apt_mai.csv', 'nome': 'Maio', 'numero': 5},
+            'jun': {'arquivo': 'dadosr_apt_jun.csv', 'nome': 'Junho', 'numero': 6},
         }
+        
+        # Ano de cada mês vem do registro no histórico (não é mais fixo no código)
+        for info in self.meses_disponiveis.values():
+            periodo = self.historico.mes_do_arquivo(info['arquivo'])
+            if periodo is None:
+                periodo = pd.Period(year=datetime.now().year, month=info['numero'], freq='M')
+            info['ano'] = periodo.year
+            info['filtro_mes'] = str(periodo)
     
     def listar_meses_disponiveis(self):
         """
@@ -146,20 +165,23 @@ class StatusReportHistoricoService:
             detalhes_por_mes = {}
             lista_horas_mensais = []  # Para calcular média das horas
             
-            # Carrega dados de todos os meses do período
-            dados_por_mes = {}
-            for mes_key in meses_validos:
-                info_mes = self.meses_disponiveis[mes_key]
-                dados_mes = self._carregar_dados_mes_historico(info_mes['arquivo'])
-                if not dados_mes.empty:
-                    dados_por_mes[mes_key] = dados_mes
+            # Carrega dados de todos os meses do período (em paralelo)
+            dados_por_mes = {
+                mes_key: dados_mes
+                for mes_key, dados_mes in self._carregar_meses(meses_validos).items()
+                if not dados_mes.empty
+            }
             
             # === SOLUÇÃO AUTOMÁTICA: EXECUTA STATUS REPORT MENSAL PARA CADA MÊS ===
             # Executa o Status Report individual de cada mês em background e consolida
             logger.info("🔄 Executando Status Reports mensais automaticamente...")
             
             dados_mensais_prazo = []
-            mes_anterior_key = None
+            
+            # Horas incrementais de todos os meses do período numa única diferença sobre o histórico
+            deltas_periodo = self.historico.deltas_horas(
+                [self.meses_disponiveis[mes_key]['filtro_mes'] for mes_key in meses_validos]
+            )
             
             for i, mes_key in enumerate(meses_validos):
                 try:
@@ -175,7 +197,7 @@ class StatusReportHistoricoService:
                     
                     # EXECUTA O STATUS REPORT MENSAL COMPLETO
                     # Simula a data de referência do mês
-                    mes_ref = datetime(2025, info_mes['numero'], 1)
+                    mes_ref = datetime(info_mes['ano'], info_mes['numero'], 1)
                     
                     # 1. Calcula projetos entregues (fechados) usando lógica do MacroService
                     projetos_entregues_resultado = self.macro_service.calcular_projetos_entregues(dados_mes, mes_ref)
@@ -196,9 +218,8 @@ class StatusReportHistoricoService:
                         
                         if not projetos_para_faturamento.empty:
                             # MODIFICAÇÃO: Converte ENGAJAMENTO para TERMINO antes da contagem
-                            faturamento_modificado = projetos_para_faturamento['Faturamento'].copy()
-                            faturamento_modificado = faturamento_modificado.replace('ENGAJAMENTO', 'TERMINO')
-                            contagem_fat = faturamento_modificado.value_counts().to_dict()
+                            faturamento_modificado = substituir_valores(projetos_para_faturamento['Faturamento'], {'ENGAJAMENTO': 'TERMINO'})
+                            contagem_fat = contar_valores(faturamento_modificado).to_dict()
                             
                             # Log com informações sobre filtros aplicados
                             total_novos = len(novos_projetos_data)
@@ -236,8 +257,8 @@ class StatusReportHistoricoService:
                     
                     # 4. Horas trabalhadas INCREMENTAIS (diferença do mês anterior)
                     horas_incrementais = self._calcular_horas_incrementais(
-                        dados_mes, 
-                        dados_por_mes.get(mes_anterior_key) if mes_anterior_key else None,
+                        dados_mes,
+                        deltas_periodo[deltas_periodo['MesSnapshot'] == periodo_mes(info_mes['filtro_mes'])],
                         info_mes['nome']
                     )
                     
@@ -300,18 +321,14 @@ class StatusReportHistoricoService:
                     arquivo_path = os.path.join(self.data_dir, nome_arquivo)
                     
                     if os.path.exists(arquivo_path):
-                        dados_mes_squad = self.macro_service.carregar_dados(fonte=arquivo_path)
+                        # Cubo pré-agregado do arquivo do mês: novos projetos = fatia do mês de abertura
+                        cubo_mes = self.macro_service.obter_cubo(nome_arquivo)
                         
-                        if not dados_mes_squad.empty and 'DataInicio' in dados_mes_squad.columns:
-                            dados_mes_copy = dados_mes_squad.copy()
-                            dados_mes_copy['DataInicio'] = pd.to_datetime(dados_mes_copy['DataInicio'], errors='coerce')
-                            
-                            # Filtra projetos novos do mês
-                            filtro_mes = dados_mes_copy['DataInicio'].dt.strftime('%Y-%m') == info_mes['filtro_mes']
-                            projetos_novos_squad = dados_mes_copy[filtro_mes]
+                        if not cubo_mes.vazio:
+                            projetos_novos_squad = cubo_mes.fatiar(MesInicio=periodo_mes(info_mes['filtro_mes']))
                             
-                            if 'Squad' in projetos_novos_squad.columns:
-                                squad_counts = projetos_novos_squad['Squad'].value_counts()
+                            if not projetos_novos_squad.vazio:
+                                squad_counts = projetos_novos_squad.contar('Squad')
                                 
                                 azure_count = 0
                                 m365_count = 0
@@ -375,9 +392,7 @@ class StatusReportHistoricoService:
                     })
                     
                     logger.info(f"✅ {info_mes['nome']}: {fechados_mes} fechados, {no_prazo_mes} no prazo, {fora_prazo_mes} fora prazo ({taxa_prazo_mes}%), {abertos_mes} abertos, {horas_totais_mes:.1f}h totais ({horas_incrementais:.1f}h incrementais)")
-                    
-                    # Atualiza mês anterior para próxima iteração
-                    mes_anterior_key = mes_key
+
                     
                 except Exception as e:
                     logger.error(f"❌ Erro ao processar Status Report de {info_mes['nome']}: {str(e)}")
@@ -542,7 +557,7 @@ class StatusReportHistoricoService:
                                 
                                 # Conta por squad se a coluna existe
                                 if 'Squad' in projetos_novos_mes.columns:
-                                    squad_counts = projetos_novos_mes['Squad'].value_counts()
+                                    squad_counts = contar_valores(projetos_novos_mes['Squad'])
                                     
                                     # Mapeia os nomes corretamente
                                     azure_count = 0
@@ -646,13 +661,13 @@ class StatusReportHistoricoService:
             logger.error(f"❌ Erro geral ao processar período histórico: {str(e)}")
             return self._criar_resultado_vazio(f"Erro ao processar período: {str(e)}")
     
-    def _calcular_horas_incrementais(self, dados_mes_atual, dados_mes_anterior, nome_mes):
+    def _calcular_horas_incrementais(self, dados_mes_atual, deltas_mes, nome_mes):
         """
-        Calcula as horas incrementais trabalhadas no mês atual comparando com o mês anterior
+        Calcula as horas incrementais trabalhadas no mês atual a partir do histórico mensal
         
         Args:
-            dados_mes_atual: DataFrame do mês atual
-            dados_mes_anterior: DataFrame do mês anterior (ou None se for o primeiro mês)
+            dados_mes_atual: DataFrame do mês atual (usado quando o mês anterior não está no histórico)
+            deltas_mes: Linhas do mês em ``HistoricoMensal.deltas_horas`` (uma por projeto)
             nome_mes: Nome do mês para logs
         
         Returns:
@@ -667,35 +682,8 @@ class StatusReportHistoricoService:
                 '6574': 'ENFORCE - ajuste retroativo'
             }
             
-            # Mapeamento de mês atual -> arquivo do mês anterior
-            MAPEAMENTO_MES_ANTERIOR = {
-                'JANEIRO': None,  # Janeiro não tem mês anterior disponível
-                'FEVEREIRO': 'dadosr_apt_jan.csv',
-                'MARÇO': 'dadosr_apt_fev.csv', 
-                'ABRIL': 'dadosr_apt_mar.csv',
-                'MAIO': 'dadosr_apt_abr.csv'
-            }
-            
-            if dados_mes_anterior is None:
-                # CASO GERAL: Se qualquer mês for selecionado individualmente, carrega o mês anterior automaticamente
-                mes_key = nome_mes.upper()
-                arquivo_anterior = MAPEAMENTO_MES_ANTERIOR.get(mes_key)
-                
-                if arquivo_anterior:
-                    logger.info(f"   🔄 {nome_mes} selecionado individualmente - carregando mês anterior para cálculo incremental")
-                    try:
-                        # Carrega dados do mês anterior automaticamente
-                        dados_anterior = self._carregar_dados_mes_historico(arquivo_anterior)
-                        if not dados_anterior.empty:
-                            logger.info(f"   ✅ Mês anterior carregado com {len(dados_anterior)} registros para cálculo incremental")
-                            # Recursão com os dados do mês anterior
-                            return self._calcular_horas_incrementais(dados_mes_atual, dados_anterior, nome_mes)
-                        else:
-                            logger.warning(f"   ⚠️ Não foi possível carregar dados do mês anterior - usando horas totais")
-                    except Exception as e:
-                        logger.warning(f"   ⚠️ Erro ao carregar mês anterior: {str(e)} - usando horas totais")
-                else:
-                    logger.info(f"   ℹ️ {nome_mes} não tem mês anterior disponível - usando horas totais")
+            if deltas_mes.empty or deltas_mes['HorasAnteriores'].isna().all():
+                logger.info(f"   ℹ️ {nome_mes} não tem mês anterior no histórico - usando horas totais")
                 
                 # Primeiro mês: todas as horas são incrementais
                 horas_total = dados_mes_atual['HorasTrabalhadas'].fillna(0).sum()
@@ -730,48 +718,29 @@ class StatusReportHistoricoService:
                 
                 return horas_total
             
-            # Prepara dados para comparação por projeto
-            atual = dados_mes_atual[['Numero', 'HorasTrabalhadas']].copy()
-            anterior = dados_mes_anterior[['Numero', 'HorasTrabalhadas']].copy()
-            
-            # Garante que HorasTrabalhadas é numérico
-            atual['HorasTrabalhadas'] = pd.to_numeric(atual['HorasTrabalhadas'], errors='coerce').fillna(0)
-            anterior['HorasTrabalhadas'] = pd.to_numeric(anterior['HorasTrabalhadas'], errors='coerce').fillna(0)
-            
-            # Remove duplicatas (mantém o maior valor de horas por projeto)
-            atual = atual.groupby('Numero')['HorasTrabalhadas'].max().reset_index()
-            anterior = anterior.groupby('Numero')['HorasTrabalhadas'].max().reset_index()
-            
-            # Merge para comparar projetos comuns
-            comparacao = atual.merge(anterior, on='Numero', how='left', suffixes=('_atual', '_anterior'))
-            comparacao['HorasTrabalhadas_anterior'] = comparacao['HorasTrabalhadas_anterior'].fillna(0)
-            
-            # Calcula incremento por projeto
-            comparacao['incremento'] = comparacao['HorasTrabalhadas_atual'] - comparacao['HorasTrabalhadas_anterior']
+            # Diferença já calculada sobre o histórico (projetos sem o mês anterior contam desde 0)
+            comparacao = deltas_mes[['Numero', 'HorasAnteriores', 'HorasIncrementais']]
+            incremento = comparacao['HorasIncrementais']
             
             # FILTRO ESPECÍFICO: Ignora horas dos projetos outliers em Abril
             projetos_filtrados = 0
             horas_filtradas = 0
             
             if nome_mes.upper() == 'ABRIL':
-                for idx, row in comparacao.iterrows():
-                    numero_str = str(row['Numero'])
-                    if numero_str in PROJETOS_OUTLIERS_ABRIL:
-                        horas_original = row['incremento']
-                        comparacao.at[idx, 'incremento'] = 0  # Zera o incremento
-                        projetos_filtrados += 1
-                        horas_filtradas += max(0, horas_original)
-                        logger.info(f"   🚫 Projeto {numero_str} ({PROJETOS_OUTLIERS_ABRIL[numero_str]}): {horas_original:.1f}h filtradas")
+                numeros = comparacao['Numero'].astype(str)
+                outliers = numeros.isin(list(PROJETOS_OUTLIERS_ABRIL))
+                for numero_str, horas_original in zip(numeros[outliers], incremento[outliers]):
+                    projetos_filtrados += 1
+                    horas_filtradas += max(0, horas_original)
+                    logger.info(f"   🚫 Projeto {numero_str} ({PROJETOS_OUTLIERS_ABRIL[numero_str]}): {horas_original:.1f}h filtradas")
+                incremento = incremento.where(~outliers, 0)  # Zera o incremento
             
-            # Garante que incrementos negativos sejam zero (correções de dados)
-            comparacao['incremento'] = comparacao['incremento'].clip(lower=0)
-            
-            # Soma total de incrementos
-            horas_incrementais = comparacao['incremento'].sum()
+            # Garante que incrementos negativos sejam zero (correções de dados) e soma
+            horas_incrementais = incremento.clip(lower=0).sum()
             
             # Log detalhado
-            projetos_novos = len(comparacao[comparacao['HorasTrabalhadas_anterior'] == 0])
-            projetos_continuos = len(comparacao[comparacao['HorasTrabalhadas_anterior'] > 0])
+            projetos_novos = int((comparacao['HorasAnteriores'] == 0).sum())
+            projetos_continuos = int((comparacao['HorasAnteriores'] > 0).sum())
             
             logger.info(f"   🟩 {nome_mes}: {projetos_novos} projetos novos, {projetos_continuos} contínuos")
             if projetos_filtrados > 0:
@@ -942,9 +911,29 @@ class StatusReportHistoricoService:
                 'horas_trabalhadas': 0.0
             }
     
-    def _carregar_dados_mes_historico(self, nome_arquivo):
+    def _carregar_meses(self, meses):
         """
-        Carrega dados de um arquivo histórico específico
+        Carrega os arquivos históricos dos meses pedidos concorrentemente
+        
+        Args:
+            meses: Lista de chaves de mês (ex: ['jan', 'fev'])
+        
+        Returns:
+            dict: {mes_key: DataFrame} na ordem pedida (DataFrame vazio se o mês não carregar)
+        """
+        pendentes = [mes_key for mes_key in dict.fromkeys(meses) if mes_key not in self._dados_meses]
+        if pendentes:
+            carregados = carregar_em_paralelo(
+                [self.meses_disponiveis[mes_key]['arquivo'] for mes_key in pendentes],
+                self._carregar_dados_mes_historico,
+                descricao='meses históricos'
+            )
+            self._dados_meses.update(zip(pendentes, carregados))
+        return {mes_key: self._dados_meses[mes_key] for mes_key in meses}
+    
+    def _carregar_dados_mes_historico(self, nome_arquivo, colunas=None):
+        """
+        Carrega dados de um arquivo histórico específico (apenas ``colunas``, se informadas)
         """
         try:
             arquivo_path = os.path.join(self.data_dir, nome_arquivo)
@@ -953,6 +942,9 @@ class StatusReportHistoricoService:
                 logger.error(f"Arquivo histórico não encontrado: {arquivo_path}")
                 return pd.DataFrame()
             
+            if colunas:
+                return ler_csv_projetado(arquivo_path, colunas)
+            
             # Usa a mesma lógica do MacroService para carregar
             logger.info(f"Carregando fonte histórica: {arquivo_path}")
             return self.macro_service.carregar_dados(fonte=arquivo_path)
@@ -983,11 +975,12 @@ class StatusReportHistoricoService:
             logger.info(f"📊 Carregando dados brutos para exportação: {meses_selecionados}")
             
             dataframes = []
+            dados_carregados = self._carregar_meses([m for m in meses_selecionados if m in self.meses_disponiveis])
             
             for mes_key in meses_selecionados:
                 if mes_key in self.meses_disponiveis:
                     info_mes = self.meses_disponiveis[mes_key]
-                    dados_mes = self._carregar_dados_mes_historico(info_mes['arquivo'])
+                    dados_mes = dados_carregados[mes_key]
                     
                     if not dados_mes.empty:
                         # Adiciona uma coluna identificando o mês de origem
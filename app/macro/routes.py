@@ -8,6 +8,10 @@ from io import BytesIO
 import os # Removido para debug - PATH OK
 import json
 from ..utils.decorators import module_required, feature_required
+from ..utils.data_version import incrementar_versao_dados
+from ..utils.http_cache import resposta_condicional, resposta_de_falha
+from ..utils.cubo import CuboMensal
+from ..utils.paralelo import carregar_em_paralelo
 
 # Inicializa logger
 logger = logging.getLogger(__name__)
@@ -102,112 +106,20 @@ def get_conclusao_color(conclusao):
 def dashboard():
     """Rota principal do dashboard macro"""
     try:
-        # --- INÍCIO: Carregar dados para Tempo Médio de Vida (Dashboard - Atual + 2 meses anteriores) ---
-        hoje = datetime.now()
-        dataframes_periodo_dash = []
-        fontes_carregadas_dash = []
-        mes_atual_dash_loop = hoje.replace(day=1)
-        
-        for i in range(3): # Carrega mês atual (i=0) e os 2 anteriores (i=1, i=2)
-            mes_loop = mes_atual_dash_loop.month
-            ano_loop = mes_atual_dash_loop.year
-            fonte_mes_loop = None
-            fonte_desc = ""
-            
-            is_current_month = (i == 0)
-            
-            if is_current_month:
-                fonte_mes_loop = None # Usar default dadosr.csv
-                fonte_desc = "dadosr.csv (atual)"
-            else:
-                # Lógica para determinar a fonte dos meses anteriores
-                # Precisa ser robusta para diferentes meses/anos
-                if mes_loop == 3 and ano_loop == 2025:
-                     fonte_mes_loop = 'dadosr_apt_mar'
-                elif mes_loop == 2 and ano_loop == 2025:
-                     fonte_mes_loop = 'dadosr_apt_fev'
-                elif mes_loop == 1 and ano_loop == 2025:
-                     fonte_mes_loop = 'dadosr_apt_jan'
-                # Adicionar mais regras aqui, ou uma lógica mais dinâmica baseada no nome do mês
-                # Exemplo dinâmico (requer teste): 
-                # else:
-                #    mes_nome_abbr = mes_atual_dash_loop.strftime('%b').lower()
-                #    fonte_mes_loop = f'dadosr_apt_{mes_nome_abbr}'
-                
-                if fonte_mes_loop:
-                    fonte_desc = fonte_mes_loop
-                else:
-                    fonte_desc = f"Não encontrada para {mes_loop}/{ano_loop}"
-
-            # Tenta carregar os dados se a fonte foi definida (ou se for o mês atual)
-            if fonte_mes_loop is not None or is_current_month:
-                logger.info(f"[Dashboard TMV] Tentando carregar dados da fonte: {fonte_desc} para {mes_loop}/{ano_loop}")
-                # Passa None para carregar dadosr.csv no mês atual
-                dados_mes = macro_service.carregar_dados(fonte=fonte_mes_loop) 
-                if not dados_mes.empty:
-                    dataframes_periodo_dash.append(dados_mes)
-                    fontes_carregadas_dash.append(fonte_desc)
-                else:
-                    logger.warning(f"[Dashboard TMV] Dados vazios ou falha ao carregar fonte: {fonte_desc}")
-            else:
-                 logger.warning(f"[Dashboard TMV] Fonte de dados não encontrada/definida para mês passado {mes_loop}/{ano_loop}")
-
-            # Calcula o mês anterior para a próxima iteração
-            primeiro_dia_mes_anterior_loop = mes_atual_dash_loop - timedelta(days=1)
-            mes_atual_dash_loop = primeiro_dia_mes_anterior_loop.replace(day=1)
-            
-        # Combina os dataframes
-        dados_combinados_dash = pd.DataFrame()
-        if dataframes_periodo_dash:
-            try:
-                 dados_combinados_dash = pd.concat(dataframes_periodo_dash, ignore_index=True)
-                 logger.info(f"[Dashboard TMV] Dados combinados de {len(dataframes_periodo_dash)} fontes ({fontes_carregadas_dash}) para cálculo. Total de linhas: {len(dados_combinados_dash)}")
-            except Exception as e_concat:
-                 logger.error(f"[Dashboard TMV] Erro ao concatenar dataframes: {e_concat}")
-        else:
-            logger.warning("[Dashboard TMV] Nenhum dataframe carregado para o período de 3 meses (atual + 2 anteriores).")
-            
-        # Calcula o tempo médio de vida usando os dados combinados e HOJE como referência
-        tempo_medio_vida = macro_service.calcular_tempo_medio_vida(dados_combinados_dash, hoje)
-        # --- FIM: Carregar dados para Tempo Médio de Vida --- 
-        
-        # --- INÍCIO: Carregar dados apenas do mês atual (dadosr.csv) para outros KPIs --- 
-        logger.info("[Dashboard] Carregando dados atuais (dadosr.csv) para outros KPIs.")
-        dados_atuais = macro_service.carregar_dados(fonte=None) # fonte=None carrega dadosr.csv
-        
-        if dados_atuais.empty:
-            logger.warning("[Dashboard] Dados atuais (dadosr.csv) vazios. Alguns KPIs podem não ser calculados.")
-            # Cria DataFrame vazio para evitar erros, mas KPIs baseados nele serão 0/vazios
-            dados_atuais = pd.DataFrame() 
-        # --- FIM: Carregar dados apenas do mês atual --- 
-        
-        # Calcula KPIs específicos usando DADOS ATUAIS (dadosr.csv)
-        projetos_ativos = macro_service.calcular_projetos_ativos(dados_atuais)
-        projetos_criticos = macro_service.calcular_projetos_criticos(dados_atuais)
-        media_horas = macro_service.calcular_media_horas(dados_atuais)
-        projetos_concluidos = macro_service.calcular_projetos_concluidos(dados_atuais)
-        eficiencia_entrega = macro_service.calcular_eficiencia_entrega(dados_combinados_dash) # Usa dados dos últimos 3 meses
-        projetos_risco = macro_service.calcular_projetos_risco(dados_atuais)
-        # tempo_medio_vida já foi calculado acima com dados combinados
-        
-        # Calcula agregações por status usando DADOS ATUAIS
-        agregacoes = macro_service.calcular_agregacoes(dados_atuais)
-        
-        # Prepara dados dos especialistas usando DADOS ATUAIS
-        dados_especialistas = macro_service.calcular_alocacao_especialistas(dados_atuais)
-        
-        # Prepara dados das abas (incluindo Account Managers) usando DADOS ATUAIS
-        dados_abas = macro_service.preparar_dados_abas(dados_atuais)
-        
-        # Calcula média de alocação
-        media_alocacao = 0.0
-        if dados_especialistas:
-            taxas_uso = [dados.get('taxa_uso', 0) for dados in dados_especialistas.values()]
-            if taxas_uso:
-                media_alocacao = sum(taxas_uso) / len(taxas_uso)
-        
-        # Calcula ocupação dos Squads usando DADOS ATUAIS
-        ocupacao_squads = macro_service.calcular_ocupacao_squads(dados_atuais)
+        # KPIs resolvidos pelo motor de KPIs: intermediários calculados uma vez por versão dos dados
+        kpis = macro_service.obter_kpis_dashboard()
+        projetos_ativos = kpis['projetos_ativos']
+        projetos_criticos = kpis['projetos_criticos']
+        media_horas = kpis['media_horas']
+        projetos_concluidos = kpis['projetos_concluidos']
+        eficiencia_entrega = kpis['eficiencia_entrega']  # Usa dados dos últimos 3 meses
+        projetos_risco = kpis['projetos_risco']
+        tempo_medio_vida = kpis['tempo_medio_vida']  # Atual + 2 meses anteriores, com HOJE como referência
+        agregacoes = kpis['agregacoes']
+        dados_especialistas = kpis['dados_especialistas']
+        dados_abas = kpis['dados_abas']
+        media_alocacao = kpis['media_alocacao']
+        ocupacao_squads = kpis['ocupacao_squads']
         
         # Prepara contexto para o template
         context = {
@@ -454,6 +366,7 @@ def relatorio_projetos_entregues():
 
 @macro_bp.route('/api/projetos/entregues')
 @feature_required('macro.suite_relatorios')
+@resposta_condicional
 def get_projetos_entregues():
     """API para obter projetos entregues"""
     try:
@@ -462,7 +375,7 @@ def get_projetos_entregues():
         
         if dados.empty:
             logger.warning("Dados vazios para projetos entregues")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
         
         # Usa a função específica para calcular projetos concluídos (que filtra pelo mês atual)
         resultado_projetos = macro_service.calcular_projetos_concluidos(dados)
@@ -515,10 +428,11 @@ def get_projetos_entregues():
         
     except Exception as e:
         logger.exception(f"Erro na API de projetos entregues: {str(e)}")
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
 @macro_bp.route('/api/projetos/entregues/todos')
 @feature_required('macro.suite_relatorios')
+@resposta_condicional
 def get_todos_projetos_entregues():
     """API para obter todos os projetos entregues (histórico completo)"""
     try:
@@ -527,7 +441,7 @@ def get_todos_projetos_entregues():
         
         if dados.empty:
             logger.warning("Dados vazios para todos os projetos entregues")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
         
         # Usa dados já tratados
         dados_base = macro_service.preparar_dados_base(dados)
@@ -606,16 +520,17 @@ def get_todos_projetos_entregues():
         
     except Exception as e:
         logger.exception(f"Erro na API de todos os projetos entregues: {str(e)}")
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
 @macro_bp.route('/api/filter-options')
+@resposta_condicional
 def api_filter_options():
     """API para obter opções dos filtros do relatório geral"""
     try:
         dados = macro_service.carregar_dados()
         
         if dados.empty:
-            return jsonify({'success': False, 'message': 'Dados não disponíveis'})
+            return resposta_de_falha(jsonify({'success': False, 'message': 'Dados não disponíveis'}))
         
         # Obtém valores únicos para os filtros básicos
         squads = sorted(dados['Squad'].dropna().unique().tolist()) if 'Squad' in dados.columns else []
@@ -650,9 +565,10 @@ def api_filter_options():
         
     except Exception as e:
         logger.exception(f"Erro ao obter opções de filtros: {str(e)}")
-        return jsonify({'success': False, 'message': 'Erro interno do servidor'})
+        return resposta_de_falha(jsonify({'success': False, 'message': 'Erro interno do servidor'}))
 
 @macro_bp.route('/api/relatorio/geral')
+@resposta_condicional
 def api_relatorio_geral_dados():
     """
     API para fornecer os dados para o Relatório Geral.
@@ -698,16 +614,15 @@ def api_relatorio_geral_dados():
         
         if not dataframes_periodo:
             logger.warning("Nenhum dado foi carregado para os meses selecionados.")
-            return jsonify([])
-        
-        # Combina todos os dados
-        dados_relatorio = pd.concat(dataframes_periodo, ignore_index=True)
-        logger.info(f"Total de dados combinados: {len(dados_relatorio)} registros")
+            return resposta_de_falha(jsonify([]))
         
-        # Aplica filtros se existirem
+        # Combina todos os dados; com filtros, cada mês é filtrado no seu índice antes da combinação
         if filtros_dict:
-            dados_relatorio = macro_service.aplicar_filtros_relatorio(dados_relatorio, filtros_dict)
+            dados_relatorio = macro_service.filtrar_periodos_relatorio(dataframes_periodo, filtros_dict)
             logger.info(f"Dados após filtros: {len(dados_relatorio)} registros")
+        else:
+            dados_relatorio = pd.concat(dataframes_periodo, ignore_index=True)
+            logger.info(f"Total de dados combinados: {len(dados_relatorio)} registros")
         
         if dados_relatorio.empty:
             logger.info("Nenhum dado encontrado após a filtragem.")
@@ -735,8 +650,8 @@ def api_relatorio_geral_dados():
             # Fallback se não houver coluna Numero
             dados_consolidados_df = dados_relatorio
         
-        # Remove a coluna temporária usada para ordenação
-        dados_consolidados_df = dados_consolidados_df.drop(columns=['sort_key'])
+        # Remove a coluna temporária usada para ordenação e a coluna interna da ocupação/burn rate
+        dados_consolidados_df = dados_consolidados_df.drop(columns=['sort_key', 'HorasRestantesAjustadas'], errors='ignore')
 
         # === FORMATAÇÃO E AJUSTE DE DADOS ===
         
@@ -783,7 +698,8 @@ def api_relatorio_geral_dados():
         for col in colunas_texto:
             if col in dados_consolidados_df.columns:
                 dados_consolidados_df[col] = dados_consolidados_df[col].astype(str).str.strip()
-                dados_consolidados_df[col] = dados_consolidados_df[col].replace(['nan', 'NaN', 'None', ''], None)
+                valores_col = dados_consolidados_df[col]
+                dados_consolidados_df[col] = valores_col.mask(valores_col.isin(['nan', 'NaN', 'None', '']), None)
         
         # === ADIÇÃO DE INFORMAÇÕES DE CATEGORIA ===
         # Adiciona coluna de categoria se há filtro por categoria ou sempre para referência
@@ -849,29 +765,32 @@ def api_relatorio_geral_dados():
         return jsonify({"error": "Erro interno ao processar os dados."}), 500
 
 @macro_bp.route('/api/especialistas')
+@resposta_condicional
 def api_especialistas():
     """Retorna uma lista de especialistas e seus projetos."""
     logger.info("Acessando rota /api/especialistas")
     dados = macro_service.carregar_dados()
     if dados.empty:
         logger.warning("Dados vazios para /api/especialistas.")
-        return jsonify({})  # Retorna dicionário vazio em vez de lista vazia
+        return resposta_de_falha(jsonify({}))  # Retorna dicionário vazio em vez de lista vazia
     alocacao_especialistas = macro_service.calcular_alocacao_especialistas(dados)
     logger.debug(f"Retornando {len(alocacao_especialistas)} registros para /api/especialistas")
     return jsonify(alocacao_especialistas)
 
 @macro_bp.route('/api/accounts')
+@resposta_condicional
 def api_accounts():
     logger.info("Acessando rota /api/accounts")
     dados = macro_service.carregar_dados()
     if dados.empty:
         logger.warning("Dados vazios para /api/accounts.")
-        return jsonify([]) # Retorna lista vazia
+        return resposta_de_falha(jsonify([])) # Retorna lista vazia
     dados_accounts = macro_service.preparar_dados_abas(dados)['dados_accounts']
     logger.debug(f"Retornando {len(dados_accounts)} registros para /api/accounts")
     return jsonify(dados_accounts)
 
 @macro_bp.route('/api/filter', methods=['GET'])
+@resposta_condicional
 def api_filter():
     """⚡ OTIMIZADO: API para filtro de dados com cache agressivo"""
     import time
@@ -904,7 +823,7 @@ def api_filter():
         if dados.empty:
             logger.warning("Dados vazios retornados ao chamar api_filter")
             # Retorna estrutura mínima garantida apenas com os status desejados
-            return jsonify({
+            return resposta_de_falha(jsonify({
                 'por_status': {
                     'NOVO': {'quantidade': 0, 'horas_totais': 0.0, 'conclusao_media': 0.0, 'cor': 'info'},
                     'EM ATENDIMENTO': {'quantidade': 0, 'horas_totais': 0.0, 'conclusao_media': 0.0, 'cor': 'primary'},
@@ -913,7 +832,7 @@ def api_filter():
                     'FECHADO': {'quantidade': 0, 'horas_totais': 0.0, 'conclusao_media': 0.0, 'cor': 'success'}
                 },
                 'projetos_risco': []
-            })
+            }))
         
         # Calcula agregações
         agregacoes = service.calcular_agregacoes(dados)
@@ -1004,36 +923,30 @@ def api_filter():
             },
             'projetos_risco': []
         }
-        return jsonify(fallback_result)
+        return resposta_de_falha(jsonify(fallback_result))
 
 # ⚡ ROTA DE CACHE MANAGEMENT
 @macro_bp.route('/api/cache/clear', methods=['POST'])
 def clear_cache():
     """🗑️ Limpa todos os caches do MacroService para desenvolvimento"""
     try:
-        from .services import _MACRO_CACHE
-        
-        # Backup dos TTLs
-        old_data_ttl = _MACRO_CACHE['ttl_seconds']
-        old_project_ttl = _MACRO_CACHE['project_cache_ttl']
-        old_api_ttl = _MACRO_CACHE['api_cache_ttl']
+        from .services import (_MACRO_CACHE, _HISTORICO_CACHE, _DETALHES_PROJETO_CACHE, _API_CACHE,
+                               _APRESENTACAO_CACHE, _versao_dados_atual)
         
         # Limpa todos os caches
         _MACRO_CACHE['dados'] = None
         _MACRO_CACHE['timestamp'] = None
-        _MACRO_CACHE['project_details_cache'] = {}
-        _MACRO_CACHE['api_cache'] = {}
-        _MACRO_CACHE['processing_lock'] = False
+        _MACRO_CACHE['versao'] = None
+        _DETALHES_PROJETO_CACHE.invalidar()
+        _API_CACHE.invalidar()
+        _APRESENTACAO_CACHE.invalidar()
+        _HISTORICO_CACHE.invalidar()
         
         cache_info = {
             'status': 'success',
             'message': 'Todos os caches foram limpos',
-            'caches_cleared': ['dados', 'project_details', 'api_results'],
-            'ttl_config': {
-                'dados_ttl': old_data_ttl,
-                'projects_ttl': old_project_ttl,
-                'api_ttl': old_api_ttl
-            },
+            'caches_cleared': ['dados', 'project_details', 'api_results', 'apresentacao', 'historico'],
+            'versao_dados': str(_versao_dados_atual()),
             'timestamp': time.time()
         }
         
@@ -1051,7 +964,10 @@ def clear_cache():
 def cache_status():
     """📊 Mostra status atual do cache"""
     try:
-        from .services import _MACRO_CACHE, _is_cache_valid
+        from .services import (_MACRO_CACHE, _HISTORICO_CACHE, _DETALHES_PROJETO_CACHE, _API_CACHE,
+                               _CARGA_SINGLE_FLIGHT, _is_cache_valid, _versao_dados_atual)
+        from .kpi_engine import MOTOR_DASHBOARD
+        from ..utils.cache import stats_caches
         import time
         
         now = time.time()
@@ -1061,28 +977,35 @@ def cache_status():
         data_age = (now - _MACRO_CACHE['timestamp']) if _MACRO_CACHE['timestamp'] else None
         
         # Status dos caches de projeto
-        project_count = len(_MACRO_CACHE['project_details_cache'])
+        project_stats = _DETALHES_PROJETO_CACHE.stats()
+        project_count = project_stats['itens']
         
         # Status dos caches de API
-        api_count = len(_MACRO_CACHE['api_cache'])
+        api_stats = _API_CACHE.stats()
+        api_count = api_stats['itens']
         
         status_info = {
             'main_cache': {
                 'valid': data_valid,
                 'has_data': _MACRO_CACHE['dados'] is not None,
                 'age_seconds': round(data_age, 2) if data_age else None,
-                'ttl_seconds': _MACRO_CACHE['ttl_seconds']
+                'versao_cache': str(_MACRO_CACHE['versao']) if _MACRO_CACHE['versao'] is not None else None,
+                'versao_atual': str(_versao_dados_atual())
             },
             'project_cache': {
                 'count': project_count,
-                'ttl_seconds': _MACRO_CACHE['project_cache_ttl']
+                **project_stats
             },
             'api_cache': {
                 'count': api_count,
-                'keys': list(_MACRO_CACHE['api_cache'].keys()),
-                'ttl_seconds': _MACRO_CACHE['api_cache_ttl']
+                'keys': [chave for chave, _ in _API_CACHE.itens()],
+                **api_stats
             },
-            'processing_lock': _MACRO_CACHE['processing_lock'],
+            'historico_cache': _HISTORICO_CACHE.stats(),
+            'carregamento': _CARGA_SINGLE_FLIGHT.stats(),
+            'kpis_dashboard': MOTOR_DASHBOARD.stats(),
+            # Todos os caches LRU da aplicação, por namespace
+            'caches': stats_caches(),
             'timestamp': now
         }
         
@@ -1097,6 +1020,7 @@ def cache_status():
         }), 500
 
 @macro_bp.route('/api/projetos/especialista/<path:nome_especialista>')
+@resposta_condicional
 def api_projetos_por_especialista(nome_especialista):
     """
     Retorna a lista de projetos ATIVOS para um especialista específico.
@@ -1107,7 +1031,7 @@ def api_projetos_por_especialista(nome_especialista):
 
     if dados.empty:
         logger.warning(f"API: Dados gerais vazios ao buscar projetos para '{nome_decodificado}'.")
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
     try:
         # Status que indicam que o projeto não está mais ativo
@@ -1187,6 +1111,7 @@ def api_projetos_por_especialista(nome_especialista):
         return jsonify({"error": f"Erro ao buscar projetos para {nome_decodificado}"}), 500
 
 @macro_bp.route('/api/projetos/ativos')
+@resposta_condicional
 def get_projetos_ativos():
     """⚡ OTIMIZADO: Retorna lista de projetos ativos com cache agressivo"""
     import time
@@ -1208,7 +1133,7 @@ def get_projetos_ativos():
         
         if dados.empty:
             logger.warning("❌ Dados vazios para projetos ativos")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
 
         # 🔄 PROCESSAMENTO
         process_start = time.time()
@@ -1227,9 +1152,10 @@ def get_projetos_ativos():
     except Exception as e:
         total_time = (time.time() - start_time) * 1000
         logger.error(f"❌ ERRO API projetos/ativos ({total_time:.1f}ms): {str(e)}")
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
 @macro_bp.route('/api/projetos/criticos')
+@resposta_condicional
 def get_projetos_criticos():
     """⚡ OTIMIZADO: Retorna lista de projetos críticos com cache agressivo"""
     import time
@@ -1251,7 +1177,7 @@ def get_projetos_criticos():
         
         if dados.empty:
             logger.warning("❌ Dados vazios para projetos críticos")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
 
         # 🔄 PROCESSAMENTO
         process_start = time.time()
@@ -1270,9 +1196,10 @@ def get_projetos_criticos():
     except Exception as e:
         total_time = (time.time() - start_time) * 1000
         logger.error(f"❌ ERRO API projetos/criticos ({total_time:.1f}ms): {str(e)}")
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
 @macro_bp.route('/api/projetos/concluidos')
+@resposta_condicional
 def get_projetos_concluidos():
     """⚡ OTIMIZADO: Retorna lista de projetos concluídos com cache agressivo"""
     import time
@@ -1294,7 +1221,7 @@ def get_projetos_concluidos():
         
         if dados.empty:
             logger.warning("❌ Dados vazios para projetos concluídos")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
 
         # 🔄 PROCESSAMENTO
         process_start = time.time()
@@ -1313,9 +1240,10 @@ def get_projetos_concluidos():
     except Exception as e:
         total_time = (time.time() - start_time) * 1000
         logger.error(f"❌ ERRO API projetos/concluidos ({total_time:.1f}ms): {str(e)}")
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
 @macro_bp.route('/api/projetos/eficiencia')
+@resposta_condicional
 def get_projetos_eficiencia():
     """⚡ OTIMIZADO: Retorna lista de projetos com eficiência e cache agressivo"""
     import time
@@ -1337,7 +1265,7 @@ def get_projetos_eficiencia():
         
         if dados.empty:
             logger.warning("❌ Dados vazios para projetos eficiência")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
 
         # 🔄 PROCESSAMENTO
         process_start = time.time()
@@ -1356,9 +1284,10 @@ def get_projetos_eficiencia():
     except Exception as e:
         total_time = (time.time() - start_time) * 1000
         logger.error(f"❌ ERRO API projetos/eficiencia ({total_time:.1f}ms): {str(e)}")
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
 @macro_bp.route('/api/projetos/account/<path:nome_account>')
+@resposta_condicional
 def api_projetos_por_account(nome_account):
     """
     Retorna a lista de projetos ATIVOS para um Account Manager específico.
@@ -1369,7 +1298,7 @@ def api_projetos_por_account(nome_account):
 
     if dados.empty:
         logger.warning(f"API: Dados gerais vazios ao buscar projetos para '{nome_decodificado}'.")
-        return jsonify([])
+        return resposta_de_falha(jsonify([]))
 
     try:
         # Status que indicam que o projeto não está mais ativo
@@ -1546,6 +1475,19 @@ def apresentacao():
         
         logger.info(f"🚀 ROTA: is_visao_atual = {is_visao_atual}")
         
+        # Contexto já calculado para o mês, a versão dos dados e a seleção de projetos principais
+        chave_cache = None
+        try:
+            mes_cache = (datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0) if is_visao_atual
+                         else datetime(int(ano_param), int(mes_param), 1))
+            chave_cache = macro_service.chave_cache_apresentacao(mes_cache, is_visao_atual)
+        except ValueError:
+            pass  # Parâmetros inválidos: tratados abaixo (redireciona para a visão atual)
+        context = macro_service.obter_contexto_apresentacao(chave_cache) if chave_cache else None
+        if context is not None:
+            logger.info(f"⚡ CACHE HIT apresentação: {chave_cache[0]} ({'atual' if is_visao_atual else 'histórica'})")
+            return render_template('macro/apresentacao.html', **context)
+        
         if is_visao_atual:
             logger.info("🚀 ROTA: Processando como Visão Atual (sem parâmetros de data específicos).")
             # --- LÓGICA PARA VISÃO ATUAL ---
@@ -1644,6 +1586,31 @@ def apresentacao():
         
         # --- INÍCIO: Carregar dados para Tempo Médio de Vida (Últimos 3 meses a partir da REFERÊNCIA) ---
         # (A lógica precisa ser ajustada para usar o mes_referencia correto)
+        def fonte_do_mes(mes_loop, ano_loop):
+            """Arquivo histórico detectado automaticamente para o mês/ano (ou None)"""
+            for fonte in fontes_disponiveis:
+                if fonte['mes'] == mes_loop and fonte['ano'] == ano_loop:
+                    return fonte['arquivo']
+            return None
+        
+        def meses_anteriores(inicio):
+            """Primeiro dia do mês de ``inicio`` e dos 2 meses anteriores"""
+            meses = [inicio.replace(day=1)]
+            for _ in range(2):
+                meses.append((meses[-1] - timedelta(days=1)).replace(day=1))
+            return meses
+        
+        # Carrega em paralelo as fontes históricas dos dois períodos do TMV (referência e comparativo)
+        fontes_tmv = []
+        for indice_mes, mes_tmv in enumerate(meses_anteriores(mes_referencia) + meses_anteriores(mes_comparativo)):
+            if is_visao_atual and indice_mes == 0:
+                continue  # Mês de referência atual usa dados_ref já carregado
+            fonte_tmv = fonte_do_mes(mes_tmv.month, mes_tmv.year)
+            if fonte_tmv and fonte_tmv not in fontes_tmv:
+                fontes_tmv.append(fonte_tmv)
+        dados_fontes_tmv = dict(zip(fontes_tmv, carregar_em_paralelo(fontes_tmv, macro_service.carregar_dados,
+                                                                     descricao='fontes do TMV')))
+        
         dataframes_periodo = []
         fontes_carregadas = []
         mes_atual_loop = mes_referencia.replace(day=1) # USA O MES DE REFERÊNCIA DEFINIDO
@@ -1661,17 +1628,11 @@ def apresentacao():
                  logger.info(f"[Tempo Médio Vida] Usando dados já carregados para mês de referência atual ({mes_referencia.strftime('%m/%Y')})")
             else:
                 # Lógica para determinar a fonte histórica - USA DETECÇÃO AUTOMÁTICA
-                fonte_mes_loop = None
-                
-                # Procura a fonte nas fontes detectadas automaticamente
-                for fonte in fontes_disponiveis:
-                    if fonte['mes'] == mes_loop and fonte['ano'] == ano_loop:
-                        fonte_mes_loop = fonte['arquivo']
-                        break
+                fonte_mes_loop = fonte_do_mes(mes_loop, ano_loop)
                 
                 if fonte_mes_loop:
-                    logger.info(f"[Tempo Médio Vida] Tentando carregar dados da fonte: {fonte_mes_loop} para {mes_loop}/{ano_loop}")
-                    dados_mes = macro_service.carregar_dados(fonte=fonte_mes_loop)
+                    logger.info(f"[Tempo Médio Vida] Usando dados da fonte: {fonte_mes_loop} para {mes_loop}/{ano_loop}")
+                    dados_mes = dados_fontes_tmv[fonte_mes_loop]
                 else:
                     logger.warning(f"[Tempo Médio Vida] Fonte de dados não definida para {mes_loop}/{ano_loop}")
                     dados_mes = pd.DataFrame() # Define como vazio para evitar erro
@@ -1718,17 +1679,11 @@ def apresentacao():
                 fonte_mes_loop = None
                 
                 # Lógica para determinar a fonte - USA DETECÇÃO AUTOMÁTICA
-                fonte_mes_loop = None
-                
-                # Procura a fonte nas fontes detectadas automaticamente  
-                for fonte in fontes_disponiveis:
-                    if fonte['mes'] == mes_loop and fonte['ano'] == ano_loop:
-                        fonte_mes_loop = fonte['arquivo']
-                        break
+                fonte_mes_loop = fonte_do_mes(mes_loop, ano_loop)
                 
                 if fonte_mes_loop:
-                    logger.info(f"[TMV Anterior] Tentando carregar dados da fonte: {fonte_mes_loop} para {mes_loop}/{ano_loop}")
-                    dados_mes_ant = macro_service.carregar_dados(fonte=fonte_mes_loop)
+                    logger.info(f"[TMV Anterior] Usando dados da fonte: {fonte_mes_loop} para {mes_loop}/{ano_loop}")
+                    dados_mes_ant = dados_fontes_tmv.get(fonte_mes_loop, pd.DataFrame())
                     if not dados_mes_ant.empty:
                         dataframes_periodo_anterior.append(dados_mes_ant)
                         fontes_carregadas_anterior.append(fonte_mes_loop)
@@ -1931,7 +1886,8 @@ def apresentacao():
         # --- INÍCIO: Calcular Faturamento dos Projetos Ativos ---
         # (AGORA EXECUTA APÓS CARREGAR dados_anterior)
         try:
-            faturamento_ativos = macro_service.calcular_projetos_por_faturamento(dados_ref, mes_ref=mes_referencia)
+            cubo_ref = macro_service.obter_cubo(fonte_dados_ref)
+            faturamento_ativos = macro_service.calcular_projetos_por_faturamento(dados_ref, mes_ref=mes_referencia, cubo=cubo_ref)
             logger.info(f"Contagem de faturamento para ativos em {mes_referencia.strftime('%m/%Y')}: {faturamento_ativos.get('contagem')}")
             
             # Calcular também para o mês anterior
@@ -1939,7 +1895,8 @@ def apresentacao():
             # Agora a verificação de dados_anterior deve funcionar
             if 'dados_anterior' in locals() and not dados_anterior.empty:
                  try:
-                      faturamento_ativos_anterior = macro_service.calcular_projetos_por_faturamento(dados_anterior, mes_ref=mes_comparativo)
+                      faturamento_ativos_anterior = macro_service.calcular_projetos_por_faturamento(
+                          dados_anterior, mes_ref=mes_comparativo, cubo=macro_service.obter_cubo(fonte_dados_anterior))
                       logger.info(f"Contagem de faturamento para ativos em {mes_comparativo.strftime('%m/%Y')}: {faturamento_ativos_anterior.get('contagem')}")
                  except Exception as e_fat_ant:
                       logger.error(f"Erro ao calcular faturamento de ativos do mês anterior: {e_fat_ant}")
@@ -1981,33 +1938,32 @@ def apresentacao():
         # --- INÍCIO: Filtrar dados ativos e Calcular Totais ---
         STATUS_NAO_ATIVOS = ['FECHADO', 'ENCERRADO', 'RESOLVIDO', 'CANCELADO']
         
-        # Filtra projetos ativos do mês de referência (dados_ref)
-        dados_ativos = pd.DataFrame() # Default
+        def fatiar_ativos(cubo):
+            """Fatia do cubo com os projetos ativos (status fora de STATUS_NAO_ATIVOS)."""
+            return cubo.fatiar(Status=lambda status: ~status.astype(str).str.upper().isin([s.upper() for s in STATUS_NAO_ATIVOS]))
+        
+        # Filtra projetos ativos do mês de referência (cubo pré-agregado de dados_ref)
+        cubo_ativos = CuboMensal.construir(None) # Default
         if 'Status' in dados_ref.columns: # Garante que a coluna existe
-             dados_ativos = dados_ref[~dados_ref['Status'].str.upper().isin([s.upper() for s in STATUS_NAO_ATIVOS])].copy()
-             logger.info(f"Projetos ativos do mês de referência ({mes_referencia.strftime('%m/%Y')}) filtrados: {len(dados_ativos)}")
+             cubo_ativos = fatiar_ativos(macro_service.obter_cubo(fonte_dados_ref))
+             logger.info(f"Projetos ativos do mês de referência ({mes_referencia.strftime('%m/%Y')}) filtrados: {cubo_ativos.total()}")
         else:
              logger.error(f"Coluna 'Status' não encontrada em dados_ref. Não foi possível filtrar ativos.")
 
         # Total Atual
-        total_ativos_atual = len(dados_ativos)
+        total_ativos_atual = cubo_ativos.total()
         
         # Total Anterior (calculado a partir de dados_anterior, se existir)
         total_ativos_anterior = 0
         if 'dados_anterior' in locals() and not dados_anterior.empty and 'Status' in dados_anterior.columns:
             try:
                 logger.debug(f"[Debug Ativos Ant] Calculando total_ativos_anterior para {mes_comparativo.strftime('%m/%Y')}. Tamanho dados_anterior: {dados_anterior.shape}")
-                # Log a contagem de status antes de filtrar, se possível
-                if not dados_anterior.empty:
-                    logger.debug(f"[Debug Ativos Ant] Contagem de Status em dados_anterior: {dados_anterior['Status'].value_counts().to_dict()}")
+                cubo_anterior = macro_service.obter_cubo(fonte_dados_anterior)
+                logger.debug(f"[Debug Ativos Ant] Contagem de Status em dados_anterior: {cubo_anterior.contar('Status').to_dict()}")
                 
                 # Aplicar o mesmo filtro de status não ativos
-                dados_ativos_anterior = dados_anterior[
-                    ~dados_anterior['Status'].str.upper().isin([s.upper() for s in STATUS_NAO_ATIVOS])
-                ].copy()
-                total_ativos_anterior = len(dados_ativos_anterior)
+                total_ativos_anterior = fatiar_ativos(cubo_anterior).total()
                 logger.info(f"Total de projetos ativos do mês anterior ({mes_comparativo.strftime('%m/%Y')}) calculado: {total_ativos_anterior}") # <<< Check this log output
-                logger.debug(f"[Debug Ativos Ant] Tamanho dados_ativos_anterior após filtro: {dados_ativos_anterior.shape}")
             except Exception as e_ativos_ant:
                 logger.error(f"Erro ao calcular total de ativos do mês anterior: {e_ativos_ant}")
         elif 'dados_anterior' not in locals() or dados_anterior.empty:
@@ -2016,8 +1972,8 @@ def apresentacao():
              logger.error("Coluna 'Status' não encontrada nos dados anteriores. Não foi possível calcular total de ativos anterior.")
         # --- FIM: Filtrar dados ativos e Calcular Totais ---
 
-        # --- INÍCIO: Calcular Agregações por Status/Squad (Usando dados_ativos) --- 
-        # (Esta parte agora usa a variável dados_ativos definida acima)
+        # --- INÍCIO: Calcular Agregações por Status/Squad (Usando cubo_ativos) --- 
+        # (Esta parte agora usa as células do cubo de ativos definido acima)
         por_status_squad = {}
         por_status_squad_especialista = {
             'AZURE': {},
@@ -2036,24 +1992,25 @@ def apresentacao():
                      por_status_squad_especialista[squad] = {}
                  por_status_squad_especialista[squad][status] = 0
         
-        if not dados_ativos.empty: # Procede apenas se temos dados ativos
-            # Itera pelos projetos ativos de dados_ref (agora na variável dados_ativos)
-            for _, projeto in dados_ativos.iterrows():
-                status = projeto.get('Status', '').upper() # Usa .get com default
+        if not cubo_ativos.vazio: # Procede apenas se temos dados ativos
+            # Itera pelas combinações status x squad x especialista dos ativos (roll-up por especialista),
+            # com a quantidade de projetos de cada uma
+            cubo_especialistas = fatiar_ativos(macro_service.obter_cubo(fonte_dados_ref, rollup='especialista'))
+            contagem_ativos = cubo_especialistas.agregar(['Status', 'Squad', 'Especialista'], ['quantidade'])['quantidade']
+            for (status_original, squad_original, especialista_original), quantidade in contagem_ativos.items():
+                status = str(status_original).upper()
                 if status not in status_para_contar:
                      continue # Pula se não for um status ativo relevante
                      
                 # Squad para agregação geral
-                squad_original = projeto.get('Squad')
                 squad = str(squad_original).upper() if squad_original and not pd.isna(squad_original) else 'OUTROS'
                 target_squad = squad if squad in squads_para_contar else 'OUTROS'
                 
                 # Conta para a agregação por_status_squad (se target_squad != 'OUTROS')
                 if target_squad != 'OUTROS':
-                    por_status_squad[status][target_squad] += 1
+                    por_status_squad[status][target_squad] += int(quantidade)
                 
                 # Squad para agregação por especialista
-                especialista_original = projeto.get('Especialista')
                 especialista = str(especialista_original).upper() if especialista_original and not pd.isna(especialista_original) else ''
                 
                 target_squad_esp = 'OUTROS' # Default
@@ -2064,11 +2021,11 @@ def apresentacao():
                 
                 # Adiciona à contagem especialista se for um dos squads principais
                 if target_squad_esp != 'OUTROS':
-                    por_status_squad_especialista[target_squad_esp][status] += 1
+                    por_status_squad_especialista[target_squad_esp][status] += int(quantidade)
             
             logger.info(f"Agregações por status/squad calculadas para {mes_referencia.strftime('%m/%Y')}")
         else:
-            logger.warning("DataFrame 'dados_ativos' está vazio, pulando cálculo de agregações por status/squad.")
+            logger.warning("Cubo de ativos está vazio, pulando cálculo de agregações por status/squad.")
         # --- FIM: Calcular Agregações por Status/Squad --- 
 
         # --- INÍCIO: Calcular Agregação Geral por Status (para cards individuais) --- 
@@ -2166,6 +2123,10 @@ def apresentacao():
 
         logger.info(f"Contexto preparado para apresentação - Mês Referência: {mes_referencia.strftime('%B/%Y')}")
         
+        # Visão atual sem dados usa mês de fallback: só cacheia quando o mês calculado é o da chave
+        if chave_cache and mes_referencia.strftime('%Y-%m') == chave_cache[0]:
+            macro_service.guardar_contexto_apresentacao(chave_cache, context)
+        
         return render_template('macro/apresentacao.html', **context)
         
     except Exception as e:
@@ -2175,6 +2136,7 @@ def apresentacao():
                              titulo="Erro na Apresentação")
 
 @macro_bp.route('/api/projetos-squad-status-mes')
+@resposta_condicional
 def api_projetos_squad_status_mes():
     """API para obter projetos por squad e status para um mês específico"""
     try:
@@ -2341,6 +2303,7 @@ def download_status_report(project_id):
 # <<< FIM: Nova Rota para Download do PDF >>>
 
 @macro_bp.route('/api/projetos/status/<string:status>')
+@resposta_condicional
 def api_projetos_por_status(status):
     """API para obter projetos filtrados por status específico"""
     try:
@@ -2351,7 +2314,7 @@ def api_projetos_por_status(status):
         
         if dados.empty:
             logger.warning("Dados vazios ao buscar projetos por status")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
         
         # Normaliza o status para comparação (uppercase)
         status_normalizado = status.upper().strip()
@@ -2448,6 +2411,7 @@ def api_projetos_por_status(status):
 
 @macro_bp.route('/api/especialistas/resumo')
 @feature_required('macro.resumo_cards')
+@resposta_condicional
 def api_resumo_especialistas():
     """
     Retorna resumo detalhado dos especialistas com métricas agregadas.
@@ -2459,14 +2423,14 @@ def api_resumo_especialistas():
         dados = macro_service.carregar_dados()
         if dados.empty:
             logger.warning("API: Dados vazios ao calcular resumo dos especialistas.")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
         
         # Prepara dados base
         dados_base = macro_service.preparar_dados_base(dados)
         
         if 'Especialista' not in dados_base.columns:
             logger.warning("API: Coluna 'Especialista' não encontrada nos dados.")
-            return jsonify([])
+            return resposta_de_falha(jsonify([]))
         
         # Obtém data atual para filtrar projetos concluídos do mês
         hoje = datetime.now()
@@ -2560,6 +2524,7 @@ def api_resumo_especialistas():
 
 @macro_bp.route('/api/tipos-servico-simples')
 @feature_required('macro.tipos_servico')
+@resposta_condicional
 def api_tipos_servico_simples():
     """API simples para testar tipos de serviço com CSV"""
     try:
@@ -2569,23 +2534,23 @@ def api_tipos_servico_simples():
         dados = macro_service.carregar_dados()
         if dados.empty:
             logger.warning("Dados vazios")
-            return jsonify({
+            return resposta_de_falha(jsonify({
                 'success': False,
                 'message': 'Nenhum dado disponível',
                 'data': {}
-            })
+            }))
         
         # Calcula métricas simples
-        metricas = macro_service.calcular_metricas_tipos_servico_simples(dados)
+        metricas = macro_service.calcular_metricas_tipos_servico_simples(dados, cubo=macro_service.obter_cubo())
         
         # Verifica se houve erro
         if 'erro' in metricas:
             logger.error(f"Erro nas métricas: {metricas['erro']}")
-            return jsonify({
+            return resposta_de_falha(jsonify({
                 'success': False,
                 'message': metricas['erro'],
                 'data': metricas
-            })
+            }))
         
         logger.info(f"✅ API concluída: {metricas['resumo']['total_tipos']} tipos, {metricas['resumo']['total_categorias']} categorias")
         
@@ -2877,6 +2842,9 @@ def api_arquivar_mensal():
         
         if resultado.returncode == 0:
             logger.info("Arquivamento mensal executado com sucesso")
+            incrementar_versao_dados("arquivamento mensal")
+            # Materializa o cubo do mês arquivado (e confirma os demais) para a apresentação
+            macro_service.materializar_cubos()
             return jsonify({
                 "status": "success", 
                 "mensagem": "Arquivamento mensal realizado com sucesso",
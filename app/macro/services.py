@@ -16,6 +16,12 @@ from app.utils import (
     COLUNAS_NUMERICAS,
     COLUNAS_TEXTO
 )
+from app.utils.ingestion import carregar_dados_normalizados, contar_valores, dtypes_combinados, horas_restantes_ajustadas, ler_csv_projetado, substituir_valores
+from app.utils.data_version import obter_versao_dados, obter_versao_backlogs, assinatura_arquivo, assinaturas_csv_dados
+from app.utils.cache import LRUCache, SingleFlight, copia_leve
+from app.utils.cubo import ROLLUPS, CuboMensal, carregar_cubo, periodo_mes
+from app.utils.indices import indexar, localizar_projeto, filtrar_por, bitset_todos, bitset_valores, bitset_intervalo, posicoes_bitset
+from app.utils.paralelo import carregar_em_paralelo
 import unicodedata
 from .. import db
 import time
@@ -34,93 +40,204 @@ STATUS_EM_ANDAMENTO = ['NOVO', 'AGUARDANDO', 'BLOQUEADO', 'EM ATENDIMENTO']
 STATUS_ATRASADO = ['ATRASADO']
 STATUS_ATIVO = ['ATIVO']
 
-# 🚀 CACHE AGRESSIVO PARA CONTAINERS: TTLs aumentados drasticamente
+# 🚀 CACHE POR VERSÃO DOS DADOS: válido enquanto dadosr.csv / versão dos dados não mudarem
 _MACRO_CACHE = {
     'dados': None,
     'timestamp': None,
-    'ttl_seconds': 300,  # 🚀 CACHE AGRESSIVO: 5 minutos (era 2min)
-    'project_details_cache': {},
-    'project_cache_ttl': 600,  # 🚀 CACHE AGRESSIVO: 10 minutos (era 5min)
-    'api_cache': {},  # ⚡ NOVO: Cache para resultados de APIs
-    'api_cache_ttl': 180,  # 🚀 Cache de APIs: 3 minutos
-    'processing_lock': False  # 🔒 NOVO: Evita carregamento simultâneo
+    'versao': None,  # 🔄 Versão dos dados no momento do carregamento
 }
 
+# 🗂️ Detalhes de projetos e resultados de APIs: LRU limitado em itens e bytes, cada entrada
+# associada à versão dos resultados em que foi calculada
+_DETALHES_PROJETO_CACHE = LRUCache(
+    'detalhes_projeto',
+    max_bytes=int(os.environ.get('DETALHES_CACHE_MAX_MB', '16')) * 1024 * 1024,
+    max_itens=int(os.environ.get('DETALHES_CACHE_MAX_ITENS', '2000'))
+)
+_API_CACHE = LRUCache(
+    'api_macro',
+    max_bytes=int(os.environ.get('API_CACHE_MAX_MB', '32')) * 1024 * 1024,
+    max_itens=int(os.environ.get('API_CACHE_MAX_ITENS', '256'))
+)
+
+# 🎞️ Contexto da página de apresentação por (mês, visão, versão dos resultados, CSVs, projetos principais)
+_APRESENTACAO_CACHE = LRUCache(
+    'apresentacao',
+    max_bytes=int(os.environ.get('APRESENTACAO_CACHE_MAX_MB', '32')) * 1024 * 1024,
+    max_itens=int(os.environ.get('APRESENTACAO_CACHE_MAX_ITENS', '24'))
+)
+
+# 🔗 Carregamento single-flight: evita parses simultâneos da mesma fonte
+_CARGA_SINGLE_FLIGHT = SingleFlight('carga_macro')
+
+# 📚 Cache LRU das fontes históricas (dadosr_apt_*.csv), chaveado por (arquivo, mtime, tamanho)
+_HISTORICO_CACHE = LRUCache(
+    'historico_macro',
+    max_bytes=int(os.environ.get('HISTORICO_CACHE_MAX_MB', '64')) * 1024 * 1024
+)
+
+_CSV_PRINCIPAL = Path(__file__).resolve().parent.parent.parent / 'data' / 'dadosr.csv'
+
+def _versao_dados_atual():
+    """
+    Retorna a chave de versão dos dados principais: época dos dados
+    (incrementada por upload, arquivamento e edição de registros) mais
+    mtime/tamanho do dadosr.csv, para detectar também cópias manuais.
+    """
+    return (obter_versao_dados(), assinatura_arquivo(_CSV_PRINCIPAL))
+
+def _versao_resultados_atual():
+    """Chave dos caches derivados: versão dos dados + dia atual (métricas usam a data de hoje)."""
+    return (_versao_dados_atual(), datetime.now().date())
+
 def _is_cache_valid():
     """Verifica se o cache de dados está válido."""
-    if _MACRO_CACHE['dados'] is None or _MACRO_CACHE['timestamp'] is None:
+    if _MACRO_CACHE['dados'] is None or _MACRO_CACHE['versao'] is None:
         return False
     
-    elapsed = time.time() - _MACRO_CACHE['timestamp']
-    return elapsed < _MACRO_CACHE['ttl_seconds']
+    return _MACRO_CACHE['versao'] == _versao_dados_atual()
 
 def _get_cached_dados():
-    """Retorna dados do cache se válido, senão None."""
+    """Retorna dados do cache se válido (cópia rasa copy-on-write), senão None."""
     if _is_cache_valid():
-        return _MACRO_CACHE['dados']
+        return copia_leve(_MACRO_CACHE['dados'])
     return None
 
-def _set_cached_dados(dados):
-    """Define dados no cache com timestamp atual."""
-    _MACRO_CACHE['dados'] = dados.copy() if dados is not None and not dados.empty else pd.DataFrame()
+def _set_cached_dados(dados, versao=None):
+    """
+    Define dados no cache associados à versão dos dados em que foram lidos.
+
+    Leituras vazias (arquivo ausente ou falha no processamento) não são cacheadas:
+    o próximo acesso tenta de novo. Retorna True se os dados foram cacheados.
+    """
+    if dados is None or dados.empty:
+        return False
+    _MACRO_CACHE['dados'] = dados
     _MACRO_CACHE['timestamp'] = time.time()
+    _MACRO_CACHE['versao'] = versao if versao is not None else _versao_dados_atual()
+    return True
 
 def _get_cached_project_details(project_id):
     """Retorna detalhes do projeto do cache se válido."""
     cache_key = str(project_id)
-    cache_data = _MACRO_CACHE['project_details_cache'].get(cache_key)
+    cache_data = _DETALHES_PROJETO_CACHE.get(cache_key)
     
     if cache_data is None:
         return None
     
-    # Verifica se o cache do projeto ainda é válido
-    elapsed = time.time() - cache_data['timestamp']
-    if elapsed < _MACRO_CACHE['project_cache_ttl']:
+    # Verifica se os dados mudaram desde que o projeto foi cacheado
+    if cache_data['versao'] == _versao_resultados_atual():
         return cache_data['details']
     else:
-        # Remove cache expirado
-        del _MACRO_CACHE['project_details_cache'][cache_key]
+        # Remove cache desatualizado
+        _DETALHES_PROJETO_CACHE.remover(cache_key)
         return None
 
 def _set_cached_project_details(project_id, details):
     """Cacheia detalhes específicos de um projeto."""
     cache_key = str(project_id)
-    _MACRO_CACHE['project_details_cache'][cache_key] = {
+    _DETALHES_PROJETO_CACHE.set(cache_key, {
         'details': details,
-        'timestamp': time.time()
-    }
+        'timestamp': time.time(),
+        'versao': _versao_resultados_atual()
+    })
 
 # ⚡ NOVO: Cache para APIs específicas
+# Os resultados trazem 'backlog_exists' (lido do banco): além da versão dos
+# resultados, cada entrada guarda a versão dos backlogs em que foi calculada.
 def _get_cached_api_result(api_key):
     """Retorna resultado da API do cache se válido."""
-    cache_data = _MACRO_CACHE['api_cache'].get(api_key)
+    cache_data = _API_CACHE.get(api_key)
     
     if cache_data is None:
         return None
     
-    elapsed = time.time() - cache_data['timestamp']
-    if elapsed < _MACRO_CACHE['api_cache_ttl']:
+    if (cache_data['versao'] == _versao_resultados_atual()
+            and cache_data['versao_backlogs'] == obter_versao_backlogs()):
         return cache_data['result']
     else:
-        # Remove cache expirado
-        del _MACRO_CACHE['api_cache'][api_key]
+        # Remove cache desatualizado
+        _API_CACHE.remover(api_key)
         return None
 
 def _set_cached_api_result(api_key, result):
     """Cacheia resultado de uma API específica."""
-    _MACRO_CACHE['api_cache'][api_key] = {
+    _API_CACHE.set(api_key, {
         'result': result,
-        'timestamp': time.time()
-    }
+        'timestamp': time.time(),
+        'versao': _versao_resultados_atual(),
+        'versao_backlogs': obter_versao_backlogs()
+    })
+
+# Colunas lidas pelo cálculo de cada resultado do api_cache (chave -> colunas).
+# Chaves ausentes daqui são sempre invalidadas quando os dados mudam.
+_DEPENDENCIAS_API_CACHE = {
+    'api_filter': {'Numero', 'Projeto', 'Squad', 'Status', 'Horas', 'HorasTrabalhadas', 'HorasRestantes',
+                   'Conclusao', 'Especialista', 'Account Manager', 'DataInicio', 'DataTermino', 'VencimentoEm'},
+    'projetos_ativos': {'Numero', 'Projeto', 'Squad', 'Status', 'Horas', 'HorasRestantes', 'Conclusao',
+                        'DataInicio', 'VencimentoEm'},
+    'projetos_criticos': {'Numero', 'Projeto', 'Squad', 'Status', 'Horas', 'HorasRestantes', 'Conclusao',
+                          'DataInicio', 'VencimentoEm'},
+    'projetos_concluidos': {'Numero', 'Projeto', 'Squad', 'TipoServico', 'Status', 'Horas', 'HorasTrabalhadas',
+                            'HorasRestantes', 'Conclusao', 'Faturamento', 'Especialista', 'Account Manager',
+                            'DataTermino', 'VencimentoEm'},
+    'projetos_eficiencia': {'Numero', 'Projeto', 'Squad', 'Status', 'Horas', 'HorasTrabalhadas', 'Especialista',
+                            'DataTermino', 'VencimentoEm'},
+}
 
-# 🔒 NOVO: Sistema de lock para evitar carregamentos simultâneos
-def _is_processing_locked():
-    """Verifica se há carregamento em andamento."""
-    return _MACRO_CACHE['processing_lock']
+def versao_resultados_atual():
+    """
+    Versão atual dos caches derivados. Quem troca o dadosr.csv a captura antes
+    da troca e a repassa a ``invalidar_caches_por_diff``.
+    """
+    return _versao_resultados_atual()
+
+def invalidar_caches_por_diff(diff, versao_anterior):
+    """
+    Invalidação direcionada após a troca do dadosr.csv.
+
+    Deve ser chamada depois que o novo arquivo já está no lugar. Detalhes de
+    projetos não tocados pelo diff e resultados de API que não dependem das
+    colunas alteradas são mantidos (reinseridos com a nova versão); os demais,
+    e entradas que já não eram da versão anterior, são removidos. O DataFrame
+    principal é recarregado no próximo acesso.
+
+    Args:
+        diff (dict): Resultado de ``app.utils.data_diff.calcular_diff``
+        versao_anterior: ``versao_resultados_atual()`` capturada antes da troca do arquivo
+
+    Returns:
+        dict: Chaves invalidadas e mantidas por cache
+    """
+    versao = _versao_resultados_atual()
+    projetos_afetados = {str(n) for n in diff['adicionados'] + diff['removidos']}
+    projetos_afetados.update(str(item['numero']) for item in diff['alterados'])
+    colunas_alteradas = set(diff['colunas_alteradas']) | set(diff['colunas_novas']) | set(diff['colunas_removidas'])
+    linhas_mudaram = bool(diff['adicionados'] or diff['removidos'])
+
+    resultado = {'detalhes_invalidados': 0, 'detalhes_mantidos': 0, 'apis_invalidadas': [], 'apis_mantidas': []}
+
+    for chave, entrada in _DETALHES_PROJETO_CACHE.itens():
+        if chave in projetos_afetados or entrada['versao'] != versao_anterior:
+            _DETALHES_PROJETO_CACHE.remover(chave)
+            resultado['detalhes_invalidados'] += 1
+        else:
+            _DETALHES_PROJETO_CACHE.set(chave, {**entrada, 'versao': versao})
+            resultado['detalhes_mantidos'] += 1
+
+    for chave, entrada in _API_CACHE.itens():
+        dependencias = _DEPENDENCIAS_API_CACHE.get(chave)
+        if (linhas_mudaram or dependencias is None or dependencias & colunas_alteradas
+                or entrada['versao'] != versao_anterior):
+            _API_CACHE.remover(chave)
+            resultado['apis_invalidadas'].append(chave)
+        else:
+            _API_CACHE.set(chave, {**entrada, 'versao': versao})
+            resultado['apis_mantidas'].append(chave)
 
-def _set_processing_lock(locked):
-    """Define/remove lock de processamento."""
-    _MACRO_CACHE['processing_lock'] = locked
+    logger.info(f"🎯 Invalidação por diff: {resultado['detalhes_invalidados']} detalhes removidos, "
+                f"{resultado['detalhes_mantidos']} mantidos; APIs invalidadas: {resultado['apis_invalidadas']}")
+    return resultado
 
 def _normalize_key(key):
     """Normaliza uma chave de dicionário para minúsculo, sem acentos e com underscores."""
@@ -164,7 +281,7 @@ class MacroService(BaseService):
 
     def carregar_dados(self, fonte=None):
         """
-        ⚡ OTIMIZADO: Carrega dados com cache agressivo e sistema de lock para containers.
+        ⚡ OTIMIZADO: Carrega dados com cache por versão e carregamento single-flight.
         
         Args:
             fonte (str, optional): Nome específico do arquivo ou None para dadosr.csv
@@ -182,24 +299,6 @@ class MacroService(BaseService):
                 logger.info(f"⚡ CACHE HIT: Dados carregados em {cache_time:.1f}ms ({len(cached_dados)} registros)")
                 return cached_dados
         
-        # 🔒 LOCK: Evita carregamentos simultâneos para dados principais
-        if fonte is None and _is_processing_locked():
-            logger.info("🔒 AGUARDANDO: Outro processo carregando dados principais...")
-            # Aguarda até 3 segundos pelo lock
-            for _ in range(30):  # 30 x 100ms = 3s
-                time.sleep(0.1)
-                if not _is_processing_locked():
-                    break
-                cached_dados = _get_cached_dados()
-                if cached_dados is not None:
-                    lock_time = (time.time() - start_time) * 1000
-                    logger.info(f"⚡ CACHE APÓS LOCK: Dados disponíveis em {lock_time:.1f}ms")
-                    return cached_dados
-        
-        # 🔒 DEFINE LOCK para dados principais
-        if fonte is None:
-            _set_processing_lock(True)
-        
         try:
             # 📁 DETERMINA ARQUIVO
             if fonte:
@@ -216,179 +315,123 @@ class MacroService(BaseService):
                 logger.error(f"❌ Arquivo não encontrado: {csv_path}")
                 return pd.DataFrame()
             
-            # 📊 CARREGAMENTO DO CSV
-            read_start = time.time()
-            dados = pd.read_csv(
-                csv_path,
-                dtype=str,
-                sep=';',
-                encoding='latin1',
+            # 📚 CACHE LRU para fontes históricas
+            chave_historico = None
+            if fonte:
+                stat = csv_path.stat()
+                chave_historico = (str(csv_path.resolve()), stat.st_mtime_ns, stat.st_size)
+                dados_cache = _HISTORICO_CACHE.get(chave_historico)
+                if dados_cache is not None:
+                    cache_time = (time.time() - start_time) * 1000
+                    logger.info(f"⚡ CACHE HIT histórico: {fonte} em {cache_time:.1f}ms ({len(dados_cache)} registros)")
+                    return copia_leve(dados_cache)
+            
+            # 🔗 SINGLE-FLIGHT: chamadas simultâneas para a mesma fonte aguardam um único carregamento
+            chave_carga = chave_historico if fonte else ('principal', str(csv_path))
+            dados_processados = _CARGA_SINGLE_FLIGHT.executar(
+                chave_carga,
+                lambda: self._carregar_e_cachear(csv_path, chave_historico)
             )
-            read_time = (time.time() - read_start) * 1000
-            logger.info(f"📊 CSV lido em {read_time:.1f}ms ({len(dados)} linhas)")
-            
-            # 🔄 PROCESSAMENTO
-            process_start = time.time()
-            dados_processados = self._processar_dados_otimizado(dados, csv_path)
-            process_time = (time.time() - process_start) * 1000
-            
-            # 💾 CACHE apenas dados principais
-            if fonte is None:
-                _set_cached_dados(dados_processados)
-                cache_set_time = (time.time() - process_start - process_time/1000) * 1000
-                logger.info(f"💾 Cache atualizado em {cache_set_time:.1f}ms")
             
             total_time = (time.time() - start_time) * 1000
-            logger.info(f"✅ DADOS CARREGADOS: {total_time:.1f}ms total (CSV: {read_time:.1f}ms, Proc: {process_time:.1f}ms)")
+            logger.info(f"✅ DADOS CARREGADOS: {total_time:.1f}ms total")
             
-            return dados_processados
+            # Cada chamador recebe sua própria cópia rasa; o frame cacheado não é alterado
+            return copia_leve(dados_processados)
             
         except Exception as e:
             logger.error(f"❌ ERRO ao carregar: {str(e)}")
             return pd.DataFrame()
-        finally:
-            # 🔓 REMOVE LOCK sempre
-            if fonte is None:
-                _set_processing_lock(False)
 
-    def _processar_dados_otimizado(self, dados, csv_path):
+    def _carregar_e_cachear(self, csv_path, chave_historico=None):
+        """Executa o pipeline canônico para ``csv_path`` e atualiza o cache correspondente."""
+        # Outra carga pode ter concluído entre a verificação do cache e a entrada no single-flight
+        if chave_historico is None:
+            cached_dados = _get_cached_dados()
+            if cached_dados is not None:
+                return cached_dados
+        
+        # 🔄 Versão capturada ANTES da leitura: se o arquivo mudar durante a
+        # leitura, o cache fica com a versão antiga e é recarregado no próximo acesso
+        versao_dados = _versao_dados_atual() if chave_historico is None else None
+        
+        # 📦 PIPELINE CANÔNICO via snapshot (parse do CSV apenas se o arquivo mudou)
+        read_start = time.time()
+        dados_processados = carregar_dados_normalizados(csv_path)
+        read_time = (time.time() - read_start) * 1000
+        logger.info(f"📦 Leitura de {csv_path.name}: {read_time:.1f}ms")
+        
+        # 🔎 ÍNDICES: Numero -> linha e especialista/account/squad -> linhas
+        indexar(dados_processados)
+        
+        # 💾 CACHE
+        if chave_historico is None:
+            cache_start = time.time()
+            if _set_cached_dados(dados_processados, versao_dados):
+                cache_set_time = (time.time() - cache_start) * 1000
+                logger.info(f"💾 Cache atualizado em {cache_set_time:.1f}ms")
+            else:
+                logger.warning(f"⚠️ Leitura de {csv_path.name} sem registros: cache não atualizado")
+        elif not dados_processados.empty:
+            # Descarta versões anteriores do mesmo arquivo antes de cachear a atual
+            _HISTORICO_CACHE.invalidar(lambda chave: chave[0] == chave_historico[0])
+            _HISTORICO_CACHE.set(chave_historico, dados_processados)
+        
+        return dados_processados
+
+    def obter_cubo(self, fonte=None, rollup=None):
         """
-        Processa dados com logs mínimos para evitar spam.
-        OTIMIZAÇÃO: Versão silenciosa do processamento original.
+        Cubo pré-agregado (``app.utils.cubo``) da fonte, com a mesma resolução de
+        nomes de ``carregar_dados``. Materializado junto ao snapshot da fonte.
+
+        Args:
+            fonte (str, optional): Nome do arquivo (com ou sem .csv) ou None para dadosr.csv
+            rollup (str, optional): Roll-up auxiliar (``app.utils.cubo.ROLLUPS``) em vez do cubo principal
+
+        Returns:
+            CuboMensal: Cubo da fonte (vazio se o arquivo não existir)
         """
-        try:
-            # --- Passo 1.2: Tratamento Inicial (SEM LOGS EXCESSIVOS) ---
-            
-            # 1.2.1 Conversão de Datas (silenciosa)
-            colunas_data_simples = ['Aberto em', 'Resolvido em', 'Data da última ação']
-            for col in colunas_data_simples:
-                if col in dados.columns:
-                    original_col = dados[col].copy()
-                    # Tenta primeiro formato com horas, depois sem horas
-                    dados[col] = pd.to_datetime(original_col, format='%d/%m/%Y %H:%M', errors='coerce')
-                    # Se falhar, tenta formato sem horas
-                    mask_failed = dados[col].isna() & original_col.notna() & (original_col != '')
-                    if mask_failed.any():
-                        dados.loc[mask_failed, col] = pd.to_datetime(original_col[mask_failed], format='%d/%m/%Y', errors='coerce')
-                    # OTIMIZAÇÃO: Logs removidos para evitar spam
-
-            # Tratamento especial para 'Vencimento em' (silencioso)
-            if 'Vencimento em' in dados.columns:
-                col_vencimento = 'Vencimento em'
-                original_vencimento = dados[col_vencimento].copy()
-                dados[col_vencimento] = pd.to_datetime(original_vencimento, format='%d/%m/%Y %H:%M', errors='coerce')
-                mask_nat = dados[col_vencimento].isna()
-                mask_retry = mask_nat & original_vencimento.notna() & (original_vencimento != '')
-                if mask_retry.any():
-                    dados.loc[mask_retry, col_vencimento] = pd.to_datetime(original_vencimento[mask_retry], format='%d/%m/%Y', errors='coerce')
-
-            # 1.2.2 Conversão Numérica (silenciosa)
-            if 'Número' in dados.columns:
-                dados['Número'] = pd.to_numeric(dados['Número'], errors='coerce').astype('Int64')
-
-            if 'Esforço estimado' in dados.columns:
-                dados['Esforço estimado'] = dados['Esforço estimado'].str.replace(',', '.', regex=False)
-                dados['Esforço estimado'] = pd.to_numeric(dados['Esforço estimado'], errors='coerce').fillna(0.0)
-            else:
-                dados['Esforço estimado'] = 0.0
+        if fonte:
+            if not fonte.endswith('.csv'):
+                fonte = fonte + '.csv'
+            csv_path = self.csv_path.parent / fonte
+        else:
+            csv_path = self.csv_path
+        return carregar_cubo(csv_path, rollup)
+
+    def materializar_cubos(self):
+        """Constrói (ou confirma em cache) os cubos e roll-ups do dadosr.csv e de todas as fontes mensais arquivadas."""
+        fontes = [None] + [fonte['arquivo'] for fonte in self.obter_fontes_disponiveis()]
+        total = 0
+        for fonte in fontes:
+            try:
+                total += len(self.obter_cubo(fonte))
+                for rollup in ROLLUPS:
+                    self.obter_cubo(fonte, rollup)
+            except Exception as e:
+                logger.warning(f"⚠️ Não foi possível materializar o cubo de {fonte or 'dadosr.csv'}: {e}")
+        logger.info(f"🧊 Cubos materializados para {len(fontes)} fontes ({total} células)")
+        return len(fontes)
 
-            if 'Andamento' in dados.columns:
-                dados['Andamento'] = dados['Andamento'].str.rstrip('%').str.replace(',', '.', regex=False)
-                dados['Andamento'] = pd.to_numeric(dados['Andamento'], errors='coerce').fillna(0.0)
-                dados['Andamento'] = dados['Andamento'].clip(lower=0, upper=100)
-            else:
-                dados['Andamento'] = 0.0
-            
-            # 1.2.3 Conversão de Tempo para Horas Decimais (silenciosa)
-            if 'Tempo trabalhado' in dados.columns:
-                dados['Tempo trabalhado'] = dados['Tempo trabalhado'].apply(self.converter_tempo_para_horas)
-            else:
-                dados['Tempo trabalhado'] = 0.0
-
-            # --- Passo 1.3: Renomeação (SEM LOGS EXCESSIVOS) ---
-            rename_map_new_to_old = {
-                'Número': 'Numero',
-                'Cliente (Completo)': 'Cliente',
-                'Assunto': 'Projeto',
-                'Serviço (2º Nível)': 'Squad',
-                'Serviço (3º Nível)': 'TipoServico',
-                'Status': 'Status',
-                'Esforço estimado': 'Horas',
-                'Tempo trabalhado': 'HorasTrabalhadas',
-                'Andamento': 'Conclusao',
-                'Data da última ação': 'UltimaInteracao',
-                'Tipo de faturamento': 'Faturamento',
-                'Responsável': 'Especialista',
-                'Account Manager ': 'Account Manager',
-                'Aberto em': 'DataInicio',
-                'Resolvido em': 'DataTermino',
-                'Vencimento em': 'VencimentoEm'
-            }
-            
-            colunas_para_renomear = {k: v for k, v in rename_map_new_to_old.items() if k in dados.columns}
-            dados.rename(columns=colunas_para_renomear, inplace=True)
-            
-            # --- Passo 1.3.1: Fallback para coluna Projeto (NOVO) ---
-            # Se Assunto está vazio ou não existe, usa Cliente como fallback
-            if 'Projeto' in dados.columns and 'Cliente' in dados.columns:
-                mask_projeto_vazio = dados['Projeto'].isna() | (dados['Projeto'] == '') | (dados['Projeto'] == 'nan')
-                if mask_projeto_vazio.any():
-                    dados.loc[mask_projeto_vazio, 'Projeto'] = dados.loc[mask_projeto_vazio, 'Cliente']
-                    # Log apenas se houver fallbacks aplicados
-                    num_fallbacks = mask_projeto_vazio.sum()
-                    if num_fallbacks > 0:
-                        logger.info(f"Aplicado fallback Cliente→Projeto em {num_fallbacks} registros")
-            elif 'Cliente' in dados.columns and 'Projeto' not in dados.columns:
-                # Se a coluna Assunto não existe ainda, cria Projeto copiando de Cliente
-                dados['Projeto'] = dados['Cliente']
-                logger.info("Criada coluna 'Projeto' usando dados de 'Cliente' (coluna Assunto não encontrada)")
-            
-            # OTIMIZAÇÃO: Log removido para evitar spam
-
-            # --- Passo 1.4: Padronização Final (SEM LOGS EXCESSIVOS) ---
-            
-            # 1.4.1 Padronização de Status (silenciosa)
-            if 'Status' in dados.columns:
-                dados['Status'] = dados['Status'].astype(str).str.strip().str.upper()
-
-            # 1.4.2 Padronização de Faturamento (silenciosa)
-            faturamento_map = {
-                "PRIME": "PRIME",
-                "Descontar do PLUS no inicio do projeto": "PLUS",
-                "Faturar no inicio do projeto": "INICIO",
-                "Faturar no final do projeto": "TERMINO",
-                "Faturado em outro projeto": "FEOP",
-                "Engajamento": "ENGAJAMENTO"
-            }
-            if 'Faturamento' in dados.columns:
-                dados['Faturamento'] = dados['Faturamento'].astype(str).str.strip()
-                dados['Faturamento'] = dados['Faturamento'].str.rstrip('. ').str.strip()
-                dados['Faturamento_Original'] = dados['Faturamento']
-                dados['Faturamento'] = dados['Faturamento'].map(faturamento_map)
-                nao_mapeados = dados['Faturamento'].isna()
-                if nao_mapeados.any():
-                    dados['Faturamento'] = dados['Faturamento'].fillna('NAO_MAPEADO')
-
-            # 1.4.3 Padronização de outras colunas de texto (silenciosa)
-            colunas_texto_padrao = ['Projeto', 'Squad', 'Especialista', 'Account Manager']
-            for col in colunas_texto_padrao:
-                if col in dados.columns:
-                    dados[col] = dados[col].astype(str).str.strip()
-                    dados[col] = dados[col].fillna('')
-            
-            # Cálculo de HorasRestantes (silencioso)
-            if 'Horas' in dados.columns and 'HorasTrabalhadas' in dados.columns:
-                dados['HorasRestantes'] = (dados['Horas'] - dados['HorasTrabalhadas']).round(1)
-            else:
-                dados['HorasRestantes'] = 0.0
+    def aquecer_apresentacao(self):
+        """
+        Pré-carrega o que a Visão Atual da apresentação lê: dadosr.csv, as fontes
+        mensais dos 3 meses anteriores (tempo médio de vida e comparativos) e os
+        cubos de todas as fontes.
 
-            # OTIMIZAÇÃO: Log mínimo apenas quando necessário
-            # logger.info(f"Dados processados: {len(dados)} registros")
-            return dados
-            
-        except Exception as e:
-            logger.error(f"Erro ao processar dados: {str(e)}")
-            return pd.DataFrame()
+        Returns:
+            int: Quantidade de fontes mensais carregadas
+        """
+        _, mes_referencia = self.obter_dados_e_referencia_atual()
+        if mes_referencia is None:
+            return 0
+
+        primeiro_mes = mes_referencia.year * 12 + mes_referencia.month - 3
+        fontes = [fonte['arquivo'] for fonte in self.obter_fontes_disponiveis()
+                  if primeiro_mes <= fonte['ano'] * 12 + fonte['mes'] < primeiro_mes + 3]
+        carregar_em_paralelo(fontes, self.carregar_dados, descricao='fontes da apresentação')
+        self.materializar_cubos()
+        return len(fontes)
 
     def obter_dados_e_referencia_atual(self):
         """
@@ -428,34 +471,6 @@ class MacroService(BaseService):
 
         return dados_atuais, mes_referencia_atual
 
-    def converter_tempo_para_horas(self, tempo_str):
-        """Converte string de tempo (HH:MM:SS) para horas decimais"""
-        try:
-            if pd.isna(tempo_str) or tempo_str == '':
-                return 0.0
-            if isinstance(tempo_str, (int, float)):
-                return float(tempo_str)
-            # Remove espaços e converte para string
-            tempo_str = str(tempo_str).strip()
-            # Se já for um número, retorna como float
-            if tempo_str.replace('.', '').isdigit():
-                return float(tempo_str)
-            # Converte formato HH:MM:SS para horas
-            partes = tempo_str.split(':')
-            if len(partes) == 3:
-                horas = int(partes[0])
-                minutos = int(partes[1])
-                segundos = int(partes[2])
-                return horas + (minutos/60) + (segundos/3600)
-            elif len(partes) == 2:
-                horas = int(partes[0])
-                minutos = int(partes[1])
-                return horas + (minutos/60)
-            return 0.0
-        except Exception as e:
-            logger.error(f"Erro ao converter tempo '{tempo_str}': {str(e)}")
-            return 0.0
-
     def obter_metricas_macro(self, dados):
         """Obtém métricas para o dashboard macro"""
         try:
@@ -482,7 +497,7 @@ class MacroService(BaseService):
             if dados is None or dados.empty:
                 return []
                 
-            projetos = dados[dados['Especialista'] == nome_especialista].copy()
+            projetos = filtrar_por(dados, 'Especialista', nome_especialista)
             
             # Adiciona verificação de backlog usando a função auxiliar
             projetos = self._adicionar_verificacao_backlog(projetos)
@@ -499,7 +514,7 @@ class MacroService(BaseService):
             if dados is None or dados.empty:
                 return []
                 
-            projetos = dados[dados['Account Manager'] == nome_account].copy()
+            projetos = filtrar_por(dados, 'Account Manager', nome_account)
             
             # Adiciona verificação de backlog usando a função auxiliar  
             projetos = self._adicionar_verificacao_backlog(projetos)
@@ -742,9 +757,71 @@ class MacroService(BaseService):
             logger.error(f"Erro ao calcular horas restantes: {str(e)}")
             return dados
 
-    def calcular_projetos_ativos(self, dados):
+    # Formatos aceitos para datas de abertura em texto, na ordem de tentativa
+    FORMATOS_DATA_ABERTURA = ['%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M:%S']
+
+    def _calcular_tempo_vida_projetos(self, projetos, colunas_data, estimativas):
+        """
+        Tempo de vida (dias desde a abertura até hoje) de cada projeto, vetorizado.
+
+        A data de abertura é a primeira coluna de ``colunas_data`` preenchida na
+        linha; textos são convertidos pelos ``FORMATOS_DATA_ABERTURA`` (texto que
+        não casa com nenhum formato resulta em None). Sem nenhuma data, o tempo é
+        estimado pela faixa do Numero: < 1000, < 3000, < 5000, < 7000 e demais,
+        com os valores de ``estimativas``.
+
+        Returns:
+            pd.Series: Dias (None/NaN quando não é possível calcular)
+        """
+        hoje = pd.Timestamp(datetime.now().date())
+        abertura = pd.Series(pd.NaT, index=projetos.index, dtype='datetime64[ns]')
+        encontrada = pd.Series(False, index=projetos.index)
+
+        for col in colunas_data:
+            if col not in projetos.columns:
+                continue
+            valores = projetos[col]
+            primeira = valores.notna() & ~encontrada
+            if not primeira.any():
+                continue
+            if pd.api.types.is_datetime64_any_dtype(valores):
+                datas = valores
+            else:
+                datas = pd.Series(pd.NaT, index=projetos.index, dtype='datetime64[ns]')
+                texto = valores.where(valores.map(lambda v: isinstance(v, str), na_action='ignore').fillna(False).astype(bool))
+                for formato in self.FORMATOS_DATA_ABERTURA:
+                    datas = datas.fillna(pd.to_datetime(texto, format=formato, errors='coerce'))
+                outros = primeira & texto.isna()
+                if outros.any():
+                    datas[outros] = pd.to_datetime(valores[outros], errors='coerce')
+            abertura = abertura.mask(primeira, datas.dt.normalize())
+            encontrada |= primeira
+
+        dias = (hoje - abertura).dt.days
+
+        if 'Numero' in projetos.columns:
+            numero = projetos['Numero'].astype(str)
+            numero_int = pd.to_numeric(numero.where(projetos['Numero'].notna() & numero.str.isdigit()), errors='coerce')
+            estimativa = pd.Series(np.select(
+                [numero_int < 1000, numero_int < 3000, numero_int < 5000, numero_int < 7000, numero_int.notna()],
+                estimativas,
+                default=np.nan
+            ), index=projetos.index)
+        else:
+            estimativa = pd.Series(np.nan, index=projetos.index)
+
+        tempo_vida = dias.where(encontrada, estimativa)
+        sem_tempo = int(tempo_vida.isna().sum())
+        if sem_tempo:
+            logger.warning(f"Não foi possível calcular tempo de vida para {sem_tempo} projetos - dados insuficientes")
+        if tempo_vida.notna().all():
+            return tempo_vida.astype('int64')
+        return tempo_vida.astype(object).where(tempo_vida.notna(), None)
+
+    def calcular_projetos_ativos(self, dados, mascara=None):
         """
         Calcula especificamente os projetos ativos e suas métricas.
+        ``mascara`` (opcional) é a máscara de ``mascara_ativos`` já calculada sobre ``dados``.
         Retorna um dicionário com:
         - total: número total de projetos ativos
         - dados: DataFrame com os projetos ativos (incluindo backlog_exists)
@@ -757,15 +834,14 @@ class MacroService(BaseService):
             dados_base = self.preparar_dados_base(dados)
             
             # Filtra apenas projetos ativos (não concluídos) e exclui CDB DATA SOLUTIONS
-            projetos_ativos_df = dados_base[
-                (~dados_base['Status'].isin(self.status_concluidos)) &
-                (dados_base['Squad'] != 'CDB DATA SOLUTIONS')
-            ].copy()
+            if mascara is None:
+                mascara = self.mascara_ativos(dados_base)
+            projetos_ativos_df = dados_base[mascara]
             
             # Calcula métricas específicas (antes de adicionar backlog_exists)
             metricas = {
                 'total': len(projetos_ativos_df),
-                'por_squad': projetos_ativos_df.groupby('Squad').size().to_dict(),
+                'por_squad': projetos_ativos_df.groupby('Squad', observed=True).size().to_dict(),
                 'media_conclusao': round(projetos_ativos_df['Conclusao'].mean(), 1),
                 'media_horas_restantes': round(projetos_ativos_df['HorasRestantes'].mean(), 1)
             }
@@ -825,77 +901,15 @@ class MacroService(BaseService):
             colunas_finais = colunas_modal + ['backlog_exists'] # Adiciona a nova coluna
             colunas_existentes = [col for col in colunas_finais if col in projetos_ativos_df.columns]
             
-            dados_para_retorno = projetos_ativos_df[colunas_existentes].copy() # Usar .copy() para evitar SettingWithCopyWarning
+            dados_para_retorno = projetos_ativos_df[colunas_existentes]
 
             # <<< INÍCIO: Calcular tempo de vida do projeto >>>
-            hoje = datetime.now().date()
-            
-            # Debug: mostrar colunas disponíveis
-            logger.info(f"Colunas disponíveis para cálculo tempo de vida: {projetos_ativos_df.columns.tolist()}")
-            
-            def calcular_tempo_vida(row):
-                try:
-                    # Tenta encontrar data de abertura em diferentes colunas possíveis
-                    data_abertura = None
-                    
-                    # Verifica colunas possíveis de data de abertura (ordem de prioridade)
-                    colunas_possiveis = ['DataInicio', 'DataAbertura', 'Data Abertura', 'data_abertura', 'DataCriacao', 'Data Criacao', 'Data_Criacao', 'Aberto em']
-                    for col in colunas_possiveis:
-                        if col in row.index and pd.notna(row[col]):
-                            data_abertura = row[col]
-                            logger.debug(f"Encontrada data de abertura na coluna '{col}': {data_abertura} para projeto {row.get('Numero', 'N/A')}")
-                            break
-                    
-                    if data_abertura is None:
-                        # Se não encontrou data específica, usa uma estimativa baseada no número do projeto
-                        # Projetos mais antigos têm números menores (aproximação)
-                        if 'Numero' in row.index and pd.notna(row['Numero']):
-                            numero = str(row['Numero'])
-                            if numero.isdigit():
-                                numero_int = int(numero)
-                                # Estima: projetos com números menores são mais antigos
-                                # Esta é uma aproximação que pode ser ajustada
-                                if numero_int < 1000:
-                                    logger.debug(f"Estimativa para projeto {numero}: 400 dias (< 1000)")
-                                    return 400  # ~1 ano e 1 mês
-                                elif numero_int < 3000:
-                                    logger.debug(f"Estimativa para projeto {numero}: 300 dias (< 3000)")
-                                    return 300  # ~10 meses
-                                elif numero_int < 5000:
-                                    logger.debug(f"Estimativa para projeto {numero}: 200 dias (< 5000)")
-                                    return 200  # ~6-7 meses
-                                elif numero_int < 7000:
-                                    logger.debug(f"Estimativa para projeto {numero}: 150 dias (< 7000)")
-                                    return 150  # ~5 meses
-                                else:
-                                    logger.debug(f"Estimativa para projeto {numero}: 90 dias (>= 7000)")
-                                    return 90   # ~3 meses
-                        logger.warning(f"Não foi possível calcular tempo de vida para projeto {row.get('Numero', 'N/A')} - dados insuficientes")
-                        return None
-                        
-                    # Converte para datetime se for string
-                    if isinstance(data_abertura, str):
-                        # Tenta diferentes formatos de data
-                        for formato in ['%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M:%S']:
-                            try:
-                                data_abertura = datetime.strptime(data_abertura, formato).date()
-                                break
-                            except ValueError:
-                                continue
-                    elif hasattr(data_abertura, 'date'):
-                        data_abertura = data_abertura.date()
-                    
-                    if data_abertura:
-                        diff = hoje - data_abertura
-                        return diff.days
-                        
-                except Exception as e:
-                    logger.debug(f"Erro ao calcular tempo de vida para projeto {row.get('Numero', 'N/A')}: {e}")
-                
-                return None
-            
-            # Adiciona coluna de tempo de vida
-            dados_para_retorno['tempo_vida'] = projetos_ativos_df.apply(calcular_tempo_vida, axis=1)
+            dados_para_retorno['tempo_vida'] = self._calcular_tempo_vida_projetos(
+                projetos_ativos_df,
+                ['DataInicio', 'DataAbertura', 'Data Abertura', 'data_abertura', 'DataCriacao', 'Data Criacao', 'Data_Criacao', 'Aberto em'],
+                # Estimativa pelo número quando não há data: projetos com números menores são mais antigos
+                (400, 300, 200, 150, 90)
+            )
             logger.info(f"Tempo de vida calculado - Exemplos: {dados_para_retorno['tempo_vida'].head().tolist()}")
             # <<< FIM: Calcular tempo de vida do projeto >>>
 
@@ -945,7 +959,7 @@ class MacroService(BaseService):
             # Retorna estrutura vazia em caso de erro inesperado
             return {"total": 0, "dados": pd.DataFrame(), "metricas": {}}
 
-    def calcular_projetos_criticos(self, dados):
+    def calcular_projetos_criticos(self, dados, mascara=None):
         """
         Calcula especificamente os projetos críticos e suas métricas.
         Um projeto é considerado crítico quando:
@@ -953,6 +967,7 @@ class MacroService(BaseService):
         - Tem horas restantes negativas
         - Está com o prazo vencido
         Obs: Apenas projetos não concluídos são considerados
+        (``mascara``, opcional: a de ``mascara_ativos`` já calculada sobre ``dados``)
         """
         try:
             logger.info("Calculando projetos críticos...")
@@ -963,10 +978,9 @@ class MacroService(BaseService):
             logger.debug(f"Data de referência (hoje): {hoje.strftime('%d/%m/%Y')}")
             
             # Primeiro filtra apenas projetos não concluídos e exclui CDB DATA SOLUTIONS
-            projetos_nao_concluidos = dados_base[
-                (~dados_base['Status'].isin(self.status_concluidos)) &
-                (dados_base['Squad'] != 'CDB DATA SOLUTIONS')
-            ]
+            if mascara is None:
+                mascara = self.mascara_ativos(dados_base)
+            projetos_nao_concluidos = dados_base[mascara]
             logger.debug(f"Total de projetos não concluídos: {len(projetos_nao_concluidos)}")
             
             # Condições de criticidade (aplicadas apenas em projetos não concluídos)
@@ -1087,74 +1101,12 @@ class MacroService(BaseService):
             dados_para_retorno = projetos_criticos[colunas_existentes_criticos].copy()
 
             # <<< INÍCIO: Calcular tempo de vida para projetos críticos >>>
-            hoje = datetime.now().date()
-            
-            # Debug: mostrar colunas disponíveis
-            logger.info(f"Colunas disponíveis para projetos críticos: {projetos_criticos.columns.tolist()}")
-            
-            def calcular_tempo_vida_criticos(row):
-                try:
-                    # Tenta encontrar data de abertura em diferentes colunas possíveis
-                    data_abertura = None
-                    
-                    # Verifica colunas possíveis de data de abertura (ordem de prioridade)
-                    colunas_possiveis = ['DataInicio', 'DataAbertura', 'Data Abertura', 'data_abertura', 'DataCriacao', 'Data Criacao', 'DataCriacao', 'Data_Criacao']
-                    for col in colunas_possiveis:
-                        if col in row.index and pd.notna(row[col]):
-                            data_abertura = row[col]
-                            logger.debug(f"Encontrada data de abertura na coluna '{col}': {data_abertura} para projeto crítico {row.get('Numero', 'N/A')}")
-                            break
-                    
-                    if data_abertura is None:
-                        # Se não encontrou data específica, usa uma estimativa baseada no número do projeto
-                        # Para projetos críticos, tendemos a assumir que são mais antigos
-                        if 'Numero' in row.index and pd.notna(row['Numero']):
-                            numero = str(row['Numero'])
-                            if numero.isdigit():
-                                numero_int = int(numero)
-                                # Estima para projetos críticos (geralmente mais antigos)
-                                if numero_int < 1000:
-                                    logger.debug(f"Estimativa para projeto crítico {numero}: 500 dias (< 1000)")
-                                    return 500  # ~1 ano e 4 meses
-                                elif numero_int < 3000:
-                                    logger.debug(f"Estimativa para projeto crítico {numero}: 400 dias (< 3000)")
-                                    return 400  # ~1 ano e 1 mês
-                                elif numero_int < 5000:
-                                    logger.debug(f"Estimativa para projeto crítico {numero}: 300 dias (< 5000)")
-                                    return 300  # ~10 meses
-                                elif numero_int < 7000:
-                                    logger.debug(f"Estimativa para projeto crítico {numero}: 200 dias (< 7000)")
-                                    return 200  # ~6-7 meses
-                                else:
-                                    logger.debug(f"Estimativa para projeto crítico {numero}: 120 dias (>= 7000)")
-                                    return 120  # ~4 meses
-                        logger.warning(f"Não foi possível calcular tempo de vida para projeto crítico {row.get('Numero', 'N/A')} - dados insuficientes")
-                        return None
-                        
-                    # Converte para datetime se for string
-                    if isinstance(data_abertura, str):
-                        # Tenta diferentes formatos de data
-                        for formato in ['%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M:%S']:
-                            try:
-                                data_abertura = datetime.strptime(data_abertura, formato).date()
-                                logger.debug(f"Data de abertura convertida com formato {formato}: {data_abertura}")
-                                break
-                            except ValueError:
-                                continue
-                    elif hasattr(data_abertura, 'date'):
-                        data_abertura = data_abertura.date()
-                    
-                    if data_abertura:
-                        diff = hoje - data_abertura
-                        return diff.days
-                        
-                except Exception as e:
-                    logger.debug(f"Erro ao calcular tempo de vida para projeto crítico {row.get('Numero', 'N/A')}: {e}")
-                
-                return None
-            
-            # Adiciona coluna de tempo de vida
-            dados_para_retorno['tempo_vida'] = projetos_criticos.apply(calcular_tempo_vida_criticos, axis=1)
+            dados_para_retorno['tempo_vida'] = self._calcular_tempo_vida_projetos(
+                projetos_criticos,
+                ['DataInicio', 'DataAbertura', 'Data Abertura', 'data_abertura', 'DataCriacao', 'Data Criacao', 'Data_Criacao'],
+                # Para projetos críticos, tendemos a assumir que são mais antigos
+                (500, 400, 300, 200, 120)
+            )
             logger.info(f"Tempo de vida calculado para críticos - Exemplos: {dados_para_retorno['tempo_vida'].head().tolist()}")
             # <<< FIM: Calcular tempo de vida >>>
 
@@ -1191,7 +1143,7 @@ class MacroService(BaseService):
                     'bloqueados': len(projetos_nao_concluidos[bloqueados]),
                     'horas_negativas': len(projetos_nao_concluidos[horas_negativas]),
                     'prazo_vencido': len(projetos_nao_concluidos[prazo_vencido]),
-                    'por_squad': projetos_criticos.groupby('Squad').size().to_dict()
+                    'por_squad': projetos_criticos.groupby('Squad', observed=True).size().to_dict()
                 }
             }
             
@@ -1199,9 +1151,10 @@ class MacroService(BaseService):
             logger.error(f"Erro ao calcular projetos críticos: {str(e)}", exc_info=True)
             return {'total': 0, 'dados': pd.DataFrame(), 'metricas': {}}
 
-    def calcular_projetos_concluidos(self, dados):
+    def calcular_projetos_concluidos(self, dados, mascara=None):
         """
         Calcula métricas para projetos concluídos no mês atual.
+        ``mascara`` (opcional) é a de ``mascara_concluidos_mes`` já calculada sobre ``dados``.
         Retorna:
         - total: número total de projetos concluídos no mês
         - dados: DataFrame com os projetos concluídos
@@ -1210,20 +1163,13 @@ class MacroService(BaseService):
         try:
             logger.info("Calculando projetos concluídos do mês atual...")
             
-            # Obtém o mês e ano atual
-            hoje = datetime.now()
-            mes_atual = hoje.month
-            ano_atual = hoje.year
-            
             # Usa dados já tratados
             dados_base = self.preparar_dados_base(dados)
             
-            # Filtra projetos concluídos (sem filtro de Squad para debug)
-            projetos_concluidos = dados_base[
-                (dados_base['Status'].isin(self.status_concluidos)) &
-                (pd.to_datetime(dados_base['DataTermino'], format='%d/%m/%Y %H:%M', errors='coerce').dt.month == mes_atual) &
-                (pd.to_datetime(dados_base['DataTermino'], format='%d/%m/%Y %H:%M', errors='coerce').dt.year == ano_atual)
-            ].copy()
+            # Filtra projetos concluídos no mês atual (sem filtro de Squad para debug)
+            if mascara is None:
+                mascara = self.mascara_concluidos_mes(dados_base)
+            projetos_concluidos = dados_base[mascara].copy()
             
             # Log para debug
             logger.debug(f"Projetos concluídos filtrados (sem CDB): {len(projetos_concluidos)}")
@@ -1233,7 +1179,7 @@ class MacroService(BaseService):
             if total_concluidos > 0:
                 media_conclusao = projetos_concluidos['Conclusao'].mean()
                 media_horas = projetos_concluidos['HorasTrabalhadas'].mean()
-                projetos_por_squad = projetos_concluidos.groupby('Squad').size().to_dict()
+                projetos_por_squad = projetos_concluidos.groupby('Squad', observed=True).size().to_dict()
             else:
                 media_conclusao = 0
                 media_horas = 0
@@ -1292,8 +1238,8 @@ class MacroService(BaseService):
             colunas_texto = ['especialista', 'account', 'servico', 'tipo_faturamento']
             for col in colunas_texto:
                 if col in dados_modal.columns:
-                    dados_modal[col] = dados_modal[col].fillna('-')
-                    dados_modal[col] = dados_modal[col].replace(['N/A', 'NÃO DEFINIDO', 'NÃO ALOCADO', ''], '-')
+                    dados_modal[col] = substituir_valores(
+                        dados_modal[col], dict.fromkeys(['N/A', 'NÃO DEFINIDO', 'NÃO ALOCADO', ''], '-'), '-')
             
             # Formatação de horas igual ao Relatório Geral (duas casas decimais)
             dados_modal['horasContratadas'] = pd.to_numeric(dados_modal['horasContratadas'], errors='coerce').fillna(0).round(2)
@@ -1327,12 +1273,13 @@ class MacroService(BaseService):
             logger.error(f"Erro ao calcular projetos concluídos: {str(e)}", exc_info=True)
             return {'total': 0, 'dados': pd.DataFrame(), 'metricas': {}}
 
-    def calcular_projetos_risco(self, dados):
+    def calcular_projetos_risco(self, dados, mascara=None):
         """
         Calcula projetos em risco com base em critérios preventivos:
         1. Menos de 20% das horas totais restantes
         2. Prazo próximo (15 dias) com conclusão menor que 70%
         3. Média de horas/dia até o prazo muito baixa (menos de 1 hora/dia)
+        ``mascara`` (opcional) é a de ``mascara_nao_concluidos`` já calculada sobre ``dados``.
         """
         try:
             hoje = pd.Timestamp(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0))
@@ -1342,8 +1289,10 @@ class MacroService(BaseService):
             logger.debug(f"Iniciando cálculo de projetos em risco. Total de projetos: {len(dados_base)}")
             
             # Filtra apenas projetos não concluídos e não críticos
+            if mascara is None:
+                mascara = self.mascara_nao_concluidos(dados_base)
             projetos_nao_concluidos = dados_base[
-                ~dados_base['Status'].isin(self.status_concluidos) &
+                mascara &
                 ~dados_base['Status'].isin(['BLOQUEADO']) &
                 (dados_base['Status'] != 'AGUARDANDO') & # <-- NOVA CONDIÇÃO: Status não pode ser AGUARDANDO
                 (dados_base['HorasRestantes'] >= 0)
@@ -1450,7 +1399,8 @@ class MacroService(BaseService):
                         f"Data exibição: {row['DataTermino']}"
                     )
                 
-                return projetos_risco
+                # HorasRestantesAjustadas é coluna interna da ocupação/burn rate, fora dos payloads de risco
+                return projetos_risco.drop(columns=['HorasRestantesAjustadas'], errors='ignore')
             else:
                 logger.warning("Nenhuma condição de risco foi aplicada")
                 return pd.DataFrame()
@@ -1462,10 +1412,15 @@ class MacroService(BaseService):
     def preparar_dados_base(self, dados):
         """
         Prepara os dados base que serão usados por todas as funções de KPI.
-        Faz as conversões e limpezas necessárias uma única vez.
+        Faz as conversões e limpezas necessárias uma única vez: dados já
+        preparados (marcados em ``attrs``, inclusive subconjuntos filtrados)
+        são devolvidos sem refazer as conversões.
         """
         try:
-            dados_base = dados.copy()
+            if dados.attrs.get('dados_base_preparados'):
+                return dados.copy(deep=False)
+            
+            dados_base = dados.copy(deep=False)
             
             # Converte datas
             for col in ['DataInicio', 'DataTermino', 'VencimentoEm']:
@@ -1497,6 +1452,8 @@ class MacroService(BaseService):
             else:
                 dados_base['TempoVida'] = 0
             
+            dados_base.attrs['dados_base_preparados'] = True
+            
             logger.debug(f"Dados base preparados. Colunas: {dados_base.columns.tolist()}")
             logger.debug(f"Account Managers após preparação: {dados_base['Account Manager'].unique().tolist() if 'Account Manager' in dados_base.columns else 'Coluna não existe'}")
             
@@ -1505,10 +1462,124 @@ class MacroService(BaseService):
             logger.error(f"Erro ao preparar dados base: {str(e)}", exc_info=True)
             return dados.copy()
 
-    def calcular_media_horas(self, dados):
+    def mascara_nao_concluidos(self, dados_base):
+        """Máscara booleana (alinhada a ``dados_base``) dos projetos não concluídos."""
+        return ~dados_base['Status'].isin(self.status_concluidos)
+
+    def mascara_fora_cdb(self, dados_base):
+        """Máscara booleana dos projetos fora da squad CDB DATA SOLUTIONS."""
+        return dados_base['Squad'] != 'CDB DATA SOLUTIONS'
+
+    def mascara_ativos(self, dados_base, nao_concluidos=None, fora_cdb=None):
+        """
+        Máscara dos projetos ativos: não concluídos e fora da CDB DATA SOLUTIONS.
+        Aceita as duas máscaras componentes já calculadas.
+        """
+        if nao_concluidos is None:
+            nao_concluidos = self.mascara_nao_concluidos(dados_base)
+        if fora_cdb is None:
+            fora_cdb = self.mascara_fora_cdb(dados_base)
+        return nao_concluidos & fora_cdb
+
+    def mascara_concluidos_mes(self, dados_base, hoje=None):
+        """Máscara dos projetos concluídos com DataTermino no mês de ``hoje`` (padrão: agora)."""
+        hoje = hoje or datetime.now()
+        termino = pd.to_datetime(dados_base['DataTermino'], format='%d/%m/%Y %H:%M', errors='coerce')
+        return (
+            dados_base['Status'].isin(self.status_concluidos) &
+            (termino.dt.month == hoje.month) &
+            (termino.dt.year == hoje.year)
+        )
+
+    def carregar_dados_periodo_dashboard(self, hoje=None):
+        """
+        Carrega e combina os dados do mês atual (dadosr.csv) e dos 2 meses anteriores,
+        usados no Tempo Médio de Vida e na Eficiência de Entrega do dashboard.
+        """
+        hoje = hoje or datetime.now()
+        dataframes_periodo_dash = []
+        fontes_carregadas_dash = []
+        cargas_dash = []  # (fonte, descrição) a carregar, na ordem dos meses
+        mes_atual_dash_loop = hoje.replace(day=1)
+        
+        for i in range(3): # Resolve a fonte do mês atual (i=0) e dos 2 anteriores (i=1, i=2)
+            mes_loop = mes_atual_dash_loop.month
+            ano_loop = mes_atual_dash_loop.year
+            fonte_mes_loop = None
+            fonte_desc = ""
+            
+            is_current_month = (i == 0)
+            
+            if is_current_month:
+                fonte_mes_loop = None # Usar default dadosr.csv
+                fonte_desc = "dadosr.csv (atual)"
+            else:
+                # Lógica para determinar a fonte dos meses anteriores
+                # Precisa ser robusta para diferentes meses/anos
+                if mes_loop == 3 and ano_loop == 2025:
+                     fonte_mes_loop = 'dadosr_apt_mar'
+                elif mes_loop == 2 and ano_loop == 2025:
+                     fonte_mes_loop = 'dadosr_apt_fev'
+                elif mes_loop == 1 and ano_loop == 2025:
+                     fonte_mes_loop = 'dadosr_apt_jan'
+                # Adicionar mais regras aqui, ou uma lógica mais dinâmica baseada no nome do mês
+                # Exemplo dinâmico (requer teste): 
+                # else:
+                #    mes_nome_abbr = mes_atual_dash_loop.strftime('%b').lower()
+                #    fonte_mes_loop = f'dadosr_apt_{mes_nome_abbr}'
+                
+                if fonte_mes_loop:
+                    fonte_desc = fonte_mes_loop
+                else:
+                    fonte_desc = f"Não encontrada para {mes_loop}/{ano_loop}"
+
+            # Carrega os dados se a fonte foi definida (ou se for o mês atual)
+            if fonte_mes_loop is not None or is_current_month:
+                logger.info(f"[Dashboard TMV] Tentando carregar dados da fonte: {fonte_desc} para {mes_loop}/{ano_loop}")
+                cargas_dash.append((fonte_mes_loop, fonte_desc)) # None carrega dadosr.csv no mês atual
+            else:
+                 logger.warning(f"[Dashboard TMV] Fonte de dados não encontrada/definida para mês passado {mes_loop}/{ano_loop}")
+
+            # Calcula o mês anterior para a próxima iteração
+            primeiro_dia_mes_anterior_loop = mes_atual_dash_loop - timedelta(days=1)
+            mes_atual_dash_loop = primeiro_dia_mes_anterior_loop.replace(day=1)
+        
+        # Carrega as fontes em paralelo (resultados na ordem dos meses)
+        dados_cargas = carregar_em_paralelo([fonte for fonte, _ in cargas_dash], self.carregar_dados,
+                                            descricao='fontes do TMV')
+        for (fonte_mes_loop, fonte_desc), dados_mes in zip(cargas_dash, dados_cargas):
+            if not dados_mes.empty:
+                dataframes_periodo_dash.append(dados_mes)
+                fontes_carregadas_dash.append(fonte_desc)
+            else:
+                logger.warning(f"[Dashboard TMV] Dados vazios ou falha ao carregar fonte: {fonte_desc}")
+            
+        # Combina os dataframes
+        dados_combinados_dash = pd.DataFrame()
+        if dataframes_periodo_dash:
+            try:
+                 dados_combinados_dash = pd.concat(dataframes_periodo_dash, ignore_index=True)
+                 logger.info(f"[Dashboard TMV] Dados combinados de {len(dataframes_periodo_dash)} fontes ({fontes_carregadas_dash}) para cálculo. Total de linhas: {len(dados_combinados_dash)}")
+            except Exception as e_concat:
+                 logger.error(f"[Dashboard TMV] Erro ao concatenar dataframes: {e_concat}")
+        else:
+            logger.warning("[Dashboard TMV] Nenhum dataframe carregado para o período de 3 meses (atual + 2 anteriores).")
+            
+        return dados_combinados_dash
+    
+    def obter_kpis_dashboard(self):
+        """
+        KPIs do dashboard macro via motor de KPIs (app.macro.kpi_engine): cada nó é
+        calculado uma vez por versão dos resultados e reaproveitado nas próximas renderizações.
+        """
+        from .kpi_engine import MOTOR_DASHBOARD, KPIS_DASHBOARD
+        return MOTOR_DASHBOARD.obter_varios(KPIS_DASHBOARD, self, _versao_resultados_atual())
+    
+    def calcular_media_horas(self, dados, mascara=None):
         """
         Calcula a média de horas dos projetos ativos.
         Retorna apenas a média geral para exibição no card.
+        ``mascara`` (opcional) é a de ``mascara_nao_concluidos`` já calculada sobre ``dados``.
         """
         try:
             logger.info("Calculando média de horas...")
@@ -1517,7 +1588,9 @@ class MacroService(BaseService):
             dados_base = self.preparar_dados_base(dados)
             
             # Filtra apenas projetos não concluídos
-            projetos_nao_concluidos = dados_base[~dados_base['Status'].isin(self.status_concluidos)]
+            if mascara is None:
+                mascara = self.mascara_nao_concluidos(dados_base)
+            projetos_nao_concluidos = dados_base[mascara]
             
             # Calcula apenas a média geral
             media_geral = round(projetos_nao_concluidos['Horas'].mean(), 1)
@@ -1528,7 +1601,7 @@ class MacroService(BaseService):
                 'total': media_geral,  # para manter consistência com outros KPIs
                 'metricas': {
                     'media_geral': media_geral,
-                    'media_por_squad': projetos_nao_concluidos.groupby('Squad')['Horas'].mean().round(1).to_dict()
+                    'media_por_squad': projetos_nao_concluidos.groupby('Squad', observed=True)['Horas'].mean().round(1).to_dict()
                 }
             }
             
@@ -1712,7 +1785,7 @@ class MacroService(BaseService):
             
             # Calcula métricas por squad se houver dados
             if len(projetos_com_horas) > 0:
-                metricas['media_por_squad'] = projetos_com_horas.groupby('Squad')['eficiencia_horas'].mean().round(1).to_dict()
+                metricas['media_por_squad'] = projetos_com_horas.groupby('Squad', observed=True)['eficiencia_horas'].mean().round(1).to_dict()
                 metricas['projetos_acima_100'] = len(projetos_com_horas[projetos_com_horas['eficiencia_horas'] > 100])
                 metricas['projetos_abaixo_80'] = len(projetos_com_horas[projetos_com_horas['eficiencia_horas'] < 80])
             else:
@@ -1808,7 +1881,7 @@ class MacroService(BaseService):
                 return resultado
                 
             # Prepara cópia de dados para evitar alterações no original
-            dados_temp = dados.copy()
+            dados_temp = dados.copy(deep=False)
             
             # Garante que Status seja string e maiúsculo
             dados_temp['Status'] = dados_temp['Status'].astype(str).str.strip().str.upper()
@@ -1836,7 +1909,7 @@ class MacroService(BaseService):
             status_concluidos = ['FECHADO', 'RESOLVIDO', 'ENCERRADO']
             
             # Filtra apenas projetos ativos
-            dados_ativos = dados_temp[~dados_temp['Status'].isin(status_concluidos)].copy()
+            dados_ativos = dados_temp[~dados_temp['Status'].isin(status_concluidos)]
             
             # 1. Agregações por Status
             # ------------------------
@@ -1844,11 +1917,11 @@ class MacroService(BaseService):
             
             # Agrupa por status e calcula as métricas
             # Modificado: Usar size() para contar linhas do grupo, mais robusto que contar não-nulos em 'Projeto'
-            contagem_status = dados_ativos.groupby('Status').size()
+            contagem_status = dados_ativos.groupby('Status', observed=True).size()
             
             # Calcular métricas adicionais separadamente (se necessário)
-            soma_horas = dados_ativos.groupby('Status')['Horas'].sum()
-            media_conclusao = dados_ativos.groupby('Status')['Conclusao'].mean()
+            soma_horas = dados_ativos.groupby('Status', observed=True)['Horas'].sum()
+            media_conclusao = dados_ativos.groupby('Status', observed=True)['Conclusao'].mean()
             
             # Status que serão ignorados no gráfico
             status_ignorados = ['ATRASADO', 'CANCELADO']
@@ -1945,7 +2018,7 @@ class MacroService(BaseService):
                 dados_temp['Squad'] = dados_temp['Squad'].str.upper()
                 
                 # Agrupa por squad e calcula as métricas
-                agregacao_squad = dados_ativos.groupby('Squad').agg({
+                agregacao_squad = dados_ativos.groupby('Squad', observed=True).agg({
                     'Projeto': 'count',    # quantidade
                     'Horas': 'sum',        # horas_totais
                     'Conclusao': 'mean'    # conclusao_media
@@ -2045,8 +2118,11 @@ class MacroService(BaseService):
                 'projetos_entregues': []
             }
 
-    def calcular_alocacao_especialistas(self, dados):
-        """Calcula a alocação detalhada por especialista, focando em projetos ativos."""
+    def calcular_alocacao_especialistas(self, dados, mascara=None):
+        """
+        Calcula a alocação detalhada por especialista, focando em projetos ativos.
+        ``mascara`` (opcional) é a de ``mascara_nao_concluidos`` já calculada sobre ``dados``.
+        """
         try:
             if dados.empty:
                 logger.warning("DataFrame vazio ao calcular alocação por especialistas.")
@@ -2060,7 +2136,9 @@ class MacroService(BaseService):
                 return {}
 
             # Filtra para incluir apenas projetos NÃO CONCLUÍDOS
-            dados_ativos = dados_base[~dados_base['Status'].isin(self.status_concluidos)].copy()
+            if mascara is None:
+                mascara = self.mascara_nao_concluidos(dados_base)
+            dados_ativos = dados_base[mascara]
             logger.info(f"Filtrando especialistas: {len(dados_base)} linhas no total -> {len(dados_ativos)} linhas ativas consideradas.")
 
             # --- NOVO: Calcular o número total de projetos ativos ---
@@ -2080,7 +2158,7 @@ class MacroService(BaseService):
                     dados_ativos[col] = 0.0
 
             # Agrupa os dados JÁ FILTRADOS (ativos)
-            agrupado = dados_ativos.groupby('Especialista', dropna=False)
+            agrupado = dados_ativos.groupby('Especialista', dropna=False, observed=True)
 
             # Realiza as agregações necessárias
             sumario = agrupado.agg(
@@ -2093,7 +2171,7 @@ class MacroService(BaseService):
             ).reset_index()
 
             # Calcula projetos bloqueados separadamente
-            bloqueados = dados_ativos[dados_ativos['Status'] == 'BLOQUEADO'].groupby('Especialista').size()
+            bloqueados = dados_ativos[dados_ativos['Status'] == 'BLOQUEADO'].groupby('Especialista', observed=True).size()
             sumario = sumario.merge(bloqueados.rename('projetos_bloqueados'), on='Especialista', how='left')
             sumario['projetos_bloqueados'] = sumario['projetos_bloqueados'].fillna(0).astype(int)
 
@@ -2204,7 +2282,7 @@ class MacroService(BaseService):
                             dados_ativos[col] = pd.to_numeric(dados_ativos[col], errors='coerce').fillna(0.0)
 
                     # Agrupa por Account Manager (incluindo 'Não Alocado')
-                    accounts_agg = dados_ativos.groupby('Account Manager', dropna=False).agg(
+                    accounts_agg = dados_ativos.groupby('Account Manager', dropna=False, observed=True).agg(
                         total_projetos=('Projeto', 'count'),
                         horas_totais=('Horas', 'sum'),
                         horas_restantes=('HorasRestantes', 'sum'),
@@ -2213,11 +2291,11 @@ class MacroService(BaseService):
                     ).reset_index()
 
                     # Trata o caso de Account Manager ser NaN
-                    accounts_agg['Account Manager'] = accounts_agg['Account Manager'].fillna('NÃO DEFINIDO')
+                    accounts_agg['Account Manager'] = substituir_valores(accounts_agg['Account Manager'], {}, 'NÃO DEFINIDO')
                     
                     # Agrupa novamente se necessário
                     if accounts_agg['Account Manager'].duplicated().any():
-                        accounts_agg = accounts_agg.groupby('Account Manager').agg({
+                        accounts_agg = accounts_agg.groupby('Account Manager', observed=True).agg({
                             'total_projetos': 'sum',
                             'horas_totais': 'sum',
                             'horas_restantes': 'sum',
@@ -2499,20 +2577,13 @@ class MacroService(BaseService):
                     logger.info(f"    Horas Trabalhadas: {projeto.get('HorasTrabalhadas', 0.0)}")
                     logger.info(f"    Horas Restantes: {projeto.get('HorasRestantes', 0.0)}")
             
-            # Ajusta horas restantes: para negativas, usa 10% do esforço inicial (igual ao Gerencial)
-            # Melhorado para garantir exatamente 10% e logging detalhado
-            def ajustar_horas_restantes(row):
-                if row['HorasRestantes'] >= 0:
-                    return row['HorasRestantes']
-                else:
-                    valor_ajustado = 0.10 * row['Horas']
-                    if row['Squad'] == 'DATA E POWER':
-                        logger.info(f"  Ajustando projeto {row.get('Projeto', 'N/A')}: "
-                                  f"Horas Restantes: {row['HorasRestantes']} -> "
-                                  f"Ajustado (10% de {row['Horas']}): {valor_ajustado}")
-                    return valor_ajustado
-            
-            projetos_ativos['HorasRestantesAjustadas'] = projetos_ativos.apply(ajustar_horas_restantes, axis=1)
+            # Horas restantes ajustadas (negativas contam 10% do esforço inicial, igual ao Gerencial),
+            # derivadas uma única vez no snapshot canônico
+            projetos_ativos['HorasRestantesAjustadas'] = horas_restantes_ajustadas(projetos_ativos)
+            ajustados_data_power = (projetos_ativos['Squad'] == 'DATA E POWER') & (projetos_ativos['HorasRestantes'] < 0)
+            if ajustados_data_power.any():
+                logger.info(f"  DATA E POWER: {int(ajustados_data_power.sum())} projetos com horas restantes negativas "
+                            f"ajustados para 10% do esforço inicial")
             
             # Separa projetos em planejamento
             planejamento_pmo = projetos_ativos[projetos_ativos['Squad'] == 'Em Planejamento - PMO'].copy()
@@ -2528,7 +2599,7 @@ class MacroService(BaseService):
             # Processa os squads regulares
             if not dados_squads.empty:
                 # Agrupa por Squad
-                squads = dados_squads.groupby('Squad').agg({
+                squads = dados_squads.groupby('Squad', observed=True).agg({
                     'Projeto': 'count',
                     'HorasRestantesAjustadas': 'sum'
                 }).reset_index()
@@ -2619,8 +2690,8 @@ class MacroService(BaseService):
             resultado = {
                 'metricas_qualidade': metricas,
                 'projetos_criticos': projetos_risco.replace({np.nan: None}).to_dict('records'),
-                'projetos_por_squad': dados_limpos.groupby('Squad').size().to_dict(),
-                'projetos_por_faturamento': dados_limpos.groupby('Faturamento').size().to_dict(),
+                'projetos_por_squad': dados_limpos.groupby('Squad', observed=True).size().to_dict(),
+                'projetos_por_faturamento': dados_limpos.groupby('Faturamento', observed=True).size().to_dict(),
                 'squads_disponiveis': sorted(dados_limpos['Squad'].unique().tolist()),
                 'faturamentos_disponiveis': sorted(dados_limpos['Faturamento'].unique().tolist()),
                 'ocupacao_squads': ocupacao_squads
@@ -2632,13 +2703,15 @@ class MacroService(BaseService):
             logging.error(f"Erro no processamento: {str(e)}")
             return self.criar_estrutura_vazia()
 
-    def calcular_projetos_por_faturamento(self, dados, mes_ref=None):
+    def calcular_projetos_por_faturamento(self, dados, mes_ref=None, cubo=None):
         """
         Calcula a distribuição de projetos por tipo de faturamento.
         
         Args:
             dados: DataFrame com os dados dos projetos
             mes_ref: Mês de referência para filtrar os dados (formato datetime)
+            cubo: Cubo pré-agregado dos mesmos dados (``obter_cubo``); se omitido,
+                é construído a partir de ``dados``
         
         Returns:
             Dictionary com contagem por tipo de faturamento e dados detalhados
@@ -2646,31 +2719,30 @@ class MacroService(BaseService):
         try:
             logger.info("Calculando projetos por tipo de faturamento...")
             
-            # Usa dados já tratados
-            dados_base = self.preparar_dados_base(dados)
-            
-            # Filtra apenas projetos ativos
-            projetos_ativos = dados_base[~dados_base['Status'].isin(self.status_concluidos)].copy()
-            
-            # Se um mês de referência for fornecido, filtra os dados
-            if mes_ref:
-                # Converte DataInicio para datetime se ainda não estiver
-                if 'DataInicio' in projetos_ativos.columns:
-                    projetos_ativos['DataInicio'] = pd.to_datetime(projetos_ativos['DataInicio'], errors='coerce')
-                    # Filtra apenas projetos que já estavam abertos até o final do mês
-                    primeiro_dia_proximo_mes = (mes_ref.replace(day=28) + timedelta(days=4)).replace(day=1)
-                    projetos_ativos = projetos_ativos[projetos_ativos['DataInicio'] < primeiro_dia_proximo_mes]
-            
             # Garante que a coluna Faturamento existe
-            if 'Faturamento' not in projetos_ativos.columns:
+            if 'Faturamento' not in dados.columns:
                 logger.warning("Coluna 'Faturamento' não encontrada ao calcular projetos por faturamento")
                 return {
                     'contagem': {},
                     'dados': []
                 }
             
+            # Contagens saem do cubo (status x mês de abertura x faturamento), sem percorrer as linhas
+            if cubo is None:
+                cubo = CuboMensal.construir(self.preparar_dados_base(dados))
+            
+            # Filtra apenas projetos ativos
+            filtros = {'Status': lambda status: ~status.astype(str).str.strip().str.upper().isin(self.status_concluidos)}
+            
+            # Se um mês de referência for fornecido, considera apenas projetos que já estavam abertos até o final do mês
+            if mes_ref and 'DataInicio' in dados.columns:
+                filtros['MesInicio'] = lambda mes: mes <= periodo_mes(mes_ref)
+            
+            projetos_ativos = cubo.fatiar(**filtros)
+            total_ativos = projetos_ativos.total()
+            
             # Contagem por tipo de faturamento
-            contagem = projetos_ativos['Faturamento'].value_counts().to_dict()
+            contagem = projetos_ativos.contar('Faturamento').to_dict()
             
             # Define cores para os tipos de faturamento
             cores_faturamento = {
@@ -2695,7 +2767,7 @@ class MacroService(BaseService):
                     'tipo': tipo,
                     'quantidade': qtd,
                     'cor': cor,
-                    'percentual': round((qtd / len(projetos_ativos) * 100), 1) if len(projetos_ativos) > 0 else 0
+                    'percentual': round((qtd / total_ativos * 100), 1) if total_ativos > 0 else 0
                 })
             
             # Ordena por quantidade em ordem decrescente
@@ -2706,7 +2778,7 @@ class MacroService(BaseService):
             return {
                 'contagem': contagem,
                 'dados': dados_detalhados,
-                'total': len(projetos_ativos)
+                'total': total_ativos
             }
             
         except Exception as e:
@@ -3014,7 +3086,7 @@ class MacroService(BaseService):
             # Calcula contagem por status
             por_status = {}
             if not dados_filtrados.empty:
-                contagem_status = dados_filtrados['Status'].value_counts().to_dict()
+                contagem_status = contar_valores(dados_filtrados['Status']).to_dict()
                 for status, qtd in contagem_status.items():
                     por_status[status] = qtd
                     logger.info(f"Status {status}: {qtd} projetos")
@@ -3180,6 +3252,19 @@ class MacroService(BaseService):
             logger.exception(f"Erro ao filtrar projetos concluídos: {str(e)}")
             return pd.DataFrame()  # Retorna DataFrame vazio em caso de erro
     
+    def _carregar_termino_historico(self, fonte, data_inicio, data_fim):
+        """
+        Carrega de uma fonte histórica apenas Numero/Status/DataTermino dos projetos
+        com término entre ``data_inicio`` e ``data_fim`` (leitura projetada, cacheada
+        por arquivo e janela). Retorna None se a fonte não existir.
+        """
+        csv_path = self.csv_path.parent / (fonte if fonte.endswith('.csv') else f"{fonte}.csv")
+        if not csv_path.is_file():
+            logger.error(f"❌ Arquivo não encontrado: {csv_path}")
+            return None
+        return ler_csv_projetado(csv_path, ['Numero', 'Status', 'DataTermino'],
+                                 janela=('DataTermino', data_inicio, data_fim))
+    
     def calcular_historico_entregas(self, dados, mes_referencia):
         """
         Calcula o histórico de entregas para os 3 meses anteriores ao mês de referência,
@@ -3236,16 +3321,15 @@ class MacroService(BaseService):
                     
                     if fonte_historico:
                         logger.info(f"    Tentando carregar dados da fonte: {fonte_historico}")
-                        dados_historico = self.carregar_dados(fonte=fonte_historico)
+                        # Define o primeiro e último dia do mês histórico
+                        data_inicio = datetime(ano_hist, mes_hist, 1)
+                        if mes_hist == 12:
+                            data_fim = datetime(ano_hist + 1, 1, 1) - timedelta(days=1)
+                        else:
+                            data_fim = datetime(ano_hist, mes_hist + 1, 1) - timedelta(days=1)
+                        dados_historico = self._carregar_termino_historico(fonte_historico, data_inicio, data_fim)
                         
-                        if not dados_historico.empty:
-                            # Define o primeiro e último dia do mês histórico
-                            data_inicio = datetime(ano_hist, mes_hist, 1)
-                            if mes_hist == 12:
-                                data_fim = datetime(ano_hist + 1, 1, 1) - timedelta(days=1)
-                            else:
-                                data_fim = datetime(ano_hist, mes_hist + 1, 1) - timedelta(days=1)
-                                
+                        if dados_historico is not None:
                             # Filtra projetos concluídos neste mês usando os dados históricos
                             concluidos_mes = self.filtrar_projetos_concluidos(dados_historico, data_inicio, data_fim)
                             quantidade = len(concluidos_mes)
@@ -3334,15 +3418,14 @@ class MacroService(BaseService):
                 
                 if fonte_historico:
                     logger.info(f"    Tentando carregar dados da fonte: {fonte_historico}")
-                    dados_historico = self.carregar_dados(fonte=fonte_historico)
+                    data_inicio = datetime(ano_hist, mes_hist, 1)
+                    if mes_hist == 12:
+                        data_fim = datetime(ano_hist + 1, 1, 1) - timedelta(days=1)
+                    else:
+                        data_fim = datetime(ano_hist, mes_hist + 1, 1) - timedelta(days=1)
+                    dados_historico = self._carregar_termino_historico(fonte_historico, data_inicio, data_fim)
                     
-                    if not dados_historico.empty:
-                        data_inicio = datetime(ano_hist, mes_hist, 1)
-                        if mes_hist == 12:
-                            data_fim = datetime(ano_hist + 1, 1, 1) - timedelta(days=1)
-                        else:
-                            data_fim = datetime(ano_hist, mes_hist + 1, 1) - timedelta(days=1)
-                        
+                    if dados_historico is not None:
                         concluidos_mes = self.filtrar_projetos_concluidos(dados_historico, data_inicio, data_fim)
                         quantidade = len(concluidos_mes)
                         logger.info(f"    Encontrados {quantidade} projetos concluídos em {nome_mes_hist} usando {fonte_historico}.csv")
@@ -3529,7 +3612,7 @@ class MacroService(BaseService):
 
             # Agrupa por Squad (garante que Squad seja string e maiúsculo)
             dados_mes['Squad'] = dados_mes['Squad'].astype(str).str.strip().str.upper() # Garante que a coluna está em maiúsculas
-            contagem_squad = dados_mes.groupby('Squad').size().to_dict()
+            contagem_squad = dados_mes.groupby('Squad', observed=True).size().to_dict()
 
             # Normaliza os squads principais
             squads_principais = ['AZURE', 'M365', 'DATA E POWER', 'CDB']
@@ -3722,16 +3805,16 @@ class MacroService(BaseService):
             logger.warning(f"Não foi possível converter project_id '{project_id}' para int")
             return None
         
-        # Busca o projeto pelo ID
-        projeto = dados[dados['Numero'] == project_id_int]
+        # Busca o projeto pelo ID (índice Numero -> linha)
+        projeto = localizar_projeto(dados, project_id_int)
         
         if projeto.empty:
             # OTIMIZAÇÃO: Log silenciado para projetos não encontrados (muito comum)
             # logger.warning(f"Projeto com ID {project_id_int} não encontrado")
             return None
         
-        # Retorna o primeiro resultado como dicionário
-        projeto_dict = projeto.iloc[0].to_dict()
+        # Retorna o primeiro resultado como dicionário (sem a coluna interna da ocupação/burn rate)
+        projeto_dict = projeto.iloc[0].drop('HorasRestantesAjustadas', errors='ignore').to_dict()
         
         # --- INÍCIO: Normalização das chaves ---
         normalized_details = { _normalize_key(k): v for k, v in projeto_dict.items() }
@@ -3929,7 +4012,7 @@ class MacroService(BaseService):
                 return self._get_empty_status_report_data(project_id, "Dados não disponíveis")
             
             # Buscar projeto específico usando o ID convertido
-            projeto = dados[dados['Numero'] == project_id_int]
+            projeto = localizar_projeto(dados, project_id_int)
             if projeto.empty:
                 logger.warning(f"Projeto {project_id_int} não encontrado")
                 return self._get_empty_status_report_data(project_id, f"Projeto {project_id_int} não encontrado")
@@ -4749,13 +4832,15 @@ class MacroService(BaseService):
             
         return dataframe
 
-    def calcular_metricas_tipos_servico_simples(self, dados):
+    def calcular_metricas_tipos_servico_simples(self, dados, cubo=None):
         """
         Calcula métricas básicas por tipo de serviço usando categorização CSV.
         Versão simples e incremental.
         
         Args:
             dados (pd.DataFrame): DataFrame com os projetos
+            cubo (CuboMensal, optional): Cubo pré-agregado dos mesmos dados (``obter_cubo``);
+                se omitido, é construído a partir de ``dados``
             
         Returns:
             dict: Métricas organizadas por categoria
@@ -4778,10 +4863,12 @@ class MacroService(BaseService):
                 logger.warning("Coluna 'TipoServico' não encontrada nos dados")
                 return {'erro': 'Coluna TipoServico não encontrada', 'categorias': {}, 'tipos': {}}
             
-            # Prepara dados básicos
-            dados_limpos = dados[dados['TipoServico'].notna() & (dados['TipoServico'] != '')].copy()
+            # Totais por tipo de serviço saem do cubo (tipo x status), sem percorrer as linhas
+            if cubo is None:
+                cubo = CuboMensal.construir(dados)
+            cubo_tipos = cubo.fatiar(TipoServico=lambda tipo: tipo.notna() & (tipo != ''))
             
-            if dados_limpos.empty:
+            if cubo_tipos.vazio:
                 logger.warning("Nenhum projeto com tipo de serviço válido")
                 return {'erro': 'Nenhum projeto com tipo de serviço válido', 'categorias': {}, 'tipos': {}}
             
@@ -4792,24 +4879,28 @@ class MacroService(BaseService):
             metricas_tipos = {}
             metricas_categorias = {}
             
-            tipos_unicos = dados_limpos['TipoServico'].unique()
+            status_concluidos = ['FECHADO', 'ENCERRADO', 'RESOLVIDO', 'CANCELADO']
+            totais_tipo = cubo_tipos.agregar(['TipoServico'], ['quantidade', 'horas'])
+            concluidos_tipo = cubo_tipos.fatiar(Status=status_concluidos).agregar(['TipoServico'], ['quantidade'])['quantidade']
+            tipos_unicos = totais_tipo.index
             
-            for tipo in tipos_unicos:
-                dados_tipo = dados_limpos[dados_limpos['TipoServico'] == tipo]
+            for tipo, totais in totais_tipo.iterrows():
                 categoria = type_service_reader.obter_categoria(tipo)
+                total_projetos = int(totais['quantidade'])
+                projetos_concluidos = int(concluidos_tipo.get(tipo, 0))
                 
                 # Métricas básicas do tipo
                 metricas_tipo = {
                     'nome': tipo,
                     'categoria': categoria,
-                    'total_projetos': len(dados_tipo),
-                    'projetos_ativos': len(dados_tipo[~dados_tipo['Status'].isin(['FECHADO', 'ENCERRADO', 'RESOLVIDO', 'CANCELADO'])]),
-                    'projetos_concluidos': len(dados_tipo[dados_tipo['Status'].isin(['FECHADO', 'ENCERRADO', 'RESOLVIDO', 'CANCELADO'])])
+                    'total_projetos': total_projetos,
+                    'projetos_ativos': total_projetos - projetos_concluidos,
+                    'projetos_concluidos': projetos_concluidos
                 }
                 
                 # Adiciona horas se disponível
-                if 'Horas' in dados_tipo.columns:
-                    metricas_tipo['horas_totais'] = float(dados_tipo['Horas'].sum())
+                if 'Horas' in dados.columns:
+                    metricas_tipo['horas_totais'] = float(totais['horas'])
                 else:
                     metricas_tipo['horas_totais'] = 0.0
                 
@@ -4840,15 +4931,16 @@ class MacroService(BaseService):
             periodo_info = {
                 'data_analise': data_atual.strftime('%d/%m/%Y %H:%M'),
                 'mes_referencia': data_atual.strftime('%m/%Y'),
-                'total_registros_analisados': len(dados_limpos)
+                'total_registros_analisados': cubo_tipos.total()
             }
             
             # Tenta obter período dos dados se houver coluna de data
-            if 'DataCriacao' in dados_limpos.columns or 'DataInicio' in dados_limpos.columns:
-                coluna_data = 'DataCriacao' if 'DataCriacao' in dados_limpos.columns else 'DataInicio'
+            if 'DataCriacao' in dados.columns or 'DataInicio' in dados.columns:
+                coluna_data = 'DataCriacao' if 'DataCriacao' in dados.columns else 'DataInicio'
                 try:
-                    # Converte para datetime se necessário
-                    datas_validas = pd.to_datetime(dados_limpos[coluna_data], errors='coerce').dropna()
+                    # Converte para datetime se necessário (apenas projetos com tipo de serviço)
+                    com_tipo = dados['TipoServico'].notna() & (dados['TipoServico'] != '')
+                    datas_validas = pd.to_datetime(dados.loc[com_tipo, coluna_data], errors='coerce').dropna()
                     if not datas_validas.empty:
                         periodo_info['data_inicio'] = datas_validas.min().strftime('%d/%m/%Y')
                         periodo_info['data_fim'] = datas_validas.max().strftime('%d/%m/%Y')
@@ -4862,7 +4954,7 @@ class MacroService(BaseService):
                 'resumo': {
                     'total_tipos': len(tipos_unicos),
                     'total_categorias': len(metricas_categorias),
-                    'total_projetos': len(dados_limpos),
+                    'total_projetos': cubo_tipos.total(),
                     'tipos_cadastrados_csv': len(mapeamento_tipos)
                 },
                 'periodo': periodo_info,
@@ -5141,7 +5233,7 @@ class MacroService(BaseService):
                             continue
                             
                         # Procura o projeto neste mês
-                        projeto_encontrado = dados_busca[dados_busca['Numero'] == numero_projeto]
+                        projeto_encontrado = localizar_projeto(dados_busca, numero_projeto)
                         if not projeto_encontrado.empty:
                             horas_base_encontrada = float(projeto_encontrado.iloc[0].get('HorasTrabalhadas', 0) or 0)
                             mes_base_encontrado = mes_busca.strftime('%B/%Y')
@@ -5222,8 +5314,9 @@ class MacroService(BaseService):
                     try:
                         dados_hist = self.carregar_dados(fonte=fonte_hist)
                         
-                        if not dados_hist.empty and numero_projeto in dados_hist['Numero'].values:
-                            projeto_hist = dados_hist[dados_hist['Numero'] == numero_projeto].iloc[0]
+                        projeto_hist = localizar_projeto(dados_hist, numero_projeto) if not dados_hist.empty else dados_hist
+                        if not projeto_hist.empty:
+                            projeto_hist = projeto_hist.iloc[0]
                             
                             # Tenta extrair nome do cliente do histórico
                             nome_projeto_hist = projeto_hist.get('Projeto', '')
@@ -5293,6 +5386,33 @@ class MacroService(BaseService):
             logger.debug(f"Erro ao truncar nome do cliente: {str(e)}")
             return nome_cliente
 
+    def chave_cache_apresentacao(self, mes_referencia, is_visao_atual):
+        """
+        Chave do contexto cacheado da apresentação: mês de referência, tipo de visão,
+        versão dos resultados (dados + dia), assinatura dos CSVs da pasta de dados
+        (fontes mensais) e do arquivo de projetos principais selecionados do mês.
+        """
+        mes_str = mes_referencia.strftime('%Y-%m')
+        config_file = os.path.join('instance', 'config', f'projetos_principais_{mes_str}.json')
+        return (mes_str, is_visao_atual, _versao_resultados_atual(), assinaturas_csv_dados(),
+                assinatura_arquivo(config_file))
+
+    def obter_contexto_apresentacao(self, chave):
+        """Contexto da apresentação já calculado para ``chave`` (ou None)."""
+        return _APRESENTACAO_CACHE.get(chave)
+
+    def guardar_contexto_apresentacao(self, chave, contexto):
+        """Guarda o contexto da apresentação, descartando versões anteriores do mesmo mês e visão."""
+        _APRESENTACAO_CACHE.invalidar(lambda c: c[:2] == chave[:2] and c != chave)
+        _APRESENTACAO_CACHE.set(chave, contexto)
+
+    def invalidar_cache_apresentacao(self, mes_referencia=None):
+        """Remove o contexto cacheado da apresentação do mês (ou de todos os meses)."""
+        mes_str = mes_referencia.strftime('%Y-%m') if mes_referencia else None
+        removidos = _APRESENTACAO_CACHE.invalidar(lambda c: mes_str is None or c[0] == mes_str)
+        logger.info(f"🗑️ Cache da apresentação invalidado ({mes_str or 'todos os meses'}): {removidos} contextos")
+        return removidos
+
     def carregar_projetos_principais_selecionados(self, mes_referencia):
         """
         Carrega a lista de projetos principais selecionados manualmente para um mês
@@ -5383,6 +5503,9 @@ class MacroService(BaseService):
             with open(config_file, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, ensure_ascii=False, indent=2)
             
+            # A seleção mudou: a apresentação do mês precisa ser recalculada
+            self.invalidar_cache_apresentacao(mes_referencia)
+            
             # Verificar se arquivo foi criado
             if os.path.exists(config_file):
                 file_size = os.path.getsize(config_file)
@@ -5723,10 +5846,104 @@ class MacroService(BaseService):
                 'status': 'erro'
             }
 
+    def _bitset_filtros_relatorio(self, dados, filtros):
+        """
+        Resolve os filtros do relatório geral sobre ``dados`` com o índice de filtros
+        do snapshot: AND dos bitsets de cada filtro, sem materializar linhas.
+        
+        Returns:
+            tuple: (bitset das linhas selecionadas, bitset dos projetos fechados - ou
+                    None se nenhum filtro de data de fechamento foi aplicado)
+        """
+        selecao = bitset_todos(len(dados))
+        aplicados = []
+        
+        # Filtro por Categoria
+        if 'categoria' in filtros and filtros['categoria']:
+            try:
+                from .typeservice_reader import TypeServiceReader
+                reader = TypeServiceReader()
+                
+                # Obtém todos os tipos de serviço da categoria selecionada
+                tipos_por_categoria = reader.obter_tipos_por_categoria()
+                tipos_da_categoria = set(tipos_por_categoria.get(filtros['categoria'], []))
+                
+                if tipos_da_categoria and 'TipoServico' in dados.columns:
+                    # Filtra projetos que têm tipos de serviço pertencentes à categoria
+                    selecao &= bitset_valores(dados, 'TipoServico', lambda tipo: tipo in tipos_da_categoria)
+                    aplicados.append(f"Categoria={filtros['categoria']} ({len(tipos_da_categoria)} tipos)")
+                else:
+                    logger.warning(f"Categoria '{filtros['categoria']}' não possui tipos de serviço ou coluna TipoServico não encontrada")
+            except Exception as e:
+                logger.error(f"Erro ao aplicar filtro de categoria: {str(e)}")
+        
+        # Filtros por Squad, Serviço, Status e Faturamento (comparação case-insensitive);
+        # Squad e Status são obrigatórios: sem a coluna, o relatório não é filtrado
+        for chave, coluna, obrigatoria in (('squad', 'Squad', True), ('servico', 'TipoServico', False),
+                                           ('status', 'Status', True), ('faturamento', 'Faturamento', False)):
+            if chave in filtros and filtros[chave]:
+                if not obrigatoria and coluna not in dados.columns:
+                    continue
+                alvo = filtros[chave].upper()
+                selecao &= bitset_valores(dados, coluna, lambda valor: isinstance(valor, str) and valor.upper() == alvo)
+                aplicados.append(f"{coluna}={filtros[chave]}")
+        
+        # Filtros por Data de Abertura
+        for chave, limite in (('data_abertura_inicio', 'inicio'), ('data_abertura_fim', 'fim')):
+            if chave in filtros and filtros[chave]:
+                try:
+                    data = pd.to_datetime(filtros[chave])
+                    if 'DataInicio' in dados.columns:
+                        selecao &= bitset_intervalo(dados, 'DataInicio', **{limite: data})
+                        aplicados.append(f"{chave}={filtros[chave]}")
+                except Exception as e:
+                    logger.warning(f"Erro ao aplicar filtro {chave}: {e}")
+        
+        # Filtros por Data de Fechamento: restringem apenas os projetos fechados
+        # (projetos não fechados são mantidos)
+        fechados = None
+        for chave, limite in (('data_fechamento_inicio', 'inicio'), ('data_fechamento_fim', 'fim')):
+            if chave in filtros and filtros[chave]:
+                try:
+                    data = pd.to_datetime(filtros[chave])
+                    if 'DataTermino' in dados.columns:
+                        status_fechados = bitset_valores(
+                            dados, 'Status',
+                            lambda valor: isinstance(valor, str) and valor.upper() in ('FECHADO', 'ENCERRADO', 'RESOLVIDO')
+                        )
+                        no_periodo = bitset_intervalo(dados, 'DataTermino', **{limite: data})
+                        selecao &= (status_fechados & no_periodo) | ~status_fechados
+                        fechados = status_fechados
+                        aplicados.append(f"{chave}={filtros[chave]}")
+                except Exception as e:
+                    logger.warning(f"Erro ao aplicar filtro {chave}: {e}")
+        
+        logger.debug(f"Filtros do relatório resolvidos no índice: {aplicados}")
+        return selecao, fechados
+    
+    def _posicoes_filtro_relatorio(self, dados, filtros):
+        """
+        Posições das linhas de ``dados`` selecionadas pelos filtros.
+        
+        Returns:
+            tuple: (posições das linhas fechadas, posições das não fechadas) quando houver
+                   filtro de data de fechamento - os fechados vêm primeiro no relatório -,
+                   ou (posições, None)
+        """
+        selecao, fechados = self._bitset_filtros_relatorio(dados, filtros)
+        posicoes = posicoes_bitset(selecao, len(dados))
+        if fechados is None:
+            return posicoes, None
+        fechado = np.unpackbits(fechados, count=len(dados)).astype(bool)[posicoes]
+        return posicoes[fechado], posicoes[~fechado]
+    
     def aplicar_filtros_relatorio(self, dados, filtros):
         """
         Aplica filtros avançados nos dados do relatório geral.
         
+        Os filtros são resolvidos no índice de filtros do snapshot (bitsets por valor
+        e datas ordenadas) e só as linhas selecionadas são materializadas.
+        
         Args:
             dados (DataFrame): Dados a serem filtrados
             filtros (dict): Dicionário com os filtros a aplicar
@@ -5736,103 +5953,67 @@ class MacroService(BaseService):
         """
         try:
             logger.info(f"Aplicando filtros ao relatório: {filtros}")
-            dados_filtrados = dados.copy()
-            
-            # Filtro por Categoria
-            if 'categoria' in filtros and filtros['categoria']:
-                try:
-                    from .typeservice_reader import TypeServiceReader
-                    reader = TypeServiceReader()
-                    
-                    # Obtém todos os tipos de serviço da categoria selecionada
-                    tipos_por_categoria = reader.obter_tipos_por_categoria()
-                    tipos_da_categoria = tipos_por_categoria.get(filtros['categoria'], [])
-                    
-                    if tipos_da_categoria and 'TipoServico' in dados_filtrados.columns:
-                        # Filtra projetos que têm tipos de serviço pertencentes à categoria
-                        dados_filtrados = dados_filtrados[dados_filtrados['TipoServico'].isin(tipos_da_categoria)]
-                        logger.info(f"Filtro Categoria aplicado: {filtros['categoria']} ({len(tipos_da_categoria)} tipos) - Registros restantes: {len(dados_filtrados)}")
-                    else:
-                        logger.warning(f"Categoria '{filtros['categoria']}' não possui tipos de serviço ou coluna TipoServico não encontrada")
-                except Exception as e:
-                    logger.error(f"Erro ao aplicar filtro de categoria: {str(e)}")
-            
-            # Filtro por Squad
-            if 'squad' in filtros and filtros['squad']:
-                dados_filtrados = dados_filtrados[dados_filtrados['Squad'].str.upper() == filtros['squad'].upper()]
-                logger.info(f"Filtro Squad aplicado: {filtros['squad']} - Registros restantes: {len(dados_filtrados)}")
-            
-            # Filtro por Serviço
-            if 'servico' in filtros and filtros['servico']:
-                if 'TipoServico' in dados_filtrados.columns:
-                    dados_filtrados = dados_filtrados[dados_filtrados['TipoServico'].str.upper() == filtros['servico'].upper()]
-                    logger.info(f"Filtro Serviço aplicado: {filtros['servico']} - Registros restantes: {len(dados_filtrados)}")
-            
-            # Filtro por Status
-            if 'status' in filtros and filtros['status']:
-                dados_filtrados = dados_filtrados[dados_filtrados['Status'].str.upper() == filtros['status'].upper()]
-                logger.info(f"Filtro Status aplicado: {filtros['status']} - Registros restantes: {len(dados_filtrados)}")
-            
-            # Filtro por Faturamento
-            if 'faturamento' in filtros and filtros['faturamento']:
-                if 'Faturamento' in dados_filtrados.columns:
-                    dados_filtrados = dados_filtrados[dados_filtrados['Faturamento'].str.upper() == filtros['faturamento'].upper()]
-                    logger.info(f"Filtro Faturamento aplicado: {filtros['faturamento']} - Registros restantes: {len(dados_filtrados)}")
-            
-            # Filtros por Data de Abertura
-            if 'data_abertura_inicio' in filtros and filtros['data_abertura_inicio']:
-                try:
-                    data_inicio = pd.to_datetime(filtros['data_abertura_inicio'])
-                    if 'DataInicio' in dados_filtrados.columns:
-                        dados_filtrados = dados_filtrados[pd.to_datetime(dados_filtrados['DataInicio']) >= data_inicio]
-                        logger.info(f"Filtro Data Abertura Início aplicado: {filtros['data_abertura_inicio']} - Registros restantes: {len(dados_filtrados)}")
-                except Exception as e:
-                    logger.warning(f"Erro ao aplicar filtro de data de abertura início: {e}")
+            posicoes, nao_fechados = self._posicoes_filtro_relatorio(dados, filtros)
+            if nao_fechados is None:
+                dados_filtrados = dados.iloc[posicoes]
+            else:
+                dados_filtrados = pd.concat([dados.iloc[posicoes], dados.iloc[nao_fechados]], ignore_index=True)
             
-            if 'data_abertura_fim' in filtros and filtros['data_abertura_fim']:
-                try:
-                    data_fim = pd.to_datetime(filtros['data_abertura_fim'])
-                    if 'DataInicio' in dados_filtrados.columns:
-                        dados_filtrados = dados_filtrados[pd.to_datetime(dados_filtrados['DataInicio']) <= data_fim]
-                        logger.info(f"Filtro Data Abertura Fim aplicado: {filtros['data_abertura_fim']} - Registros restantes: {len(dados_filtrados)}")
-                except Exception as e:
-                    logger.warning(f"Erro ao aplicar filtro de data de abertura fim: {e}")
+            logger.info(f"Filtros aplicados com sucesso. Registros finais: {len(dados_filtrados)}")
+            return dados_filtrados
             
-            # Filtros por Data de Fechamento
-            if 'data_fechamento_inicio' in filtros and filtros['data_fechamento_inicio']:
-                try:
-                    data_inicio = pd.to_datetime(filtros['data_fechamento_inicio'])
-                    if 'DataTermino' in dados_filtrados.columns:
-                        # Filtra apenas projetos que foram fechados no período
-                        dados_fechados = dados_filtrados[dados_filtrados['Status'].str.upper().isin(['FECHADO', 'ENCERRADO', 'RESOLVIDO'])]
-                        dados_fechados = dados_fechados[pd.to_datetime(dados_fechados['DataTermino']) >= data_inicio]
-                        # Mantém também projetos que não foram fechados (DataTermino nula)
-                        dados_nao_fechados = dados_filtrados[~dados_filtrados['Status'].str.upper().isin(['FECHADO', 'ENCERRADO', 'RESOLVIDO'])]
-                        dados_filtrados = pd.concat([dados_fechados, dados_nao_fechados], ignore_index=True)
-                        logger.info(f"Filtro Data Fechamento Início aplicado: {filtros['data_fechamento_inicio']} - Registros restantes: {len(dados_filtrados)}")
-                except Exception as e:
-                    logger.warning(f"Erro ao aplicar filtro de data de fechamento início: {e}")
+        except Exception as e:
+            logger.error(f"Erro ao aplicar filtros: {e}")
+            return dados  # Retorna dados originais em caso de erro
+    
+    def filtrar_periodos_relatorio(self, dataframes, filtros):
+        """
+        Combina os meses do relatório geral aplicando os filtros em cada mês antes da
+        concatenação, com o índice de filtros de cada snapshot.
+        
+        Equivale a ``aplicar_filtros_relatorio(pd.concat(dataframes, ignore_index=True), filtros)``,
+        mas materializa apenas as linhas selecionadas.
+        
+        Args:
+            dataframes (list): DataFrames dos meses selecionados, na ordem do relatório
+            filtros (dict): Dicionário com os filtros a aplicar
             
-            if 'data_fechamento_fim' in filtros and filtros['data_fechamento_fim']:
-                try:
-                    data_fim = pd.to_datetime(filtros['data_fechamento_fim'])
-                    if 'DataTermino' in dados_filtrados.columns:
-                        # Filtra apenas projetos que foram fechados no período
-                        dados_fechados = dados_filtrados[dados_filtrados['Status'].str.upper().isin(['FECHADO', 'ENCERRADO', 'RESOLVIDO'])]
-                        dados_fechados = dados_fechados[pd.to_datetime(dados_fechados['DataTermino']) <= data_fim]
-                        # Mantém também projetos que não foram fechados (DataTermino nula)
-                        dados_nao_fechados = dados_filtrados[~dados_filtrados['Status'].str.upper().isin(['FECHADO', 'ENCERRADO', 'RESOLVIDO'])]
-                        dados_filtrados = pd.concat([dados_fechados, dados_nao_fechados], ignore_index=True)
-                        logger.info(f"Filtro Data Fechamento Fim aplicado: {filtros['data_fechamento_fim']} - Registros restantes: {len(dados_filtrados)}")
-                except Exception as e:
-                    logger.warning(f"Erro ao aplicar filtro de data de fechamento fim: {e}")
+        Returns:
+            DataFrame: Dados combinados e filtrados
+        """
+        colunas = set(dataframes[0].columns) if dataframes else set()
+        if any(set(dados.columns) != colunas for dados in dataframes):
+            # Meses com colunas diferentes: filtra a combinação (colunas ausentes ficam nulas)
+            return self.aplicar_filtros_relatorio(pd.concat(dataframes, ignore_index=True), filtros)
+        
+        try:
+            logger.info(f"Aplicando filtros ao relatório ({len(dataframes)} meses): {filtros}")
+            selecionados, nao_fechados = [], []
+            deslocamento = 0
+            for dados in dataframes:
+                posicoes, posicoes_nao_fechadas = self._posicoes_filtro_relatorio(dados, filtros)
+                # Índice = posição na combinação dos meses, como em pd.concat(..., ignore_index=True)
+                selecionados.append(dados.iloc[posicoes].set_axis(posicoes + deslocamento))
+                if posicoes_nao_fechadas is not None:
+                    nao_fechados.append(dados.iloc[posicoes_nao_fechadas])
+                deslocamento += len(dados)
+            
+            # Só os pedaços com linhas entram no concat; sem nenhum, o primeiro define as colunas
+            pedacos = [dados for dados in selecionados + nao_fechados if len(dados)] or selecionados[:1]
+            dados_filtrados = pd.concat(pedacos, ignore_index=bool(nao_fechados))
+            
+            # Colunas com dtypes diferentes entre os meses (ex: categorias distintas) ficam com
+            # o dtype da combinação dos meses, independente de quais meses têm linhas selecionadas
+            dtypes = dtypes_combinados(dataframes)
+            if dtypes:
+                dados_filtrados = dados_filtrados.astype(dtypes)
             
             logger.info(f"Filtros aplicados com sucesso. Registros finais: {len(dados_filtrados)}")
             return dados_filtrados
             
         except Exception as e:
             logger.error(f"Erro ao aplicar filtros: {e}")
-            return dados  # Retorna dados originais em caso de erro
+            return pd.concat(dataframes, ignore_index=True)  # Retorna dados combinados em caso de erro
 
     def _traduzir_categoria(self, categoria):
         """
@@ -4,8 +4,13 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+from app.utils.file_info import detectar_formato, ler_csv_detectado
+
 logger = logging.getLogger(__name__)
 
+# Ordem de preferência dos encodings do typeservices.csv
+ENCODINGS_TIPOS = ('utf-8', 'latin1', 'cp1252', 'iso-8859-1')
+
 class TypeServiceReader:
     """
     Classe simples para ler e processar o arquivo typeservices.csv
@@ -44,31 +49,13 @@ class TypeServiceReader:
             
             self.logger.info(f"📁 Carregando CSV: {self.csv_path}")
             
-            # Tenta diferentes encodings
-            encodings = ['utf-8', 'latin1', 'cp1252', 'iso-8859-1']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    self.logger.info(f"🔄 Tentando encoding: {encoding}")
-                    df = pd.read_csv(
-                        self.csv_path,
-                        sep=';',
-                        encoding=encoding,
-                        dtype=str
-                    )
-                    self.logger.info(f"✅ Sucesso com encoding: {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    self.logger.warning(f"⚠️ Falha com encoding: {encoding}")
-                    continue
-                except Exception as e:
-                    self.logger.warning(f"⚠️ Erro com {encoding}: {str(e)}")
-                    continue
+            # Encoding detectado uma vez por versão do arquivo (amostra dos primeiros bytes)
+            df, formato = ler_csv_detectado(self.csv_path, ENCODINGS_TIPOS, dtype=str)
             
             if df is None:
                 self.logger.error("❌ Falha em todos os encodings")
                 return {}
+            self.logger.info(f"✅ Lido com encoding: {formato.encoding}")
             
             # Debug das colunas
             self.logger.info(f"📊 Colunas encontradas: {list(df.columns)}")
@@ -220,7 +207,9 @@ class TypeServiceReader:
             if not self.csv_path.exists():
                 return False, f"Arquivo não encontrado: {self.csv_path}"
             
-            df = pd.read_csv(self.csv_path, sep=';', encoding='latin1', nrows=5)
+            formato = detectar_formato(self.csv_path, ENCODINGS_TIPOS)
+            encoding = formato.encoding if formato is not None else 'latin1'
+            df = pd.read_csv(self.csv_path, sep=';', encoding=encoding, nrows=5)
             
             if 'TipoServico' not in df.columns:
                 return False, "Coluna 'TipoServico' não encontrada"
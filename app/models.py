@@ -3,6 +3,9 @@ from . import db  # Importa a instância db de app/__init__.py
 from datetime import datetime
 import enum
 import pytz
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from .utils.data_version import incrementar_versao_backlogs
 
 # Define o fuso horário brasileiro
 br_timezone = pytz.timezone('America/Sao_Paulo')
@@ -134,6 +137,33 @@ class Backlog(db.Model):
     def __repr__(self):
         return f'<Backlog {self.name} (Project: {self.project_id})>'
 
+# --- Versão dos backlogs ---
+# Os resultados em cache com 'backlog_exists' usam a versão dos backlogs como
+# chave. Ela é incrementada depois do commit que cria, remove ou troca o
+# projeto de um backlog (nunca antes: outra requisição recalcularia o cache
+# sem enxergar a alteração ainda não gravada).
+
+@event.listens_for(Backlog, 'after_insert')
+@event.listens_for(Backlog, 'after_delete')
+def _marcar_backlogs_alterados(mapper, connection, target):
+    sessao = object_session(target)
+    if sessao is not None:
+        sessao.info['backlogs_alterados'] = True
+
+@event.listens_for(Backlog, 'after_update')
+def _marcar_projeto_backlog_alterado(mapper, connection, target):
+    if inspect(target).attrs.project_id.history.has_changes():
+        _marcar_backlogs_alterados(mapper, connection, target)
+
+@event.listens_for(Session, 'after_commit')
+def _incrementar_versao_backlogs_alterados(sessao):
+    if sessao.info.pop('backlogs_alterados', False):
+        incrementar_versao_backlogs('backlog criado/removido')
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_backlogs_alterados(sessao):
+    sessao.info.pop('backlogs_alterados', None)
+
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -1,8 +1,11 @@
 from .base_service import BaseService
 from .constants import *
+from .time_parser import converter_tempo_para_horas, converter_tempo_para_horas_vetorizado
 
 __all__ = [
     'BaseService',
+    'converter_tempo_para_horas',
+    'converter_tempo_para_horas_vetorizado',
     'STATUS_ATIVO',
     'STATUS_CRITICO',
     'STATUS_CONCLUIDO',
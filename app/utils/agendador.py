@@ -0,0 +1,227 @@
+"""
+Aquecimento dos caches em segundo plano.
+
+Depois de um restart, ou quando os dados mudam, o primeiro usuário pagava o
+parse dos CSVs e o cálculo de todos os KPIs das páginas mais pesadas. O
+agendador mantém um registro de tarefas de aquecimento e as executa numa
+thread daemon: na inicialização, sempre que a assinatura dos dados (versão dos
+dados, dadosr.csv e dia atual) muda e, opcionalmente, em intervalo fixo.
+
+As requisições nunca esperam pelo agendador: ele só preenche os caches que as
+rotas já consultam. Uma requisição que chega durante um aquecimento aguarda o
+mesmo cálculo pelo single-flight do cache, sem repeti-lo.
+
+Configuração (variáveis de ambiente):
+    AQUECIMENTO_HABILITADO             '0' desliga o agendador (padrão: ligado)
+    AQUECIMENTO_INTERVALO_VERIFICACAO  segundos entre verificações dos dados (padrão: 5)
+    AQUECIMENTO_TAREFAS_DESATIVADAS    nomes de tarefas, separados por vírgula
+    AQUECIMENTO_INTERVALO_<TAREFA>     recálculo periódico da tarefa, em segundos
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from .data_version import DATA_DIR, assinatura_arquivo, obter_versao_dados
+
+logger = logging.getLogger(__name__)
+
+HABILITADO = os.environ.get('AQUECIMENTO_HABILITADO', '1') != '0'
+INTERVALO_VERIFICACAO = float(os.environ.get('AQUECIMENTO_INTERVALO_VERIFICACAO', '5'))
+TAREFAS_DESATIVADAS = {
+    nome.strip() for nome in os.environ.get('AQUECIMENTO_TAREFAS_DESATIVADAS', '').split(',') if nome.strip()
+}
+
+
+def assinatura_dados():
+    """Versão dos dados, assinatura do dadosr.csv e dia atual (os KPIs usam a data de hoje)."""
+    return (obter_versao_dados(), assinatura_arquivo(DATA_DIR / 'dadosr.csv'), datetime.now().date())
+
+
+def _formatar_horario(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat(timespec='seconds') if timestamp else None
+
+
+class TarefaAquecimento:
+    """Tarefa registrada no agendador: configuração e resultado das execuções."""
+
+    def __init__(self, nome, funcao, descricao='', ao_mudar_dados=True, intervalo=None, ativa=True):
+        self.nome = nome
+        self.funcao = funcao
+        self.descricao = descricao
+        self.ao_mudar_dados = ao_mudar_dados
+        self.intervalo = intervalo
+        self.ativa = ativa
+        self.pendente = ativa  # toda tarefa ativa executa na inicialização
+        self.estado = 'pendente' if ativa else 'desativada'
+        self.execucoes = 0
+        self.falhas = 0
+        self.ultimo_inicio = None
+        self.ultima_duracao_ms = None
+        self.ultimo_erro = None
+
+    def to_dict(self):
+        return {
+            'nome': self.nome,
+            'descricao': self.descricao,
+            'ativa': self.ativa,
+            'ao_mudar_dados': self.ao_mudar_dados,
+            'intervalo_segundos': self.intervalo,
+            'estado': self.estado,
+            'pendente': self.pendente,
+            'execucoes': self.execucoes,
+            'falhas': self.falhas,
+            'ultimo_inicio': _formatar_horario(self.ultimo_inicio),
+            'ultima_duracao_ms': self.ultima_duracao_ms,
+            'ultimo_erro': self.ultimo_erro
+        }
+
+
+class AgendadorAquecimento:
+    """Registro de tarefas de aquecimento executadas por uma thread daemon."""
+
+    def __init__(self, intervalo_verificacao=INTERVALO_VERIFICACAO):
+        self.intervalo_verificacao = intervalo_verificacao
+        self._tarefas = {}  # nome -> TarefaAquecimento, na ordem de registro
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+        self._app = None
+        self._assinatura = None
+        self.iniciado_em = None
+
+    def registrar(self, nome, funcao, descricao='', ao_mudar_dados=True, intervalo=None):
+        """
+        Registra (ou substitui) a tarefa ``nome``.
+
+        Args:
+            nome (str): Identificador da tarefa (usado no status e na configuração)
+            funcao (callable): Executada sem argumentos, dentro do contexto da aplicação
+            descricao (str): Texto exibido no status
+            ao_mudar_dados (bool): Reexecuta quando a assinatura dos dados muda
+            intervalo (float): Reexecuta a cada ``intervalo`` segundos; sobrescrito
+                por AQUECIMENTO_INTERVALO_<NOME>
+
+        Returns:
+            TarefaAquecimento: Tarefa registrada
+        """
+        intervalo_env = os.environ.get(f'AQUECIMENTO_INTERVALO_{nome.upper()}')
+        if intervalo_env:
+            intervalo = float(intervalo_env)
+        tarefa = TarefaAquecimento(nome, funcao, descricao, ao_mudar_dados, intervalo,
+                                   ativa=nome not in TAREFAS_DESATIVADAS)
+        with self._lock:
+            self._tarefas[nome] = tarefa
+        return tarefa
+
+    def iniciar(self, app):
+        """Inicia a thread de aquecimento (uma por processo). Retorna True se ela foi iniciada agora."""
+        if not HABILITADO:
+            logger.info("🔥 Aquecimento de caches desabilitado (AQUECIMENTO_HABILITADO=0)")
+            return False
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._app = app
+            self._thread = threading.Thread(target=self._executar_loop, name='aquecimento_caches', daemon=True)
+            self.iniciado_em = time.time()
+            self._thread.start()
+        logger.info(f"🔥 Aquecimento de caches iniciado ({len(self._tarefas)} tarefas)")
+        return True
+
+    def agendar(self, nome=None):
+        """
+        Marca a tarefa ``nome`` (ou todas as ativas) para execução imediata.
+
+        Returns:
+            list: Nomes das tarefas agendadas (vazia se ``nome`` não existir ou estiver desativada)
+        """
+        with self._lock:
+            tarefas = [self._tarefas[nome]] if nome in self._tarefas else ([] if nome else list(self._tarefas.values()))
+            agendadas = []
+            for tarefa in tarefas:
+                if tarefa.ativa:
+                    tarefa.pendente = True
+                    agendadas.append(tarefa.nome)
+        self._acordar.set()
+        return agendadas
+
+    def status(self):
+        """Situação do agendador e de cada tarefa."""
+        with self._lock:
+            return {
+                'habilitado': HABILITADO,
+                'em_execucao': self._thread is not None and self._thread.is_alive(),
+                'iniciado_em': _formatar_horario(self.iniciado_em),
+                'intervalo_verificacao_segundos': self.intervalo_verificacao,
+                'assinatura_dados': str(self._assinatura) if self._assinatura is not None else None,
+                'tarefas': [tarefa.to_dict() for tarefa in self._tarefas.values()]
+            }
+
+    # --- Thread de aquecimento ---
+
+    def _executar_loop(self):
+        while True:
+            try:
+                for tarefa in self._marcar_pendentes():
+                    self._executar(tarefa)
+            except Exception as e:
+                logger.error(f"❌ Aquecimento de caches: erro no agendador: {e}")
+            self._acordar.wait(self.intervalo_verificacao)
+            self._acordar.clear()
+
+    def _marcar_pendentes(self):
+        """Marca as tarefas afetadas por mudança nos dados ou com intervalo vencido; retorna as pendentes."""
+        assinatura = assinatura_dados()
+        agora = time.time()
+        with self._lock:
+            dados_mudaram = assinatura != self._assinatura
+            if dados_mudaram and self._assinatura is not None:
+                logger.info("🔥 Aquecimento de caches: dados alterados, recalculando")
+            self._assinatura = assinatura
+            for tarefa in self._tarefas.values():
+                if not tarefa.ativa:
+                    continue
+                if dados_mudaram and tarefa.ao_mudar_dados:
+                    tarefa.pendente = True
+                elif tarefa.intervalo and tarefa.ultimo_inicio and agora - tarefa.ultimo_inicio >= tarefa.intervalo:
+                    tarefa.pendente = True
+                if tarefa.pendente:
+                    tarefa.estado = 'pendente'
+            return [tarefa for tarefa in self._tarefas.values() if tarefa.pendente]
+
+    def _executar(self, tarefa):
+        with self._lock:
+            tarefa.pendente = False
+            tarefa.estado = 'executando'
+            tarefa.ultimo_inicio = time.time()
+
+        inicio = time.time()
+        erro = None
+        try:
+            with self._app.app_context():
+                tarefa.funcao()
+        except Exception as e:
+            erro = str(e)
+        duracao_ms = round((time.time() - inicio) * 1000, 1)
+
+        with self._lock:
+            tarefa.execucoes += 1
+            tarefa.ultima_duracao_ms = duracao_ms
+            tarefa.ultimo_erro = erro
+            if erro:
+                tarefa.falhas += 1
+            # Agendada de novo durante a execução: continua pendente
+            if not tarefa.pendente:
+                tarefa.estado = 'erro' if erro else 'ok'
+
+        if erro:
+            logger.error(f"❌ Aquecimento '{tarefa.nome}' falhou em {duracao_ms}ms: {erro}")
+        else:
+            logger.info(f"🔥 Aquecimento '{tarefa.nome}' concluído em {duracao_ms}ms")
+
+
+# Agendador único do processo
+AGENDADOR = AgendadorAquecimento()
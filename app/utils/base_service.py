@@ -7,6 +7,7 @@ import numpy as np
 from typing import List, Dict, Optional, Tuple
 import json
 import holidays
+from .time_parser import converter_tempo_para_horas, converter_tempo_para_horas_vetorizado
 
 class BaseService:
     """Classe base para serviços de processamento de dados."""
@@ -55,7 +56,7 @@ class BaseService:
                 
             # Converte horas trabalhadas
             if 'HorasTrabalhadas' in dados.columns:
-                dados['HorasTrabalhadas'] = dados['HorasTrabalhadas'].apply(self.converter_tempo_para_horas)
+                dados['HorasTrabalhadas'] = converter_tempo_para_horas_vetorizado(dados['HorasTrabalhadas'])
                 
             # Limpa nomes de projetos
             if 'Projeto' in dados.columns:
@@ -72,41 +73,8 @@ class BaseService:
             return pd.DataFrame()
             
     def converter_tempo_para_horas(self, tempo_str):
-        """Converte string de tempo (HH:MM) para horas decimais."""
-        try:
-            if pd.isna(tempo_str) or tempo_str == '':
-                return 0.0
-                
-            if isinstance(tempo_str, (int, float)):
-                return float(tempo_str)
-                
-            # Remove espaços e converte para string
-            tempo_str = str(tempo_str).strip()
-            
-            # Se já for um número, retorna como float
-            try:
-                return float(tempo_str)
-            except ValueError:
-                pass
-                
-            # Tenta diferentes formatos
-            if ':' in tempo_str:
-                # Formato HH:MM
-                horas, minutos = tempo_str.split(':')
-                return float(horas) + float(minutos)/60
-            elif 'h' in tempo_str.lower():
-                # Formato Xh Ym
-                tempo_str = tempo_str.lower().replace(' ', '')
-                if 'h' in tempo_str:
-                    horas = float(tempo_str.split('h')[0])
-                    minutos = float(tempo_str.split('h')[1].replace('m', '')) if 'm' in tempo_str else 0
-                    return horas + minutos/60
-                    
-            return 0.0
-            
-        except Exception as e:
-            logger.error(f"Erro ao converter tempo '{tempo_str}': {str(e)}")
-            return 0.0
+        """Converte string de tempo (HH:MM:SS, HH:MM, decimal ou Xh Ym) para horas decimais."""
+        return converter_tempo_para_horas(tempo_str)
             
     def calcular_horas_restantes(self, dados):
         """Calcula horas restantes para cada projeto."""
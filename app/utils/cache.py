@@ -0,0 +1,246 @@
+"""
+Caches em memória compartilhados pelos serviços.
+
+Cada ``LRUCache`` é um namespace com limites próprios (itens, bytes, TTL) e
+contadores de uso; todos ficam registrados em ``CACHES`` para que as rotas de
+status exponham as estatísticas de cada namespace (``stats_caches``).
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Namespace -> LRUCache, preenchido na criação de cada cache
+CACHES = {}
+
+
+def copia_leve(dados):
+    """
+    Retorna uma cópia rasa de um DataFrame cacheado para entregar ao chamador.
+
+    Com o copy-on-write do pandas ativo, a cópia não duplica os dados: as
+    colunas só são copiadas se o chamador escrever nelas, e o objeto cacheado
+    nunca é alterado (nem por inclusão de colunas).
+    """
+    if isinstance(dados, pd.DataFrame):
+        return dados.copy(deep=False)
+    return dados
+
+
+def estimar_tamanho_bytes(valor):
+    """
+    Estima o tamanho em memória de um valor cacheado: DataFrames pelo
+    memory_usage; listas, tuplas e dicionários (resultados de API) somando os
+    elementos.
+    """
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(
+            estimar_tamanho_bytes(chave) + estimar_tamanho_bytes(item) for chave, item in valor.items()
+        )
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(estimar_tamanho_bytes(item) for item in valor)
+    return sys.getsizeof(valor)
+
+
+def stats_caches():
+    """Estatísticas de todos os caches registrados, por namespace."""
+    return {nome: cache.stats() for nome, cache in list(CACHES.items())}
+
+
+class LRUCache:
+    """
+    Cache LRU thread-safe com limite de memória, TTL opcional e contadores de uso.
+
+    Quando a soma estimada dos valores ultrapassa ``max_bytes`` (ou a quantidade
+    ultrapassa ``max_itens``), os itens menos usados recentemente são removidos.
+    Com ``ttl`` (segundos), um item expira nesse tempo após ser gravado e a
+    leitura seguinte conta como miss.
+    """
+
+    def __init__(self, nome, max_bytes=64 * 1024 * 1024, max_itens=None, ttl=None):
+        self.nome = nome
+        self.max_bytes = max_bytes
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()  # chave -> (valor, tamanho, gravado_em)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if nome in CACHES:
+            logger.warning(f"⚠️ Cache {nome}: namespace já registrado, substituindo nas estatísticas")
+        CACHES[nome] = self
+
+    def _expirado(self, item, agora):
+        return self.ttl is not None and agora - item[2] >= self.ttl
+
+    def get(self, chave):
+        """Retorna o valor cacheado ou None, atualizando a ordem de uso."""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and self._expirado(item, time.time()):
+                self._remover(chave)
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return item[0]
+
+    def set(self, chave, valor):
+        """Adiciona um valor, removendo os menos usados se necessário."""
+        tamanho = estimar_tamanho_bytes(valor)
+        with self._lock:
+            if tamanho > self.max_bytes:
+                logger.warning(f"⚠️ Cache {self.nome}: item de {tamanho / 1024:.0f}KB excede o limite, não cacheado")
+                return
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (valor, tamanho, time.time())
+            self._bytes += tamanho
+            self._aplicar_limites()
+
+    def remover(self, chave):
+        """Remove ``chave`` (se existir); retorna True se o item estava no cache."""
+        with self._lock:
+            if chave not in self._itens:
+                return False
+            self._remover(chave)
+            return True
+
+    def itens(self):
+        """Lista de (chave, valor) não expirados, sem alterar a ordem de uso nem os contadores."""
+        with self._lock:
+            agora = time.time()
+            return [(chave, item[0]) for chave, item in self._itens.items() if not self._expirado(item, agora)]
+
+    def _remover(self, chave):
+        self._bytes -= self._itens.pop(chave)[1]
+
+    def _aplicar_limites(self):
+        while self._itens and (
+            self._bytes > self.max_bytes
+            or (self.max_itens is not None and len(self._itens) > self.max_itens)
+        ):
+            chave, item = self._itens.popitem(last=False)
+            self._bytes -= item[1]
+            self.evictions += 1
+            logger.debug(f"Cache {self.nome}: removido {chave}")
+
+    def invalidar(self, filtro=None):
+        """Remove todos os itens, ou apenas os cujas chaves satisfazem ``filtro(chave)``."""
+        with self._lock:
+            if filtro is None:
+                removidos = len(self._itens)
+                self._itens.clear()
+                self._bytes = 0
+                return removidos
+            chaves = [chave for chave in self._itens if filtro(chave)]
+            for chave in chaves:
+                self._remover(chave)
+            return len(chaves)
+
+    def __len__(self):
+        return len(self._itens)
+
+    def stats(self):
+        """Retorna estatísticas de uso do cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'nome': self.nome,
+                'itens': len(self._itens),
+                'max_itens': self.max_itens,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_segundos': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0.0
+            }
+
+
+class SingleFlight:
+    """
+    Garante uma única execução simultânea por chave.
+
+    A primeira thread que chama ``executar(chave, funcao)`` executa a função;
+    as que chegam enquanto ela está em andamento aguardam e recebem o mesmo
+    resultado (ou a mesma exceção), sem repetir o carregamento.
+    """
+
+    def __init__(self, nome):
+        self.nome = nome
+        self._lock = threading.Lock()
+        self._em_andamento = {}  # chave -> Future
+        self.execucoes = 0
+        self.aguardando = 0
+        self.coalescidos = 0
+        self.tempo_espera_total = 0.0
+        self.tempo_espera_max = 0.0
+
+    def executar(self, chave, funcao):
+        """Executa ``funcao()`` para ``chave`` ou aguarda a execução já em andamento."""
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = Future()
+                self._em_andamento[chave] = futuro
+                self.execucoes += 1
+            else:
+                self.coalescidos += 1
+                self.aguardando += 1
+
+        if lider:
+            try:
+                resultado = funcao()
+            except BaseException as e:
+                futuro.set_exception(e)
+                raise
+            else:
+                futuro.set_result(resultado)
+                return resultado
+            finally:
+                with self._lock:
+                    self._em_andamento.pop(chave, None)
+
+        inicio = time.time()
+        try:
+            return futuro.result()
+        finally:
+            espera = time.time() - inicio
+            with self._lock:
+                self.aguardando -= 1
+                self.tempo_espera_total += espera
+                self.tempo_espera_max = max(self.tempo_espera_max, espera)
+            logger.info(f"🔗 {self.nome}: aguardou carregamento em andamento de {chave} por {espera * 1000:.1f}ms")
+
+    def stats(self):
+        """Retorna métricas de execuções e esperas coalescidas."""
+        with self._lock:
+            return {
+                'nome': self.nome,
+                'em_andamento': len(self._em_andamento),
+                'execucoes': self.execucoes,
+                'aguardando': self.aguardando,
+                'coalescidos': self.coalescidos,
+                'tempo_espera_total_ms': round(self.tempo_espera_total * 1000, 1),
+                'tempo_espera_max_ms': round(self.tempo_espera_max * 1000, 1),
+                'tempo_espera_medio_ms': round(self.tempo_espera_total / self.coalescidos * 1000, 1) if self.coalescidos else 0.0
+            }
@@ -0,0 +1,230 @@
+"""
+Cubo pré-agregado (OLAP) das métricas mensais de projetos.
+
+Cada célula é uma combinação das dimensões - mês de abertura, squad, status,
+tipo de faturamento e tipo de serviço - com as medidas já somadas: quantidade
+de projetos, horas estimadas, trabalhadas e restantes. O cubo de cada
+dadosr*.csv é materializado junto ao snapshot canônico (namespace ``cubo`` do
+snapshot store) e invalidado com ele; as páginas de apresentação consultam
+agregados em vez de percorrer as linhas.
+
+Visões que precisam de uma dimensão fora do cubo (ex: especialista) usam um
+roll-up próprio, com poucas dimensões (``ROLLUPS``), materializado da mesma
+forma em ``cubo_<nome>``. Acrescentar dimensões de alta cardinalidade ao cubo
+principal o deixaria com quase uma célula por projeto.
+
+A categoria do tipo de serviço vem do typeservices.csv, que muda sem que o CSV
+de projetos mude. Por isso o cubo guarda o tipo de serviço e a categoria é
+obtida na consulta, subindo um nível na hierarquia (``mapeamentos`` em
+``agregar``).
+
+Operações:
+    fatiar(**filtros) - slice/dice: mantém as células que atendem aos filtros
+    agregar(por)      - roll-up: soma as medidas agrupando pelas dimensões pedidas
+    contar(dimensao)  - quantidade por valor, na ordem de ``contar_valores``
+    total(medida)     - soma de uma medida no cubo (ou na fatia)
+"""
+
+import functools
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .cache import LRUCache
+from .ingestion import carregar_dados_normalizados
+from .snapshot_store import carregar_snapshot
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAMESPACE = 'cubo'
+
+# Dimensão -> coluna do DataFrame canônico
+DIMENSOES = {
+    'MesInicio': 'DataInicio',
+    'Squad': 'Squad',
+    'Status': 'Status',
+    'Faturamento': 'Faturamento',
+    'TipoServico': 'TipoServico',
+}
+
+# Roll-ups auxiliares: nome -> dimensões (dimensão -> coluna do DataFrame canônico)
+ROLLUPS = {
+    'especialista': {
+        'Status': 'Status',
+        'Squad': 'Squad',
+        'Especialista': 'Especialista',
+    },
+}
+
+# Dimensões de mês são guardadas como pd.Period mensal (NaT quando a data é nula)
+DIMENSOES_MES = ('MesInicio',)
+
+# Medida -> coluna somada do DataFrame canônico ('quantidade' conta as linhas)
+MEDIDAS = {
+    'horas': 'Horas',
+    'horas_trabalhadas': 'HorasTrabalhadas',
+    'horas_restantes': 'HorasRestantes',
+    'horas_restantes_ajustadas': 'HorasRestantesAjustadas',
+    'conclusao': 'Conclusao',
+}
+NOMES_MEDIDAS = ['quantidade'] + list(MEDIDAS)
+
+# Cubos já carregados, por (arquivo, roll-up, mtime, tamanho)
+_CUBOS_CACHE = LRUCache('cubos_olap', max_itens=32)
+
+
+def periodo_mes(data):
+    """Mês (pd.Period) de uma data, para fatiar a dimensão ``MesInicio``."""
+    return pd.Period(data, freq='M')
+
+
+class CuboMensal:
+    """Células agregadas (dimensões + medidas) de um conjunto de projetos."""
+
+    def __init__(self, celulas):
+        self.celulas = celulas
+
+    @classmethod
+    def construir(cls, dados, dimensoes=None):
+        """
+        Agrega ``dados`` (DataFrame canônico ou subconjunto dele) nas células do cubo.
+
+        As células ficam na ordem da primeira linha de cada combinação, de modo que
+        roll-ups preservam a ordem de primeira ocorrência dos valores nos dados.
+
+        Args:
+            dados (DataFrame): Projetos a agregar
+            dimensoes (dict): Dimensões das células (padrão: ``DIMENSOES``; um dos ``ROLLUPS``)
+        """
+        dimensoes = dimensoes or DIMENSOES
+        if dados is None or dados.empty:
+            return cls(pd.DataFrame(columns=list(dimensoes) + NOMES_MEDIDAS))
+
+        base = pd.DataFrame(index=dados.index)
+        for dimensao, coluna in dimensoes.items():
+            if coluna not in dados.columns:
+                base[dimensao] = None
+            elif dimensao in DIMENSOES_MES:
+                base[dimensao] = pd.to_datetime(dados[coluna], errors='coerce').dt.to_period('M')
+            else:
+                base[dimensao] = dados[coluna]
+
+        base['quantidade'] = 1
+        for medida, coluna in MEDIDAS.items():
+            if coluna in dados.columns:
+                base[medida] = pd.to_numeric(dados[coluna], errors='coerce').fillna(0.0)
+            else:
+                base[medida] = 0.0
+
+        celulas = base.groupby(list(dimensoes), observed=True, dropna=False, sort=False).sum().reset_index()
+        return cls(celulas)
+
+    def __len__(self):
+        return len(self.celulas)
+
+    @property
+    def vazio(self):
+        return self.celulas.empty
+
+    def fatiar(self, **filtros):
+        """
+        Slice/dice: cubo só com as células que atendem a todos os filtros.
+
+        Cada filtro é ``dimensao=valor`` (igualdade), ``dimensao=[valores]``
+        (pertinência) ou ``dimensao=funcao``, que recebe a coluna da dimensão e
+        retorna a máscara booleana (valores nulos na máscara contam como False).
+        """
+        mascara = np.ones(len(self.celulas), dtype=bool)
+        for dimensao, criterio in filtros.items():
+            coluna = self.celulas[dimensao]
+            if callable(criterio):
+                selecao = criterio(coluna)
+            elif isinstance(criterio, (list, tuple, set, frozenset)):
+                selecao = coluna.isin(list(criterio))
+            else:
+                selecao = coluna == criterio
+            mascara &= pd.Series(selecao, index=coluna.index).fillna(False).astype(bool).to_numpy()
+        return CuboMensal(self.celulas[mascara])
+
+    def agregar(self, por=(), medidas=None, mapeamentos=None):
+        """
+        Roll-up: soma das medidas agrupada pelas dimensões ``por``, na ordem de
+        primeira ocorrência.
+
+        Args:
+            por (list): Dimensões mantidas; vazio retorna uma Series com os totais
+            medidas (list): Medidas retornadas (padrão: todas)
+            mapeamentos (dict): ``{dimensao: funcao}`` aplicado aos valores antes de
+                agrupar, para subir um nível na hierarquia (ex: tipo -> categoria)
+
+        Returns:
+            pd.DataFrame | pd.Series
+        """
+        medidas = list(medidas or NOMES_MEDIDAS)
+        celulas = self.celulas
+        if mapeamentos:
+            celulas = celulas.copy(deep=False)
+            for dimensao, funcao in mapeamentos.items():
+                celulas[dimensao] = celulas[dimensao].astype(object).map(funcao)
+        if not por:
+            return celulas[medidas].sum()
+        return celulas.groupby(list(por), observed=True, dropna=False, sort=False)[medidas].sum()
+
+    def contar(self, dimensao):
+        """
+        Quantidade de projetos por valor de ``dimensao``, sem nulos e em ordem
+        decrescente - o mesmo resultado de ``contar_valores`` sobre as linhas.
+        """
+        coluna = self.celulas[dimensao]
+        # value_counts ordena a partir das categorias (categóricas) ou da ordem de ocorrência
+        categorica = isinstance(coluna.dtype, pd.CategoricalDtype)
+        contagem = self.celulas.groupby(dimensao, observed=False, sort=categorica)['quantidade'].sum()
+        contagem = contagem.sort_values(ascending=False)
+        return contagem[contagem > 0]
+
+    def total(self, medida='quantidade'):
+        """Soma de ``medida`` em todas as células."""
+        total = self.celulas[medida].sum()
+        return int(total) if medida == 'quantidade' else float(total)
+
+
+def _processar_cubo(dimensoes, csv_path):
+    inicio = time.time()
+    cubo = CuboMensal.construir(carregar_dados_normalizados(csv_path), dimensoes)
+    logger.info(f"🧊 Cubo ({', '.join(dimensoes)}) de {os.path.basename(str(csv_path))} construído em "
+                f"{(time.time() - inicio) * 1000:.1f}ms ({len(cubo)} células)")
+    return cubo.celulas
+
+
+def carregar_cubo(csv_path, rollup=None):
+    """
+    Cubo do arquivo ``csv_path``, materializado no snapshot store e mantido em
+    memória enquanto o arquivo não mudar.
+
+    Args:
+        csv_path (str | Path): CSV de origem
+        rollup (str, optional): Nome de um dos ``ROLLUPS``; None para o cubo principal
+
+    Returns:
+        CuboMensal: cubo (vazio se o arquivo não existir ou não puder ser processado)
+    """
+    dimensoes = ROLLUPS[rollup] if rollup else DIMENSOES
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return CuboMensal.construir(None, dimensoes)
+
+    chave = (os.path.abspath(str(csv_path)), rollup, stat.st_mtime_ns, stat.st_size)
+    celulas = _CUBOS_CACHE.get(chave)
+    if celulas is None:
+        namespace = f'{SNAPSHOT_NAMESPACE}_{rollup}' if rollup else SNAPSHOT_NAMESPACE
+        celulas = carregar_snapshot(csv_path, namespace, functools.partial(_processar_cubo, dimensoes))
+        if celulas is None or celulas.empty:
+            return CuboMensal.construir(None, dimensoes)
+        # Versões anteriores do mesmo arquivo não serão mais consultadas
+        _CUBOS_CACHE.invalidar(lambda c: c[:2] == chave[:2])
+        _CUBOS_CACHE.set(chave, celulas)
+    return CuboMensal(celulas)
@@ -0,0 +1,152 @@
+"""
+Diff por linha entre duas versões do dadosr.csv.
+
+Compara os DataFrames canônicos (saída da ingestão) usando o ``Numero`` como
+chave e classifica cada projeto como adicionado, removido ou alterado, com a
+lista de colunas que mudaram. É usado no upload de um novo CSV para mostrar o
+que mudou e para invalidar apenas os caches afetados.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from .cache import LRUCache
+from .data_version import DATA_DIR, assinatura_arquivo
+from .ingestion import carregar_dados_normalizados, processar_csv
+
+logger = logging.getLogger(__name__)
+
+CHAVE = 'Numero'
+
+ULTIMO_DIFF_FILE = DATA_DIR / '.snapshots' / 'ultimo_diff.json'
+
+# Diffs já calculados, por (arquivo anterior, arquivo novo) com mtime/tamanho
+_DIFF_CACHE = LRUCache('diff_upload', max_itens=8)
+
+
+def _indexar_por_chave(dados):
+    if dados is None or dados.empty or CHAVE not in dados.columns:
+        return pd.DataFrame(index=pd.Index([], name=CHAVE))
+    dados = dados[dados[CHAVE].notna()].drop_duplicates(subset=[CHAVE])
+    return dados.set_index(CHAVE)
+
+
+def _valores_diferentes(anterior, novo):
+    """Máscara das posições em que os valores diferem (NaN == NaN)."""
+    if isinstance(anterior.dtype, pd.CategoricalDtype):
+        anterior = anterior.astype(object)
+    if isinstance(novo.dtype, pd.CategoricalDtype):
+        novo = novo.astype(object)
+    try:
+        iguais = (anterior == novo).fillna(False).astype(bool)
+    except TypeError:
+        iguais = anterior.astype(str) == novo.astype(str)
+    ambos_nulos = anterior.isna() & novo.isna()
+    return ~(iguais | ambos_nulos).to_numpy()
+
+
+def calcular_diff(anterior, novo):
+    """
+    Calcula o diff por ``Numero`` entre dois DataFrames canônicos.
+
+    Returns:
+        dict: adicionados/removidos (listas de Numero), alterados (lista de
+        ``{'numero', 'colunas'}``), contagem de alterações por coluna,
+        colunas novas/removidas e um resumo com os totais
+    """
+    inicio = time.time()
+    ant = _indexar_por_chave(anterior)
+    nov = _indexar_por_chave(novo)
+
+    adicionados = nov.index.difference(ant.index)
+    removidos = ant.index.difference(nov.index)
+    comuns = nov.index.intersection(ant.index)
+
+    colunas = [col for col in nov.columns if col in ant.columns]
+    colunas_novas = [col for col in nov.columns if col not in ant.columns]
+    colunas_removidas = [col for col in ant.columns if col not in nov.columns]
+
+    ant_comuns = ant.loc[comuns, colunas]
+    nov_comuns = nov.loc[comuns, colunas]
+    mudancas = pd.DataFrame(
+        {col: _valores_diferentes(ant_comuns[col], nov_comuns[col]) for col in colunas},
+        index=comuns,
+        dtype=bool
+    )
+    linhas_alteradas = mudancas[mudancas.any(axis=1)]
+
+    alterados = [
+        {'numero': int(numero), 'colunas': [col for col, mudou in linha.items() if mudou]}
+        for numero, linha in linhas_alteradas.iterrows()
+    ]
+    contagem_colunas = {col: int(total) for col, total in linhas_alteradas.sum().items() if total}
+
+    logger.info(f"🔍 Diff calculado em {(time.time() - inicio) * 1000:.1f}ms: "
+                f"{len(adicionados)} adicionados, {len(removidos)} removidos, {len(alterados)} alterados")
+
+    return {
+        'chave': CHAVE,
+        'adicionados': [int(n) for n in adicionados],
+        'removidos': [int(n) for n in removidos],
+        'alterados': alterados,
+        'colunas_alteradas': contagem_colunas,
+        'colunas_novas': colunas_novas,
+        'colunas_removidas': colunas_removidas,
+        'resumo': {
+            'total_anterior': len(ant),
+            'total_novo': len(nov),
+            'adicionados': len(adicionados),
+            'removidos': len(removidos),
+            'alterados': len(alterados),
+            'inalterados': len(comuns) - len(alterados)
+        }
+    }
+
+
+def diff_arquivos(anterior_path, novo_path):
+    """
+    Diff entre o CSV atual e um CSV candidato (ex: dadosr_temp.csv do upload).
+
+    O resultado fica em cache enquanto nenhum dos dois arquivos mudar, para que
+    o upload e a API de diff não reprocessem os arquivos.
+    """
+    chave = (str(anterior_path), assinatura_arquivo(anterior_path),
+             str(novo_path), assinatura_arquivo(novo_path))
+    diff = _DIFF_CACHE.get(chave)
+    if diff is not None:
+        return diff
+
+    anterior = carregar_dados_normalizados(anterior_path) if os.path.exists(anterior_path) else pd.DataFrame()
+    # O candidato é processado sem snapshot: o arquivo temporário é descartado ou renomeado
+    novo = processar_csv(novo_path)
+    diff = calcular_diff(anterior, novo)
+    _DIFF_CACHE.set(chave, diff)
+    return diff
+
+
+def registrar_diff_aplicado(diff):
+    """Persiste o diff do último upload aplicado, consultado pela API quando não há upload pendente."""
+    registro = dict(diff, aplicado_em=datetime.now().isoformat())
+    try:
+        ULTIMO_DIFF_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = ULTIMO_DIFF_FILE.with_name(ULTIMO_DIFF_FILE.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(registro, f, ensure_ascii=False)
+        os.replace(tmp_path, ULTIMO_DIFF_FILE)
+    except OSError as e:
+        logger.warning(f"⚠️ Não foi possível gravar o último diff aplicado: {e}")
+    return registro
+
+
+def obter_ultimo_diff_aplicado():
+    """Retorna o diff do último upload aplicado, ou None."""
+    try:
+        with open(ULTIMO_DIFF_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,135 @@
+"""
+Versão (época) dos dados de projetos.
+
+Um contador monotônico gravado em ``data/.data_version`` é incrementado
+sempre que os dados mudam pela aplicação (upload, arquivamento mensal,
+edição/exclusão de registros). Os caches em memória usam a versão como
+chave: enquanto ela não mudar, o cache é válido; ao mudar, o próximo
+acesso recarrega imediatamente, sem esperar TTL.
+
+Os resultados que também trazem informação do banco (``backlog_exists``
+dos projetos) usam um segundo contador, ``data/.backlog_version``,
+incrementado quando um backlog é criado, removido ou muda de projeto.
+
+A leitura é barata: apenas um ``os.stat`` do arquivo de versão, e o
+conteúdo só é relido quando o mtime muda (inclusive se outro processo
+incrementar a versão).
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent.parent.parent / 'data'
+VERSION_FILE = DATA_DIR / '.data_version'
+BACKLOG_VERSION_FILE = DATA_DIR / '.backlog_version'
+
+
+class ContadorVersao:
+    """Contador monotônico persistido em arquivo e compartilhado entre processos."""
+
+    def __init__(self, path, descricao):
+        self.path = Path(path)
+        self.descricao = descricao
+        self._lock = threading.Lock()
+        self._estado = {'mtime_ns': None, 'versao': 0}
+
+    def _ler_arquivo(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def obter(self):
+        """Retorna a versão atual (0 se nunca foi incrementada)."""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return 0
+
+        if mtime_ns != self._estado['mtime_ns']:
+            with self._lock:
+                self._estado['versao'] = self._ler_arquivo()
+                self._estado['mtime_ns'] = mtime_ns
+        return self._estado['versao']
+
+    def incrementar(self, motivo=''):
+        """Incrementa a versão e retorna o novo valor (o atual, se a gravação falhar)."""
+        with self._lock:
+            nova_versao = self._ler_arquivo() + 1
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(self.path.name + '.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(str(nova_versao))
+                os.replace(tmp_path, self.path)
+                self._estado['versao'] = nova_versao
+                self._estado['mtime_ns'] = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                logger.error(f"❌ Erro ao gravar versão {self.descricao}: {e}")
+                return self._estado['versao']
+
+        logger.info(f"🔄 Versão {self.descricao} incrementada para {nova_versao}" + (f" ({motivo})" if motivo else ""))
+        return nova_versao
+
+
+_VERSAO_DADOS = ContadorVersao(VERSION_FILE, 'dos dados')
+_VERSAO_BACKLOGS = ContadorVersao(BACKLOG_VERSION_FILE, 'dos backlogs')
+
+
+def obter_versao_dados():
+    """Retorna a versão atual dos dados (0 se nunca foi incrementada)."""
+    return _VERSAO_DADOS.obter()
+
+
+def incrementar_versao_dados(motivo=''):
+    """
+    Incrementa a versão dos dados, invalidando os caches que dependem dela.
+
+    Args:
+        motivo (str): Descrição da alteração, apenas para log
+
+    Returns:
+        int: Nova versão
+    """
+    return _VERSAO_DADOS.incrementar(motivo)
+
+
+def obter_versao_backlogs():
+    """Retorna a versão atual dos backlogs (0 se nunca foi incrementada)."""
+    return _VERSAO_BACKLOGS.obter()
+
+
+def incrementar_versao_backlogs(motivo=''):
+    """Incrementa a versão dos backlogs, invalidando os resultados com ``backlog_exists``."""
+    return _VERSAO_BACKLOGS.incrementar(motivo)
+
+
+def assinatura_arquivo(path):
+    """Retorna (mtime_ns, tamanho) de um arquivo, ou None se não existir."""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def assinaturas_csv_dados():
+    """
+    Retorna ((nome, mtime_ns, tamanho), ...) de cada CSV da pasta de dados, em
+    ordem de nome - detecta também arquivos mensais copiados manualmente.
+    """
+    arquivos = []
+    try:
+        with os.scandir(DATA_DIR) as entradas:
+            for entrada in entradas:
+                if entrada.is_file() and entrada.name.endswith('.csv'):
+                    stat = entrada.stat()
+                    arquivos.append((entrada.name, stat.st_mtime_ns, stat.st_size))
+    except OSError as e:
+        logger.warning(f"⚠️ Não foi possível listar {DATA_DIR}: {e}")
+    return tuple(sorted(arquivos))
@@ -0,0 +1,122 @@
+"""
+Registro de formato (encoding e separador) dos CSVs lidos pela aplicação.
+
+O formato é detectado uma única vez por arquivo/versão (caminho, mtime,
+tamanho) a partir de uma amostra limitada dos primeiros bytes, em vez de
+reler o arquivo inteiro tentando cada encoding. Os leitores recebem o
+formato detectado e fazem uma única passada de decodificação; se um byte
+inválido aparecer depois da amostra, o próximo encoding candidato é usado
+e o registro é corrigido.
+"""
+
+import codecs
+import logging
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Ordem de tentativa padrão (CP1252 primeiro - encoding do dadosr.csv exportado do ITSM)
+ENCODINGS_PADRAO = ('cp1252', 'utf-8', 'latin1', 'iso-8859-1')
+SEPARADORES = (';', ',', '\t', '|')
+TAMANHO_AMOSTRA = 64 * 1024
+MIN_COLUNAS = 6
+
+FormatoArquivo = namedtuple('FormatoArquivo', ['encoding', 'separador', 'num_colunas'])
+
+_FORMATOS_CACHE = LRUCache('formatos_arquivo', max_itens=64)
+
+
+def _chave(caminho, encodings):
+    stat = os.stat(caminho)
+    return (os.path.abspath(caminho), stat.st_mtime_ns, stat.st_size, tuple(encodings))
+
+
+def _decodificar(amostra, encoding, completa):
+    """Decodifica a amostra; um caractere multibyte cortado no fim da amostra não conta como erro."""
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors='strict').decode(amostra, final=completa)
+    except (UnicodeDecodeError, LookupError):
+        return None
+
+
+def _detectar(caminho, encodings):
+    with open(caminho, 'rb') as f:
+        amostra = f.read(TAMANHO_AMOSTRA)
+        completa = f.read(1) == b''
+
+    for encoding in encodings:
+        texto = _decodificar(amostra, encoding, completa)
+        if texto is None:
+            continue
+        primeira_linha = texto.split('\n', 1)[0].strip()
+        for separador in SEPARADORES:
+            if primeira_linha.count(separador) >= MIN_COLUNAS - 1:
+                return FormatoArquivo(encoding, separador, len(primeira_linha.split(separador)))
+        return FormatoArquivo(encoding, None, 0)
+    return None
+
+
+def detectar_formato(caminho, encodings=ENCODINGS_PADRAO):
+    """
+    Retorna o ``FormatoArquivo`` de ``caminho``, detectado na primeira chamada
+    para a versão atual do arquivo e reaproveitado até ele mudar.
+
+    Args:
+        caminho (str | Path): CSV a inspecionar
+        encodings (tuple): Encodings candidatos, em ordem de preferência
+
+    Returns:
+        FormatoArquivo | None: encoding, separador (None se não identificado)
+        e número de colunas do cabeçalho; None se nenhum encoding decodificar a amostra
+    """
+    chave = _chave(caminho, encodings)
+    formato = _FORMATOS_CACHE.get(chave)
+    if formato is None:
+        formato = _detectar(caminho, encodings)
+        if formato is not None:
+            _FORMATOS_CACHE.set(chave, formato)
+            logger.info(f"🔎 Formato de {os.path.basename(str(caminho))}: encoding={formato.encoding}, "
+                        f"separador={formato.separador!r}, colunas={formato.num_colunas}")
+    return formato
+
+
+def registrar_formato(caminho, formato, encodings=ENCODINGS_PADRAO):
+    """Registra o formato de um arquivo recém-gravado pela aplicação, evitando nova detecção."""
+    _FORMATOS_CACHE.set(_chave(caminho, encodings), formato)
+
+
+def ler_csv_detectado(caminho, encodings=ENCODINGS_PADRAO, separador_padrao=';', **kwargs):
+    """
+    Lê um CSV com o formato registrado para o arquivo, numa única passada.
+
+    Args:
+        caminho (str | Path): CSV a ler
+        encodings (tuple): Encodings candidatos, em ordem de preferência
+        separador_padrao (str): Usado quando o separador não é identificado pelo cabeçalho
+        **kwargs: Repassados ao ``pd.read_csv``
+
+    Returns:
+        tuple: (DataFrame, FormatoArquivo), ou (None, None) se o arquivo não puder ser decodificado
+    """
+    formato = detectar_formato(caminho, encodings)
+    if formato is None:
+        return None, None
+
+    separador = formato.separador or separador_padrao
+    candidatos = list(encodings)
+    for encoding in candidatos[candidatos.index(formato.encoding):]:
+        try:
+            dados = pd.read_csv(caminho, sep=separador, encoding=encoding, **kwargs)
+        except UnicodeDecodeError:
+            logger.warning(f"⚠️ {os.path.basename(str(caminho))}: byte inválido para {encoding} após a amostra")
+            continue
+        if encoding != formato.encoding:
+            formato = formato._replace(encoding=encoding)
+            registrar_formato(caminho, formato, encodings)
+        return dados, formato
+    return None, None
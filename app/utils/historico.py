@@ -0,0 +1,273 @@
+"""
+Histórico mensal, em formato longo, dos arquivos arquivados (dadosr_apt_<mes>.csv).
+
+Cada linha é um projeto em um mês de fechamento - chave (MesSnapshot, Numero) -
+com as horas e os atributos do projeto naquele mês. O passo de arquivamento
+acrescenta o mês arquivado com mês/ano explícitos; arquivos apt ainda não
+registrados (ou alterados fora do arquivamento) são incorporados na primeira
+leitura, com o ano deduzido das datas de abertura do próprio arquivo.
+
+O histórico é mantido ordenado por (Numero, MesSnapshot): as horas
+incrementais de todos os projetos, em qualquer intervalo de meses, saem de uma
+única diferença vetorizada, sem carregar e cruzar os arquivos dois a dois.
+Meses já registrados permanecem no histórico mesmo quando o arquivo apt do
+mesmo nome é sobrescrito no ano seguinte.
+
+Formato: pickle do pandas (preserva o dtype Period do mês), gravado de forma
+atômica na pasta ``.historico`` ao lado dos CSVs, com um manifesto JSON que
+associa cada arquivo apt ao mês registrado e à sua assinatura (tamanho, mtime).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import LRUCache
+from .ingestion import carregar_dados_normalizados
+
+logger = logging.getLogger(__name__)
+
+HISTORICO_DIRNAME = '.historico'
+NOME_HISTORICO = 'historico_mensal'
+
+PADRAO_ARQUIVO_MENSAL = re.compile(r'^dadosr_apt_([a-z]{3})\.csv$')
+ABREVIACOES_MES = {
+    'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12
+}
+
+COLUNAS_TEXTO = ['Projeto', 'Cliente', 'Squad', 'Especialista', 'Status']
+COLUNAS_HORAS = ['Horas', 'HorasTrabalhadas', 'HorasRestantes']
+COLUNAS_HISTORICO = ['MesSnapshot', 'Numero'] + COLUNAS_TEXTO + COLUNAS_HORAS + ['Arquivo']
+
+# Histórico já lido, por (arquivo, mtime, tamanho)
+_HISTORICO_CACHE = LRUCache('historico_mensal', max_itens=4)
+_LOCK = threading.Lock()
+
+
+def periodo_mes(mes):
+    """Mês (pd.Period) a partir de 'AAAA-MM', data ou Period."""
+    return pd.Period(mes, freq='M')
+
+
+def inferir_mes_arquivo(csv_path, dados=None):
+    """
+    Mês de fechamento de um dadosr_apt_<mes>.csv sem registro no histórico.
+
+    O mês vem da abreviação no nome; o ano é o da abertura mais recente do
+    arquivo, ou o anterior quando o mês da abreviação é posterior a ela (ex:
+    arquivo de dezembro gerado em janeiro).
+
+    Returns:
+        pd.Period | None: mês inferido (None se o nome ou as datas não permitirem)
+    """
+    correspondencia = PADRAO_ARQUIVO_MENSAL.match(Path(csv_path).name)
+    if not correspondencia or correspondencia.group(1) not in ABREVIACOES_MES:
+        return None
+    numero_mes = ABREVIACOES_MES[correspondencia.group(1)]
+
+    if dados is None:
+        dados = carregar_dados_normalizados(csv_path)
+    if dados is None or 'DataInicio' not in dados.columns:
+        return None
+    referencia = dados['DataInicio'].max()
+    if pd.isna(referencia):
+        return None
+
+    ano = referencia.year if numero_mes <= referencia.month else referencia.year - 1
+    return pd.Period(year=ano, month=numero_mes, freq='M')
+
+
+def _linhas_historico(dados, mes, nome_arquivo):
+    """Linhas do histórico (uma por Numero) a partir do DataFrame canônico de um mês."""
+    linhas = pd.DataFrame(index=dados.index)
+    linhas['Numero'] = dados['Numero'] if 'Numero' in dados.columns else pd.NA
+    for coluna in COLUNAS_TEXTO:
+        linhas[coluna] = dados[coluna].astype(object) if coluna in dados.columns else np.nan
+    for coluna in COLUNAS_HORAS:
+        if coluna in dados.columns:
+            linhas[coluna] = pd.to_numeric(dados[coluna], errors='coerce').fillna(0.0).astype(float)
+        else:
+            linhas[coluna] = 0.0
+
+    # Numero duplicado no mesmo arquivo: prevalece a linha com mais horas trabalhadas
+    linhas = linhas.dropna(subset=['Numero'])
+    linhas = linhas.sort_values('HorasTrabalhadas', ascending=False, kind='stable').drop_duplicates('Numero')
+
+    linhas.insert(0, 'MesSnapshot', pd.Series(periodo_mes(mes), index=linhas.index))
+    linhas['Arquivo'] = nome_arquivo
+    return linhas[COLUNAS_HISTORICO]
+
+
+class HistoricoMensal:
+    """Armazenamento em formato longo (MesSnapshot, Numero) dos meses arquivados."""
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        pasta = self.data_dir / HISTORICO_DIRNAME
+        self.dados_path = pasta / f'{NOME_HISTORICO}.pkl'
+        self.manifesto_path = pasta / f'{NOME_HISTORICO}.json'
+
+    # --- Persistência ---
+
+    def _ler_manifesto(self):
+        try:
+            with open(self.manifesto_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'arquivos': {}}
+
+    def _ler_dados(self):
+        try:
+            stat = os.stat(self.dados_path)
+        except OSError:
+            return pd.DataFrame(columns=COLUNAS_HISTORICO)
+
+        chave = (str(self.dados_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        dados = _HISTORICO_CACHE.get(chave)
+        if dados is None:
+            dados = pd.read_pickle(self.dados_path)
+            _HISTORICO_CACHE.invalidar(lambda c: c[0] == chave[0])
+            _HISTORICO_CACHE.set(chave, dados)
+        return dados
+
+    def _gravar(self, dados, manifesto):
+        self.dados_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.dados_path.with_name(self.dados_path.name + '.tmp')
+        dados.to_pickle(tmp_path)
+        os.replace(tmp_path, self.dados_path)
+
+        manifesto_tmp = self.manifesto_path.with_name(self.manifesto_path.name + '.tmp')
+        with open(manifesto_tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+        os.replace(manifesto_tmp, self.manifesto_path)
+
+    @staticmethod
+    def _assinatura(csv_path):
+        stat = os.stat(csv_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    # --- Escrita ---
+
+    def registrar_mes(self, csv_path, mes=None):
+        """
+        Acrescenta (ou substitui) o mês ``mes`` com os projetos de ``csv_path``.
+
+        Args:
+            csv_path (str | Path): Arquivo apt do mês
+            mes (str | pd.Period): Mês de fechamento ('AAAA-MM'); se omitido, é
+                inferido do nome e das datas do arquivo
+
+        Returns:
+            int: Quantidade de projetos registrados no mês (0 se nada foi registrado)
+        """
+        csv_path = Path(csv_path)
+        inicio = time.time()
+        dados_mes = carregar_dados_normalizados(csv_path)
+        if dados_mes is None or dados_mes.empty:
+            logger.warning(f"⚠️ Histórico mensal: {csv_path.name} sem dados para registrar")
+            return 0
+
+        periodo = periodo_mes(mes) if mes is not None else inferir_mes_arquivo(csv_path, dados_mes)
+        if periodo is None:
+            logger.warning(f"⚠️ Histórico mensal: não foi possível determinar o mês de {csv_path.name}")
+            return 0
+
+        linhas = _linhas_historico(dados_mes, periodo, csv_path.name)
+        with _LOCK:
+            manifesto = self._ler_manifesto()
+            atual = self._ler_dados()
+            if not atual.empty:
+                atual = atual[atual['MesSnapshot'] != periodo]
+            partes = [parte for parte in (atual, linhas) if not parte.empty]
+            if not partes:
+                return 0
+            dados = pd.concat(partes, ignore_index=True)
+            dados = dados.sort_values(['Numero', 'MesSnapshot'], kind='stable').reset_index(drop=True)
+            for coluna in COLUNAS_TEXTO + ['Arquivo']:
+                dados[coluna] = dados[coluna].astype('category')
+
+            manifesto['arquivos'][csv_path.name] = {'mes': str(periodo), **self._assinatura(csv_path)}
+            self._gravar(dados, manifesto)
+
+        logger.info(f"🗂️ Histórico mensal: {len(linhas)} projetos de {csv_path.name} registrados em {periodo} "
+                    f"({(time.time() - inicio) * 1000:.1f}ms)")
+        return len(linhas)
+
+    def sincronizar(self):
+        """Registra os arquivos apt novos ou alterados desde o último registro."""
+        manifesto = self._ler_manifesto()
+        for csv_path in sorted(self.data_dir.glob('dadosr_apt_*.csv')):
+            if not PADRAO_ARQUIVO_MENSAL.match(csv_path.name):
+                continue  # backups (dadosr_apt_<mes>_backup_*.csv)
+            registro = manifesto['arquivos'].get(csv_path.name)
+            try:
+                assinatura = self._assinatura(csv_path)
+            except OSError:
+                continue
+            if registro and all(registro.get(k) == v for k, v in assinatura.items()):
+                continue
+            # Alterado fora do arquivamento: o mês é deduzido de novo a partir do conteúdo
+            try:
+                self.registrar_mes(csv_path)
+            except Exception as e:
+                logger.error(f"❌ Histórico mensal: erro ao registrar {csv_path.name}: {e}")
+
+    # --- Leitura ---
+
+    def carregar(self):
+        """Histórico completo (sincronizado com os arquivos apt), ordenado por (Numero, MesSnapshot)."""
+        self.sincronizar()
+        return self._ler_dados()
+
+    def mes_do_arquivo(self, nome_arquivo):
+        """Mês registrado para o arquivo apt ``nome_arquivo`` (pd.Period), ou None."""
+        self.sincronizar()
+        registro = self._ler_manifesto()['arquivos'].get(nome_arquivo)
+        return periodo_mes(registro['mes']) if registro else None
+
+    def meses(self):
+        """Meses presentes no histórico, em ordem cronológica."""
+        dados = self.carregar()
+        return sorted(dados['MesSnapshot'].unique()) if not dados.empty else []
+
+    def deltas_horas(self, meses=None):
+        """
+        Horas trabalhadas incrementais de cada projeto em cada mês do histórico.
+
+        Uma única diferença sobre o histórico ordenado: ``HorasAnteriores`` é o
+        valor do mesmo projeto no mês imediatamente anterior (0 se o projeto não
+        existia nele) e fica nulo quando o mês anterior não está no histórico.
+
+        Args:
+            meses (list): Meses retornados ('AAAA-MM' ou Period); todos se omitido
+
+        Returns:
+            pd.DataFrame: colunas do histórico + HorasAnteriores e HorasIncrementais
+        """
+        dados = self.carregar()
+        if dados.empty:
+            return pd.DataFrame(columns=COLUNAS_HISTORICO + ['HorasAnteriores', 'HorasIncrementais'])
+
+        codigo_mes = dados['MesSnapshot'].dt.year * 12 + dados['MesSnapshot'].dt.month
+        por_projeto = dados['Numero']
+        horas_anteriores = dados['HorasTrabalhadas'].groupby(por_projeto, sort=False).shift(1)
+        codigo_anterior = codigo_mes.groupby(por_projeto, sort=False).shift(1)
+
+        resultado = dados.copy(deep=False)
+        resultado['HorasAnteriores'] = horas_anteriores.where(codigo_anterior == codigo_mes - 1, 0.0)
+        # Sem o snapshot do mês anterior não há base de comparação
+        sem_mes_anterior = ~(codigo_mes - 1).isin(set(codigo_mes.unique()))
+        resultado.loc[sem_mes_anterior, 'HorasAnteriores'] = np.nan
+        resultado['HorasIncrementais'] = resultado['HorasTrabalhadas'] - resultado['HorasAnteriores']
+
+        if meses is not None:
+            resultado = resultado[resultado['MesSnapshot'].isin([periodo_mes(mes) for mes in meses])]
+        return resultado
@@ -0,0 +1,117 @@
+"""
+Cache HTTP condicional (ETag / Last-Modified + 304) para as APIs JSON.
+
+As respostas das APIs de projetos dependem apenas do estado dos dados - versão
+dos dados (``data/.data_version``), arquivos CSV da pasta ``data``, versão dos
+backlogs (``data/.backlog_version``, por causa de ``backlog_exists``) e dia
+atual (métricas usam a data de hoje) - e dos parâmetros da requisição. O decorator
+``resposta_condicional`` calcula um ETag forte a partir disso e responde
+``304 Not Modified`` a ``If-None-Match``/``If-Modified-Since`` antes de executar
+a view: atualizações do navegador e polling custam só a verificação dos headers.
+
+Só respostas 200 bem-sucedidas recebem ETag. As views que respondem 200 com uma
+estrutura vazia quando a carga ou o cálculo falham marcam esse retorno com
+``resposta_de_falha``, para que ele não seja revalidado com 304.
+
+O estado dos dados é obtido com ``os.stat`` dos arquivos (sem leitura).
+"""
+
+import hashlib
+import logging
+import os
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import g, make_response, request
+
+from .data_version import (BACKLOG_VERSION_FILE, VERSION_FILE, assinaturas_csv_dados, obter_versao_backlogs,
+                           obter_versao_dados)
+
+logger = logging.getLogger(__name__)
+
+# Respostas podem conter dados internos: só o navegador guarda, e sempre revalida
+CACHE_CONTROL = 'private, no-cache'
+
+
+def _estado_dados():
+    """
+    Retorna (assinatura, última modificação) do estado dos dados.
+
+    A assinatura reúne a versão dos dados, (nome, mtime, tamanho) de cada CSV
+    da pasta de dados, a versão dos backlogs e o dia atual; a última
+    modificação é o maior mtime entre esses arquivos e a meia-noite de hoje.
+    """
+    hoje = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    arquivos = assinaturas_csv_dados()
+    ultima_modificacao = max([hoje.timestamp()] + [mtime_ns / 1e9 for _, mtime_ns, _ in arquivos])
+    for arquivo_versao in (VERSION_FILE, BACKLOG_VERSION_FILE):
+        try:
+            ultima_modificacao = max(ultima_modificacao, os.stat(arquivo_versao).st_mtime)
+        except OSError:
+            pass
+
+    assinatura = (obter_versao_dados(), arquivos, obter_versao_backlogs(), hoje.date().isoformat())
+    return assinatura, datetime.fromtimestamp(int(ultima_modificacao), timezone.utc)
+
+
+def calcular_etag(assinatura):
+    """ETag forte da requisição atual (endpoint + parâmetros + estado dos dados)."""
+    conteudo = repr((
+        request.endpoint,
+        sorted(request.view_args.items()) if request.view_args else [],
+        sorted(request.args.items(multi=True)),
+        assinatura,
+    ))
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()
+
+
+def resposta_de_falha(resposta):
+    """
+    Marca ``resposta`` como fallback de erro de uma view com ``resposta_condicional``:
+    ela sai sem ETag/Last-Modified e com ``no-store``, e a próxima requisição recalcula.
+    """
+    g.resposta_de_falha = True
+    return resposta
+
+
+def resposta_condicional(view):
+    """
+    Decorator para views GET cujo resultado depende só dos dados e dos parâmetros.
+
+    Responde 304 quando o ``If-None-Match`` do cliente contém o ETag atual (ou,
+    sem ``If-None-Match``, quando ``If-Modified-Since`` não é anterior à última
+    modificação dos dados); caso contrário executa a view e acrescenta ETag,
+    Last-Modified e Cache-Control às respostas 200 que não foram marcadas com
+    ``resposta_de_falha``.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+
+        assinatura, ultima_modificacao = _estado_dados()
+        etag = calcular_etag(assinatura)
+
+        if request.if_none_match:
+            nao_modificado = request.if_none_match.contains(etag)
+        else:
+            nao_modificado = (request.if_modified_since is not None
+                              and ultima_modificacao <= request.if_modified_since)
+
+        if nao_modificado:
+            resposta = make_response('', 304)
+            logger.debug(f"Cache HTTP: 304 para {request.path}")
+        else:
+            resposta = make_response(view(*args, **kwargs))
+            if resposta.status_code != 200:
+                return resposta
+            if g.pop('resposta_de_falha', False):
+                resposta.headers['Cache-Control'] = 'no-store'
+                return resposta
+
+        resposta.set_etag(etag)
+        resposta.last_modified = ultima_modificacao
+        resposta.headers['Cache-Control'] = CACHE_CONTROL
+        return resposta
+
+    return wrapper
@@ -0,0 +1,279 @@
+"""
+Índices de linhas dos DataFrames canônicos mantidos em cache.
+
+Construídos uma única vez por carga, permitem localizar um projeto pelo
+Numero (ou os projetos de um especialista, account manager ou squad) sem
+varrer o DataFrame inteiro.
+
+O índice fica associado ao array de cada coluna indexada. Cópias rasas do
+frame cacheado (``copia_leve``) compartilham esses arrays e continuam usando
+o índice; frames filtrados, ou com a coluna reescrita, voltam para a busca
+por máscara booleana, com o mesmo resultado.
+
+Para os filtros do relatório geral, cada snapshot também tem um índice de
+filtros: um bitset (``np.packbits``) por valor das colunas categóricas e as
+datas ordenadas das colunas de data. Combinações de filtros são resolvidas com
+AND dos bitsets e ``searchsorted`` nos intervalos de datas, antes de
+materializar qualquer linha.
+"""
+
+import logging
+import sys
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUNAS_SECUNDARIAS = ['Especialista', 'Account Manager', 'Squad']
+COLUNAS_BITSET = ['Squad', 'TipoServico', 'Status', 'Faturamento']
+COLUNAS_INTERVALO = ['DataInicio', 'DataTermino']
+
+_registro = {}  # id(array de Numero) -> (weakref do array, IndiceDados)
+_lock = threading.Lock()
+
+
+def _chave_numero(numero):
+    """Normaliza o Numero para int; None se o valor não for um inteiro."""
+    if isinstance(numero, (bool, np.bool_)):
+        return None
+    if isinstance(numero, (int, np.integer)):
+        return int(numero)
+    if isinstance(numero, (float, np.floating)) and float(numero).is_integer():
+        return int(numero)
+    return None
+
+
+def _referencia_coluna(serie):
+    """Array que identifica a coluna: o ExtensionArray, ou o ndarray (view) das colunas numpy."""
+    if isinstance(serie.dtype, pd.api.extensions.ExtensionDtype):
+        return serie.array
+    return serie.to_numpy()
+
+
+def _mesma_coluna(referencia, serie):
+    """Indica se ``serie`` usa o mesmo array de ``referencia`` (cópias rasas compartilham o buffer)."""
+    if not isinstance(referencia, np.ndarray):
+        return serie.array is referencia
+    if isinstance(serie.dtype, pd.api.extensions.ExtensionDtype):
+        return False
+    valores = serie.to_numpy()
+    return (
+        valores.__array_interface__['data'][0] == referencia.__array_interface__['data'][0]
+        and valores.shape == referencia.shape
+        and valores.strides == referencia.strides
+        and valores.dtype == referencia.dtype
+    )
+
+
+def _bitset(posicoes, total):
+    """Bitset com os bits de ``posicoes`` ligados."""
+    mascara = np.zeros(total, dtype=bool)
+    mascara[posicoes] = True
+    return np.packbits(mascara)
+
+
+def _limite_ns(limite):
+    """Data-limite de um intervalo em nanossegundos (int64), como em ``datetime64[ns]``."""
+    limite = pd.Timestamp(limite)
+    if limite.tzinfo is not None:
+        raise TypeError("Invalid comparison between naive and tz-aware datetimes")
+    return limite.as_unit('ns').value
+
+
+def bitset_todos(total):
+    """Bitset com todas as ``total`` linhas selecionadas."""
+    return np.packbits(np.ones(total, dtype=bool))
+
+
+def posicoes_bitset(bitset, total):
+    """Posições (ordenadas) das linhas selecionadas no bitset."""
+    return np.flatnonzero(np.unpackbits(bitset, count=total))
+
+
+class IndiceFiltros:
+    """Bitsets por valor das colunas categóricas e datas ordenadas para intervalos."""
+
+    def __init__(self, dados):
+        self.total_linhas = len(dados)
+        self._arrays = {}
+        self.bitsets = {}  # coluna -> {valor: bitset}
+        self.datas = {}    # coluna -> (datas ordenadas em ns, posições das linhas)
+
+        for coluna in COLUNAS_BITSET:
+            if coluna in dados.columns:
+                grupos = dados.groupby(coluna, observed=True, sort=False).indices
+                self.bitsets[coluna] = {valor: _bitset(pos, self.total_linhas) for valor, pos in grupos.items()}
+                self._arrays[coluna] = _referencia_coluna(dados[coluna])
+
+        for coluna in COLUNAS_INTERVALO:
+            if coluna in dados.columns:
+                valores = pd.to_datetime(dados[coluna]).to_numpy(dtype='datetime64[ns]')
+                validas = np.flatnonzero(~np.isnat(valores))
+                ordem = np.argsort(valores[validas], kind='stable')
+                self.datas[coluna] = (valores[validas][ordem].view('int64'), validas[ordem])
+                self._arrays[coluna] = _referencia_coluna(dados[coluna])
+
+    def __sizeof__(self):
+        tamanho = sum(bits.nbytes for grupos in self.bitsets.values() for bits in grupos.values())
+        return tamanho + sum(datas.nbytes + posicoes.nbytes for datas, posicoes in self.datas.values())
+
+    def cobre(self, dados, coluna):
+        """Indica se o índice de ``coluna`` vale para ``dados`` (mesmo array, mesmo tamanho)."""
+        referencia = self._arrays.get(coluna)
+        return (
+            referencia is not None
+            and len(dados) == self.total_linhas
+            and coluna in dados.columns
+            and _mesma_coluna(referencia, dados[coluna])
+        )
+
+    def valores(self, coluna, predicado):
+        """OR dos bitsets dos valores de ``coluna`` que satisfazem ``predicado``."""
+        resultado = np.zeros((self.total_linhas + 7) // 8, dtype=np.uint8)
+        for valor, bits in self.bitsets[coluna].items():
+            if predicado(valor):
+                resultado |= bits
+        return resultado
+
+    def intervalo(self, coluna, inicio=None, fim=None):
+        """Bitset das linhas com ``inicio <= coluna <= fim`` (datas nulas nunca entram)."""
+        datas, posicoes = self.datas[coluna]
+        primeiro = np.searchsorted(datas, _limite_ns(inicio), side='left') if inicio is not None else 0
+        ultimo = np.searchsorted(datas, _limite_ns(fim), side='right') if fim is not None else len(datas)
+        return _bitset(posicoes[primeiro:ultimo], self.total_linhas)
+
+
+class IndiceDados:
+    """Mapa Numero -> posição da linha e valor -> posições para as colunas secundárias."""
+
+    def __init__(self, dados):
+        self.total_linhas = len(dados)
+        self._arrays = {}
+        self.por_numero = {}
+        self.secundarios = {}
+
+        if 'Numero' in dados.columns:
+            numeros = dados['Numero']
+            validos = numeros.notna().to_numpy()
+            posicoes = np.flatnonzero(validos)
+            chaves = numeros[validos].astype('int64').to_numpy()
+            # Invertido para que a primeira ocorrência prevaleça, como em dados[mask].iloc[0]
+            self.por_numero = dict(zip(chaves[::-1].tolist(), posicoes[::-1].tolist()))
+            self._arrays['Numero'] = numeros.array
+
+        for coluna in COLUNAS_SECUNDARIAS:
+            if coluna in dados.columns:
+                self.secundarios[coluna] = dados.groupby(coluna, observed=True, sort=False).indices
+                self._arrays[coluna] = dados[coluna].array
+
+        self.filtros = IndiceFiltros(dados)
+
+    def __sizeof__(self):
+        tamanho = sys.getsizeof(self.por_numero) + sys.getsizeof(self.filtros)
+        for grupos in self.secundarios.values():
+            tamanho += sys.getsizeof(grupos) + sum(pos.nbytes for pos in grupos.values())
+        return tamanho
+
+    def cobre(self, dados, coluna):
+        """Indica se o índice de ``coluna`` vale para ``dados`` (mesmo array, mesmo tamanho)."""
+        array = self._arrays.get(coluna)
+        return (
+            array is not None
+            and len(dados) == self.total_linhas
+            and coluna in dados.columns
+            and dados[coluna].array is array
+        )
+
+    def localizar(self, dados, numero):
+        """Linha de ``dados`` com o Numero informado (DataFrame de 0 ou 1 linha)."""
+        posicao = self.por_numero.get(_chave_numero(numero))
+        if posicao is None:
+            return dados.iloc[0:0]
+        return dados.iloc[[posicao]]
+
+    def filtrar(self, dados, coluna, valor):
+        """Linhas de ``dados`` em que ``coluna == valor``."""
+        posicoes = self.secundarios[coluna].get(valor)
+        if posicoes is None:
+            return dados.iloc[0:0]
+        return dados.iloc[posicoes]
+
+
+def indexar(dados):
+    """Constrói e registra o índice de um DataFrame que será mantido em cache."""
+    if dados is None or dados.empty or 'Numero' not in dados.columns:
+        return None
+    inicio = time.time()
+    indice = IndiceDados(dados)
+    numeros = dados['Numero'].array
+    chave = id(numeros)
+    with _lock:
+        _registro[chave] = (weakref.ref(numeros), indice)
+    # Remove o registro quando o frame cacheado (e suas cópias rasas) for descartado
+    weakref.finalize(numeros, _registro.pop, chave, None)
+    logger.debug(f"Índice de {len(dados)} linhas construído em {(time.time() - inicio) * 1000:.1f}ms")
+    return indice
+
+
+def obter_indice(dados):
+    """Retorna o índice registrado para ``dados`` ou None."""
+    if dados is None or 'Numero' not in dados.columns:
+        return None
+    numeros = dados['Numero'].array
+    item = _registro.get(id(numeros))
+    if item is None or item[0]() is not numeros:
+        return None
+    return item[1]
+
+
+def localizar_projeto(dados, numero):
+    """
+    Equivalente a ``dados[dados['Numero'] == numero]``, em O(1) quando ``dados``
+    é (uma cópia rasa de) um frame indexado.
+    """
+    indice = obter_indice(dados)
+    if indice is not None and _chave_numero(numero) is not None and indice.cobre(dados, 'Numero'):
+        return indice.localizar(dados, numero)
+    return dados[dados['Numero'] == numero]
+
+
+def filtrar_por(dados, coluna, valor):
+    """Equivalente a ``dados[dados[coluna] == valor]`` usando o índice secundário quando possível."""
+    indice = obter_indice(dados)
+    if indice is not None and indice.cobre(dados, coluna):
+        return indice.filtrar(dados, coluna, valor)
+    return dados[dados[coluna] == valor]
+
+
+def bitset_valores(dados, coluna, predicado):
+    """
+    Bitset das linhas de ``dados`` cujo valor em ``coluna`` satisfaz ``predicado(valor)``;
+    valores nulos nunca são selecionados. Usa o índice de filtros quando possível.
+    """
+    indice = obter_indice(dados)
+    if indice is not None and indice.filtros.cobre(dados, coluna):
+        return indice.filtros.valores(coluna, predicado)
+    serie = dados[coluna]
+    aceitos = [valor for valor in serie.dropna().unique() if predicado(valor)]
+    return np.packbits(serie.isin(aceitos).to_numpy(dtype=bool))
+
+
+def bitset_intervalo(dados, coluna, inicio=None, fim=None):
+    """
+    Bitset das linhas de ``dados`` com ``inicio <= coluna <= fim`` (limites opcionais);
+    datas nulas nunca são selecionadas. Usa o índice de filtros quando possível.
+    """
+    indice = obter_indice(dados)
+    if indice is not None and indice.filtros.cobre(dados, coluna):
+        return indice.filtros.intervalo(coluna, inicio, fim)
+    valores = pd.to_datetime(dados[coluna])
+    mascara = valores.notna()
+    if inicio is not None:
+        mascara &= valores >= inicio
+    if fim is not None:
+        mascara &= valores <= fim
+    return np.packbits(mascara.to_numpy(dtype=bool))
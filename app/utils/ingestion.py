@@ -0,0 +1,413 @@
+"""
+Pipeline canônico de ingestão dos arquivos dadosr*.csv.
+
+Todos os serviços (Macro, Gerencial, Status Report histórico e períodos
+fiscais) consomem o mesmo DataFrame normalizado, produzido uma única vez
+por versão do arquivo e persistido pelo snapshot store.
+
+Estágios:
+    1. parse       - leitura do CSV bruto (latin1, ';', tudo como texto)
+    2. tipos       - datas, números e tempo trabalhado
+    3. renomeação  - nomes do sistema de chamados -> nomes usados pelos serviços
+    4. padronização- Status, Faturamento e colunas de texto
+    5. derivação   - colunas calculadas (HorasRestantes, HorasRestantesAjustadas)
+    6. compactação - colunas de baixa variedade como categóricas
+
+Convenções específicas de um serviço (ex: Status em Title Case no Gerencial)
+são aplicadas pelo próprio serviço sobre este resultado.
+
+Para análises que precisam de poucas colunas de arquivos grandes (burn rate,
+horas incrementais, entregas por mês), ``ler_csv_projetado`` lê o CSV em
+blocos, converte apenas as colunas pedidas e descarta as linhas fora do
+filtro, sem montar o DataFrame completo.
+"""
+
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .cache import LRUCache
+from .snapshot_store import carregar_snapshot
+from .time_parser import converter_tempo_para_horas_vetorizado
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAMESPACE = 'canonico'
+
+COLUNAS_DATA = ['Aberto em', 'Resolvido em', 'Data da última ação', 'Vencimento em']
+
+MAPA_RENOMEACAO = {
+    'Número': 'Numero',
+    'Cliente (Completo)': 'Cliente',
+    'Assunto': 'Projeto',
+    'Serviço (2º Nível)': 'Squad',
+    'Serviço (3º Nível)': 'TipoServico',
+    'Status': 'Status',
+    'Esforço estimado': 'Horas',
+    'Tempo trabalhado': 'HorasTrabalhadas',
+    'Andamento': 'Conclusao',
+    'Data da última ação': 'UltimaInteracao',
+    'Tipo de faturamento': 'Faturamento',
+    'Responsável': 'Especialista',
+    'Account Manager ': 'Account Manager',
+    'Aberto em': 'DataInicio',
+    'Resolvido em': 'DataTermino',
+    'Vencimento em': 'VencimentoEm'
+}
+
+MAPA_FATURAMENTO = {
+    "PRIME": "PRIME",
+    "Descontar do PLUS no inicio do projeto": "PLUS",
+    "Faturar no inicio do projeto": "INICIO",
+    "Faturar no final do projeto": "TERMINO",
+    "Faturado em outro projeto": "FEOP",
+    "Engajamento": "ENGAJAMENTO"
+}
+
+# Colunas canônicas que dependem de outras colunas do CSV
+DEPENDENCIAS_COLUNAS = {
+    'HorasRestantes': ['Horas', 'HorasTrabalhadas'],
+    'HorasRestantesAjustadas': ['Horas', 'HorasTrabalhadas'],
+    'Faturamento_Original': ['Faturamento'],
+    'Projeto': ['Projeto', 'Cliente'],
+}
+
+TAMANHO_BLOCO = 20000
+
+COLUNAS_TEXTO_PADRAO = ['Projeto', 'Squad', 'Especialista', 'Account Manager']
+
+# Poucas dezenas de valores distintos em milhares de linhas: armazenadas como
+# categóricas (códigos inteiros + dicionário único por snapshot). Apenas colunas
+# sem nulos após a padronização; Cliente e TipoServico podem ter NaN, que os
+# serviços convertem para None com replace() antes de serializar em JSON.
+COLUNAS_CATEGORICAS = ['Status', 'Squad', 'Especialista', 'Account Manager', 'Faturamento']
+
+
+# --- 1. Parse ---
+
+def ler_csv_bruto(csv_path):
+    """Lê o CSV exportado com todas as colunas como texto."""
+    return pd.read_csv(
+        csv_path,
+        dtype=str,
+        sep=';',
+        encoding='latin1',
+    )
+
+
+# --- 2. Tipos ---
+
+def _converter_data(serie):
+    """Converte datas 'dd/mm/aaaa HH:MM', com fallback para 'dd/mm/aaaa'."""
+    convertida = pd.to_datetime(serie, format='%d/%m/%Y %H:%M', errors='coerce')
+    mask_falha = convertida.isna() & serie.notna() & (serie != '')
+    if mask_falha.any():
+        convertida.loc[mask_falha] = pd.to_datetime(serie[mask_falha], format='%d/%m/%Y', errors='coerce')
+    return convertida
+
+
+def converter_tipos(dados):
+    """Converte datas, números, percentuais e tempo trabalhado."""
+    for col in COLUNAS_DATA:
+        if col in dados.columns:
+            dados[col] = _converter_data(dados[col])
+
+    if 'Número' in dados.columns:
+        dados['Número'] = pd.to_numeric(dados['Número'], errors='coerce').astype('Int64')
+
+    if 'Esforço estimado' in dados.columns:
+        dados['Esforço estimado'] = dados['Esforço estimado'].str.replace(',', '.', regex=False)
+        dados['Esforço estimado'] = pd.to_numeric(dados['Esforço estimado'], errors='coerce').fillna(0.0)
+    else:
+        dados['Esforço estimado'] = 0.0
+
+    if 'Andamento' in dados.columns:
+        dados['Andamento'] = dados['Andamento'].str.rstrip('%').str.replace(',', '.', regex=False)
+        dados['Andamento'] = pd.to_numeric(dados['Andamento'], errors='coerce').fillna(0.0)
+        dados['Andamento'] = dados['Andamento'].clip(lower=0, upper=100)
+    else:
+        dados['Andamento'] = 0.0
+
+    if 'Tempo trabalhado' in dados.columns:
+        dados['Tempo trabalhado'] = converter_tempo_para_horas_vetorizado(dados['Tempo trabalhado'])
+    else:
+        dados['Tempo trabalhado'] = 0.0
+
+    return dados
+
+
+# --- 3. Renomeação ---
+
+def renomear_colunas(dados):
+    """Renomeia as colunas e aplica o fallback Cliente -> Projeto."""
+    colunas_para_renomear = {k: v for k, v in MAPA_RENOMEACAO.items() if k in dados.columns}
+    dados = dados.rename(columns=colunas_para_renomear)
+
+    # Se Assunto está vazio ou não existe, usa Cliente como fallback
+    if 'Projeto' in dados.columns and 'Cliente' in dados.columns:
+        mask_projeto_vazio = dados['Projeto'].isna() | (dados['Projeto'] == '') | (dados['Projeto'] == 'nan')
+        if mask_projeto_vazio.any():
+            dados.loc[mask_projeto_vazio, 'Projeto'] = dados.loc[mask_projeto_vazio, 'Cliente']
+            logger.info(f"Aplicado fallback Cliente→Projeto em {mask_projeto_vazio.sum()} registros")
+    elif 'Cliente' in dados.columns and 'Projeto' not in dados.columns:
+        dados['Projeto'] = dados['Cliente']
+        logger.info("Criada coluna 'Projeto' usando dados de 'Cliente' (coluna Assunto não encontrada)")
+
+    return dados
+
+
+# --- 4. Padronização ---
+
+def padronizar_valores(dados):
+    """Padroniza Status (maiúsculo), Faturamento (códigos curtos) e colunas de texto."""
+    if 'Status' in dados.columns:
+        dados['Status'] = dados['Status'].astype(str).str.strip().str.upper()
+
+    if 'Faturamento' in dados.columns:
+        # Remove ponto final ("Faturado em outro projeto.") antes de mapear
+        dados['Faturamento'] = dados['Faturamento'].astype(str).str.strip().str.rstrip('. ').str.strip()
+        dados['Faturamento_Original'] = dados['Faturamento']
+        dados['Faturamento'] = dados['Faturamento'].map(MAPA_FATURAMENTO).fillna('NAO_MAPEADO')
+
+    for col in COLUNAS_TEXTO_PADRAO:
+        if col in dados.columns:
+            dados[col] = dados[col].astype(str).str.strip()
+
+    return dados
+
+
+# --- 5. Derivação ---
+
+def derivar_colunas(dados):
+    """Calcula colunas derivadas das colunas já normalizadas."""
+    if 'Horas' in dados.columns and 'HorasTrabalhadas' in dados.columns:
+        dados['HorasRestantes'] = (dados['Horas'] - dados['HorasTrabalhadas']).round(1)
+    else:
+        dados['HorasRestantes'] = 0.0
+    dados['HorasRestantesAjustadas'] = calcular_horas_restantes_ajustadas(dados)
+    return dados
+
+
+def calcular_horas_restantes_ajustadas(dados):
+    """
+    Horas restantes usadas na ocupação dos squads e no burn rate: projetos que
+    estouraram o esforço (HorasRestantes negativo) contam com 10% do esforço inicial.
+    """
+    horas_restantes = dados['HorasRestantes']
+    return pd.Series(
+        np.where(horas_restantes >= 0, horas_restantes, 0.10 * dados['Horas']),
+        index=dados.index,
+        dtype='float64'
+    )
+
+
+def horas_restantes_ajustadas(dados):
+    """Coluna ``HorasRestantesAjustadas`` do snapshot canônico, ou calculada se os dados vierem de outra fonte."""
+    if 'HorasRestantesAjustadas' in dados.columns:
+        return dados['HorasRestantesAjustadas']
+    return calcular_horas_restantes_ajustadas(dados)
+
+
+# --- 6. Compactação ---
+
+def compactar_colunas(dados):
+    """Converte as colunas de ``COLUNAS_CATEGORICAS`` para o dtype category."""
+    for col in COLUNAS_CATEGORICAS:
+        if col in dados.columns:
+            dados[col] = dados[col].astype('category')
+    return dados
+
+
+def _is_categorica(serie):
+    return isinstance(serie.dtype, pd.CategoricalDtype)
+
+
+def adicionar_categorias(serie, valores):
+    """Garante que ``valores`` possam ser atribuídos à coluna (no-op se não for categórica)."""
+    if not _is_categorica(serie):
+        return serie
+    novos = [v for v in valores if v not in serie.cat.categories]
+    return serie.cat.set_categories(serie.cat.categories.union(novos)) if novos else serie
+
+
+def substituir_valores(serie, mapa, valor_nulo=None):
+    """
+    Equivalente a ``serie.replace(mapa).fillna(valor_nulo)``.
+
+    Em colunas categóricas a troca é feita no dicionário de categorias e nos
+    códigos inteiros, sem percorrer as strings linha a linha.
+    """
+    if not _is_categorica(serie):
+        serie = serie.replace(mapa)
+        return serie.fillna(valor_nulo) if valor_nulo is not None else serie
+
+    categorias = [mapa.get(c, c) for c in serie.cat.categories]
+    codigos = serie.cat.codes.to_numpy()
+    if valor_nulo is not None and (codigos == -1).any():
+        categorias.append(valor_nulo)
+        codigos = np.where(codigos == -1, len(categorias) - 1, codigos)
+    codigos_mapa, novas_categorias = pd.factorize(pd.Index(categorias, dtype=object), sort=True)
+    novos_codigos = np.where(codigos == -1, -1, codigos_mapa[codigos])
+    return pd.Series(pd.Categorical.from_codes(novos_codigos, categories=novas_categorias),
+                     index=serie.index, name=serie.name)
+
+
+def contar_valores(serie):
+    """``value_counts`` sem as categorias que não ocorrem na seleção."""
+    contagem = serie.value_counts()
+    return contagem[contagem > 0]
+
+
+def dtypes_combinados(dataframes):
+    """
+    Dtypes que ``pd.concat(dataframes)`` produz nas colunas cujo dtype varia entre os
+    frames não vazios (ex: categóricas com categorias diferentes em cada mês viram object).
+
+    Resolvido sobre frames de zero linhas, sem materializar as colunas. Retorna
+    ``{coluna: dtype}`` (vazio se os dtypes coincidem), para ``astype`` no resultado.
+    """
+    nao_vazios = [dados for dados in dataframes if len(dados)] or dataframes
+    if len(nao_vazios) < 2:
+        return {}
+    primeiro = nao_vazios[0]
+    colunas = [coluna for coluna in primeiro.columns
+               if any(dados[coluna].dtype != primeiro[coluna].dtype for dados in nao_vazios[1:])]
+    if not colunas:
+        return {}
+    return pd.concat([dados[colunas].iloc[:0] for dados in nao_vazios], ignore_index=True).dtypes.to_dict()
+
+
+ESTAGIOS = [
+    ('tipos', converter_tipos),
+    ('renomeacao', renomear_colunas),
+    ('padronizacao', padronizar_valores),
+    ('derivacao', derivar_colunas),
+    ('compactacao', compactar_colunas),
+]
+
+
+def normalizar_dados(dados):
+    """Aplica os estágios de normalização a um DataFrame bruto (saída de ``ler_csv_bruto``)."""
+    for nome, estagio in ESTAGIOS:
+        try:
+            dados = estagio(dados)
+        except Exception as e:
+            logger.error(f"❌ Erro no estágio '{nome}' da ingestão: {str(e)}")
+            return pd.DataFrame()
+    return dados
+
+
+def processar_csv(csv_path):
+    """Executa o pipeline completo (parse + normalização) para um arquivo."""
+    inicio = time.time()
+    try:
+        dados = ler_csv_bruto(csv_path)
+    except Exception as e:
+        logger.error(f"❌ Erro ao ler CSV {csv_path}: {str(e)}")
+        return pd.DataFrame()
+    dados = normalizar_dados(dados)
+    logger.info(f"📊 {csv_path} processado em {(time.time() - inicio) * 1000:.1f}ms ({len(dados)} linhas)")
+    return dados
+
+
+def carregar_dados_normalizados(csv_path):
+    """
+    Retorna o DataFrame canônico de ``csv_path``.
+
+    O processamento completo só é executado quando o arquivo muda; nos demais
+    casos o resultado vem do snapshot binário.
+    """
+    return carregar_snapshot(csv_path, SNAPSHOT_NAMESPACE, processar_csv)
+
+
+# --- Leitura projetada ---
+
+_PROJECOES_CACHE = LRUCache('projecoes_csv', max_bytes=32 * 1024 * 1024)
+
+
+def _colunas_brutas(colunas):
+    """Nomes das colunas do CSV necessárias para produzir as colunas canônicas pedidas."""
+    canonicas = set(colunas)
+    for col in colunas:
+        canonicas.update(DEPENDENCIAS_COLUNAS.get(col, []))
+    nome_original = {v: k for k, v in MAPA_RENOMEACAO.items()}
+    return {nome_original.get(col, col) for col in canonicas}
+
+
+def filtro_janela_datas(coluna, inicio, fim):
+    """Predicado de linhas com ``inicio <= coluna <= fim`` (datas nulas ficam de fora)."""
+    def filtro(dados):
+        return dados[coluna].notna() & (dados[coluna] >= inicio) & (dados[coluna] <= fim)
+    return filtro
+
+
+def ler_csv_projetado(csv_path, colunas, filtro=None, janela=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê apenas as colunas canônicas ``colunas`` de um dadosr*.csv, em blocos.
+
+    Cada bloco passa pelos mesmos estágios do pipeline canônico, restritos às
+    colunas lidas; as linhas rejeitadas pelo filtro são descartadas antes de
+    acumular o próximo bloco.
+
+    Args:
+        csv_path (str | Path): CSV de origem
+        colunas (list): Colunas canônicas desejadas (ex: ['Numero', 'HorasTrabalhadas'])
+        filtro (callable, optional): ``filtro(bloco) -> máscara booleana`` sobre o
+            bloco já normalizado; as colunas usadas devem estar em ``colunas``
+        janela (tuple, optional): ``(coluna, inicio, fim)``, atalho para
+            ``filtro_janela_datas``. Ao contrário de ``filtro``, permite cachear o resultado
+
+    Returns:
+        pd.DataFrame: Somente as colunas pedidas (vazio em caso de erro)
+    """
+    colunas = list(colunas)
+    chave = None
+    if filtro is None:
+        try:
+            stat = os.stat(csv_path)
+            chave = (str(csv_path), stat.st_mtime_ns, stat.st_size, tuple(colunas), janela)
+        except OSError as e:
+            logger.error(f"❌ Erro ao ler metadados de {csv_path}: {str(e)}")
+            return pd.DataFrame(columns=colunas)
+        dados = _PROJECOES_CACHE.get(chave)
+        if dados is not None:
+            return dados.copy(deep=False)
+        if janela is not None:
+            filtro = filtro_janela_datas(*janela)
+
+    inicio = time.time()
+    brutas = _colunas_brutas(colunas)
+    blocos = []
+    try:
+        leitor = pd.read_csv(
+            csv_path,
+            dtype=str,
+            sep=';',
+            encoding='latin1',
+            usecols=lambda col: col in brutas,
+            chunksize=tamanho_bloco,
+        )
+        for bloco in leitor:
+            bloco = normalizar_dados(bloco)
+            if bloco.empty:
+                continue
+            if filtro is not None:
+                bloco = bloco[filtro(bloco)]
+            blocos.append(bloco[[col for col in colunas if col in bloco.columns]])
+    except Exception as e:
+        logger.error(f"❌ Erro na leitura projetada de {csv_path}: {str(e)}")
+        return pd.DataFrame(columns=colunas)
+
+    dados = pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame(columns=colunas)
+    # Blocos com categorias diferentes viram object no concat; recompacta o resultado
+    dados = compactar_colunas(dados)
+    logger.info(f"📑 Leitura projetada de {os.path.basename(str(csv_path))} ({', '.join(colunas)}): "
+                f"{len(dados)} linhas em {(time.time() - inicio) * 1000:.1f}ms")
+
+    if chave is not None:
+        _PROJECOES_CACHE.set(chave, dados)
+        return dados.copy(deep=False)
+    return dados
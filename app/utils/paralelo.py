@@ -0,0 +1,62 @@
+"""
+Carregamento concorrente das fontes de dados mensais (dadosr_apt_<mes>.csv).
+
+Relatórios que combinam vários meses carregavam as fontes uma após a outra,
+somando o tempo de cada parse. Aqui cada fonte é lida e normalizada num pool
+de threads com número limitado de workers, e os resultados voltam na ordem
+pedida: o relatório leva aproximadamente o tempo do mês mais lento.
+
+Threads, e não processos: o parse do pandas libera o GIL na maior parte do
+trabalho e os caches em memória (LRU, single-flight, snapshots) continuam
+compartilhados com o processo da aplicação.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Limite de workers por carregamento (a aplicação atende várias requisições ao mesmo tempo)
+MAX_WORKERS_CARREGAMENTO = int(os.environ.get('CARREGAMENTO_MAX_WORKERS', '4'))
+
+
+def carregar_em_paralelo(fontes, carregar, max_workers=MAX_WORKERS_CARREGAMENTO, descricao='fontes'):
+    """
+    Executa ``carregar(fonte)`` para cada fonte de forma concorrente.
+
+    Args:
+        fontes (iterable): Fontes a carregar (nomes de arquivo, caminhos, chaves de mês...)
+        carregar (callable): ``carregar(fonte) -> DataFrame``
+        max_workers (int): Máximo de threads simultâneas
+        descricao (str): Usado nos logs
+
+    Returns:
+        list: Resultados na mesma ordem de ``fontes``; uma fonte que falha
+        resulta em DataFrame vazio (o erro é registrado)
+    """
+    fontes = list(fontes)
+    if not fontes:
+        return []
+
+    def carregar_fonte(fonte):
+        try:
+            return carregar(fonte)
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar {fonte}: {str(e)}")
+            return pd.DataFrame()
+
+    inicio = time.time()
+    workers = max(1, min(max_workers, len(fontes)))
+    if workers == 1:
+        resultados = [carregar_fonte(fonte) for fonte in fontes]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='carga_fontes') as executor:
+            resultados = list(executor.map(carregar_fonte, fontes))
+
+    logger.info(f"⚡ {len(fontes)} {descricao} carregadas em {(time.time() - inicio) * 1000:.1f}ms "
+                f"({workers} workers)")
+    return resultados
@@ -0,0 +1,152 @@
+"""
+Snapshot colunar dos arquivos dadosr*.csv já normalizados.
+
+Cada CSV é lido e processado uma única vez; o DataFrame resultante é salvo
+em formato binário na pasta ``.snapshots`` ao lado do arquivo de origem,
+identificado pelo caminho, tamanho e mtime do CSV. Enquanto o CSV não mudar,
+os serviços carregam o snapshot em vez de refazer o parse + conversões.
+
+Formato: pickle do pandas, que preserva os dtypes (inclusive as colunas
+categóricas). É o caminho normal da aplicação: o ``pyarrow`` não faz parte do
+requirements.txt. Se ele estiver instalado, os snapshots passam a ser gravados
+em Feather (memory-mapped); um snapshot que não possa ser lido ou gravado nesse
+formato volta para o CSV/pickle sem interromper o carregamento.
+"""
+
+import functools
+import importlib.util
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Incrementar sempre que o processamento dos serviços mudar o formato do DataFrame
+SNAPSHOT_SCHEMA_VERSION = 4
+
+SNAPSHOT_DIRNAME = '.snapshots'
+
+
+@functools.lru_cache(maxsize=None)
+def _feather_disponivel():
+    """Verifica se o pyarrow está instalado (dependência opcional, fora do requirements.txt)."""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _assinatura_arquivo(csv_path):
+    """Retorna a assinatura (caminho resolvido, tamanho, mtime) do CSV."""
+    stat = os.stat(csv_path)
+    return {
+        'path': str(Path(csv_path).resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'schema': SNAPSHOT_SCHEMA_VERSION,
+    }
+
+
+def _caminhos_snapshot(csv_path, namespace):
+    """Retorna (arquivo de dados, arquivo de metadados) do snapshot."""
+    csv_path = Path(csv_path)
+    pasta = csv_path.parent / SNAPSHOT_DIRNAME
+    base = f"{csv_path.stem}.{namespace}"
+    return pasta / base, pasta / f"{base}.meta.json"
+
+
+def _ler_snapshot(dados_path, formato):
+    if formato == 'feather':
+        import pyarrow.feather as feather
+        tabela = feather.read_table(str(dados_path), memory_map=True)
+        dados = tabela.to_pandas()
+        # O Arrow devolve None para strings nulas; o CSV original usa NaN
+        for col in dados.select_dtypes(include='object').columns:
+            dados[col] = dados[col].fillna(np.nan)
+        return dados
+    return pd.read_pickle(dados_path)
+
+
+def _gravar_snapshot(dados, dados_path, formato):
+    tmp_path = dados_path.with_name(dados_path.name + '.tmp')
+    if formato == 'feather':
+        dados.reset_index(drop=True).to_feather(tmp_path)
+    else:
+        dados.to_pickle(tmp_path)
+    os.replace(tmp_path, dados_path)
+
+
+def carregar_snapshot(csv_path, namespace, processar):
+    """
+    Carrega o DataFrame normalizado de ``csv_path`` a partir do snapshot.
+
+    Args:
+        csv_path (str | Path): CSV de origem
+        namespace (str): Identifica o processamento (ex: 'macro', 'gerencial'),
+            pois cada serviço normaliza o CSV de forma diferente
+        processar (callable): Função ``processar(csv_path) -> DataFrame`` que faz
+            o parse completo; chamada apenas quando o snapshot está ausente ou
+            desatualizado
+
+    Returns:
+        pd.DataFrame: Dados processados (vazio em caso de erro no processamento)
+    """
+    csv_path = Path(csv_path)
+    try:
+        assinatura = _assinatura_arquivo(csv_path)
+    except OSError as e:
+        logger.error(f"❌ Snapshot: não foi possível ler metadados de {csv_path}: {e}")
+        return processar(csv_path)
+
+    base_path, meta_path = _caminhos_snapshot(csv_path, namespace)
+
+    # 1. Tenta usar o snapshot existente
+    try:
+        if meta_path.is_file():
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            formato = meta.get('formato')
+            dados_path = base_path.with_name(f'{base_path.name}.{formato}')
+            if (meta.get('assinatura') == assinatura and dados_path.is_file()
+                    and (formato != 'feather' or _feather_disponivel())):
+                inicio = time.time()
+                dados = _ler_snapshot(dados_path, formato)
+                logger.info(f"📦 Snapshot {namespace} de {csv_path.name} carregado em "
+                            f"{(time.time() - inicio) * 1000:.1f}ms ({len(dados)} linhas)")
+                return dados
+    except Exception as e:
+        logger.warning(f"⚠️ Snapshot inválido para {csv_path.name} ({namespace}), reprocessando: {e}")
+
+    # 2. Parse completo do CSV
+    dados = processar(csv_path)
+    if dados is None or dados.empty:
+        return dados
+
+    # 3. Persiste o snapshot (falhas aqui não impedem o retorno dos dados)
+    formato = 'feather' if _feather_disponivel() else 'pkl'
+    dados_path = base_path.with_name(f'{base_path.name}.{formato}')
+    try:
+        base_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            _gravar_snapshot(dados, dados_path, formato)
+        except Exception as e:
+            if formato != 'feather':
+                raise
+            # Colunas com tipos mistos podem não ser suportadas pelo Arrow
+            logger.debug(f"Feather indisponível para {csv_path.name}, usando pickle: {e}")
+            formato = 'pkl'
+            dados_path = base_path.with_name(f'{base_path.name}.pkl')
+            _gravar_snapshot(dados, dados_path, formato)
+
+        meta_tmp = meta_path.with_name(meta_path.name + '.tmp')
+        with open(meta_tmp, 'w', encoding='utf-8') as f:
+            json.dump({'assinatura': assinatura, 'formato': formato}, f)
+        os.replace(meta_tmp, meta_path)
+        logger.info(f"💾 Snapshot {namespace} de {csv_path.name} gravado ({formato})")
+    except Exception as e:
+        logger.warning(f"⚠️ Não foi possível gravar snapshot de {csv_path.name}: {e}")
+
+    return dados
+
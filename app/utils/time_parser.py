@@ -0,0 +1,141 @@
+"""
+Conversão de tempos trabalhados ('1069:42:00', '12:30', '7.5', '3h 20m')
+para horas decimais.
+
+A versão vetorizada processa a coluna inteira com expressões regulares do
+pandas, sem loop Python por linha. Todos os serviços usam estas funções
+para garantir a mesma semântica:
+
+- ``HH:MM:SS`` -> horas + minutos/60 + segundos/3600
+- ``HH:MM``    -> horas + minutos/60
+- decimal      -> float (ponto como separador, ex: '7.5')
+- ``Xh Ym``    -> horas + minutos/60
+- vazio, nulo ou formato desconhecido -> 0.0
+
+O caminho vetorizado cobre só dígitos ASCII; partes com sinal, espaços ou
+dígitos de outros alfabetos (raras) são convertidas uma a uma com ``int()``
+e ``float()``, como fazia o conversor original.
+"""
+
+import numpy as np
+import pandas as pd
+
+_PADRAO_H_M = r'^(\d+(?:\.\d+)?)h(?:(\d+(?:\.\d+)?)m?)?$'
+
+
+# Acima disso o int64 pode estourar; partes maiores vão para o parse elemento a elemento
+_MAX_DIGITOS_INT64 = 18
+
+
+def _codigos(partes):
+    """Code points das strings como matriz (uma linha por string, 0 no preenchimento)."""
+    partes = np.ascontiguousarray(partes)
+    largura = partes.dtype.itemsize // 4
+    if largura == 0:
+        return np.zeros((partes.size, 0), dtype=np.uint32)
+    return partes.view(np.uint32).reshape(-1, largura)
+
+
+def _digitos_ascii(codigos):
+    """Máscara das strings não vazias formadas apenas por dígitos ASCII [0-9]."""
+    if codigos.shape[1] == 0:
+        return np.zeros(codigos.shape[0], dtype=bool)
+    vazio = codigos == 0
+    digito = (codigos >= ord('0')) & (codigos <= ord('9'))
+    return (digito | vazio).all(axis=1) & ~vazio[:, 0]
+
+
+def _inteiros_ascii(partes):
+    """
+    Converte partes formadas só por dígitos ASCII em int64, coluna a coluna
+    sobre os code points (sem parse por elemento).
+
+    Returns:
+        tuple: (valores, válidos); posições inválidas - vazias, com sinal,
+        espaços, dígitos não ASCII ou grandes demais para int64 - valem 0
+    """
+    codigos = _codigos(partes)
+    validos = _digitos_ascii(codigos) & ((codigos != 0).sum(axis=1) <= _MAX_DIGITOS_INT64)
+    valores = np.zeros(codigos.shape[0], dtype=np.int64)
+    for coluna in codigos.T:
+        presente = validos & (coluna != 0)
+        valores = np.where(presente, valores * 10 + (coluna.astype(np.int64) - ord('0')), valores)
+    return valores, validos
+
+
+def _horas_elemento(texto):
+    """Conversão de um valor com a semântica do conversor original (int/float do Python)."""
+    try:
+        if texto.replace('.', '').isdigit():
+            return float(texto)
+        partes = texto.split(':')
+        if len(partes) == 3:
+            return int(partes[0]) + int(partes[1]) / 60 + int(partes[2]) / 3600
+        if len(partes) == 2:
+            return int(partes[0]) + int(partes[1]) / 60
+    except ValueError:
+        pass
+    return 0.0
+
+
+def converter_tempo_para_horas_vetorizado(serie):
+    """
+    Converte uma Series de tempos para horas decimais (float64).
+
+    Args:
+        serie (pd.Series): Valores em HH:MM:SS, HH:MM, decimal ou 'Xh Ym'
+
+    Returns:
+        pd.Series: Horas decimais com o mesmo índice; valores inválidos viram 0.0
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype('float64').fillna(0.0)
+
+    texto = np.char.strip(serie.fillna('').to_numpy(dtype=str))
+    if texto.size == 0:
+        return pd.Series(0.0, index=serie.index, dtype='float64')
+    horas = np.zeros(texto.shape, dtype='float64')
+
+    # HH:MM:SS / HH:MM (operações de string do numpy, sem loop Python)
+    h, sep1, resto = np.char.partition(texto, ':').T
+    m, sep2, s = np.char.partition(resto, ':').T
+    tem_segundos = sep2 != ''
+    horas_int, h_valido = _inteiros_ascii(h)
+    minutos, m_valido = _inteiros_ascii(m)
+    segundos, s_valido = _inteiros_ascii(s)
+    mask = (sep1 != '') & h_valido & m_valido & (~tem_segundos | s_valido)
+    if mask.any():
+        horas = np.where(mask, horas_int + minutos / 60 + segundos / 3600, horas)
+
+    # Decimal com ponto (ex: '7.5')
+    sem_ponto = np.char.replace(texto, '.', '')
+    mask_decimal = (
+        ~mask
+        & (np.char.count(texto, '.') <= 1)
+        & _digitos_ascii(_codigos(sem_ponto))
+    )
+    if mask_decimal.any():
+        horas[mask_decimal] = texto[mask_decimal].astype('float64')
+
+    # Xh Ym (raro; usa regex apenas nas linhas restantes que contêm 'h')
+    restantes = ~(mask | mask_decimal) & ((np.char.find(texto, 'h') >= 0) | (np.char.find(texto, 'H') >= 0))
+    if restantes.any():
+        partes_hm = (pd.Series(texto[restantes]).str.lower().str.replace(' ', '', regex=False)
+                     .str.extract(_PADRAO_H_M))
+        valores = (partes_hm[0].astype('float64').fillna(0.0)
+                   + partes_hm[1].astype('float64').fillna(0.0) / 60)
+        horas[restantes] = valores.to_numpy()
+
+    # Sinal, espaços internos ou dígitos não ASCII: parse elemento a elemento (raro)
+    elemento = ~(mask | mask_decimal | restantes) & ((sep1 != '') | np.char.isdigit(sem_ponto))
+    if elemento.any():
+        horas[elemento] = [_horas_elemento(valor) for valor in texto[elemento]]
+
+    return pd.Series(horas, index=serie.index, dtype='float64')
+
+
+def converter_tempo_para_horas(valor):
+    """Versão escalar de ``converter_tempo_para_horas_vetorizado`` para valores avulsos."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return 0.0 if pd.isna(valor) else float(valor)
+    return float(converter_tempo_para_horas_vetorizado(pd.Series([valor], dtype=object)).iloc[0])
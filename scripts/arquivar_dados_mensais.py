@@ -34,6 +34,23 @@ def obter_nome_mes_completo(mes_numero):
     }
     return meses_completos.get(mes_numero, f'Mês {mes_numero}')
 
+def registrar_historico_mensal(data_dir, arquivo_destino, mes_numero, ano):
+    """
+    Acrescenta o mês arquivado ao histórico mensal (formato longo), com o mês/ano
+    explícitos. Uma falha aqui não invalida o arquivamento: o arquivo é
+    incorporado ao histórico na próxima leitura.
+    """
+    try:
+        projeto_dir = str(Path(__file__).parent.parent)
+        if projeto_dir not in sys.path:
+            sys.path.insert(0, projeto_dir)
+        from app.utils.historico import HistoricoMensal
+        
+        projetos = HistoricoMensal(data_dir).registrar_mes(arquivo_destino, f"{ano}-{mes_numero:02d}")
+        print(f"Historico mensal atualizado: {projetos} projetos em {mes_numero:02d}/{ano}")
+    except Exception as e:
+        print(f"AVISO: Historico mensal nao atualizado ({str(e)})")
+
 def arquivar_dados_mensal(mes_numero=None, ano=None, forcar=False):
     """
     Arquiva os dados atuais para o mês especificado
@@ -97,6 +114,8 @@ def arquivar_dados_mensal(mes_numero=None, ano=None, forcar=False):
         print(f"Destino: {arquivo_destino.name}")
         print(f"Mes arquivado: {mes_abbr.capitalize()}/{ano}")
         
+        registrar_historico_mensal(data_dir, arquivo_destino, mes_numero, ano)
+        
         return True
         
     except Exception as e:
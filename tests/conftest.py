@@ -0,0 +1,11 @@
+"""Configuração comum dos testes: raiz do projeto no path e agendador de aquecimento desligado."""
+
+import os
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+# Sem thread de aquecimento durante os testes
+os.environ.setdefault('AQUECIMENTO_HABILITADO', '0')
@@ -0,0 +1,49 @@
+"""Carga dos dados principais: cache por versão dos dados e nova tentativa após leitura vazia."""
+
+import pandas as pd
+import pytest
+
+from app.macro import services
+from app.macro.services import MacroService
+
+
+@pytest.fixture
+def cache_limpo():
+    services._MACRO_CACHE.update(dados=None, timestamp=None, versao=None)
+    yield
+    services._MACRO_CACHE.update(dados=None, timestamp=None, versao=None)
+
+
+@pytest.fixture
+def carregador(monkeypatch):
+    """Substitui o pipeline canônico por um carregador que falha (frame vazio) na primeira chamada."""
+    chamadas = []
+
+    def carregar(csv_path):
+        chamadas.append(csv_path)
+        if len(chamadas) == 1:
+            return pd.DataFrame()
+        return pd.DataFrame({'Numero': [1, 2], 'Status': ['NOVO', 'FECHADO']})
+
+    monkeypatch.setattr(services, 'carregar_dados_normalizados', carregar)
+    return chamadas
+
+
+def test_falha_transitoria_nao_fica_em_cache(cache_limpo, carregador):
+    servico = MacroService()
+
+    assert servico.carregar_dados().empty
+    assert services._MACRO_CACHE['dados'] is None
+
+    assert len(servico.carregar_dados()) == 2
+    assert len(servico.carregar_dados()) == 2
+    assert len(carregador) == 2
+
+
+def test_leitura_valida_fica_em_cache(cache_limpo, carregador):
+    carregador.append('falha já consumida')
+    servico = MacroService()
+
+    for _ in range(3):
+        assert servico.carregar_dados()['Numero'].tolist() == [1, 2]
+    assert len(carregador) == 2
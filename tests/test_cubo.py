@@ -0,0 +1,58 @@
+"""Cubo pré-agregado: dimensões do cubo principal, roll-ups auxiliares e equivalência com as linhas."""
+
+import pandas as pd
+import pytest
+
+from app.utils.cubo import DIMENSOES, NOMES_MEDIDAS, ROLLUPS, CuboMensal, carregar_cubo, periodo_mes
+
+
+@pytest.fixture
+def dados():
+    return pd.DataFrame({
+        'Numero': [1, 2, 3, 4, 5, 6],
+        'DataInicio': pd.to_datetime(['2025-01-10', '2025-01-20', '2025-02-03', None, '2025-02-28', '2025-01-05']),
+        'DataTermino': pd.to_datetime(['2025-03-01', None, '2025-04-10', None, None, '2025-02-01']),
+        'Squad': ['AZURE', 'AZURE', 'M365', 'M365', 'AZURE', 'DATA E POWER'],
+        'Status': ['NOVO', 'NOVO', 'FECHADO', 'EM ATENDIMENTO', 'NOVO', 'FECHADO'],
+        'Faturamento': ['PRIME', 'PRIME', 'PLUS', 'FEOP', 'PRIME', 'TERMINO'],
+        'TipoServico': ['Migração', 'Migração', 'Backup', 'Backup', 'Migração', 'Power BI'],
+        'Especialista': ['Ana', 'Bruno', 'Carla', 'CDB DATA SOLUTIONS', 'Ana', 'Davi'],
+        'Horas': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0],
+        'HorasTrabalhadas': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+
+
+def test_cubo_principal_agrega_somente_as_dimensoes_pedidas(dados):
+    cubo = CuboMensal.construir(dados)
+
+    assert list(cubo.celulas.columns) == list(DIMENSOES) + NOMES_MEDIDAS
+    # Os projetos 1 e 2 só diferem no especialista: caem na mesma célula
+    assert len(cubo) == 5
+    assert cubo.total() == 6
+    assert cubo.total('horas') == 210.0
+
+
+def test_fatiar_e_agregar_equivalem_as_linhas(dados):
+    cubo = CuboMensal.construir(dados)
+
+    janeiro = cubo.fatiar(MesInicio=periodo_mes('2025-01-15'))
+    assert janeiro.contar('Squad').to_dict() == {'AZURE': 2, 'DATA E POWER': 1}
+
+    ativos = cubo.fatiar(Status=lambda status: status != 'FECHADO')
+    assert ativos.contar('Faturamento').to_dict() == dados[dados['Status'] != 'FECHADO']['Faturamento'].value_counts().to_dict()
+    assert cubo.agregar(['TipoServico'], ['horas'])['horas'].to_dict() == dados.groupby('TipoServico', sort=False)['Horas'].sum().to_dict()
+
+
+def test_rollup_por_especialista(dados):
+    rollup = CuboMensal.construir(dados, ROLLUPS['especialista'])
+
+    assert list(rollup.celulas.columns) == list(ROLLUPS['especialista']) + NOMES_MEDIDAS
+    contagem = rollup.agregar(['Status', 'Squad', 'Especialista'], ['quantidade'])['quantidade']
+    esperado = dados.groupby(['Status', 'Squad', 'Especialista'], sort=False).size()
+    assert contagem.to_dict() == esperado.to_dict()
+
+
+def test_carregar_cubo_de_arquivo_ausente(tmp_path):
+    assert carregar_cubo(tmp_path / 'dadosr.csv').vazio
+    assert list(carregar_cubo(tmp_path / 'dadosr.csv', 'especialista').celulas.columns) == \
+        list(ROLLUPS['especialista']) + NOMES_MEDIDAS
@@ -0,0 +1,100 @@
+"""Respostas condicionais: 304 enquanto os dados não mudam, 200 com novo ETag depois."""
+
+import pytest
+from flask import Flask, jsonify
+
+from app.utils import data_version, http_cache
+from app.utils.http_cache import resposta_condicional, resposta_de_falha
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    """Aplicação mínima com os arquivos de versão e a pasta de dados no diretório temporário."""
+    monkeypatch.setattr(data_version, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(data_version, '_VERSAO_DADOS', data_version.ContadorVersao(tmp_path / '.data_version', 'dos dados'))
+    monkeypatch.setattr(data_version, '_VERSAO_BACKLOGS',
+                        data_version.ContadorVersao(tmp_path / '.backlog_version', 'dos backlogs'))
+    monkeypatch.setattr(http_cache, 'VERSION_FILE', tmp_path / '.data_version')
+    monkeypatch.setattr(http_cache, 'BACKLOG_VERSION_FILE', tmp_path / '.backlog_version')
+    (tmp_path / 'dadosr.csv').write_text('Numero;Status\n1;NOVO\n', encoding='utf-8')
+
+    app = Flask(__name__)
+    chamadas = []
+
+    @app.route('/api/projetos')
+    @resposta_condicional
+    def projetos():
+        chamadas.append(1)
+        return jsonify({'total': len(chamadas)})
+
+    @app.route('/api/erro')
+    @resposta_condicional
+    def erro():
+        return jsonify({'error': 'falhou'}), 500
+
+    @app.route('/api/fallback')
+    @resposta_condicional
+    def fallback():
+        chamadas.append(1)
+        if len(chamadas) == 1:
+            return resposta_de_falha(jsonify([]))
+        return jsonify([{'numero': 1}])
+
+    cliente = app.test_client()
+    cliente.chamadas = chamadas
+    return cliente
+
+
+def test_304_quando_etag_confere(cliente):
+    primeira = cliente.get('/api/projetos')
+    assert primeira.status_code == 200
+    assert primeira.headers['Cache-Control'] == http_cache.CACHE_CONTROL
+    etag = primeira.headers['ETag']
+
+    repetida = cliente.get('/api/projetos', headers={'If-None-Match': etag})
+    assert repetida.status_code == 304
+    assert repetida.headers['ETag'] == etag
+    assert len(cliente.chamadas) == 1
+
+
+def test_parametros_fazem_parte_do_etag(cliente):
+    etag = cliente.get('/api/projetos?squad=AZURE').headers['ETag']
+    assert cliente.get('/api/projetos?squad=M365', headers={'If-None-Match': etag}).status_code == 200
+    assert cliente.get('/api/projetos?squad=AZURE', headers={'If-None-Match': etag}).status_code == 304
+
+
+@pytest.mark.parametrize('alterar', [
+    lambda pasta: data_version.incrementar_versao_dados('teste'),
+    lambda pasta: data_version.incrementar_versao_backlogs('teste'),
+    lambda pasta: (pasta / 'dadosr.csv').write_text('Numero;Status\n1;NOVO\n2;FECHADO\n', encoding='utf-8'),
+], ids=['versao_dados', 'versao_backlogs', 'csv_alterado'])
+def test_mudanca_nos_dados_invalida_etag(cliente, tmp_path, alterar):
+    etag = cliente.get('/api/projetos').headers['ETag']
+    alterar(tmp_path)
+
+    resposta = cliente.get('/api/projetos', headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+    assert len(cliente.chamadas) == 2
+
+
+def test_if_modified_since(cliente):
+    ultima_modificacao = cliente.get('/api/projetos').headers['Last-Modified']
+    assert cliente.get('/api/projetos', headers={'If-Modified-Since': ultima_modificacao}).status_code == 304
+
+
+def test_erros_nao_recebem_headers_de_cache(cliente):
+    resposta = cliente.get('/api/erro')
+    assert resposta.status_code == 500
+    assert 'ETag' not in resposta.headers
+
+
+def test_fallback_de_erro_com_200_nao_e_revalidado(cliente):
+    falha = cliente.get('/api/fallback')
+    assert falha.status_code == 200 and falha.get_json() == []
+    assert 'ETag' not in falha.headers and 'Last-Modified' not in falha.headers
+    assert falha.headers['Cache-Control'] == 'no-store'
+
+    recuperada = cliente.get('/api/fallback')
+    assert recuperada.get_json() == [{'numero': 1}]
+    assert 'ETag' in recuperada.headers
@@ -0,0 +1,85 @@
+"""Invalidação direcionada dos caches de projetos e APIs a partir do diff do upload."""
+
+import pytest
+
+from app.macro import services
+from app.macro.services import _API_CACHE, _DETALHES_PROJETO_CACHE, invalidar_caches_por_diff, versao_resultados_atual
+
+
+def _diff(adicionados=(), removidos=(), alterados=None, colunas_novas=(), colunas_removidas=()):
+    alterados = alterados or {}
+    colunas = {}
+    for lista in alterados.values():
+        for coluna in lista:
+            colunas[coluna] = colunas.get(coluna, 0) + 1
+    return {
+        'chave': 'Numero',
+        'adicionados': list(adicionados),
+        'removidos': list(removidos),
+        'alterados': [{'numero': numero, 'colunas': lista} for numero, lista in alterados.items()],
+        'colunas_alteradas': colunas,
+        'colunas_novas': list(colunas_novas),
+        'colunas_removidas': list(colunas_removidas),
+    }
+
+
+@pytest.fixture
+def caches():
+    """Caches preenchidos com detalhes de três projetos e resultados de APIs da versão atual."""
+    _DETALHES_PROJETO_CACHE.invalidar()
+    _API_CACHE.invalidar()
+    for numero in ('101', '102', '103'):
+        services._set_cached_project_details(numero, {'numero': numero})
+    for chave in ('projetos_ativos', 'projetos_concluidos', 'projetos_eficiencia', 'api_sem_dependencias'):
+        services._set_cached_api_result(chave, [chave])
+    yield
+    _DETALHES_PROJETO_CACHE.invalidar()
+    _API_CACHE.invalidar()
+
+
+def test_alteracao_mantem_projetos_e_apis_nao_afetados(caches):
+    resultado = invalidar_caches_por_diff(_diff(alterados={102: ['Faturamento']}), versao_resultados_atual())
+
+    assert resultado['detalhes_invalidados'] == 1 and resultado['detalhes_mantidos'] == 2
+    assert services._get_cached_project_details('102') is None
+    assert services._get_cached_project_details('101') == {'numero': '101'}
+    assert sorted(resultado['apis_invalidadas']) == ['api_sem_dependencias', 'projetos_concluidos']
+    assert sorted(resultado['apis_mantidas']) == ['projetos_ativos', 'projetos_eficiencia']
+    assert services._get_cached_api_result('projetos_ativos') == ['projetos_ativos']
+    assert services._get_cached_api_result('projetos_concluidos') is None
+
+
+def test_linhas_adicionadas_invalidam_todas_as_apis(caches):
+    resultado = invalidar_caches_por_diff(_diff(adicionados=[104], removidos=[103]), versao_resultados_atual())
+
+    assert resultado['detalhes_invalidados'] == 1 and resultado['detalhes_mantidos'] == 2
+    assert resultado['apis_mantidas'] == []
+    assert len(_API_CACHE) == 0
+
+
+def test_coluna_removida_conta_como_alterada(caches):
+    resultado = invalidar_caches_por_diff(_diff(colunas_removidas=['Squad']), versao_resultados_atual())
+
+    assert resultado['detalhes_invalidados'] == 0
+    assert resultado['apis_mantidas'] == []
+
+
+def test_entradas_de_outra_versao_sao_removidas(caches):
+    resultado = invalidar_caches_por_diff(_diff(), ('versao', 'antiga'))
+
+    assert resultado['detalhes_mantidos'] == 0 and resultado['apis_mantidas'] == []
+    assert len(_DETALHES_PROJETO_CACHE) == 0 and len(_API_CACHE) == 0
+
+
+def test_entradas_mantidas_sao_reinseridas_com_a_nova_versao(caches, monkeypatch):
+    versao_anterior = versao_resultados_atual()
+    entrada_anterior = _API_CACHE.get('projetos_ativos')
+    monkeypatch.setattr(services, '_versao_resultados_atual', lambda: ('versao', 'nova'))
+
+    invalidar_caches_por_diff(_diff(alterados={102: ['Faturamento']}), versao_anterior)
+
+    # A entrada antiga não é alterada no lugar; a nova vale para a versão nova
+    assert entrada_anterior['versao'] == versao_anterior
+    assert _API_CACHE.get('projetos_ativos')['versao'] == ('versao', 'nova')
+    assert services._get_cached_api_result('projetos_ativos') == ['projetos_ativos']
+    assert services._get_cached_project_details('101') == {'numero': '101'}
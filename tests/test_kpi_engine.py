@@ -0,0 +1,127 @@
+"""Motor de KPIs: máscaras como nós compartilhados e saídas vazias/falhas fora do cache."""
+
+import pandas as pd
+import pytest
+
+from app.macro.kpi_engine import MOTOR_DASHBOARD, MotorKPIs
+from app.macro.services import MacroService
+
+
+class Servico:
+    def __init__(self, dados):
+        self.dados = dados
+
+
+def _motor(chamadas):
+    motor = MotorKPIs('teste')
+
+    @motor.no('dados')
+    def _dados(servico):
+        chamadas.append('dados')
+        return servico.dados
+
+    @motor.no('ativos', ['dados'])
+    def _ativos(servico, dados):
+        chamadas.append('ativos')
+        return dados['Status'] != 'FECHADO'
+
+    @motor.no('total_ativos', ['dados', 'ativos'])
+    def _total(servico, dados, ativos):
+        return int(ativos.sum())
+
+    @motor.no('horas_ativos', ['dados', 'ativos'])
+    def _horas(servico, dados, ativos):
+        return float(dados.loc[ativos, 'Horas'].sum())
+
+    return motor
+
+
+def test_mascara_compartilhada_calculada_uma_vez():
+    chamadas = []
+    motor = _motor(chamadas)
+    servico = Servico(pd.DataFrame({'Status': ['NOVO', 'FECHADO', 'ATIVO'], 'Horas': [1.0, 2.0, 4.0]}))
+
+    saidas = motor.obter_varios(['total_ativos', 'horas_ativos'], servico, 1)
+    motor.obter_varios(['total_ativos', 'horas_ativos'], servico, 1)
+
+    assert saidas == {'total_ativos': 2, 'horas_ativos': 5.0}
+    assert chamadas == ['dados', 'ativos']
+
+
+def test_saida_vazia_e_excecao_nao_ficam_em_cache():
+    chamadas = []
+    motor = _motor(chamadas)
+    servico = Servico(pd.DataFrame())
+
+    with pytest.raises(KeyError):
+        motor.obter('total_ativos', servico, 1)
+    assert motor.stats()['nos_cacheados'] == 0
+
+    # Recuperação: a leitura seguinte recalcula em vez de servir a saída vazia
+    servico.dados = pd.DataFrame({'Status': ['NOVO'], 'Horas': [3.0]})
+    assert motor.obter('horas_ativos', servico, 1) == 3.0
+    assert motor.obter('horas_ativos', servico, 1) == 3.0
+    assert chamadas == ['dados', 'ativos', 'dados', 'ativos']
+
+
+def test_entrada_vazia_calculada_uma_vez_por_resolucao():
+    chamadas = []
+    motor = _motor(chamadas)
+    servico = Servico(pd.DataFrame({'Status': pd.Series(dtype=object), 'Horas': pd.Series(dtype=float)}))
+
+    assert motor.obter_varios(['total_ativos', 'horas_ativos'], servico, 1) == {'total_ativos': 0, 'horas_ativos': 0.0}
+    assert chamadas == ['dados', 'ativos']
+    assert motor.stats()['nos_cacheados'] == 0
+
+    motor.obter_varios(['total_ativos', 'horas_ativos'], servico, 1)
+    assert chamadas == ['dados', 'ativos'] * 2
+
+
+def test_saida_derivada_de_entrada_vazia_nao_fica_em_cache():
+    motor = MotorKPIs('teste')
+    respostas = [None, 10]
+
+    @motor.no('fonte')
+    def _fonte(servico):
+        return respostas.pop(0)
+
+    @motor.no('dobro', ['fonte'])
+    def _dobro(servico, fonte):
+        return (fonte or 0) * 2
+
+    assert motor.obter('dobro', None, 1) == 0
+    assert motor.obter('dobro', None, 1) == 20
+    assert motor.obter('dobro', None, 1) == 20
+    assert motor.stats()['calculos'] == {'fonte': 2, 'dobro': 2}
+
+
+def test_estrutura_de_falha_nao_fica_em_cache():
+    motor = MotorKPIs('teste')
+    respostas = [{'total': 0, 'dados': pd.DataFrame(), 'metricas': {}}, {'total': 1, 'dados': pd.DataFrame({'a': [1]}), 'metricas': {'x': 1}}]
+
+    @motor.no('kpi')
+    def _kpi(servico):
+        return respostas.pop(0)
+
+    assert motor.obter('kpi', None, 1)['total'] == 0
+    assert motor.obter('kpi', None, 1)['total'] == 1
+    assert motor.obter('kpi', None, 1)['total'] == 1
+
+
+def test_kpis_do_dashboard_recebem_mascaras():
+    nos = MOTOR_DASHBOARD._nos
+    assert 'mascara_ativos' in nos['projetos_ativos'].entradas
+    assert 'mascara_ativos' in nos['projetos_criticos'].entradas
+    assert 'mascara_concluidos_mes' in nos['projetos_concluidos'].entradas
+    for kpi in ('media_horas', 'projetos_risco', 'dados_especialistas'):
+        assert 'mascara_nao_concluidos' in nos[kpi].entradas
+
+    servico = MacroService()
+    dados_base = servico.preparar_dados_base(pd.DataFrame({
+        'Status': ['NOVO', 'FECHADO', 'EM ATENDIMENTO'],
+        'Squad': ['AZURE', 'AZURE', 'CDB DATA SOLUTIONS'],
+        'Horas': [10, 20, 40],
+    }))
+    mascara = servico.mascara_nao_concluidos(dados_base)
+    assert servico.calcular_media_horas(dados_base, mascara) == servico.calcular_media_horas(dados_base)
+    assert servico.mascara_ativos(dados_base).tolist() == [True, False, False]
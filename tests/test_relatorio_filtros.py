@@ -0,0 +1,114 @@
+"""Filtros do relatório geral por mês: equivalência com o filtro da combinação dos meses."""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.macro.services import MacroService
+from app.utils.indices import indexar
+
+SQUADS = ['AZURE', 'M365', 'DATA E POWER', 'Azure']
+SERVICOS = ['Migração', 'Backup', 'Tenant to Tenant']
+STATUS = ['NOVO', 'EM ATENDIMENTO', 'FECHADO', 'ENCERRADO', 'RESOLVIDO', 'CANCELADO']
+FATURAMENTO = ['PRIME', 'PLUS', 'FEOP', 'TERMINO']
+FECHADOS = ['FECHADO', 'ENCERRADO', 'RESOLVIDO']
+
+
+def aplicar_filtros_original(dados, filtros):
+    """Filtro do relatório geral antes do índice de filtros (sem categoria), aplicado à combinação dos meses."""
+    dados_filtrados = dados.copy()
+    for chave, coluna in (('squad', 'Squad'), ('servico', 'TipoServico'), ('status', 'Status'),
+                          ('faturamento', 'Faturamento')):
+        if filtros.get(chave):
+            dados_filtrados = dados_filtrados[dados_filtrados[coluna].str.upper() == filtros[chave].upper()]
+    if filtros.get('data_abertura_inicio'):
+        dados_filtrados = dados_filtrados[
+            pd.to_datetime(dados_filtrados['DataInicio']) >= pd.to_datetime(filtros['data_abertura_inicio'])]
+    if filtros.get('data_abertura_fim'):
+        dados_filtrados = dados_filtrados[
+            pd.to_datetime(dados_filtrados['DataInicio']) <= pd.to_datetime(filtros['data_abertura_fim'])]
+    for chave, comparar in (('data_fechamento_inicio', pd.Series.ge), ('data_fechamento_fim', pd.Series.le)):
+        if filtros.get(chave):
+            fechado = dados_filtrados['Status'].str.upper().isin(FECHADOS)
+            dados_fechados = dados_filtrados[fechado]
+            dados_fechados = dados_fechados[comparar(pd.to_datetime(dados_fechados['DataTermino']),
+                                                     pd.to_datetime(filtros[chave]))]
+            dados_filtrados = pd.concat([dados_fechados, dados_filtrados[~fechado]], ignore_index=True)
+    return dados_filtrados
+
+
+def _combinar(meses):
+    """``pd.concat`` dos meses sem os vazios, que não entram na definição dos dtypes."""
+    return pd.concat([dados for dados in meses if len(dados)] or meses, ignore_index=True)
+
+
+def _mes(gerador, linhas, categorias):
+    datas = pd.date_range('2024-01-01', '2025-06-30', freq='D')
+    dados = pd.DataFrame({
+        'Numero': np.arange(linhas) + gerador.randint(0, 10000),
+        'Squad': [gerador.choice(SQUADS) for _ in range(linhas)],
+        'TipoServico': [gerador.choice(SERVICOS) for _ in range(linhas)],
+        'Status': [gerador.choice(STATUS) for _ in range(linhas)],
+        'Faturamento': [gerador.choice(FATURAMENTO) for _ in range(linhas)],
+        'DataInicio': [gerador.choice(datas) if gerador.random() > 0.1 else pd.NaT for _ in range(linhas)],
+        'DataTermino': [gerador.choice(datas) if gerador.random() > 0.3 else pd.NaT for _ in range(linhas)],
+        'Horas': [float(gerador.randint(0, 400)) for _ in range(linhas)],
+    })
+    if categorias:
+        for coluna in ('Squad', 'TipoServico', 'Status', 'Faturamento'):
+            dados[coluna] = dados[coluna].astype('category')
+    return dados
+
+
+def _filtros(gerador):
+    candidatos = {
+        'squad': gerador.choice(SQUADS).lower(),
+        'servico': gerador.choice(SERVICOS),
+        'status': gerador.choice(STATUS),
+        'faturamento': gerador.choice(FATURAMENTO),
+        'data_abertura_inicio': '2024-03-01',
+        'data_abertura_fim': '2025-01-31',
+        'data_fechamento_inicio': '2024-06-01',
+        'data_fechamento_fim': '2025-03-31',
+    }
+    return {chave: valor for chave, valor in candidatos.items() if gerador.random() < 0.35}
+
+
+@pytest.fixture(scope='module')
+def servico():
+    return MacroService()
+
+
+@pytest.mark.parametrize('semente', range(40))
+def test_filtro_por_mes_igual_ao_filtro_da_combinacao(servico, semente):
+    gerador = random.Random(semente)
+    meses = [_mes(gerador, gerador.randint(0, 60), categorias=gerador.random() < 0.5)
+             for _ in range(gerador.randint(1, 4))]
+    for dados in meses:
+        if gerador.random() < 0.7:
+            indexar(dados)
+    filtros = _filtros(gerador)
+
+    esperado = aplicar_filtros_original(_combinar(meses), filtros)
+    obtido = servico.filtrar_periodos_relatorio(meses, filtros)
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+def test_meses_com_colunas_diferentes(servico):
+    gerador = random.Random(7)
+    meses = [_mes(gerador, 30, categorias=True), _mes(gerador, 30, categorias=False).drop(columns=['Faturamento'])]
+    filtros = {'squad': 'azure', 'data_fechamento_fim': '2025-01-31'}
+
+    esperado = aplicar_filtros_original(pd.concat(meses, ignore_index=True), filtros)
+    pd.testing.assert_frame_equal(servico.filtrar_periodos_relatorio(meses, filtros), esperado)
+
+
+def test_meses_vazios(servico):
+    gerador = random.Random(11)
+    meses = [_mes(gerador, 0, categorias=True), _mes(gerador, 0, categorias=False)]
+    filtros = {'data_abertura_inicio': '2024-03-01'}
+
+    esperado = aplicar_filtros_original(_combinar(meses), filtros)
+    pd.testing.assert_frame_equal(servico.filtrar_periodos_relatorio(meses, filtros), esperado)
@@ -0,0 +1,72 @@
+"""Cópia de trabalho do admin: ida e volta do CSV, publicação e atualização de cópias antigas."""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from app.admin import staging
+from app.utils.file_info import detectar_formato
+
+COLUNAS = ['Número', 'Cliente', 'Projeto', 'Status', 'Squad', 'Horas']
+
+
+@pytest.fixture
+def csv_virgula(tmp_path, monkeypatch):
+    """CSV delimitado por vírgula e cópia de trabalho isolados no diretório temporário."""
+    caminho = tmp_path / 'dadosr.csv'
+    pd.DataFrame([
+        ['1001', 'Cliente A', 'Migração SharePoint', 'Em andamento', 'Azure', '10:30'],
+        ['1002', 'Cliente B', 'Tenant to Tenant', 'Fechado', 'M365', '4'],
+        ['1003', 'Cliente C', 'Backup, Exchange', 'Novo', 'Azure', ''],
+    ], columns=COLUNAS).to_csv(caminho, sep=',', index=False, encoding='cp1252')
+    monkeypatch.setattr(staging, 'CSV_PATH', caminho)
+    monkeypatch.setattr(staging, 'STAGING_DB', tmp_path / '.staging' / 'dadosr_staging.db')
+    return caminho
+
+
+def test_exportacao_preserva_separador_e_valores(csv_virgula, tmp_path):
+    assert staging.obter_registro(1)['Projeto'] == 'Tenant to Tenant'
+    assert staging.atualizar_registro(1, {'Status': 'Encerrado'})
+    assert staging.excluir_registro(0)
+
+    destino = tmp_path / 'publicacao.csv'
+    assert staging.exportar_csv(destino) == {'registros': 2, 'pendentes': 2}
+
+    assert detectar_formato(destino).separador == ','
+    exportado = pd.read_csv(destino, sep=',', dtype=str, keep_default_na=False, encoding='cp1252')
+    assert exportado.columns.tolist() == COLUNAS
+    assert exportado['Status'].tolist() == ['Encerrado', 'Novo']
+    assert exportado['Projeto'].tolist() == ['Tenant to Tenant', 'Backup, Exchange']
+    assert exportado['Horas'].tolist() == ['4', '']
+
+
+def test_publicacao_associa_copia_ao_novo_csv(csv_virgula, tmp_path):
+    staging.atualizar_registro(2, {'Squad': 'M365'})
+    destino = tmp_path / 'publicacao.csv'
+    staging.exportar_csv(destino)
+    os.replace(destino, csv_virgula)
+    staging.confirmar_publicacao()
+
+    situacao = staging.status()
+    assert situacao['pendentes'] == 0
+    assert not situacao['origem_alterada']
+    assert detectar_formato(csv_virgula).separador == ','
+    total, encontrados = staging.buscar('backup', 0, 10)
+    assert total == 1 and encontrados['Squad'].tolist() == ['M365']
+
+
+def test_copia_de_schema_anterior_recebe_separador_sem_perder_edicoes(csv_virgula, tmp_path):
+    staging.atualizar_registro(0, {'Status': 'Pausado'})
+    conn = staging._conectar()
+    with conn:
+        conn.execute("DELETE FROM meta WHERE chave = 'separador'")
+        conn.execute("UPDATE meta SET valor = ? WHERE chave = 'schema'", (json.dumps(2),))
+    conn.close()
+
+    destino = tmp_path / 'publicacao.csv'
+    assert staging.exportar_csv(destino)['pendentes'] == 1
+    exportado = pd.read_csv(destino, sep=',', dtype=str, keep_default_na=False, encoding='cp1252')
+    assert exportado['Status'].tolist()[0] == 'Pausado'
+    assert staging.status()['pendentes'] == 1
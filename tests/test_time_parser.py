@@ -0,0 +1,78 @@
+"""Conversor de tempos: equivalência com o conversor original dos serviços."""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.time_parser import converter_tempo_para_horas, converter_tempo_para_horas_vetorizado
+
+
+def converter_original(tempo_str):
+    """Conversor de MacroService/GerencialService antes do parser compartilhado."""
+    try:
+        if pd.isna(tempo_str) or tempo_str == '':
+            return 0.0
+        if isinstance(tempo_str, (int, float)):
+            return float(tempo_str)
+        tempo_str = str(tempo_str).strip()
+        if tempo_str.replace('.', '').isdigit():
+            return float(tempo_str)
+        partes = tempo_str.split(':')
+        if len(partes) == 3:
+            return int(partes[0]) + (int(partes[1]) / 60) + (int(partes[2]) / 3600)
+        elif len(partes) == 2:
+            return int(partes[0]) + (int(partes[1]) / 60)
+        return 0.0
+    except Exception:
+        return 0.0
+
+
+CASOS = [
+    '1069:42:00', '12:30', '0:00', '00:45:30', '7.5', '7', '7.', '.5', '.', '1.2.3', '', '   ', 'nan', None,
+    '-1:30', '1:-30', '+1:30', ' 1 :30', '1: 30', '1 : 30 : 15', '-0:30', '1:2:3:4', 'a:b', '12:ab', ':30', '1:',
+    '١٢:٣٠', '١٢.٥', '٣', '²', '1_0:30', '-7.5', '+7.5', '99999999999999999999:00', '000000000000000000012:30',
+]
+
+
+@pytest.mark.parametrize('valor', CASOS)
+def test_vetorizado_igual_ao_original(valor):
+    convertido = converter_tempo_para_horas_vetorizado(pd.Series([valor], dtype=object)).iloc[0]
+    assert convertido == pytest.approx(converter_original(valor))
+
+
+def test_vetorizado_igual_ao_original_em_valores_aleatorios():
+    gerador = random.Random(42)
+    alfabeto = '0123456789' * 3 + '::..-+ ١٢a'
+    valores = [''.join(gerador.choice(alfabeto) for _ in range(gerador.randint(0, 9))) for _ in range(5000)]
+    valores += [f'{gerador.randint(0, 3000)}:{gerador.randint(0, 59):02d}:{gerador.randint(0, 59):02d}'
+                for _ in range(5000)]
+
+    convertidos = converter_tempo_para_horas_vetorizado(pd.Series(valores, dtype=object)).to_numpy()
+    esperados = np.array([converter_original(valor) for valor in valores])
+
+    divergentes = [(v, c, e) for v, c, e in zip(valores, convertidos, esperados) if not np.isclose(c, e)]
+    assert divergentes == []
+
+
+def test_formato_horas_minutos():
+    serie = pd.Series(['3h 20m', '2h', '1.5h', '4H30M'], dtype=object)
+    assert converter_tempo_para_horas_vetorizado(serie).tolist() == pytest.approx([3 + 20 / 60, 2.0, 1.5, 4.5])
+
+
+def test_mantem_indice_e_aceita_colunas_numericas():
+    serie = pd.Series(['1:30', None], index=[10, 20], dtype=object)
+    convertido = converter_tempo_para_horas_vetorizado(serie)
+    assert convertido.index.tolist() == [10, 20]
+    assert convertido.tolist() == [1.5, 0.0]
+
+    numerica = pd.Series([1.25, np.nan])
+    assert converter_tempo_para_horas_vetorizado(numerica).tolist() == [1.25, 0.0]
+
+
+def test_conversor_escalar():
+    assert converter_tempo_para_horas('10:15') == 10.25
+    assert converter_tempo_para_horas(2) == 2.0
+    assert converter_tempo_para_horas(float('nan')) == 0.0
+    assert converter_tempo_para_horas(None) == 0.0